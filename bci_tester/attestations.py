@@ -0,0 +1,367 @@
+"""Streaming verification of the build time attestations of the images.
+
+The attestations of an image are stored in the registry as the layers of the
+image ``sha256-{digest}.att``. Each layer is a DSSE envelope whose
+``payload`` is a base64 encoded in-toto statement, which contains e.g. a
+complete vulnerability report and can be several MB large.
+
+:py:func:`read_attestation` processes such an envelope while it is being
+downloaded: the payload is decoded in chunks and parsed by the incremental
+json parser :py:func:`iter_json_events`, only the values that the tests check
+are kept in an :py:class:`AttestationSummary`. The memory usage is thus
+independent of the size of the reports. :py:func:`get_attestations` reads the
+attestations of multiple images (e.g. of all architectures of an image)
+concurrently.
+
+:py:class:`PeakMemory` measures the memory allocated while reading them.
+
+"""
+
+import base64
+import codecs
+import itertools
+import json
+import re
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from bci_tester.registry import RegistryClient
+
+#: annotation of the attestation layers with the type of their predicate
+PREDICATE_TYPE_ANNOTATION = "org.open-build-service.intoto.predicatetype"
+
+#: a key of a json object or an index of a json array
+PathElement = Union[str, int]
+
+_TOKEN = re.compile(
+    r'[ \t\n\r]*(?:([{}\[\]:,])|"((?:[^"\\]|\\.)*)"'
+    r"|(-?[0-9][0-9.eE+-]*|true|false|null))"
+)
+
+# the contents of a string up to its closing quote
+_STRING_BODY = re.compile(r'(?:[^"\\]|\\.)*')
+
+_PAYLOAD_START = re.compile(rb'"payload"[ \t\n\r]*:[ \t\n\r]*"')
+
+# the labels of the image in the trivy and the NeuVector report
+_TRIVY_LABELS = ("result", "Metadata", "ImageConfig", "config", "Labels")
+_NEUVECTOR_LABELS = ("result", "report", "labels")
+
+
+def iter_json_events(
+    chunks: Iterable[str],
+) -> Iterator[Tuple[Tuple[PathElement, ...], str, Any]]:
+    """Parses the json document split into ``chunks`` incrementally and
+    yields a ``(path, event, value)`` tuple for each value in it.
+
+    ``path`` consists of the keys of the objects and the indexes of the
+    arrays leading to the value. ``event`` is ``start_map``, ``end_map``,
+    ``start_array`` or ``end_array`` (with ``value`` ``None``) for objects
+    and arrays, and ``scalar`` for all other values. Only the current string
+    or number token is kept in memory.
+
+    """
+    path: List[Any] = []
+    # "map" or "array" for each enclosing container
+    stack: List[str] = []
+    expect_key = False
+    buffer = ""
+    # the parts of a string token that continues in the next chunk, only the
+    # new chunks are scanned for its end instead of the whole token
+    string_parts: Optional[List[str]] = None
+    chunk_iter = iter(chunks)
+    exhausted = False
+
+    def handle(
+        punctuation: Optional[str],
+        string: Optional[str],
+        literal: Optional[str],
+    ) -> Iterator[Tuple[Tuple[PathElement, ...], str, Any]]:
+        nonlocal expect_key
+        if punctuation == "{" or punctuation == "[":
+            yield (
+                tuple(path),
+                "start_map" if punctuation == "{" else "start_array",
+                None,
+            )
+            stack.append("map" if punctuation == "{" else "array")
+            path.append(None if punctuation == "{" else 0)
+            expect_key = punctuation == "{"
+        elif punctuation == "}" or punctuation == "]":
+            stack.pop()
+            path.pop()
+            yield (
+                tuple(path),
+                "end_map" if punctuation == "}" else "end_array",
+                None,
+            )
+        elif punctuation == ",":
+            if stack[-1] == "array":
+                path[-1] += 1
+            else:
+                expect_key = True
+        elif punctuation == ":":
+            pass
+        else:
+            if string is not None:
+                value = json.loads(f'"{string}"') if "\\" in string else string
+            else:
+                value = json.loads(literal)
+            if expect_key:
+                path[-1] = value
+                expect_key = False
+            else:
+                yield tuple(path), "scalar", value
+
+    while True:
+        if string_parts is not None:
+            end = _STRING_BODY.match(buffer).end()
+            string_parts.append(buffer[:end])
+            # either empty, the closing quote or a trailing backslash
+            buffer = buffer[end:]
+            if buffer.startswith('"'):
+                yield from handle(None, "".join(string_parts), None)
+                string_parts = None
+                buffer = buffer[1:]
+
+        if string_parts is None:
+            pos = 0
+            while True:
+                match = _TOKEN.match(buffer, pos)
+                # a token at the end of the buffer might continue in the next
+                # chunk
+                if match is None or (
+                    match.end() == len(buffer)
+                    and match.group(3) is not None
+                    and not exhausted
+                ):
+                    break
+                pos = match.end()
+                yield from handle(*match.groups())
+
+            buffer = buffer[pos:]
+            rest = buffer.lstrip(" \t\n\r")
+            if rest.startswith('"') and not exhausted:
+                string_parts = []
+                buffer = rest[1:]
+                continue
+
+        if exhausted:
+            if string_parts is not None or buffer.strip() or stack:
+                raise ValueError(f"Invalid json near {buffer[:50]!r}")
+            return
+        try:
+            buffer += next(chunk_iter)
+        except StopIteration:
+            exhausted = True
+
+
+@dataclass
+class AttestationSummary:
+    """The values of an attestation that are verified by the tests."""
+
+    #: the type of the predicate (e.g. ``…/vuln/v1`` for vulnerability
+    #: reports)
+    predicate_type: Optional[str] = None
+
+    #: length of the base64 encoded payload
+    payload_length: int = 0
+
+    #: sha256 digests of the subjects of the statement
+    subject_digests: List[str] = field(default_factory=list)
+
+    #: the scan result in ``predicate.data`` (ClamAV)
+    data: Optional[str] = None
+
+    #: uri of the vulnerability scanner and of its database
+    scanner_uri: Optional[str] = None
+    scanner_db_uri: Optional[str] = None
+
+    #: the labels of the image according to the vulnerability report
+    labels: Optional[Dict[str, str]] = None
+
+    #: the ``Class`` of each result of a trivy report
+    result_classes: List[Optional[str]] = field(default_factory=list)
+
+    #: ids of the vulnerabilities by the index of the trivy result that
+    #: contains them
+    vulnerabilities: Dict[int, List[str]] = field(default_factory=dict)
+
+    #: the ``error_message`` of a NeuVector report
+    error_message: Optional[str] = None
+
+    #: ``level`` and ``description`` of the checks of a NeuVector report
+    checks: List[Dict[str, Any]] = field(default_factory=list)
+
+    def _add(self, path: Tuple[PathElement, ...], event: str, value) -> None:
+        if path == ("predicateType",) and self.predicate_type is None:
+            self.predicate_type = value
+        elif path[:1] == ("subject",) and path[2:] == ("digest", "sha256"):
+            self.subject_digests.append(value)
+        elif path == ("predicate", "data"):
+            self.data = value
+        elif path[:2] == ("predicate", "scanner"):
+            self._add_scanner(path[2:], event, value)
+
+    def _add_scanner(
+        self, path: Tuple[PathElement, ...], event: str, value
+    ) -> None:
+        if path == ("uri",):
+            self.scanner_uri = value
+        elif path == ("db", "uri"):
+            self.scanner_db_uri = value
+        elif path in (_TRIVY_LABELS, _NEUVECTOR_LABELS):
+            if event == "start_map":
+                self.labels = {}
+        elif path[:-1] in (_TRIVY_LABELS, _NEUVECTOR_LABELS):
+            if event == "scalar" and self.labels is not None:
+                self.labels[str(path[-1])] = value
+        elif path[:2] == ("result", "Results"):
+            if len(path) == 3 and event == "start_map":
+                self.result_classes.append(None)
+            elif path[3:] == ("Class",):
+                self.result_classes[-1] = value
+            elif path[3:] == ("Vulnerabilities",) and event == "start_array":
+                self.vulnerabilities[len(self.result_classes) - 1] = []
+            elif path[3:4] == ("Vulnerabilities",) and path[5:] == (
+                "VulnerabilityID",
+            ):
+                self.vulnerabilities[len(self.result_classes) - 1].append(
+                    value
+                )
+        elif path == ("result", "error_message"):
+            self.error_message = value
+        elif path[:3] == ("result", "report", "checks"):
+            if len(path) == 4 and event == "start_map":
+                self.checks.append({})
+            elif len(path) == 5 and event == "scalar":
+                self.checks[-1][str(path[4])] = value
+
+
+def read_attestation(
+    chunks: Iterable[bytes], predicate_type: Optional[str] = None
+) -> AttestationSummary:
+    """Reads the DSSE envelope split into ``chunks`` and returns the summary
+    of the statement in its payload. ``predicate_type`` overrides the
+    predicate type of the statement.
+
+    """
+    summary = AttestationSummary(predicate_type=predicate_type)
+
+    def iter_payload() -> Iterator[str]:
+        # yields the decoded payload, the envelope before the payload is tiny
+        buffer = b""
+        chunk_iter = iter(chunks)
+        for chunk in chunk_iter:
+            buffer += chunk
+            match = _PAYLOAD_START.search(buffer)
+            if match:
+                buffer = buffer[match.end() :]
+                break
+        else:
+            raise ValueError("The envelope has no payload")
+
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        encoded = b""
+        for chunk in itertools.chain((buffer,), chunk_iter):
+            end = chunk.find(b'"')
+            # json might escape the slashes in the base64 alphabet
+            encoded += (chunk if end < 0 else chunk[:end]).replace(b"\\", b"")
+            complete = len(encoded) - len(encoded) % 4
+            summary.payload_length += complete
+            yield decoder.decode(base64.b64decode(encoded[:complete]))
+            encoded = encoded[complete:]
+            if end >= 0:
+                break
+        else:
+            raise ValueError("The payload of the envelope is not terminated")
+        if encoded:
+            raise ValueError("The payload is not valid base64")
+        yield decoder.decode(b"", final=True)
+        # the remainder of the envelope (the signatures) is small, it is read
+        # and discarded so that the blob is completely downloaded & verified
+        for _ in chunk_iter:
+            pass
+
+    for path, event, value in iter_json_events(iter_payload()):
+        summary._add(path, event, value)  # pylint: disable=protected-access
+    return summary
+
+
+def get_attestations(
+    client: RegistryClient, repository: str, digests: Iterable[str]
+) -> Dict[str, List[AttestationSummary]]:
+    """Reads the attestations of the images ``digests`` in ``repository``
+    concurrently and returns them indexed by the image digest.
+
+    """
+
+    def read_all(digest: str) -> List[AttestationSummary]:
+        manifest = json.loads(
+            client.get_manifest(
+                repository, digest.replace("sha256:", "sha256-") + ".att"
+            )[1]
+        )
+        return [
+            read_attestation(
+                client.iter_blob(repository, layer["digest"]),
+                layer.get("annotations", {}).get(PREDICATE_TYPE_ANNOTATION),
+            )
+            for layer in manifest["layers"]
+        ]
+
+    unique = list(dict.fromkeys(digests))
+    with ThreadPoolExecutor(max_workers=client.max_workers) as executor:
+        return dict(zip(unique, executor.map(read_all, unique)))
+
+
+class PeakMemory:
+    """Context manager measuring the peak of the memory that is allocated
+    via :py:mod:`tracemalloc` while it is active. Unlike the peak RSS of the
+    process, it is not affected by anything that ran before.
+
+    If :py:mod:`tracemalloc` is already tracing (e.g. via ``-X
+    tracemalloc``), the traces are kept and only the peak is reset, which
+    requires Python 3.9. The peak is not measured on older versions.
+
+    """
+
+    def __init__(self) -> None:
+        #: the peak of the allocated memory in KiB, ``None`` if it could not
+        #: be measured
+        self.peak_kib: Optional[int] = None
+        self._started = False
+        self._measuring = False
+        self._baseline = 0
+
+    def __enter__(self) -> "PeakMemory":
+        self._started = not tracemalloc.is_tracing()
+        if self._started:
+            tracemalloc.start()
+        elif not hasattr(tracemalloc, "reset_peak"):
+            return self
+        else:
+            tracemalloc.reset_peak()
+        self._measuring = True
+        # the memory that was already traced when the measurement started
+        self._baseline = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if not self._measuring:
+            return
+        self.peak_kib = (
+            tracemalloc.get_traced_memory()[1] - self._baseline
+        ) // 1024
+        if self._started:
+            tracemalloc.stop()
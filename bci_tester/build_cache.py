@@ -0,0 +1,290 @@
+"""Content addressed cache of the derived container images built by the
+testsuite.
+
+Many :py:class:`~pytest_container.DerivedContainer` share the same
+:file:`Containerfile` and base image (e.g. all containers created by
+:py:func:`~bci_tester.data.create_BCI` when ``BCI_DEVEL_REPO`` is set), but
+differ in their launch settings. pytest-container builds each of them
+separately and every :command:`pytest-xdist` worker builds them again.
+
+:py:class:`CachedDerivedContainer` builds each distinct image only once per
+host and test run: the image is tagged with a hash of the base image id, the
+containerfile, the files that it copies from the build context and the build
+arguments and all other containers (also in other processes) with the same
+hash reuse it.
+
+The cached images are recorded in :file:`$BCI_CACHE_DIR/build-cache/`.
+:py:class:`BuildCachePruner` removes the tags of the images of the current
+test run once it finished and of all images that were not used for a week.
+
+"""
+
+import glob
+import hashlib
+import json
+import os
+import shlex
+import subprocess
+import tempfile
+import time
+import uuid
+from datetime import timedelta
+from pathlib import Path
+from subprocess import check_output
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+
+from pytest_container import DerivedContainer
+from pytest_container import OciRuntimeBase
+from pytest_container.container import Container
+
+from bci_tester.util import get_cache_dir
+from bci_tester.util import get_image_id
+
+#: Name of the local image repository in which the cached images are tagged
+BUILD_CACHE_REPOSITORY = "bci_tester_build_cache"
+
+# The cache must not be reused across test runs as the images contain a
+# snapshot of the repositories at the time of the build. All pytest-xdist
+# workers share the same test run id, without xdist we use a random one.
+_RUN_ID: str = os.getenv("PYTEST_XDIST_TESTRUNUID") or uuid.uuid4().hex
+
+#: cached images that were not used for this long are removed
+BUILD_CACHE_MAX_AGE = timedelta(days=7)
+
+
+def _iter_copy_sources(containerfile: str) -> Iterator[str]:
+    # the sources of all COPY and ADD instructions that are taken from the
+    # build context
+    for line in containerfile.replace("\\\n", " ").splitlines():
+        instruction, _, arguments = line.strip().partition(" ")
+        if instruction.upper() not in ("COPY", "ADD"):
+            continue
+        arguments = arguments.strip()
+        if arguments.startswith("["):
+            args = json.loads(arguments)
+        else:
+            args = shlex.split(arguments)
+        if any(arg.startswith("--from") for arg in args):
+            continue
+        sources = [arg for arg in args if not arg.startswith("--")][:-1]
+        for source in sources:
+            if "://" not in source and not source.startswith("git@"):
+                yield source
+
+
+def hash_build_context(containerfile: str, context: Path) -> str:
+    """Returns a hash of the names and contents of all files in ``context``
+    that the ``COPY`` and ``ADD`` instructions of ``containerfile`` use.
+
+    """
+    digest = hashlib.sha256()
+    for source in _iter_copy_sources(containerfile):
+        digest.update(f"{source}\0".encode())
+        for match in sorted(glob.glob(str(context / source))):
+            path = Path(match)
+            files = (
+                sorted(p for p in path.rglob("*") if p.is_file())
+                if path.is_dir()
+                else [path]
+            )
+            for file in files:
+                digest.update(f"{file.relative_to(context)}\0".encode())
+                digest.update(hashlib.sha256(file.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+def _index_path() -> Path:
+    return get_cache_dir("build-cache") / "images.json"
+
+
+def _update_index(update) -> Dict[str, Dict]:
+    # applies update() to the index of the cached images under a file lock
+    # pylint: disable=import-outside-toplevel
+    from filelock import FileLock
+
+    path = _index_path()
+    with FileLock(f"{path}.lock"):
+        try:
+            index = json.loads(path.read_text())
+        except (OSError, ValueError):
+            index = {}
+        update(index)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(index, indent=2, sort_keys=True))
+        os.replace(tmp_path, path)
+    return index
+
+
+def _record_use(cache_tag: str, scope: str) -> None:
+    def update(index: Dict[str, Dict]) -> None:
+        index[cache_tag] = {"scope": scope, "last_used": time.time()}
+
+    _update_index(update)
+
+
+def prune_build_cache(
+    runner_binary: str,
+    finished_run: Optional[str] = None,
+    max_age: timedelta = BUILD_CACHE_MAX_AGE,
+) -> List[str]:
+    """Removes the tags of the cached images that belong to the test run
+    ``finished_run`` or that were not used within ``max_age`` and returns
+    them. Images that are still tagged otherwise or used by containers are
+    kept by the runtime.
+
+    """
+    removed: List[str] = []
+
+    def update(index: Dict[str, Dict]) -> None:
+        deadline = time.time() - max_age.total_seconds()
+        for cache_tag, entry in list(index.items()):
+            if (
+                entry.get("scope") == finished_run
+                or entry.get("last_used", 0) < deadline
+            ):
+                subprocess.run(
+                    [runner_binary, "rmi", cache_tag],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    check=False,
+                )
+                del index[cache_tag]
+                removed.append(cache_tag)
+
+    _update_index(update)
+    return removed
+
+
+class CachedDerivedContainer(DerivedContainer):
+    """A :py:class:`~pytest_container.DerivedContainer` whose image is only
+    built once per host and test run, even if multiple containers with
+    different launch settings or multiple processes use it.
+
+    """
+
+    def build_cache_scope(self) -> str:
+        """Returns the identifier of the period during which the cached image
+        may be reused, by default the current test run.
+
+        """
+        return _RUN_ID
+
+    def build_cache_key(
+        self,
+        base_image_id: str,
+        extra_build_args: Optional[List[str]] = None,
+        rootdir: Optional[Path] = None,
+    ) -> str:
+        """Returns the hash of all inputs that influence the built image,
+        including the files copied from the build context ``rootdir``.
+
+        """
+        digest = hashlib.sha256()
+        for value in (
+            self.build_cache_scope(),
+            base_image_id,
+            self.containerfile,
+            self.image_format,
+            extra_build_args or [],
+            hash_build_context(self.containerfile, rootdir)
+            if rootdir
+            else None,
+        ):
+            digest.update(f"{value!r}\0".encode())
+        return digest.hexdigest()
+
+    def finalize_containerfile(
+        self, container_runtime: OciRuntimeBase, base_image_id: str
+    ) -> None:
+        """Called with the id of the prepared base image before the cache key
+        is computed, subclasses can complete the :py:attr:`containerfile`
+        based on the base image here.
+
+        """
+
+    def prepare_container(
+        self,
+        container_runtime: OciRuntimeBase,
+        rootdir: Path,
+        extra_build_args: Optional[List[str]] = None,
+    ) -> None:
+        #: whether the image was found in the cache instead of being built
+        self.build_cache_hit = False
+        if not self.containerfile:
+            super().prepare_container(
+                container_runtime, rootdir, extra_build_args
+            )
+            return
+
+        # pull/build the base image to obtain its id, like
+        # DerivedContainer.prepare_container does
+        base = self.base
+        if isinstance(base, str):
+            base = Container(url=base)
+        base.prepare_container(container_runtime, rootdir, extra_build_args)
+        base_image_id = get_image_id(
+            container_runtime, base.url or base._build_tag
+        )
+        assert base_image_id, f"base image {base} does not exist"
+        self.finalize_containerfile(container_runtime, base_image_id)
+
+        cache_tag = f"{BUILD_CACHE_REPOSITORY}:" + self.build_cache_key(
+            base_image_id, extra_build_args, rootdir
+        )
+        _record_use(cache_tag, self.build_cache_scope())
+
+        # pylint: disable=import-outside-toplevel
+        from filelock import FileLock
+
+        with FileLock(str(Path(tempfile.gettempdir()) / f"{cache_tag}.lock")):
+            image_id = get_image_id(container_runtime, cache_tag)
+            if image_id is None:
+                super().prepare_container(
+                    container_runtime, rootdir, extra_build_args
+                )
+                self._tag(container_runtime, self.container_id, cache_tag)
+                return
+
+        self.container_id = image_id
+        self.build_cache_hit = True
+        for tag in [self._build_tag] + self.add_build_tags:
+            self._tag(container_runtime, image_id, tag)
+
+    @staticmethod
+    def _tag(
+        container_runtime: OciRuntimeBase, image_id: str, tag: str
+    ) -> None:
+        check_output([container_runtime.runner_binary, "tag", image_id, tag])
+
+
+class BuildCachePruner:
+    """pytest plugin removing the cached images of the test run at its end,
+    as well as all cached images that were not used recently (see
+    :py:func:`prune_build_cache`). It must only be registered in the
+    :command:`pytest-xdist` controller (or without xdist).
+
+    """
+
+    def __init__(self, config) -> None:
+        self.config = config
+        # the workers derive the run id from the --testrunuid of the
+        # controller
+        if getattr(config.option, "testrunuid", _RUN_ID) is None:
+            config.option.testrunuid = _RUN_ID
+        self.run_id = getattr(config.option, "testrunuid", None) or _RUN_ID
+
+    def pytest_sessionfinish(self, session) -> None:
+        if not _index_path().exists():
+            return
+        # pylint: disable=import-outside-toplevel
+        from pytest_container.runtime import get_selected_runtime
+
+        try:
+            runner_binary = get_selected_runtime().runner_binary
+        except ValueError:
+            # no container runtime, so there are no images to remove
+            return
+        prune_build_cache(runner_binary, self.run_id)
@@ -0,0 +1,167 @@
+"""Lazily evaluated registry of the container definitions.
+
+:py:mod:`bci_tester.data` registers the factories creating each group of
+containers (e.g. ``GOLANG_CONTAINERS``) in a :py:class:`LazyCatalog`. A group
+is only constructed once it is accessed for the first time and the result is
+memoized for the lifetime of the process. Thereby, a test module only pays for
+the container definitions that it actually imports.
+
+Running this module as a script reports the import time and the number of
+constructed :py:class:`~pytest_container.DerivedContainer` objects when only
+the given groups are materialized versus when all groups are materialized (as
+it was done before the catalog was lazy):
+
+.. code-block:: shell-session
+
+   $ python -m bci_tester.catalog NANO_CONTAINER OS_VERSION
+
+"""
+
+import functools
+import threading
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import MutableMapping
+from typing import Optional
+from typing import TypeVar
+
+_FactoryT = TypeVar("_FactoryT", bound=Callable[[], Any])
+
+
+class LazyCatalog:
+    """Registry mapping the name of a container group to a factory function
+    that creates it. Each factory is invoked at most once, its result is stored
+    and optionally published into ``namespace`` (usually the ``globals()`` of
+    the module defining the groups), so that subsequent lookups are plain
+    attribute accesses.
+
+    """
+
+    def __init__(
+        self, namespace: Optional[MutableMapping[str, Any]] = None
+    ) -> None:
+        self._namespace = namespace
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._values: Dict[str, Any] = {}
+        self._in_progress: List[str] = []
+        self._lock = threading.RLock()
+
+    def register(self, name: str) -> Callable[[_FactoryT], _FactoryT]:
+        """Decorator registering the decorated function as the factory of the
+        group ``name``.
+
+        """
+
+        def decorator(factory: _FactoryT) -> _FactoryT:
+            self._add(name, factory)
+            return factory
+
+        return decorator
+
+    def register_call(
+        self, name: str, func: Callable[..., Any], *args, **kwargs
+    ) -> None:
+        """Register ``func(*args, **kwargs)`` as the factory of ``name``."""
+        self._add(name, functools.partial(func, *args, **kwargs))
+
+    def _add(self, name: str, factory: Callable[[], Any]) -> None:
+        if name in self._factories:
+            raise ValueError(f"{name} is already registered in the catalog")
+        self._factories[name] = factory
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._factories
+
+    def __getitem__(self, name: str) -> Any:
+        with self._lock:
+            if name in self._values:
+                return self._values[name]
+
+            if name not in self._factories:
+                raise KeyError(name)
+
+            if name in self._in_progress:
+                raise RuntimeError(
+                    "Cyclic dependency in the container catalog: "
+                    + " -> ".join(self._in_progress + [name])
+                )
+
+            self._in_progress.append(name)
+            try:
+                value = self._factories[name]()
+            finally:
+                self._in_progress.pop()
+
+            self._values[name] = value
+            if self._namespace is not None:
+                self._namespace[name] = value
+            return value
+
+    def names(self) -> List[str]:
+        """Returns the names of all registered groups."""
+        return list(self._factories)
+
+    def is_materialized(self, name: str) -> bool:
+        """Returns whether the group ``name`` has already been constructed."""
+        return name in self._values
+
+    def materialized(self) -> List[str]:
+        """Returns the names of all groups that have been constructed so far."""
+        return list(self._values)
+
+    def materialize_all(self) -> Dict[str, Any]:
+        """Constructs every registered group and returns all of them."""
+        return {name: self[name] for name in self._factories}
+
+
+def _count_derived_containers() -> int:
+    # pylint: disable=import-outside-toplevel
+    import gc
+
+    from pytest_container import DerivedContainer
+
+    return sum(1 for o in gc.get_objects() if isinstance(o, DerivedContainer))
+
+
+def _benchmark(names: List[str]) -> None:
+    # pylint: disable=import-outside-toplevel
+    import time
+
+    baseline = _count_derived_containers()
+
+    start = time.perf_counter()
+    from bci_tester import data
+
+    import_time = time.perf_counter() - start
+
+    catalog: LazyCatalog = getattr(data, "_CATALOG")
+
+    start = time.perf_counter()
+    for name in names:
+        getattr(data, name)
+    lazy_time = time.perf_counter() - start
+    lazy_groups = len(catalog.materialized())
+    lazy_objects = _count_derived_containers() - baseline
+
+    start = time.perf_counter()
+    catalog.materialize_all()
+    eager_time = time.perf_counter() - start + lazy_time
+    eager_objects = _count_derived_containers() - baseline
+
+    print(f"import of bci_tester.data: {import_time * 1000:.1f} ms")
+    print(
+        f"lazy  ({', '.join(names) or 'nothing'}): {lazy_time * 1000:.1f} ms, "
+        f"{lazy_groups} groups, {lazy_objects} DerivedContainer objects"
+    )
+    print(
+        f"eager (all groups): {eager_time * 1000:.1f} ms, "
+        f"{len(catalog.names())} groups, {eager_objects} DerivedContainer objects"
+    )
+
+
+if __name__ == "__main__":
+    import sys
+
+    _benchmark(sys.argv[1:])
@@ -0,0 +1,238 @@
+"""Pool of pre-started containers for the ``container_per_test`` fixture.
+
+Every test using ``container_per_test`` launches a fresh container and
+removes it afterwards. With ``--container-pool N``, :py:class:`ContainerPool`
+starts the containers of the next ``N`` tests in the background while the
+current test is running and removes the used containers in the background as
+well. Each test still gets its own container, but the startup & teardown
+latency is hidden. The pool is only registered for ``N > 0``, it then replaces
+the ``container_per_test`` fixture of pytest_container with
+:py:meth:`ContainerPool.container_per_test`.
+
+The upcoming tests are taken from the collected items, with
+:command:`pytest-xdist` only the next test of the worker is known (the
+remaining tests are not yet assigned to it).
+
+"""
+
+import logging
+import os
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Union
+
+import pytest
+from pytest_container import DerivedContainer
+from pytest_container import OciRuntimeBase
+from pytest_container import container_and_marks_from_pytest_param
+from pytest_container.container import Container
+from pytest_container.container import ContainerData
+from pytest_container.container import ContainerLauncher
+from pytest_container.plugin import _log_container_logs
+
+_LOGGER = logging.getLogger(__name__)
+
+#: the fixture whose containers are pooled
+POOLED_FIXTURE = "container_per_test"
+
+_WORKEROUTPUT_KEY = "bci_container_pool"
+
+
+def _container_key(container: Union[Container, DerivedContainer]) -> str:
+    # a hash of all attributes of the container
+    return container.filelock_filename
+
+
+class ContainerPool:
+    """pytest plugin launching the containers of ``container_per_test`` and
+    keeping the containers of the next ``size`` tests ready.
+
+    """
+
+    def __init__(self, config, size: int = 0) -> None:
+        self.config = config
+        self.size = size
+        #: number of containers that were started ahead of their test
+        self.hits = 0
+        #: number of containers that had to be started on demand
+        self.misses = 0
+        self._spares: Dict[str, Deque["Future[ContainerLauncher]"]] = {}
+        self._teardowns: List["Future[None]"] = []
+        self._upcoming: List[Union[Container, DerivedContainer]] = []
+        self._positions: Dict[str, int] = {}
+        self._container_runtime: Optional[OciRuntimeBase] = None
+        self._executor: Optional[ThreadPoolExecutor] = (
+            ThreadPoolExecutor(max_workers=2 * size) if size > 0 else None
+        )
+
+    def _launch(
+        self,
+        container: Union[Container, DerivedContainer],
+        container_runtime: OciRuntimeBase,
+    ) -> ContainerLauncher:
+        launcher = ContainerLauncher.from_pytestconfig(
+            container=container,
+            container_runtime=container_runtime,
+            pytestconfig=self.config,
+        )
+        try:
+            launcher.launch_container()
+        except BaseException:
+            self._destroy(launcher)
+            raise
+        return launcher
+
+    def _destroy(self, launcher: ContainerLauncher) -> None:
+        # the teardown of pytest-container's fixture: the launcher is only
+        # used as a context manager to remove the container, after its logs
+        # were saved (also if it failed to launch)
+        # pylint: disable=protected-access
+        try:
+            if launcher._container_id:
+                _log_container_logs(
+                    launcher._container_id, launcher.container_runtime
+                )
+        finally:
+            launcher.__exit__(None, None, None)
+
+    @pytest.fixture(scope="function")
+    def container_per_test(
+        self, request, container_runtime: OciRuntimeBase
+    ) -> Iterator[ContainerData]:
+        """This fixture replaces the ``container_per_test`` fixture of
+        pytest_container: it launches a new container for each test function,
+        but the container is started while the previous test is still
+        running.
+        """
+        container, _ = container_and_marks_from_pytest_param(request.param)
+        launcher = self.acquire(container, container_runtime)
+        try:
+            yield launcher.container_data
+        finally:
+            self.release(launcher)
+
+    def pytest_collection_finish(self, session) -> None:
+        self._positions = {
+            item.nodeid: pos for pos, item in enumerate(session.items)
+        }
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_protocol(self, item, nextitem) -> None:
+        if self._executor is None:
+            return
+        if os.getenv("PYTEST_XDIST_WORKER") or item.nodeid not in (
+            self._positions
+        ):
+            upcoming = [nextitem] if nextitem is not None else []
+        else:
+            pos = self._positions[item.nodeid]
+            upcoming = item.session.items[pos + 1 : pos + 1 + self.size]
+
+        self._upcoming = []
+        for upcoming_item in [item, *upcoming]:
+            callspec = getattr(upcoming_item, "callspec", None)
+            if callspec is not None and POOLED_FIXTURE in callspec.params:
+                container, _ = container_and_marks_from_pytest_param(
+                    callspec.params[POOLED_FIXTURE]
+                )
+                # singleton containers hold a lock until they are removed
+                if not container.singleton:
+                    self._upcoming.append(container)
+
+        # the runtime is only known once the first test requested it
+        if self._container_runtime is not None:
+            self._prestart()
+
+    def _prestart(self) -> None:
+        # starts the containers of the current and the upcoming tests that
+        # are not running yet
+        assert self._executor and self._container_runtime
+        wanted: Dict[str, int] = {}
+        for container in self._upcoming:
+            key = _container_key(container)
+            wanted[key] = wanted.get(key, 0) + 1
+            spares = self._spares.setdefault(key, deque())
+            if len(spares) < wanted[key]:
+                spares.append(
+                    self._executor.submit(
+                        self._launch, container, self._container_runtime
+                    )
+                )
+
+    def acquire(
+        self,
+        container: Union[Container, DerivedContainer],
+        container_runtime: OciRuntimeBase,
+    ) -> ContainerLauncher:
+        """Returns a launcher with the running ``container``, started ahead
+        if possible. It has to be passed to :py:meth:`release` afterwards.
+
+        """
+        key = _container_key(container)
+        if self._executor is None or container.singleton:
+            self.misses += 1
+            return self._launch(container, container_runtime)
+
+        if self._spares.get(key):
+            self.hits += 1
+        else:
+            self.misses += 1
+        self._container_runtime = container_runtime
+        self._prestart()
+        spares = self._spares.get(key)
+        if not spares:
+            return self._launch(container, container_runtime)
+        return spares.popleft().result()
+
+    def release(self, launcher: ContainerLauncher) -> None:
+        """Removes the container of ``launcher`` (in the background)."""
+        if self._executor is None:
+            self._destroy(launcher)
+        else:
+            self._teardowns.append(
+                self._executor.submit(self._destroy, launcher)
+            )
+
+    def pytest_sessionfinish(self, session) -> None:
+        workeroutput = getattr(session.config, "workeroutput", None)
+        if workeroutput is not None:
+            workeroutput[_WORKEROUTPUT_KEY] = (self.hits, self.misses)
+        if self._executor is None:
+            return
+        # remove the spares of tests that did not use them
+        for spares in self._spares.values():
+            for spare in spares:
+                try:
+                    self.release(spare.result())
+                except Exception as exc:  # pylint: disable=broad-except
+                    _LOGGER.warning("Pre-started container failed: %s", exc)
+        self._spares = {}
+        for teardown in self._teardowns:
+            try:
+                teardown.result()
+            except Exception as exc:  # pylint: disable=broad-except
+                _LOGGER.warning("Removing a container failed: %s", exc)
+        self._teardowns = []
+        self._executor.shutdown()
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error) -> None:
+        hits, misses = getattr(node, "workeroutput", {}).get(
+            _WORKEROUTPUT_KEY, (0, 0)
+        )
+        self.hits += hits
+        self.misses += misses
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        if self.size > 0 and (self.hits or self.misses):
+            terminalreporter.write_sep("-", "container pool")
+            terminalreporter.write_line(
+                f"{self.hits} of {self.hits + self.misses} per test "
+                "containers were started ahead of their test"
+            )
@@ -2,11 +2,14 @@
 
 import enum
 import os
+import sys
 from datetime import timedelta
 from itertools import chain
 from itertools import product
 from pathlib import Path
+from typing import Any
 from typing import Iterable
+from typing import List
 from typing import Optional
 from typing import Sequence
 from typing import Tuple
@@ -18,6 +21,9 @@ from pytest_container.container import container_and_marks_from_pytest_param
 from pytest_container.inspect import NetworkProtocol
 from pytest_container.runtime import LOCALHOST
 
+from bci_tester.build_cache import CachedDerivedContainer
+from bci_tester.catalog import LazyCatalog
+
 try:
     from typing import Literal
 except ImportError:
@@ -273,6 +279,8 @@ def create_container_version_mark(
 #: URL to the SLE_BCI repository
 BCI_DEVEL_REPO = os.getenv("BCI_DEVEL_REPO")
 
+# the repository in the images is only replaced if it was set explicitly
+_replace_bci_repo = BCI_DEVEL_REPO is not None
 
 if BCI_DEVEL_REPO is None:
     if OS_VERSION == "tumbleweed":
@@ -288,8 +296,20 @@ if BCI_DEVEL_REPO is None:
             BCI_DEVEL_REPO = f"https://{CDN_PREFIX}.suse.com/SUSE/Products/SLE-BCI/{OS_MAJOR_VERSION}.{OS_SP_VERSION}/{LOCALHOST.system_info.arch}/product/"
         else:
             BCI_DEVEL_REPO = f"https://{CDN_PREFIX}.suse.com/SUSE/Products/SLE-BCI/{OS_MAJOR_VERSION}-SP{OS_SP_VERSION}/{LOCALHOST.system_info.arch}/product/"
-    _bci_replace_repo_containerfile = ""
-else:
+
+#: URL of the SLE_BCI repository on the network, the caching proxy
+#: (:py:mod:`bci_tester.repo_proxy`) forwards requests to it
+BCI_UPSTREAM_REPO = BCI_DEVEL_REPO
+
+#: URL of the caching proxy of the SLE_BCI repository, it replaces the
+#: repository in the images if set
+BCI_REPO_PROXY = os.getenv("BCI_REPO_PROXY")
+
+if BCI_REPO_PROXY:
+    BCI_DEVEL_REPO = BCI_REPO_PROXY
+    _replace_bci_repo = True
+
+if _replace_bci_repo:
     BCI_REPO_PATH = f"/etc/zypp/repos.d/{BCI_REPO_NAME}.repo"
     bci_repo_replace = "${line/baseurl*/baseurl = " + BCI_DEVEL_REPO + "}"
     _bci_replace_repo_containerfile = f"""RUN if [ -e {BCI_REPO_PATH} ]; then \\
@@ -298,6 +318,8 @@ else:
         done < {BCI_REPO_PATH}; \\
         mv {BCI_REPO_PATH}.tmp {BCI_REPO_PATH}; \\
     fi"""
+else:
+    _bci_replace_repo_containerfile = ""
 
 assert BCI_DEVEL_REPO, "BCI_DEVEL_REPO must be set at this point"
 
@@ -342,7 +364,7 @@ def create_BCI(
     container_user: Optional[str] = None,
     **kwargs,
 ) -> ParameterSet:
-    """Creates a DerivedContainer wrapped in a pytest.param for the BCI with the
+    """Creates a CachedDerivedContainer wrapped in a pytest.param for the BCI with the
     given ``build_tag``.
 
     Args:
@@ -458,7 +480,7 @@ def create_BCI(
         )
 
     return pytest.param(
-        DerivedContainer(
+        CachedDerivedContainer(
             base=baseurl,
             containerfile=containerfile,
             **kwargs,
@@ -468,409 +490,493 @@ def create_BCI(
     )
 
 
-KIWI_CONTAINERS = [
-    create_BCI(build_tag=f"bci/kiwi:{tag}", available_versions=(ver,))
-    for ver, tag in (
-        ("16.0", "10.2"),
-        ("tumbleweed", "latest"),
-    )
-]
+#: Registry of all container definitions of this module. The containers are
+#: only created once they are accessed via this module's
+#: :py:func:`__getattr__` and are then cached for the rest of the process.
+_CATALOG = LazyCatalog(globals())
 
-BASE_FIPS_CONTAINERS = []
-LTSS_BASE_CONTAINERS = []
-LTSS_BASE_FIPS_CONTAINERS = []
 
-if OS_VERSION == "tumbleweed":
-    BASE_CONTAINER = create_BCI(
-        build_tag="tumbleweed:latest",
-        image_type="kiwi",
-        bci_type=ImageType.OS,
-    )
-    BASE_FIPS_CONTAINERS.append(
-        create_BCI(
-            build_tag=f"{BCI_CONTAINER_PREFIX}/bci-base-fips:{OS_CONTAINER_TAG}",
+@_CATALOG.register("KIWI_CONTAINERS")
+def _kiwi_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(build_tag=f"bci/kiwi:{tag}", available_versions=(ver,))
+        for ver, tag in (
+            ("16.0", "10.2"),
+            ("tumbleweed", "latest"),
+        )
+    ]
+
+
+@_CATALOG.register("BASE_CONTAINER")
+def _base_container() -> ParameterSet:
+    if OS_VERSION == "tumbleweed":
+        return create_BCI(
+            build_tag="tumbleweed:latest",
+            image_type="kiwi",
             bci_type=ImageType.OS,
-            available_versions=["tumbleweed"],
         )
-    )
-else:
-    BASE_CONTAINER = create_BCI(
+    return create_BCI(
         build_tag=f"{BCI_CONTAINER_PREFIX}/bci-base:{OS_CONTAINER_TAG}",
         image_type="kiwi",
         bci_type=ImageType.OS,
     )
-    if TARGET not in ("dso",):
-        BASE_FIPS_CONTAINERS.append(
+
+
+@_CATALOG.register("BASE_FIPS_CONTAINERS")
+def _base_fips_containers() -> List[ParameterSet]:
+    if OS_VERSION == "tumbleweed":
+        return [
             create_BCI(
                 build_tag=f"{BCI_CONTAINER_PREFIX}/bci-base-fips:{OS_CONTAINER_TAG}",
                 bci_type=ImageType.OS,
-                available_versions=[
-                    ver
-                    for ver in _DEFAULT_BASE_OS_VERSIONS
-                    if ver not in ("15.5",)
-                ],
+                available_versions=["tumbleweed"],
             )
+        ]
+    if TARGET in ("dso",):
+        return []
+    return [
+        create_BCI(
+            build_tag=f"{BCI_CONTAINER_PREFIX}/bci-base-fips:{OS_CONTAINER_TAG}",
+            bci_type=ImageType.OS,
+            available_versions=[
+                ver
+                for ver in _DEFAULT_BASE_OS_VERSIONS
+                if ver not in ("15.5",)
+            ],
         )
-    if TARGET in ("ibs", "ibs-cr", "ibs-released"):
-        LTSS_BASE_CONTAINERS.extend(
-            create_BCI(
-                build_tag=f"{APP_CONTAINER_PREFIX}/ltss/sle{sp}/bci-base:{OS_CONTAINER_TAG}",
-                available_versions=[sp],
-                image_type="kiwi",
-                extra_marks=[pytest.mark.__getattr__(f"bci-base_{sp}-ltss")],
-                bci_type=ImageType.OS_LTSS,
-            )
-            for sp in ("15.4", "15.5", "15.6")
+    ]
+
+
+@_CATALOG.register("LTSS_BASE_CONTAINERS")
+def _ltss_base_containers() -> List[ParameterSet]:
+    if OS_VERSION == "tumbleweed" or TARGET not in (
+        "ibs",
+        "ibs-cr",
+        "ibs-released",
+    ):
+        return []
+    return [
+        create_BCI(
+            build_tag=f"{APP_CONTAINER_PREFIX}/ltss/sle{sp}/bci-base:{OS_CONTAINER_TAG}",
+            available_versions=[sp],
+            image_type="kiwi",
+            extra_marks=[pytest.mark.__getattr__(f"bci-base_{sp}-ltss")],
+            bci_type=ImageType.OS_LTSS,
         )
-        LTSS_BASE_FIPS_CONTAINERS.extend(
-            create_BCI(
-                build_tag=f"{APP_CONTAINER_PREFIX}/ltss/sle{sp}/bci-base-fips:{OS_CONTAINER_TAG}",
-                available_versions=[sp],
-                bci_type=ImageType.OS_LTSS,
-            )
-            for sp in ("15.4", "15.6")
+        for sp in ("15.4", "15.5", "15.6")
+    ]
+
+
+@_CATALOG.register("LTSS_BASE_FIPS_CONTAINERS")
+def _ltss_base_fips_containers() -> List[ParameterSet]:
+    if OS_VERSION == "tumbleweed" or TARGET not in (
+        "ibs",
+        "ibs-cr",
+        "ibs-released",
+    ):
+        return []
+    return [
+        create_BCI(
+            build_tag=f"{APP_CONTAINER_PREFIX}/ltss/sle{sp}/bci-base-fips:{OS_CONTAINER_TAG}",
+            available_versions=[sp],
+            bci_type=ImageType.OS_LTSS,
         )
+        for sp in ("15.4", "15.6")
+    ]
+
 
-MINIMAL_CONTAINER = create_BCI(
+_CATALOG.register_call(
+    "MINIMAL_CONTAINER",
+    create_BCI,
     build_tag=f"{BCI_CONTAINER_PREFIX}/bci-minimal:{OS_CONTAINER_TAG}",
     image_type="kiwi",
     bci_type=ImageType.OS,
 )
-MICRO_CONTAINER = create_BCI(
+_CATALOG.register_call(
+    "MICRO_CONTAINER",
+    create_BCI,
     build_tag=f"{BCI_CONTAINER_PREFIX}/bci-micro:{OS_CONTAINER_TAG}",
     bci_type=ImageType.OS,
 )
-MICRO_FIPS_CONTAINER = create_BCI(
+_CATALOG.register_call(
+    "MICRO_FIPS_CONTAINER",
+    create_BCI,
     build_tag=f"{BCI_CONTAINER_PREFIX}/bci-micro-fips:{OS_CONTAINER_TAG}",
     bci_type=ImageType.OS,
 )
 
-NANO_CONTAINER = create_BCI(
+_CATALOG.register_call(
+    "NANO_CONTAINER",
+    create_BCI,
     build_tag=f"{BCI_CONTAINER_PREFIX}/bci-nano:{OS_CONTAINER_TAG}",
     bci_type=ImageType.OS,
     custom_entry_point="/usr/bin/pause",
 )
-BUSYBOX_CONTAINER = create_BCI(
+_CATALOG.register_call(
+    "BUSYBOX_CONTAINER",
+    create_BCI,
     build_tag=f"{BCI_CONTAINER_PREFIX}/bci-busybox:{OS_CONTAINER_TAG}",
     custom_entry_point="/bin/sh",
     bci_type=ImageType.OS,
 )
 
+
 # The very last container in this list needs to be available for all
 # tested OSes
-GOLANG_CONTAINERS = (
-    [
-        create_BCI(
-            build_tag=f"{BCI_CONTAINER_PREFIX}/golang:{golang_version}",
-            extra_marks=[pytest.mark.__getattr__(f"golang_{stability}")],
-            available_versions=[*_DEFAULT_NONBASE_SLE_VERSIONS, "16.1"],
-        )
-        for golang_version, stability in (
-            ("oldstable-openssl", "oldstable"),
-            ("stable-openssl", "stable"),
-        )
-    ]
-    + [
-        create_BCI(
-            build_tag=f"{BCI_CONTAINER_PREFIX}/golang:{golang_version}",
-            extra_marks=[
-                pytest.mark.__getattr__(f"golang_{golang_version}"),
-                pytest.mark.skip(
-                    reason="There is no unstable golang at the moment"
-                ),
-            ],
-            available_versions=["tumbleweed"],
-        )
-        for golang_version in ("unstable",)
-    ]
-    + [
-        create_BCI(
-            build_tag=f"{BCI_CONTAINER_PREFIX}/golang:{stability}",
-        )
-        for stability in ("oldstable", "stable")
-    ]
-)
+@_CATALOG.register("GOLANG_CONTAINERS")
+def _golang_containers() -> List[ParameterSet]:
+    return (
+        [
+            create_BCI(
+                build_tag=f"{BCI_CONTAINER_PREFIX}/golang:{golang_version}",
+                extra_marks=[pytest.mark.__getattr__(f"golang_{stability}")],
+                available_versions=[*_DEFAULT_NONBASE_SLE_VERSIONS, "16.1"],
+            )
+            for golang_version, stability in (
+                ("oldstable-openssl", "oldstable"),
+                ("stable-openssl", "stable"),
+            )
+        ]
+        + [
+            create_BCI(
+                build_tag=f"{BCI_CONTAINER_PREFIX}/golang:{golang_version}",
+                extra_marks=[
+                    pytest.mark.__getattr__(f"golang_{golang_version}"),
+                    pytest.mark.skip(
+                        reason="There is no unstable golang at the moment"
+                    ),
+                ],
+                available_versions=["tumbleweed"],
+            )
+            for golang_version in ("unstable",)
+        ]
+        + [
+            create_BCI(
+                build_tag=f"{BCI_CONTAINER_PREFIX}/golang:{stability}",
+            )
+            for stability in ("oldstable", "stable")
+        ]
+    )
 
-OPENJDK_11_CONTAINER = create_BCI(
-    build_tag="bci/openjdk:11", available_versions=["tumbleweed"]
+
+_CATALOG.register_call(
+    "OPENJDK_11_CONTAINER",
+    create_BCI,
+    build_tag="bci/openjdk:11",
+    available_versions=["tumbleweed"],
 )
-OPENJDK_DEVEL_11_CONTAINER = create_BCI(
+_CATALOG.register_call(
+    "OPENJDK_DEVEL_11_CONTAINER",
+    create_BCI,
     build_tag="bci/openjdk-devel:11",
     available_versions=["tumbleweed"],
     custom_entry_point="/bin/sh",
 )
-OPENJDK_17_CONTAINER = create_BCI(
+_CATALOG.register_call(
+    "OPENJDK_17_CONTAINER",
+    create_BCI,
     build_tag="bci/openjdk:17",
     available_versions=_DEFAULT_NONBASE_OS_VERSIONS,
 )
-OPENJDK_DEVEL_17_CONTAINER = create_BCI(
+_CATALOG.register_call(
+    "OPENJDK_DEVEL_17_CONTAINER",
+    create_BCI,
     build_tag="bci/openjdk-devel:17",
     available_versions=_DEFAULT_NONBASE_OS_VERSIONS,
     custom_entry_point="/bin/sh",
 )
-OPENJDK_21_CONTAINER = create_BCI(
-    build_tag="bci/openjdk:21", available_versions=_DEFAULT_NONBASE_OS_VERSIONS
+_CATALOG.register_call(
+    "OPENJDK_21_CONTAINER",
+    create_BCI,
+    build_tag="bci/openjdk:21",
+    available_versions=_DEFAULT_NONBASE_OS_VERSIONS,
 )
-OPENJDK_DEVEL_21_CONTAINER = create_BCI(
+_CATALOG.register_call(
+    "OPENJDK_DEVEL_21_CONTAINER",
+    create_BCI,
     build_tag="bci/openjdk-devel:21",
     available_versions=_DEFAULT_NONBASE_OS_VERSIONS,
     custom_entry_point="/bin/sh",
 )
-OPENJDK_25_CONTAINER = create_BCI(
+_CATALOG.register_call(
+    "OPENJDK_25_CONTAINER",
+    create_BCI,
     build_tag="bci/openjdk:25",
     available_versions=_DEFAULT_NONBASE_OS_VERSIONS,
 )
-OPENJDK_DEVEL_25_CONTAINER = create_BCI(
+_CATALOG.register_call(
+    "OPENJDK_DEVEL_25_CONTAINER",
+    create_BCI,
     build_tag="bci/openjdk-devel:25",
     available_versions=_DEFAULT_NONBASE_OS_VERSIONS,
 )
 
 
-OPENJDK_CONTAINERS = [
-    OPENJDK_11_CONTAINER,
-    OPENJDK_17_CONTAINER,
-    OPENJDK_21_CONTAINER,
-    OPENJDK_25_CONTAINER,
-]
-
-OPENJDK_DEVEL_CONTAINERS = [
-    OPENJDK_DEVEL_11_CONTAINER,
-    OPENJDK_DEVEL_17_CONTAINER,
-    OPENJDK_DEVEL_21_CONTAINER,
-    OPENJDK_DEVEL_25_CONTAINER,
-]
-
-NODEJS_BASE_CONTAINERS = [
-    create_BCI(
-        build_tag=f"bci/nodejs:{node_version}",
-        available_versions=available_versions,
-    )
-    for node_version, available_versions in (
-        (22, ("15.7", "16.0")),
-        (24, _DEFAULT_NONBASE_SLFOPLUS_VERSIONS),
-    )
-]
+@_CATALOG.register("OPENJDK_CONTAINERS")
+def _openjdk_containers() -> List[ParameterSet]:
+    return [
+        _CATALOG["OPENJDK_11_CONTAINER"],
+        _CATALOG["OPENJDK_17_CONTAINER"],
+        _CATALOG["OPENJDK_21_CONTAINER"],
+        _CATALOG["OPENJDK_25_CONTAINER"],
+    ]
 
-NODEJS_MICRO_CONTAINERS = [
-    create_BCI(
-        build_tag=f"bci/nodejs:{node_version}-micro",
-        available_versions=available_versions,
-    )
-    for node_version, available_versions in (
-        (24, _DEFAULT_NONBASE_SLFOPLUS_VERSIONS),
-    )
-]
 
-AMD_CONTAINERS = [
-    create_BCI(
-        build_tag=(
-            f"third-party/amd/amdgpu-driver:sles-{os_ver}-{driver_ver}"
-        ),
-        available_versions=[f"{os_ver}-third-party"],
-        custom_entry_point="/bin/sh",
-    )
-    for driver_ver, os_ver in (
-        ("31.30", "16.0"),
-        ("31.20", "16.0"),
-        ("31.10", "16.0"),
-        ("31.30", "15.7"),
-        ("31.20", "15.7"),
-        ("31.10", "15.7"),
-        ("30.30.4", "15.7"),
-        ("30.20.1", "15.7"),
-    )
-]
-
-NVIDIA_CONTAINERS = [
-    create_BCI(
-        build_tag=(
-            f"third-party/nvidia/driver:{driver_branch}-sles{os_ver}"
-            if kernel_flavor == "default"
-            else f"third-party/nvidia/driver:{driver_branch}-{kernel_flavor}-sles{os_ver}"
-        ),
-        available_versions=[f"{os_ver}-third-party"],
-        custom_entry_point="/bin/sh",
-        extra_marks=[
-            pytest.mark.skipif(
-                condition=LOCALHOST.system_info.arch != "aarch64",
-                reason="64kb flavor is available only on aarch64",
-            )
-        ]
-        if kernel_flavor == "64kb"
-        else [],
-    )
-    for driver_branch, kernel_flavor, os_ver in (
-        ("595", "default", "16.0"),
-        ("595", "64kb", "16.0"),
-        ("595", "default", "15.7"),
-        ("595", "64kb", "15.7"),
-        ("590", "default", "15.7"),
-        ("590", "64kb", "15.7"),
-        ("580", "default", "15.7"),
-        ("580", "64kb", "15.7"),
-        ("575", "default", "15.7"),
-        ("575", "64kb", "15.7"),
-        ("570", "default", "15.7"),
-        ("570", "64kb", "15.7"),
-        ("550", "default", "15.7"),
-        ("550", "64kb", "15.7"),
-    )
-]
+@_CATALOG.register("OPENJDK_DEVEL_CONTAINERS")
+def _openjdk_devel_containers() -> List[ParameterSet]:
+    return [
+        _CATALOG["OPENJDK_DEVEL_11_CONTAINER"],
+        _CATALOG["OPENJDK_DEVEL_17_CONTAINER"],
+        _CATALOG["OPENJDK_DEVEL_21_CONTAINER"],
+        _CATALOG["OPENJDK_DEVEL_25_CONTAINER"],
+    ]
 
-PYTHON_BASE_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{BCI_CONTAINER_PREFIX}/python:{ver}-base",
-        available_versions=versions,
-    )
-    for ver, versions in (("3.13", ["16.0"]), ("3.14", ["tumbleweed", "16.1"]))
-]
 
-PYTHON_WITH_PIPX_CONTAINERS = PYTHON_BASE_CONTAINERS + [
-    create_BCI(
-        build_tag=f"{BCI_CONTAINER_PREFIX}/python:{ver}",
-        available_versions=versions,
-    )
-    for ver, versions in (("3.13", ["15.7", "tumbleweed"]),)
-]
+@_CATALOG.register("NODEJS_BASE_CONTAINERS")
+def _nodejs_base_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"bci/nodejs:{node_version}",
+            available_versions=available_versions,
+        )
+        for node_version, available_versions in (
+            (22, ("15.7", "16.0")),
+            (24, _DEFAULT_NONBASE_SLFOPLUS_VERSIONS),
+        )
+    ]
 
-PYTHON_MICRO_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{BCI_CONTAINER_PREFIX}/python:{ver}-micro",
-        available_versions=versions,
-    )
-    for ver, versions in (("3.13", ["16.0"]), ("3.14", ["tumbleweed", "16.1"]))
-]
 
-PYTHON_CONTAINERS = PYTHON_WITH_PIPX_CONTAINERS + [
-    create_BCI(
-        build_tag=f"{BCI_CONTAINER_PREFIX}/python:{ver}",
-        available_versions=versions,
-    )
-    for ver, versions in (
-        ("3.6", ("15.7",)),
-        ("3.11", ("15.7", "tumbleweed")),
-    )
-]
+@_CATALOG.register("NODEJS_MICRO_CONTAINERS")
+def _nodejs_micro_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"bci/nodejs:{node_version}-micro",
+            available_versions=available_versions,
+        )
+        for node_version, available_versions in (
+            (24, _DEFAULT_NONBASE_SLFOPLUS_VERSIONS),
+        )
+    ]
+
+
+@_CATALOG.register("AMD_CONTAINERS")
+def _amd_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=(
+                f"third-party/amd/amdgpu-driver:sles-{os_ver}-{driver_ver}"
+            ),
+            available_versions=[f"{os_ver}-third-party"],
+            custom_entry_point="/bin/sh",
+        )
+        for driver_ver, os_ver in (
+            ("31.30", "16.0"),
+            ("31.20", "16.0"),
+            ("31.10", "16.0"),
+            ("31.30", "15.7"),
+            ("31.20", "15.7"),
+            ("31.10", "15.7"),
+            ("30.30.4", "15.7"),
+            ("30.20.1", "15.7"),
+        )
+    ]
+
+
+@_CATALOG.register("NVIDIA_CONTAINERS")
+def _nvidia_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=(
+                f"third-party/nvidia/driver:{driver_branch}-sles{os_ver}"
+                if kernel_flavor == "default"
+                else f"third-party/nvidia/driver:{driver_branch}-{kernel_flavor}-sles{os_ver}"
+            ),
+            available_versions=[f"{os_ver}-third-party"],
+            custom_entry_point="/bin/sh",
+            extra_marks=[
+                pytest.mark.skipif(
+                    condition=LOCALHOST.system_info.arch != "aarch64",
+                    reason="64kb flavor is available only on aarch64",
+                )
+            ]
+            if kernel_flavor == "64kb"
+            else [],
+        )
+        for driver_branch, kernel_flavor, os_ver in (
+            ("595", "default", "16.0"),
+            ("595", "64kb", "16.0"),
+            ("595", "default", "15.7"),
+            ("595", "64kb", "15.7"),
+            ("590", "default", "15.7"),
+            ("590", "64kb", "15.7"),
+            ("580", "default", "15.7"),
+            ("580", "64kb", "15.7"),
+            ("575", "default", "15.7"),
+            ("575", "64kb", "15.7"),
+            ("570", "default", "15.7"),
+            ("570", "64kb", "15.7"),
+            ("550", "default", "15.7"),
+            ("550", "64kb", "15.7"),
+        )
+    ]
+
+
+@_CATALOG.register("PYTHON_BASE_CONTAINERS")
+def _python_base_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"{BCI_CONTAINER_PREFIX}/python:{ver}-base",
+            available_versions=versions,
+        )
+        for ver, versions in (
+            ("3.13", ["16.0"]),
+            ("3.14", ["tumbleweed", "16.1"]),
+        )
+    ]
+
+
+@_CATALOG.register("PYTHON_WITH_PIPX_CONTAINERS")
+def _python_with_pipx_containers() -> List[ParameterSet]:
+    return _CATALOG["PYTHON_BASE_CONTAINERS"] + [
+        create_BCI(
+            build_tag=f"{BCI_CONTAINER_PREFIX}/python:{ver}",
+            available_versions=versions,
+        )
+        for ver, versions in (("3.13", ["15.7", "tumbleweed"]),)
+    ]
+
+
+@_CATALOG.register("PYTHON_MICRO_CONTAINERS")
+def _python_micro_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"{BCI_CONTAINER_PREFIX}/python:{ver}-micro",
+            available_versions=versions,
+        )
+        for ver, versions in (
+            ("3.13", ["16.0"]),
+            ("3.14", ["tumbleweed", "16.1"]),
+        )
+    ]
+
+
+@_CATALOG.register("PYTHON_CONTAINERS")
+def _python_containers() -> List[ParameterSet]:
+    return _CATALOG["PYTHON_WITH_PIPX_CONTAINERS"] + [
+        create_BCI(
+            build_tag=f"{BCI_CONTAINER_PREFIX}/python:{ver}",
+            available_versions=versions,
+        )
+        for ver, versions in (
+            ("3.6", ("15.7",)),
+            ("3.11", ("15.7", "tumbleweed")),
+        )
+    ]
+
+
+@_CATALOG.register("RUBY_CONTAINERS")
+def _ruby_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(build_tag="bci/ruby:2.5", available_versions=("15.7",)),
+        create_BCI(
+            build_tag="bci/ruby:3.4",
+            available_versions=_DEFAULT_NONBASE_SLE_VERSIONS,
+        ),
+        create_BCI(
+            build_tag="bci/ruby:latest", available_versions=["tumbleweed"]
+        ),
+    ]
 
-RUBY_CONTAINERS = [
-    create_BCI(build_tag="bci/ruby:2.5", available_versions=("15.7",)),
-    create_BCI(
-        build_tag="bci/ruby:3.4",
-        available_versions=_DEFAULT_NONBASE_SLE_VERSIONS,
-    ),
-    create_BCI(build_tag="bci/ruby:latest", available_versions=["tumbleweed"]),
-]
 
 _DOTNET_SKIP_ARCH_MARK = pytest.mark.skipif(
     LOCALHOST.system_info.arch not in ("aarch64", "x86_64"),
     reason="The .Net containers are only available on aarch64 and x86_64",
 )
 
-DOTNET_SDK_8_0_CONTAINER = create_BCI(
-    build_tag="bci/dotnet-sdk:8.0",
-    available_versions=("15.7",),
-    extra_marks=(_DOTNET_SKIP_ARCH_MARK,),
-)
-DOTNET_SDK_9_0_CONTAINER = create_BCI(
-    build_tag="bci/dotnet-sdk:9.0",
-    available_versions=("15.7",),
-    extra_marks=(_DOTNET_SKIP_ARCH_MARK,),
-)
-DOTNET_SDK_10_0_CONTAINER = create_BCI(
-    build_tag="bci/dotnet-sdk:10.0",
-    available_versions=("15.7",),
-    extra_marks=(_DOTNET_SKIP_ARCH_MARK,),
-)
-DOTNET_ASPNET_8_0_CONTAINER = create_BCI(
-    build_tag="bci/dotnet-aspnet:8.0",
-    available_versions=("15.7",),
-    extra_marks=(_DOTNET_SKIP_ARCH_MARK,),
-)
-DOTNET_ASPNET_9_0_CONTAINER = create_BCI(
-    build_tag="bci/dotnet-aspnet:9.0",
-    available_versions=("15.7",),
-    extra_marks=(_DOTNET_SKIP_ARCH_MARK,),
-)
-DOTNET_ASPNET_10_0_CONTAINER = create_BCI(
-    build_tag="bci/dotnet-aspnet:10.0",
-    available_versions=("15.7",),
-    extra_marks=(_DOTNET_SKIP_ARCH_MARK,),
-)
-DOTNET_RUNTIME_8_0_CONTAINER = create_BCI(
-    build_tag="bci/dotnet-runtime:8.0",
-    available_versions=("15.7",),
-    extra_marks=(_DOTNET_SKIP_ARCH_MARK,),
-)
-DOTNET_RUNTIME_9_0_CONTAINER = create_BCI(
-    build_tag="bci/dotnet-runtime:9.0",
-    available_versions=("15.7",),
-    extra_marks=(_DOTNET_SKIP_ARCH_MARK,),
-)
-DOTNET_RUNTIME_10_0_CONTAINER = create_BCI(
-    build_tag="bci/dotnet-runtime:10.0",
-    available_versions=("15.7",),
-    extra_marks=(_DOTNET_SKIP_ARCH_MARK,),
-)
-
-
-RUST_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{BCI_CONTAINER_PREFIX}/rust:{rust_version}",
+for _dotnet_image, _dotnet_version in product(
+    ("sdk", "aspnet", "runtime"), ("8.0", "9.0", "10.0")
+):
+    _CATALOG.register_call(
+        f"DOTNET_{_dotnet_image.upper()}_{_dotnet_version.replace('.', '_')}_CONTAINER",
+        create_BCI,
+        build_tag=f"bci/dotnet-{_dotnet_image}:{_dotnet_version}",
+        available_versions=("15.7",),
+        extra_marks=(_DOTNET_SKIP_ARCH_MARK,),
     )
-    for rust_version in ("oldstable", "stable")
-]
 
-INIT_CONTAINER = create_BCI(
-    build_tag=f"{BCI_CONTAINER_PREFIX}/bci-init:{OS_CONTAINER_TAG}",
-    bci_type=ImageType.OS,
-    healthcheck_timeout=timedelta(seconds=240),
-    extra_marks=[
-        pytest.mark.skipif(
-            DOCKER_SELECTED,
-            reason="only podman is supported, systemd is broken with docker.",
+
+@_CATALOG.register("RUST_CONTAINERS")
+def _rust_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"{BCI_CONTAINER_PREFIX}/rust:{rust_version}",
         )
-    ],
-)
+        for rust_version in ("oldstable", "stable")
+    ]
 
-PCP_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{APP_CONTAINER_PREFIX}/pcp:{ver}",
+
+@_CATALOG.register("INIT_CONTAINER")
+def _init_container() -> ParameterSet:
+    return create_BCI(
+        build_tag=f"{BCI_CONTAINER_PREFIX}/bci-init:{OS_CONTAINER_TAG}",
+        bci_type=ImageType.OS,
+        healthcheck_timeout=timedelta(seconds=240),
         extra_marks=[
             pytest.mark.skipif(
-                DOCKER_SELECTED, reason="only podman is supported"
+                DOCKER_SELECTED,
+                reason="only podman is supported, systemd is broken with docker.",
             )
         ],
-        forwarded_ports=[PortForwarding(container_port=44322)],
-        available_versions=os_ver,
-        healthcheck_timeout=timedelta(seconds=240),
-        extra_launch_args=["--systemd", "always"],
-        bci_type=ImageType.APPLICATION,
-    )
-    for ver, os_ver in (
-        ("6", _DEFAULT_NONBASE_SLE_VERSIONS),
-        ("6", ["tumbleweed"]),
     )
-]
 
-CONTAINER_389DS_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{APP_CONTAINER_PREFIX}/389-ds:{ver}",
-        bci_type=ImageType.APPLICATION,
-        available_versions=os_ver,
-        healthcheck_timeout=timedelta(seconds=240),
-        extra_environment_variables={"SUFFIX_NAME": "dc=example,dc=com"},
-        forwarded_ports=[PortForwarding(container_port=3389)],
-    )
-    for ver, os_ver in (
-        ("3.0", ("16.0",)),
-        ("3.1", ("16.1",)),
-        ("latest", ("tumbleweed",)),
-    )
-]
 
-PHP_8_CLI = create_BCI(build_tag="bci/php:8")
-PHP_8_APACHE = create_BCI(build_tag="bci/php-apache:8")
-PHP_8_FPM = create_BCI(build_tag="bci/php-fpm:8")
+@_CATALOG.register("PCP_CONTAINERS")
+def _pcp_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"{APP_CONTAINER_PREFIX}/pcp:{ver}",
+            extra_marks=[
+                pytest.mark.skipif(
+                    DOCKER_SELECTED, reason="only podman is supported"
+                )
+            ],
+            forwarded_ports=[PortForwarding(container_port=44322)],
+            available_versions=os_ver,
+            healthcheck_timeout=timedelta(seconds=240),
+            extra_launch_args=["--systemd", "always"],
+            bci_type=ImageType.APPLICATION,
+        )
+        for ver, os_ver in (
+            ("6", _DEFAULT_NONBASE_SLE_VERSIONS),
+            ("6", ["tumbleweed"]),
+        )
+    ]
+
+
+@_CATALOG.register("CONTAINER_389DS_CONTAINERS")
+def _container_389ds_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"{APP_CONTAINER_PREFIX}/389-ds:{ver}",
+            bci_type=ImageType.APPLICATION,
+            available_versions=os_ver,
+            healthcheck_timeout=timedelta(seconds=240),
+            extra_environment_variables={"SUFFIX_NAME": "dc=example,dc=com"},
+            forwarded_ports=[PortForwarding(container_port=3389)],
+        )
+        for ver, os_ver in (
+            ("3.0", ("16.0",)),
+            ("3.1", ("16.1",)),
+            ("latest", ("tumbleweed",)),
+        )
+    ]
+
+
+_CATALOG.register_call("PHP_8_CLI", create_BCI, build_tag="bci/php:8")
+_CATALOG.register_call(
+    "PHP_8_APACHE", create_BCI, build_tag="bci/php-apache:8"
+)
+_CATALOG.register_call("PHP_8_FPM", create_BCI, build_tag="bci/php-fpm:8")
 
 MARIADB_ROOT_PASSWORD = "'88tpw-n!t-s$$cr`t!"
 
@@ -880,72 +986,89 @@ _MARIADB_VERSION_OS_MATRIX: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
     ("latest", ("tumbleweed",)),
 )
 
-MARIADB_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{APP_CONTAINER_PREFIX}/mariadb:{mariadb_ver}",
-        bci_type=ImageType.APPLICATION,
-        available_versions=os_versions,
-        forwarded_ports=[PortForwarding(container_port=3306)],
-        extra_environment_variables={
-            "MARIADB_ROOT_PASSWORD": MARIADB_ROOT_PASSWORD
-        },
-    )
-    for mariadb_ver, os_versions in _MARIADB_VERSION_OS_MATRIX
-]
 
-MARIADB_CLIENT_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{APP_CONTAINER_PREFIX}/mariadb-client:{mariadb_client_ver}",
-        bci_type=ImageType.APPLICATION,
-        available_versions=os_versions,
-        custom_entry_point="/bin/sh",
-    )
-    for mariadb_client_ver, os_versions in _MARIADB_VERSION_OS_MATRIX
-]
+@_CATALOG.register("MARIADB_CONTAINERS")
+def _mariadb_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"{APP_CONTAINER_PREFIX}/mariadb:{mariadb_ver}",
+            bci_type=ImageType.APPLICATION,
+            available_versions=os_versions,
+            forwarded_ports=[PortForwarding(container_port=3306)],
+            extra_environment_variables={
+                "MARIADB_ROOT_PASSWORD": MARIADB_ROOT_PASSWORD
+            },
+        )
+        for mariadb_ver, os_versions in _MARIADB_VERSION_OS_MATRIX
+    ]
+
+
+@_CATALOG.register("MARIADB_CLIENT_CONTAINERS")
+def _mariadb_client_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"{APP_CONTAINER_PREFIX}/mariadb-client:{mariadb_client_ver}",
+            bci_type=ImageType.APPLICATION,
+            available_versions=os_versions,
+            custom_entry_point="/bin/sh",
+        )
+        for mariadb_client_ver, os_versions in _MARIADB_VERSION_OS_MATRIX
+    ]
+
+
+@_CATALOG.register("POSTFIX_CONTAINERS")
+def _postfix_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"{SAC_CONTAINER_PREFIX}/postfix:{postfix_ver}",
+            bci_type=ImageType.APPLICATION,
+            available_versions=os_versions,
+            forwarded_ports=[PortForwarding(container_port=25)],
+            extra_environment_variables={"SERVER_HOSTNAME": "localhost"},
+        )
+        for postfix_ver, os_versions in (("latest", ["tumbleweed"]),)
+    ]
 
-POSTFIX_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{SAC_CONTAINER_PREFIX}/postfix:{postfix_ver}",
-        bci_type=ImageType.APPLICATION,
-        available_versions=os_versions,
-        forwarded_ports=[PortForwarding(container_port=25)],
-        extra_environment_variables={"SERVER_HOSTNAME": "localhost"},
-    )
-    for postfix_ver, os_versions in (("latest", ["tumbleweed"]),)
-]
 
 POSTGRES_PASSWORD = "n0ts3cr3t"
 
-POSTGRESQL_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{APP_CONTAINER_PREFIX}/postgres:{pg_ver}{variant}",
-        bci_type=ImageType.APPLICATION,
-        available_versions=pg_versions,
-        forwarded_ports=[PortForwarding(container_port=5432)],
-        extra_environment_variables={"POSTGRES_PASSWORD": POSTGRES_PASSWORD},
-        # https://github.com/SUSE/BCI-tests/issues/647
-        healthcheck_timeout=(
-            timedelta(minutes=6)
-            if LOCALHOST.system_info.arch == "ppc64le"
-            else None
-        ),
-    )
-    for pg_ver, pg_versions in (
-        (14, ["tumbleweed"]),
-        (15, ["tumbleweed"]),
-        (16, _DEFAULT_NONBASE_OS_VERSIONS),
-        (17, _DEFAULT_NONBASE_OS_VERSIONS),
-        (18, _DEFAULT_NONBASE_OS_VERSIONS),
-    )
-    for variant in ("", "-contrib")
-]
+
+@_CATALOG.register("POSTGRESQL_CONTAINERS")
+def _postgresql_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"{APP_CONTAINER_PREFIX}/postgres:{pg_ver}{variant}",
+            bci_type=ImageType.APPLICATION,
+            available_versions=pg_versions,
+            forwarded_ports=[PortForwarding(container_port=5432)],
+            extra_environment_variables={
+                "POSTGRES_PASSWORD": POSTGRES_PASSWORD
+            },
+            # https://github.com/SUSE/BCI-tests/issues/647
+            healthcheck_timeout=(
+                timedelta(minutes=6)
+                if LOCALHOST.system_info.arch == "ppc64le"
+                else None
+            ),
+        )
+        for pg_ver, pg_versions in (
+            (14, ["tumbleweed"]),
+            (15, ["tumbleweed"]),
+            (16, _DEFAULT_NONBASE_OS_VERSIONS),
+            (17, _DEFAULT_NONBASE_OS_VERSIONS),
+            (18, _DEFAULT_NONBASE_OS_VERSIONS),
+        )
+        for variant in ("", "-contrib")
+    ]
 
 
 _distribution_version = "latest"
 if OS_VERSION in ("16.0", "16.1"):
     _distribution_version = "3.1"
 
-DISTRIBUTION_CONTAINER = create_BCI(
+_CATALOG.register_call(
+    "DISTRIBUTION_CONTAINER",
+    create_BCI,
     build_tag=f"{APP_CONTAINER_PREFIX}/registry:{_distribution_version}",
     bci_type=ImageType.APPLICATION,
     forwarded_ports=[PortForwarding(container_port=5000)],
@@ -959,7 +1082,9 @@ if OS_VERSION in ("16.1",):
 elif OS_VERSION in ("16.0",):
     _git_app_version = "2.51"
 
-GIT_CONTAINER = create_BCI(
+_CATALOG.register_call(
+    "GIT_CONTAINER",
+    create_BCI,
     build_tag=f"{APP_CONTAINER_PREFIX}/git:{_git_app_version}",
     bci_type=ImageType.APPLICATION,
     available_versions=_DEFAULT_NONBASE_SLFOPLUS_VERSIONS,
@@ -971,7 +1096,9 @@ if OS_VERSION in ("16.0"):
 elif OS_VERSION in ("16.1",):
     _helm_app_version = "4"
 
-HELM_CONTAINER = create_BCI(
+_CATALOG.register_call(
+    "HELM_CONTAINER",
+    create_BCI,
     build_tag=f"{APP_CONTAINER_PREFIX}/helm:{_helm_app_version}",
     bci_type=ImageType.APPLICATION,
     custom_entry_point="/bin/sh",
@@ -979,306 +1106,368 @@ HELM_CONTAINER = create_BCI(
 )
 
 _COSIGN_VERSION: str = "latest" if OS_VERSION == "tumbleweed" else "3"
-COSIGN_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{APP_CONTAINER_PREFIX}/cosign:{_COSIGN_VERSION}",
-        bci_type=ImageType.APPLICATION,
-        custom_entry_point="/usr/bin/pause",
-    )
-]
 
-NGINX_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{APP_CONTAINER_PREFIX}/nginx:{nginx_ver}",
-        bci_type=ImageType.APPLICATION,
-        available_versions=os_versions,
-        forwarded_ports=[PortForwarding(container_port=80)],
-    )
-    for nginx_ver, os_versions in (
-        ("latest", ("tumbleweed",)),
-        ("1.27", ("16.0", "16.1")),
-    )
-]
 
-KUBECTL_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{APP_CONTAINER_PREFIX}/kubectl:{kubectl_ver}",
-        bci_type=ImageType.APPLICATION,
-        available_versions=os_versions,
-        custom_entry_point="/bin/sh",
-    )
-    for kubectl_ver, os_versions in (
-        ("oldstable", ("15.7",)),
-        ("stable", ("15.7",)),
-        ("1.33", ("tumbleweed",)),
-        ("1.34", ("tumbleweed",)),
-        ("1.35", ("tumbleweed",)),
-        ("1.36", ("tumbleweed",)),
-    )
-]
+@_CATALOG.register("COSIGN_CONTAINERS")
+def _cosign_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"{APP_CONTAINER_PREFIX}/cosign:{_COSIGN_VERSION}",
+            bci_type=ImageType.APPLICATION,
+            custom_entry_point="/usr/bin/pause",
+        )
+    ]
 
-KEA_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{APP_CONTAINER_PREFIX}/kea:{kea_ver}",
-        bci_type=ImageType.APPLICATION,
-        available_versions=os_versions,
-    )
-    for kea_ver, os_versions in (
-        ("2.6", ("15.7",)),
-        ("3.0", ("16.0", "16.1")),
-        ("latest", ("tumbleweed",)),
-    )
-]
 
-if OS_VERSION in ("16.1",):
-    KERNEL_MODULE_CONTAINER = create_BCI(
-        build_tag=f"{BCI_CONTAINER_PREFIX}/bci-sle16-kernel-module-devel:{OS_CONTAINER_TAG}",
-        available_versions=["16.1"],
-        bci_type=ImageType.OS,
-    )
-elif OS_VERSION in ("16.0",):
-    KERNEL_MODULE_CONTAINER = create_BCI(
-        build_tag=f"{BCI_CONTAINER_PREFIX}/bci-sle16-kernel-module-devel:{OS_CONTAINER_TAG}",
-        available_versions=["16.0"],
-        bci_type=ImageType.OS,
-    )
-else:
-    KERNEL_MODULE_CONTAINER = create_BCI(
+@_CATALOG.register("NGINX_CONTAINERS")
+def _nginx_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"{APP_CONTAINER_PREFIX}/nginx:{nginx_ver}",
+            bci_type=ImageType.APPLICATION,
+            available_versions=os_versions,
+            forwarded_ports=[PortForwarding(container_port=80)],
+        )
+        for nginx_ver, os_versions in (
+            ("latest", ("tumbleweed",)),
+            ("1.27", ("16.0", "16.1")),
+        )
+    ]
+
+
+@_CATALOG.register("KUBECTL_CONTAINERS")
+def _kubectl_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"{APP_CONTAINER_PREFIX}/kubectl:{kubectl_ver}",
+            bci_type=ImageType.APPLICATION,
+            available_versions=os_versions,
+            custom_entry_point="/bin/sh",
+        )
+        for kubectl_ver, os_versions in (
+            ("oldstable", ("15.7",)),
+            ("stable", ("15.7",)),
+            ("1.33", ("tumbleweed",)),
+            ("1.34", ("tumbleweed",)),
+            ("1.35", ("tumbleweed",)),
+            ("1.36", ("tumbleweed",)),
+        )
+    ]
+
+
+@_CATALOG.register("KEA_CONTAINERS")
+def _kea_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"{APP_CONTAINER_PREFIX}/kea:{kea_ver}",
+            bci_type=ImageType.APPLICATION,
+            available_versions=os_versions,
+        )
+        for kea_ver, os_versions in (
+            ("2.6", ("15.7",)),
+            ("3.0", ("16.0", "16.1")),
+            ("latest", ("tumbleweed",)),
+        )
+    ]
+
+
+@_CATALOG.register("KERNEL_MODULE_CONTAINER")
+def _kernel_module_container() -> ParameterSet:
+    if OS_VERSION in ("16.1",):
+        return create_BCI(
+            build_tag=f"{BCI_CONTAINER_PREFIX}/bci-sle16-kernel-module-devel:{OS_CONTAINER_TAG}",
+            available_versions=["16.1"],
+            bci_type=ImageType.OS,
+        )
+    if OS_VERSION in ("16.0",):
+        return create_BCI(
+            build_tag=f"{BCI_CONTAINER_PREFIX}/bci-sle16-kernel-module-devel:{OS_CONTAINER_TAG}",
+            available_versions=["16.0"],
+            bci_type=ImageType.OS,
+        )
+    return create_BCI(
         build_tag=f"{BCI_CONTAINER_PREFIX}/bci-sle15-kernel-module-devel:{OS_CONTAINER_TAG}",
         available_versions=("15.7",),
         bci_type=ImageType.OS,
     )
 
-GCC_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{BCI_CONTAINER_PREFIX}/gcc:{gcc_version}",
-        available_versions=os_versions,
-    )
-    for gcc_version, os_versions in (
-        (13, ("tumbleweed",)),
-        (14, ("15.7", "tumbleweed")),
-        (15, ("16.0", "16.1", "tumbleweed")),
-    )
-]
 
-APACHE_TOMCAT_10_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{APP_CONTAINER_PREFIX}/apache-tomcat:10.1-openjdk{openjdk_version}",
-        bci_type=ImageType.APPLICATION,
-        available_versions=("tumbleweed",),
-        forwarded_ports=[PortForwarding(container_port=8080)],
-    )
-    for openjdk_version in (25, 21, 17)
-]
+@_CATALOG.register("GCC_CONTAINERS")
+def _gcc_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"{BCI_CONTAINER_PREFIX}/gcc:{gcc_version}",
+            available_versions=os_versions,
+        )
+        for gcc_version, os_versions in (
+            (13, ("tumbleweed",)),
+            (14, ("15.7", "tumbleweed")),
+            (15, ("16.0", "16.1", "tumbleweed")),
+        )
+    ]
 
-APACHE_TOMCAT_9_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{SAC_CONTAINER_PREFIX}/apache-tomcat:9-openjdk{openjdk_version}",
-        bci_type=ImageType.APPLICATION,
-        available_versions=("tumbleweed",),
-        forwarded_ports=[PortForwarding(container_port=8080)],
-    )
-    for openjdk_version in (21, 17)
-]
-
-TOMCAT_CONTAINERS = [
-    *APACHE_TOMCAT_9_CONTAINERS,
-    *APACHE_TOMCAT_10_CONTAINERS,
-]
-
-DOTNET_CONTAINERS = [
-    DOTNET_SDK_8_0_CONTAINER,
-    DOTNET_SDK_9_0_CONTAINER,
-    DOTNET_SDK_10_0_CONTAINER,
-    DOTNET_ASPNET_8_0_CONTAINER,
-    DOTNET_ASPNET_9_0_CONTAINER,
-    DOTNET_ASPNET_10_0_CONTAINER,
-    DOTNET_RUNTIME_8_0_CONTAINER,
-    DOTNET_RUNTIME_9_0_CONTAINER,
-    DOTNET_RUNTIME_10_0_CONTAINER,
-]
-
-SPACK_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{BCI_CONTAINER_PREFIX}/spack:{tag}",
-        available_versions=[f"{ver}"],
-    )
-    for ver, tag in (("15.7", "0.23"),)
-]
 
-PROMETHEUS_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{APP_CONTAINER_PREFIX}/prometheus:{tag}",
-        bci_type=ImageType.APPLICATION,
-        forwarded_ports=[PortForwarding(container_port=9090)],
-        available_versions=versions,
-    )
-    for tag, versions in (
-        ("3", ("15.7",)),
-        ("3", ("16.0", "16.1", "tumbleweed")),
-    )
-]
+@_CATALOG.register("APACHE_TOMCAT_10_CONTAINERS")
+def _apache_tomcat_10_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"{APP_CONTAINER_PREFIX}/apache-tomcat:10.1-openjdk{openjdk_version}",
+            bci_type=ImageType.APPLICATION,
+            available_versions=("tumbleweed",),
+            forwarded_ports=[PortForwarding(container_port=8080)],
+        )
+        for openjdk_version in (25, 21, 17)
+    ]
 
-ALERTMANAGER_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{APP_CONTAINER_PREFIX}/alertmanager:{tag}",
-        bci_type=ImageType.APPLICATION,
-        forwarded_ports=[PortForwarding(container_port=9093)],
-        available_versions=versions,
-    )
-    for tag, versions in (
-        ("0.28", ("15.7",)),
-        ("latest", ("tumbleweed",)),
-    )
-]
 
-BLACKBOX_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{APP_CONTAINER_PREFIX}/blackbox_exporter:{tag}",
-        bci_type=ImageType.APPLICATION,
-        forwarded_ports=[PortForwarding(container_port=9115)],
-        available_versions=versions,
-    )
-    for tag, versions in (
-        ("0.26", ("15.7",)),
-        ("latest", ("tumbleweed",)),
-    )
-]
+@_CATALOG.register("APACHE_TOMCAT_9_CONTAINERS")
+def _apache_tomcat_9_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"{SAC_CONTAINER_PREFIX}/apache-tomcat:9-openjdk{openjdk_version}",
+            bci_type=ImageType.APPLICATION,
+            available_versions=("tumbleweed",),
+            forwarded_ports=[PortForwarding(container_port=8080)],
+        )
+        for openjdk_version in (21, 17)
+    ]
+
+
+@_CATALOG.register("TOMCAT_CONTAINERS")
+def _tomcat_containers() -> List[ParameterSet]:
+    return [
+        *_CATALOG["APACHE_TOMCAT_9_CONTAINERS"],
+        *_CATALOG["APACHE_TOMCAT_10_CONTAINERS"],
+    ]
+
+
+@_CATALOG.register("DOTNET_CONTAINERS")
+def _dotnet_containers() -> List[ParameterSet]:
+    return [
+        _CATALOG["DOTNET_SDK_8_0_CONTAINER"],
+        _CATALOG["DOTNET_SDK_9_0_CONTAINER"],
+        _CATALOG["DOTNET_SDK_10_0_CONTAINER"],
+        _CATALOG["DOTNET_ASPNET_8_0_CONTAINER"],
+        _CATALOG["DOTNET_ASPNET_9_0_CONTAINER"],
+        _CATALOG["DOTNET_ASPNET_10_0_CONTAINER"],
+        _CATALOG["DOTNET_RUNTIME_8_0_CONTAINER"],
+        _CATALOG["DOTNET_RUNTIME_9_0_CONTAINER"],
+        _CATALOG["DOTNET_RUNTIME_10_0_CONTAINER"],
+    ]
+
+
+@_CATALOG.register("SPACK_CONTAINERS")
+def _spack_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"{BCI_CONTAINER_PREFIX}/spack:{tag}",
+            available_versions=[f"{ver}"],
+        )
+        for ver, tag in (("15.7", "0.23"),)
+    ]
+
+
+@_CATALOG.register("PROMETHEUS_CONTAINERS")
+def _prometheus_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"{APP_CONTAINER_PREFIX}/prometheus:{tag}",
+            bci_type=ImageType.APPLICATION,
+            forwarded_ports=[PortForwarding(container_port=9090)],
+            available_versions=versions,
+        )
+        for tag, versions in (
+            ("3", ("15.7",)),
+            ("3", ("16.0", "16.1", "tumbleweed")),
+        )
+    ]
+
+
+@_CATALOG.register("ALERTMANAGER_CONTAINERS")
+def _alertmanager_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"{APP_CONTAINER_PREFIX}/alertmanager:{tag}",
+            bci_type=ImageType.APPLICATION,
+            forwarded_ports=[PortForwarding(container_port=9093)],
+            available_versions=versions,
+        )
+        for tag, versions in (
+            ("0.28", ("15.7",)),
+            ("latest", ("tumbleweed",)),
+        )
+    ]
+
+
+@_CATALOG.register("BLACKBOX_CONTAINERS")
+def _blackbox_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"{APP_CONTAINER_PREFIX}/blackbox_exporter:{tag}",
+            bci_type=ImageType.APPLICATION,
+            forwarded_ports=[PortForwarding(container_port=9115)],
+            available_versions=versions,
+        )
+        for tag, versions in (
+            ("0.26", ("15.7",)),
+            ("latest", ("tumbleweed",)),
+        )
+    ]
 
-GRAFANA_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{APP_CONTAINER_PREFIX}/grafana:{tag}",
-        bci_type=ImageType.APPLICATION,
-        forwarded_ports=[PortForwarding(container_port=3000)],
-        available_versions=versions,
-    )
-    for tag, versions in (
-        ("11", ("15.7",)),
-        ("latest", ("tumbleweed",)),
-    )
-]
 
-STUNNEL_CONTAINER = create_BCI(
+@_CATALOG.register("GRAFANA_CONTAINERS")
+def _grafana_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"{APP_CONTAINER_PREFIX}/grafana:{tag}",
+            bci_type=ImageType.APPLICATION,
+            forwarded_ports=[PortForwarding(container_port=3000)],
+            available_versions=versions,
+        )
+        for tag, versions in (
+            ("11", ("15.7",)),
+            ("latest", ("tumbleweed",)),
+        )
+    ]
+
+
+_CATALOG.register_call(
+    "STUNNEL_CONTAINER",
+    create_BCI,
     build_tag=f"{APP_CONTAINER_PREFIX}/stunnel:5",
     bci_type=ImageType.APPLICATION,
     custom_entry_point="/bin/sh",
     available_versions=_DEFAULT_NONBASE_OS_VERSIONS,
 )
 
-VALKEY_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{APP_CONTAINER_PREFIX}/valkey:{tag}",
-        bci_type=ImageType.APPLICATION,
-        available_versions=versions,
-        forwarded_ports=[PortForwarding(container_port=6379)],
-    )
-    for versions, tag in (
-        (("16.0", "16.1"), "8.0"),
-        (("tumbleweed",), "latest"),
-    )
-]
 
-BIND_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{APP_CONTAINER_PREFIX}/bind:9",
-        bci_type=ImageType.APPLICATION,
-        available_versions=_DEFAULT_NONBASE_OS_VERSIONS,
-        forwarded_ports=[
-            PortForwarding(container_port=53, protocol=NetworkProtocol.UDP)
-        ],
-    )
-]
+@_CATALOG.register("VALKEY_CONTAINERS")
+def _valkey_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"{APP_CONTAINER_PREFIX}/valkey:{tag}",
+            bci_type=ImageType.APPLICATION,
+            available_versions=versions,
+            forwarded_ports=[PortForwarding(container_port=6379)],
+        )
+        for versions, tag in (
+            (("16.0", "16.1"), "8.0"),
+            (("tumbleweed",), "latest"),
+        )
+    ]
 
-KIOSK_FIREFOX_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{APP_CONTAINER_PREFIX}/kiosk/firefox-esr:esr",
-        bci_type=ImageType.APPLICATION,
-        available_versions=("15.7",),
-        custom_entry_point="/bin/sh",
-    )
-]
 
-KIOSK_PULSEAUDIO_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{APP_CONTAINER_PREFIX}/kiosk/pulseaudio:17",
-        bci_type=ImageType.APPLICATION,
-        available_versions=("15.7",),
-        custom_entry_point="/bin/sh",
-    )
-]
+@_CATALOG.register("BIND_CONTAINERS")
+def _bind_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"{APP_CONTAINER_PREFIX}/bind:9",
+            bci_type=ImageType.APPLICATION,
+            available_versions=_DEFAULT_NONBASE_OS_VERSIONS,
+            forwarded_ports=[
+                PortForwarding(container_port=53, protocol=NetworkProtocol.UDP)
+            ],
+        )
+    ]
 
-KIOSK_XORG_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{APP_CONTAINER_PREFIX}/kiosk/xorg:21",
-        bci_type=ImageType.APPLICATION,
-        available_versions=("15.7",),
-        custom_entry_point="/bin/sh",
-    )
-]
 
-KIOSK_XORG_CLIENT_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{APP_CONTAINER_PREFIX}/kiosk/xorg-client:21",
-        bci_type=ImageType.APPLICATION,
-        available_versions=("15.7",),
-        custom_entry_point="/bin/sh",
-    )
-]
+def _create_kiosk_containers(build_tag: str) -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"{APP_CONTAINER_PREFIX}/{build_tag}",
+            bci_type=ImageType.APPLICATION,
+            available_versions=("15.7",),
+            custom_entry_point="/bin/sh",
+        )
+    ]
 
-KIOSK_X11VNC_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{APP_CONTAINER_PREFIX}/kiosk/tigervnc-x11vnc:1",
-        bci_type=ImageType.APPLICATION,
-        available_versions=("15.7",),
-        custom_entry_point="/bin/sh",
-    )
-]
-
-KIOSK_CONTAINERS = (
-    KIOSK_FIREFOX_CONTAINERS
-    + KIOSK_PULSEAUDIO_CONTAINERS
-    + KIOSK_XORG_CONTAINERS
-    + KIOSK_XORG_CLIENT_CONTAINERS
-    + KIOSK_X11VNC_CONTAINERS
+
+_CATALOG.register_call(
+    "KIOSK_FIREFOX_CONTAINERS",
+    _create_kiosk_containers,
+    "kiosk/firefox-esr:esr",
 )
+_CATALOG.register_call(
+    "KIOSK_PULSEAUDIO_CONTAINERS",
+    _create_kiosk_containers,
+    "kiosk/pulseaudio:17",
+)
+_CATALOG.register_call(
+    "KIOSK_XORG_CONTAINERS", _create_kiosk_containers, "kiosk/xorg:21"
+)
+_CATALOG.register_call(
+    "KIOSK_XORG_CLIENT_CONTAINERS",
+    _create_kiosk_containers,
+    "kiosk/xorg-client:21",
+)
+_CATALOG.register_call(
+    "KIOSK_X11VNC_CONTAINERS",
+    _create_kiosk_containers,
+    "kiosk/tigervnc-x11vnc:1",
+)
+
+
+@_CATALOG.register("KIOSK_CONTAINERS")
+def _kiosk_containers() -> List[ParameterSet]:
+    return (
+        _CATALOG["KIOSK_FIREFOX_CONTAINERS"]
+        + _CATALOG["KIOSK_PULSEAUDIO_CONTAINERS"]
+        + _CATALOG["KIOSK_XORG_CONTAINERS"]
+        + _CATALOG["KIOSK_XORG_CLIENT_CONTAINERS"]
+        + _CATALOG["KIOSK_X11VNC_CONTAINERS"]
+    )
+
 
 _SAMBA_VERSION_OS_MATRIX: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
     ("4.21", ("15.7",)),
 )
 
-SAMBA_SERVER_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{APP_CONTAINER_PREFIX}/samba-server:{tag}",
-        bci_type=ImageType.APPLICATION,
-        forwarded_ports=[PortForwarding(container_port=445)],
-        available_versions=versions,
-    )
-    for tag, versions in _SAMBA_VERSION_OS_MATRIX
-]
 
-SAMBA_CLIENT_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{APP_CONTAINER_PREFIX}/samba-client:{tag}",
-        bci_type=ImageType.APPLICATION,
-        available_versions=versions,
-    )
-    for tag, versions in _SAMBA_VERSION_OS_MATRIX
-]
+@_CATALOG.register("SAMBA_SERVER_CONTAINERS")
+def _samba_server_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"{APP_CONTAINER_PREFIX}/samba-server:{tag}",
+            bci_type=ImageType.APPLICATION,
+            forwarded_ports=[PortForwarding(container_port=445)],
+            available_versions=versions,
+        )
+        for tag, versions in _SAMBA_VERSION_OS_MATRIX
+    ]
 
-SAMBA_TOOLBOX_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{APP_CONTAINER_PREFIX}/samba-toolbox:{tag}",
-        bci_type=ImageType.APPLICATION,
-        available_versions=versions,
+
+@_CATALOG.register("SAMBA_CLIENT_CONTAINERS")
+def _samba_client_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"{APP_CONTAINER_PREFIX}/samba-client:{tag}",
+            bci_type=ImageType.APPLICATION,
+            available_versions=versions,
+        )
+        for tag, versions in _SAMBA_VERSION_OS_MATRIX
+    ]
+
+
+@_CATALOG.register("SAMBA_TOOLBOX_CONTAINERS")
+def _samba_toolbox_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"{APP_CONTAINER_PREFIX}/samba-toolbox:{tag}",
+            bci_type=ImageType.APPLICATION,
+            available_versions=versions,
+        )
+        for tag, versions in _SAMBA_VERSION_OS_MATRIX
+    ]
+
+
+@_CATALOG.register("SAMBA_CONTAINERS")
+def _samba_containers() -> List[ParameterSet]:
+    return (
+        _CATALOG["SAMBA_SERVER_CONTAINERS"]
+        + _CATALOG["SAMBA_CLIENT_CONTAINERS"]
+        + _CATALOG["SAMBA_TOOLBOX_CONTAINERS"]
     )
-    for tag, versions in _SAMBA_VERSION_OS_MATRIX
-]
 
-SAMBA_CONTAINERS = (
-    SAMBA_SERVER_CONTAINERS
-    + SAMBA_CLIENT_CONTAINERS
-    + SAMBA_TOOLBOX_CONTAINERS
-)
 
 _kubevirt_version = "latest"
 if OS_VERSION in (
@@ -1287,32 +1476,36 @@ if OS_VERSION in (
 ):
     _kubevirt_version = "1.8"
 
-KUBEVIRT_CONTAINERS = [
-    create_BCI(
-        build_tag=(
-            f"suse/sles/{os_version}/virt-{service}:{_kubevirt_version}"
-            if os_version.startswith("16")
-            else f"{APP_CONTAINER_PREFIX}/virt-{service}:{_kubevirt_version}"
-        ),
-        bci_type=ImageType.APPLICATION,
-        available_versions=[os_version],
-        custom_entry_point="/bin/sh",
-    )
-    for os_version, service in product(
-        ("16.0", "16.1", "tumbleweed"),
-        (
-            "api",
-            "controller",
-            "exportproxy",
-            "exportserver",
-            "handler",
-            "launcher",
-            "operator",
-            "pr-helper",
-            "synchronization-controller",
-        ),
-    )
-]
+
+@_CATALOG.register("KUBEVIRT_CONTAINERS")
+def _kubevirt_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=(
+                f"suse/sles/{os_version}/virt-{service}:{_kubevirt_version}"
+                if os_version.startswith("16")
+                else f"{APP_CONTAINER_PREFIX}/virt-{service}:{_kubevirt_version}"
+            ),
+            bci_type=ImageType.APPLICATION,
+            available_versions=[os_version],
+            custom_entry_point="/bin/sh",
+        )
+        for os_version, service in product(
+            ("16.0", "16.1", "tumbleweed"),
+            (
+                "api",
+                "controller",
+                "exportproxy",
+                "exportserver",
+                "handler",
+                "launcher",
+                "operator",
+                "pr-helper",
+                "synchronization-controller",
+            ),
+        )
+    ]
+
 
 _cdi_version = "latest"
 if OS_VERSION in (
@@ -1321,282 +1514,326 @@ if OS_VERSION in (
 ):
     _cdi_version = "1.65"
 
-KUBEVIRT_CDI_CONTAINERS = [
-    create_BCI(
-        build_tag=(
-            f"suse/sles/{os_version}/cdi-{service}:{_cdi_version}"
-            if os_version.startswith("16")
-            else f"{APP_CONTAINER_PREFIX}/cdi-{service}:latest"
-        ),
-        bci_type=ImageType.APPLICATION,
-        available_versions=[os_version],
-        custom_entry_point="/bin/bash",
-    )
-    for os_version, service in product(
-        ("16.0", "16.1", "tumbleweed"),
-        (
-            "apiserver",
-            "cloner",
-            "controller",
-            "importer",
-            "operator",
-            "uploadproxy",
-            "uploadserver",
-        ),
-    )
-]
-
 
-SPR_CONTAINERS = [
-    create_BCI(
-        build_tag=f"private-registry{get_spr_namespace(os_version)}/harbor-{service}:latest",
-        bci_type=ImageType.APPLICATION,
-        available_versions=[os_version],
-        custom_entry_point="/bin/sh" if service != "db" else "",
-        extra_environment_variables=(
-            {"POSTGRES_PASSWORD": POSTGRES_PASSWORD} if service == "db" else {}
-        ),
-    )
-    for os_version, service in chain(
-        product(
-            (
-                "15.7-spr",
-                "15.7-spr1.0",
-                "15.7-spr1.2",
+@_CATALOG.register("KUBEVIRT_CDI_CONTAINERS")
+def _kubevirt_cdi_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=(
+                f"suse/sles/{os_version}/cdi-{service}:{_cdi_version}"
+                if os_version.startswith("16")
+                else f"{APP_CONTAINER_PREFIX}/cdi-{service}:latest"
             ),
+            bci_type=ImageType.APPLICATION,
+            available_versions=[os_version],
+            custom_entry_point="/bin/bash",
+        )
+        for os_version, service in product(
+            ("16.0", "16.1", "tumbleweed"),
             (
-                "core",
-                "exporter",
-                "jobservice",
-                "portal",
-                "registry",
-                "registryctl",
-                "trivy-adapter",
+                "apiserver",
+                "cloner",
+                "controller",
+                "importer",
+                "operator",
+                "uploadproxy",
+                "uploadserver",
             ),
-        ),
-    )
-]
+        )
+    ]
 
-RMT_CONTAINERS = [
-    create_BCI(
-        build_tag=f"{APP_CONTAINER_PREFIX}/rmt-server:2",
-        bci_type=ImageType.APPLICATION,
-        available_versions=("15.7",),
-        custom_entry_point="/bin/bash",
-    )
-]
 
-PC_AWS_TOOLCHAIN_RUNTIME_PROVIDER_CONTAINER = create_BCI(
-    build_tag=f"{APP_CONTAINER_PREFIX}/public-cloud-toolchain/aws-toolchain-runtime-provider:latest",
-    bci_type=ImageType.APPLICATION,
-    available_versions=("16.0-pc2025",),
-)
+@_CATALOG.register("SPR_CONTAINERS")
+def _spr_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"private-registry{get_spr_namespace(os_version)}/harbor-{service}:latest",
+            bci_type=ImageType.APPLICATION,
+            available_versions=[os_version],
+            custom_entry_point="/bin/sh" if service != "db" else "",
+            extra_environment_variables=(
+                {"POSTGRES_PASSWORD": POSTGRES_PASSWORD}
+                if service == "db"
+                else {}
+            ),
+        )
+        for os_version, service in chain(
+            product(
+                (
+                    "15.7-spr",
+                    "15.7-spr1.0",
+                    "15.7-spr1.2",
+                ),
+                (
+                    "core",
+                    "exporter",
+                    "jobservice",
+                    "portal",
+                    "registry",
+                    "registryctl",
+                    "trivy-adapter",
+                ),
+            ),
+        )
+    ]
 
-PC_AZ_TOOLCHAIN_RUNTIME_PROVIDER_CONTAINER = create_BCI(
-    build_tag=f"{APP_CONTAINER_PREFIX}/public-cloud-toolchain/az-toolchain-runtime-provider:latest",
-    bci_type=ImageType.APPLICATION,
-    available_versions=("16.0-pc2025",),
-)
 
-PC_GCP_TOOLCHAIN_RUNTIME_PROVIDER_CONTAINER = create_BCI(
-    build_tag=f"{APP_CONTAINER_PREFIX}/public-cloud-toolchain/google-toolchain-runtime-provider:latest",
-    bci_type=ImageType.APPLICATION,
-    available_versions=("16.0-pc2025",),
-)
+@_CATALOG.register("RMT_CONTAINERS")
+def _rmt_containers() -> List[ParameterSet]:
+    return [
+        create_BCI(
+            build_tag=f"{APP_CONTAINER_PREFIX}/rmt-server:2",
+            bci_type=ImageType.APPLICATION,
+            available_versions=("15.7",),
+            custom_entry_point="/bin/bash",
+        )
+    ]
 
 
-CONTAINERS_WITH_ZYPPER = (
-    [
-        BASE_CONTAINER,
-        INIT_CONTAINER,
-        KERNEL_MODULE_CONTAINER,
-        PHP_8_APACHE,
-        PHP_8_CLI,
-        PHP_8_FPM,
-        PC_AWS_TOOLCHAIN_RUNTIME_PROVIDER_CONTAINER,
-        PC_GCP_TOOLCHAIN_RUNTIME_PROVIDER_CONTAINER,
-        PC_AZ_TOOLCHAIN_RUNTIME_PROVIDER_CONTAINER,
-    ]
-    + BASE_FIPS_CONTAINERS
-    + GCC_CONTAINERS
-    + GOLANG_CONTAINERS
-    + KIWI_CONTAINERS
-    + LTSS_BASE_CONTAINERS
-    + LTSS_BASE_FIPS_CONTAINERS
-    + NODEJS_BASE_CONTAINERS
-    + OPENJDK_CONTAINERS
-    + OPENJDK_DEVEL_CONTAINERS
-    + PCP_CONTAINERS
-    + PYTHON_CONTAINERS
-    + RMT_CONTAINERS
-    + RUBY_CONTAINERS
-    + RUST_CONTAINERS
-    + SPACK_CONTAINERS
-    + (
-        DOTNET_CONTAINERS
-        if LOCALHOST.system_info.arch in ("aarch64", "x86_64")
-        else []
+for _pc_group, _pc_provider in (
+    ("PC_AWS_TOOLCHAIN_RUNTIME_PROVIDER_CONTAINER", "aws"),
+    ("PC_AZ_TOOLCHAIN_RUNTIME_PROVIDER_CONTAINER", "az"),
+    ("PC_GCP_TOOLCHAIN_RUNTIME_PROVIDER_CONTAINER", "google"),
+):
+    _CATALOG.register_call(
+        _pc_group,
+        create_BCI,
+        build_tag=f"{APP_CONTAINER_PREFIX}/public-cloud-toolchain/{_pc_provider}-toolchain-runtime-provider:latest",
+        bci_type=ImageType.APPLICATION,
+        available_versions=("16.0-pc2025",),
     )
-)
 
-#: all containers with zypper and with the flag to launch them as root
-CONTAINERS_WITH_ZYPPER_AS_ROOT = []
-for param in CONTAINERS_WITH_ZYPPER:
-    # only modify the user for containers where `USER` is explicitly set,
-    # atm this is no container
-    if param not in []:
-        CONTAINERS_WITH_ZYPPER_AS_ROOT.append(param)
-    else:
-        ctr, marks = container_and_marks_from_pytest_param(param)
-        CONTAINERS_WITH_ZYPPER_AS_ROOT.append(
-            pytest.param(
-                DerivedContainer(
-                    base=ctr,
-                    extra_launch_args=(
-                        (ctr.extra_launch_args or []) + ["--user", "root"]
-                    ),
-                ),
-                marks=marks,
-            )
+
+@_CATALOG.register("CONTAINERS_WITH_ZYPPER")
+def _containers_with_zypper() -> List[ParameterSet]:
+    return (
+        [
+            _CATALOG["BASE_CONTAINER"],
+            _CATALOG["INIT_CONTAINER"],
+            _CATALOG["KERNEL_MODULE_CONTAINER"],
+            _CATALOG["PHP_8_APACHE"],
+            _CATALOG["PHP_8_CLI"],
+            _CATALOG["PHP_8_FPM"],
+            _CATALOG["PC_AWS_TOOLCHAIN_RUNTIME_PROVIDER_CONTAINER"],
+            _CATALOG["PC_GCP_TOOLCHAIN_RUNTIME_PROVIDER_CONTAINER"],
+            _CATALOG["PC_AZ_TOOLCHAIN_RUNTIME_PROVIDER_CONTAINER"],
+        ]
+        + _CATALOG["BASE_FIPS_CONTAINERS"]
+        + _CATALOG["GCC_CONTAINERS"]
+        + _CATALOG["GOLANG_CONTAINERS"]
+        + _CATALOG["KIWI_CONTAINERS"]
+        + _CATALOG["LTSS_BASE_CONTAINERS"]
+        + _CATALOG["LTSS_BASE_FIPS_CONTAINERS"]
+        + _CATALOG["NODEJS_BASE_CONTAINERS"]
+        + _CATALOG["OPENJDK_CONTAINERS"]
+        + _CATALOG["OPENJDK_DEVEL_CONTAINERS"]
+        + _CATALOG["PCP_CONTAINERS"]
+        + _CATALOG["PYTHON_CONTAINERS"]
+        + _CATALOG["RMT_CONTAINERS"]
+        + _CATALOG["RUBY_CONTAINERS"]
+        + _CATALOG["RUST_CONTAINERS"]
+        + _CATALOG["SPACK_CONTAINERS"]
+        + (
+            _CATALOG["DOTNET_CONTAINERS"]
+            if LOCALHOST.system_info.arch in ("aarch64", "x86_64")
+            else []
         )
+    )
 
 
-CONTAINERS_WITHOUT_ZYPPER = [
-    *ALERTMANAGER_CONTAINERS,
-    *BIND_CONTAINERS,
-    *BLACKBOX_CONTAINERS,
-    BUSYBOX_CONTAINER,
-    *CONTAINER_389DS_CONTAINERS,
-    DISTRIBUTION_CONTAINER,
-    GIT_CONTAINER,
-    *GRAFANA_CONTAINERS,
-    HELM_CONTAINER,
-    *KEA_CONTAINERS,
-    *KIOSK_FIREFOX_CONTAINERS,
-    *KIOSK_XORG_CONTAINERS,
-    *KIOSK_XORG_CLIENT_CONTAINERS,
-    *KIOSK_PULSEAUDIO_CONTAINERS,
-    *KIOSK_X11VNC_CONTAINERS,
-    *KUBECTL_CONTAINERS,
-    MICRO_CONTAINER,
-    MICRO_FIPS_CONTAINER,
-    MINIMAL_CONTAINER,
-    *NGINX_CONTAINERS,
-    *NODEJS_MICRO_CONTAINERS,
-    *PYTHON_MICRO_CONTAINERS,
-    *POSTFIX_CONTAINERS,
-    *TOMCAT_CONTAINERS,
-    *POSTGRESQL_CONTAINERS,
-    *MARIADB_CLIENT_CONTAINERS,
-    *MARIADB_CONTAINERS,
-    *PROMETHEUS_CONTAINERS,
-    *SAMBA_CONTAINERS,
-    STUNNEL_CONTAINER,
-    *VALKEY_CONTAINERS,
-    *SPR_CONTAINERS,
-    *KUBEVIRT_CONTAINERS,
-    *KUBEVIRT_CDI_CONTAINERS,
-    *AMD_CONTAINERS,
-    *NVIDIA_CONTAINERS,
-]
-
-CONTAINERS_WITHOUT_SHELL = [NANO_CONTAINER, *COSIGN_CONTAINERS]
-
-
-# can't use sets here, because the list contents are mutable :-(
-for ctr_with_zypp in CONTAINERS_WITH_ZYPPER:
-    assert ctr_with_zypp not in CONTAINERS_WITHOUT_SHELL, (
-        f"Container '{ctr_with_zypp.id}' is both in CONTAINERS_WITH_ZYPPER and CONTAINERS_WITHOUT_SHELL"
-    )
-    assert ctr_with_zypp not in CONTAINERS_WITHOUT_ZYPPER, (
-        f"Container '{ctr_with_zypp.id}' is both in CONTAINERS_WITH_ZYPPER and CONTAINERS_WITHOUT_ZYPPER"
-    )
+#: all containers with zypper and with the flag to launch them as root
+@_CATALOG.register("CONTAINERS_WITH_ZYPPER_AS_ROOT")
+def _containers_with_zypper_as_root() -> List[ParameterSet]:
+    containers_with_zypper_as_root = []
+    for param in _CATALOG["CONTAINERS_WITH_ZYPPER"]:
+        # only modify the user for containers where `USER` is explicitly set,
+        # atm this is no container
+        if param not in []:
+            containers_with_zypper_as_root.append(param)
+        else:
+            ctr, marks = container_and_marks_from_pytest_param(param)
+            containers_with_zypper_as_root.append(
+                pytest.param(
+                    DerivedContainer(
+                        base=ctr,
+                        extra_launch_args=(
+                            (ctr.extra_launch_args or []) + ["--user", "root"]
+                        ),
+                    ),
+                    marks=marks,
+                )
+            )
+    return containers_with_zypper_as_root
+
+
+@_CATALOG.register("CONTAINERS_WITHOUT_ZYPPER")
+def _containers_without_zypper() -> List[ParameterSet]:
+    return [
+        *_CATALOG["ALERTMANAGER_CONTAINERS"],
+        *_CATALOG["BIND_CONTAINERS"],
+        *_CATALOG["BLACKBOX_CONTAINERS"],
+        _CATALOG["BUSYBOX_CONTAINER"],
+        *_CATALOG["CONTAINER_389DS_CONTAINERS"],
+        _CATALOG["DISTRIBUTION_CONTAINER"],
+        _CATALOG["GIT_CONTAINER"],
+        *_CATALOG["GRAFANA_CONTAINERS"],
+        _CATALOG["HELM_CONTAINER"],
+        *_CATALOG["KEA_CONTAINERS"],
+        *_CATALOG["KIOSK_FIREFOX_CONTAINERS"],
+        *_CATALOG["KIOSK_XORG_CONTAINERS"],
+        *_CATALOG["KIOSK_XORG_CLIENT_CONTAINERS"],
+        *_CATALOG["KIOSK_PULSEAUDIO_CONTAINERS"],
+        *_CATALOG["KIOSK_X11VNC_CONTAINERS"],
+        *_CATALOG["KUBECTL_CONTAINERS"],
+        _CATALOG["MICRO_CONTAINER"],
+        _CATALOG["MICRO_FIPS_CONTAINER"],
+        _CATALOG["MINIMAL_CONTAINER"],
+        *_CATALOG["NGINX_CONTAINERS"],
+        *_CATALOG["NODEJS_MICRO_CONTAINERS"],
+        *_CATALOG["PYTHON_MICRO_CONTAINERS"],
+        *_CATALOG["POSTFIX_CONTAINERS"],
+        *_CATALOG["TOMCAT_CONTAINERS"],
+        *_CATALOG["POSTGRESQL_CONTAINERS"],
+        *_CATALOG["MARIADB_CLIENT_CONTAINERS"],
+        *_CATALOG["MARIADB_CONTAINERS"],
+        *_CATALOG["PROMETHEUS_CONTAINERS"],
+        *_CATALOG["SAMBA_CONTAINERS"],
+        _CATALOG["STUNNEL_CONTAINER"],
+        *_CATALOG["VALKEY_CONTAINERS"],
+        *_CATALOG["SPR_CONTAINERS"],
+        *_CATALOG["KUBEVIRT_CONTAINERS"],
+        *_CATALOG["KUBEVIRT_CDI_CONTAINERS"],
+        *_CATALOG["AMD_CONTAINERS"],
+        *_CATALOG["NVIDIA_CONTAINERS"],
+    ]
 
-for ctr_without_zypp in CONTAINERS_WITHOUT_ZYPPER:
-    assert ctr_without_zypp not in CONTAINERS_WITHOUT_SHELL, (
-        f"Container '{ctr_without_zypp.id}' is both in CONTAINERS_WITHOUT_ZYPPER and CONTAINERS_WITHOUT_SHELL"
-    )
-    assert ctr_without_zypp not in CONTAINERS_WITH_ZYPPER, (
-        f"Container '{ctr_without_zypp.id}' is both in CONTAINERS_WITH_ZYPPER and CONTAINERS_WITHOUT_ZYPPER"
-    )
 
-for ctr_without_shell in CONTAINERS_WITHOUT_SHELL:
-    assert ctr_without_shell not in CONTAINERS_WITH_ZYPPER, (
-        f"Container '{ctr_without_shell.id}' is both in CONTAINERS_WITH_ZYPPER and CONTAINERS_WITHOUT_SHELL"
-    )
-    assert ctr_without_shell not in CONTAINERS_WITHOUT_ZYPPER, (
-        f"Container '{ctr_without_shell.id}' is both in CONTAINERS_WITHOUT_ZYPPER and CONTAINERS_WITHOUT_SHELL"
-    )
+@_CATALOG.register("CONTAINERS_WITHOUT_SHELL")
+def _containers_without_shell() -> List[ParameterSet]:
+    return [_CATALOG["NANO_CONTAINER"], *_CATALOG["COSIGN_CONTAINERS"]]
 
 
 #: Containers with L3 support
 # Tumbleweed has no concept of l3 support
 # 16.1 is not yet released, so no l3 support either
-if OS_VERSION in (
-    "tumbleweed",
-    "16.1",
-):
-    L3_CONTAINERS = ()
-else:
-    L3_CONTAINERS = (
+@_CATALOG.register("L3_CONTAINERS")
+def _l3_containers() -> Sequence[ParameterSet]:
+    if OS_VERSION in (
+        "tumbleweed",
+        "16.1",
+    ):
+        return ()
+    return (
         [
-            BASE_CONTAINER,
-            BUSYBOX_CONTAINER,
-            DISTRIBUTION_CONTAINER,
-            GIT_CONTAINER,
-            HELM_CONTAINER,
-            INIT_CONTAINER,
-            MICRO_CONTAINER,
-            MICRO_FIPS_CONTAINER,
-            MINIMAL_CONTAINER,
-            NANO_CONTAINER,
-            PHP_8_APACHE,
-            PHP_8_CLI,
-            PHP_8_FPM,
-            PC_AWS_TOOLCHAIN_RUNTIME_PROVIDER_CONTAINER,
-            PC_GCP_TOOLCHAIN_RUNTIME_PROVIDER_CONTAINER,
-            PC_AZ_TOOLCHAIN_RUNTIME_PROVIDER_CONTAINER,
-            STUNNEL_CONTAINER,
+            _CATALOG["BASE_CONTAINER"],
+            _CATALOG["BUSYBOX_CONTAINER"],
+            _CATALOG["DISTRIBUTION_CONTAINER"],
+            _CATALOG["GIT_CONTAINER"],
+            _CATALOG["HELM_CONTAINER"],
+            _CATALOG["INIT_CONTAINER"],
+            _CATALOG["MICRO_CONTAINER"],
+            _CATALOG["MICRO_FIPS_CONTAINER"],
+            _CATALOG["MINIMAL_CONTAINER"],
+            _CATALOG["NANO_CONTAINER"],
+            _CATALOG["PHP_8_APACHE"],
+            _CATALOG["PHP_8_CLI"],
+            _CATALOG["PHP_8_FPM"],
+            _CATALOG["PC_AWS_TOOLCHAIN_RUNTIME_PROVIDER_CONTAINER"],
+            _CATALOG["PC_GCP_TOOLCHAIN_RUNTIME_PROVIDER_CONTAINER"],
+            _CATALOG["PC_AZ_TOOLCHAIN_RUNTIME_PROVIDER_CONTAINER"],
+            _CATALOG["STUNNEL_CONTAINER"],
         ]
-        + BASE_FIPS_CONTAINERS
-        + CONTAINER_389DS_CONTAINERS
-        + COSIGN_CONTAINERS
-        + GCC_CONTAINERS
-        + GOLANG_CONTAINERS
-        + KEA_CONTAINERS
-        + KIOSK_CONTAINERS
-        + KIWI_CONTAINERS
-        + KUBECTL_CONTAINERS
-        + KUBEVIRT_CONTAINERS
-        + KUBEVIRT_CDI_CONTAINERS
-        + LTSS_BASE_CONTAINERS
-        + LTSS_BASE_FIPS_CONTAINERS
-        + MARIADB_CLIENT_CONTAINERS
-        + MARIADB_CONTAINERS
-        + NGINX_CONTAINERS
-        + NODEJS_BASE_CONTAINERS
-        + NODEJS_MICRO_CONTAINERS
-        + OPENJDK_CONTAINERS
-        + OPENJDK_DEVEL_CONTAINERS
-        + PCP_CONTAINERS
-        + PYTHON_CONTAINERS
-        + PYTHON_MICRO_CONTAINERS
-        + RMT_CONTAINERS
-        + RUBY_CONTAINERS
-        + RUST_CONTAINERS
-        + SPACK_CONTAINERS
-        + VALKEY_CONTAINERS
-        + NVIDIA_CONTAINERS
-    )
+        + _CATALOG["BASE_FIPS_CONTAINERS"]
+        + _CATALOG["CONTAINER_389DS_CONTAINERS"]
+        + _CATALOG["COSIGN_CONTAINERS"]
+        + _CATALOG["GCC_CONTAINERS"]
+        + _CATALOG["GOLANG_CONTAINERS"]
+        + _CATALOG["KEA_CONTAINERS"]
+        + _CATALOG["KIOSK_CONTAINERS"]
+        + _CATALOG["KIWI_CONTAINERS"]
+        + _CATALOG["KUBECTL_CONTAINERS"]
+        + _CATALOG["KUBEVIRT_CONTAINERS"]
+        + _CATALOG["KUBEVIRT_CDI_CONTAINERS"]
+        + _CATALOG["LTSS_BASE_CONTAINERS"]
+        + _CATALOG["LTSS_BASE_FIPS_CONTAINERS"]
+        + _CATALOG["MARIADB_CLIENT_CONTAINERS"]
+        + _CATALOG["MARIADB_CONTAINERS"]
+        + _CATALOG["NGINX_CONTAINERS"]
+        + _CATALOG["NODEJS_BASE_CONTAINERS"]
+        + _CATALOG["NODEJS_MICRO_CONTAINERS"]
+        + _CATALOG["OPENJDK_CONTAINERS"]
+        + _CATALOG["OPENJDK_DEVEL_CONTAINERS"]
+        + _CATALOG["PCP_CONTAINERS"]
+        + _CATALOG["PYTHON_CONTAINERS"]
+        + _CATALOG["PYTHON_MICRO_CONTAINERS"]
+        + _CATALOG["RMT_CONTAINERS"]
+        + _CATALOG["RUBY_CONTAINERS"]
+        + _CATALOG["RUST_CONTAINERS"]
+        + _CATALOG["SPACK_CONTAINERS"]
+        + _CATALOG["VALKEY_CONTAINERS"]
+        + _CATALOG["NVIDIA_CONTAINERS"]
+    )
+
+
+_CATALOG.register_call(
+    "ACC_CONTAINERS", _CATALOG.__getitem__, "POSTGRESQL_CONTAINERS"
+)
 
-ACC_CONTAINERS = POSTGRESQL_CONTAINERS
 
 #: Containers pulled from registry.suse.de
-ALL_CONTAINERS = (
-    CONTAINERS_WITH_ZYPPER
-    + CONTAINERS_WITHOUT_ZYPPER
-    + CONTAINERS_WITHOUT_SHELL
-)
+@_CATALOG.register("ALL_CONTAINERS")
+def _all_containers() -> List[ParameterSet]:
+    containers_with_zypper = _CATALOG["CONTAINERS_WITH_ZYPPER"]
+    containers_without_zypper = _CATALOG["CONTAINERS_WITHOUT_ZYPPER"]
+    containers_without_shell = _CATALOG["CONTAINERS_WITHOUT_SHELL"]
+
+    # can't use sets here, because the list contents are mutable :-(
+    for ctr_with_zypp in containers_with_zypper:
+        assert ctr_with_zypp not in containers_without_shell, (
+            f"Container '{ctr_with_zypp.id}' is both in CONTAINERS_WITH_ZYPPER and CONTAINERS_WITHOUT_SHELL"
+        )
+        assert ctr_with_zypp not in containers_without_zypper, (
+            f"Container '{ctr_with_zypp.id}' is both in CONTAINERS_WITH_ZYPPER and CONTAINERS_WITHOUT_ZYPPER"
+        )
+
+    for ctr_without_zypp in containers_without_zypper:
+        assert ctr_without_zypp not in containers_without_shell, (
+            f"Container '{ctr_without_zypp.id}' is both in CONTAINERS_WITHOUT_ZYPPER and CONTAINERS_WITHOUT_SHELL"
+        )
+        assert ctr_without_zypp not in containers_with_zypper, (
+            f"Container '{ctr_without_zypp.id}' is both in CONTAINERS_WITH_ZYPPER and CONTAINERS_WITHOUT_ZYPPER"
+        )
+
+    for ctr_without_shell in containers_without_shell:
+        assert ctr_without_shell not in containers_with_zypper, (
+            f"Container '{ctr_without_shell.id}' is both in CONTAINERS_WITH_ZYPPER and CONTAINERS_WITHOUT_SHELL"
+        )
+        assert ctr_without_shell not in containers_without_zypper, (
+            f"Container '{ctr_without_shell.id}' is both in CONTAINERS_WITHOUT_ZYPPER and CONTAINERS_WITHOUT_SHELL"
+        )
+
+    return (
+        containers_with_zypper
+        + containers_without_zypper
+        + containers_without_shell
+    )
+
+
+def __getattr__(name: str) -> Any:
+    """Constructs the container group ``name`` on first access (:pep:`562`)."""
+    if name in _CATALOG:
+        return _CATALOG[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()).union(_CATALOG.names()))
+
+
+if sys.version_info < (3, 7):
+    # module level __getattr__ is only supported on Python 3.7+, so we have to
+    # construct everything eagerly
+    _CATALOG.materialize_all()
 
 
 if __name__ == "__main__":
@@ -1627,7 +1864,7 @@ if __name__ == "__main__":
                 return True
         return False
 
-    for param in ALL_CONTAINERS:
+    for param in _CATALOG["ALL_CONTAINERS"]:
         # don't check containers which are known broken or excluded
         if has_true_skipif(param) or has_xfail(param):
             continue
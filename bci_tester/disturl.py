@@ -0,0 +1,145 @@
+"""Cache of the sources referenced by the ``org.openbuildservice.disturl``
+label.
+
+The disturl (e.g.
+``obs://build.suse.de/SUSE:SLE-15-SP7:Update/images/{rev}-{package}``)
+references a revision of a package in the Open Build Service, which never
+changes. Many images are built from the same revision, so
+:py:class:`SourceCache` fetches the source listing of each
+:py:class:`SourceRevision` only once and stores it in
+:file:`$BCI_CACHE_DIR/disturl/`, where it is kept forever. Failed requests are
+not cached. Concurrent requests of the same revision (e.g. from multiple
+:command:`pytest-xdist` workers) are serialized via a file lock, so that only
+the first one contacts the build service.
+
+The listings are fetched via the ``fetch`` function of the cache (defaults to
+:py:func:`fetch_from_obs`). A directory with previously stored listings can
+serve as a recorded store in offline environments, by using it as the cache
+directory together with :py:func:`fetch_unrecorded`.
+
+"""
+
+import hashlib
+import json
+import os
+import urllib.parse
+from dataclasses import asdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+from typing import Optional
+
+import requests
+
+from bci_tester.util import get_cache_dir
+
+
+@dataclass(frozen=True)
+class SourceRevision:
+    """A revision of a package in the Open Build Service."""
+
+    #: hostname of the build service
+    host: str
+
+    #: name of the project
+    project: str
+
+    #: name of the package (without the multibuild flavor)
+    package: str
+
+    #: the source revision (md5 sum of the sources)
+    rev: str
+
+    @staticmethod
+    def from_disturl(disturl: str) -> "SourceRevision":
+        """Extracts the source revision from the url ``disturl``."""
+        url = urllib.parse.urlparse(disturl)
+        if url.scheme != "obs" or not url.hostname:
+            raise ValueError(f"{disturl} is not an obs:// url")
+        rev, _, package = Path(url.path).name.partition("-")
+        return SourceRevision(
+            host=url.hostname,
+            project=Path(url.path).parent.parent.name,
+            package=package.partition(":")[0],
+            rev=rev,
+        )
+
+    @property
+    def key(self) -> str:
+        """The name of the revision in the cache."""
+        return hashlib.sha256(
+            f"{self.host}/{self.project}/{self.package}?rev={self.rev}".encode()
+        ).hexdigest()
+
+
+def fetch_from_obs(
+    revision: SourceRevision, cert: Optional[str] = None
+) -> str:
+    """Returns the source listing of ``revision`` from the public api of its
+    build service, authenticated with the certificate ``cert``.
+
+    """
+    response = requests.get(
+        f"https://{revision.host}/public/source/{revision.project}/"
+        f"{revision.package}",
+        params={"rev": revision.rev},
+        cert=cert,
+        timeout=(5, 10),
+    )
+    response.raise_for_status()
+    return response.text
+
+
+def fetch_unrecorded(revision: SourceRevision) -> str:
+    """Fetch function of an offline :py:class:`SourceCache`, which fails for
+    every revision that is not stored yet.
+
+    """
+    raise LookupError(f"The sources of {revision} are not recorded")
+
+
+class SourceCache:
+    """Persistent cache of the source listings of :py:class:`SourceRevision`
+    in ``cache_dir``, which fetches missing listings via ``fetch``.
+
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[SourceRevision], str] = fetch_from_obs,
+        cache_dir: Optional[Path] = None,
+    ) -> None:
+        self.fetch = fetch
+        self.cache_dir = cache_dir or get_cache_dir("disturl")
+
+    def _read(self, path: Path) -> Optional[str]:
+        try:
+            return json.loads(path.read_text())["listing"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def get_listing(self, revision: SourceRevision) -> str:
+        """Returns the source listing of ``revision``, fetching it only if it
+        is not in the cache yet.
+
+        """
+        path = self.cache_dir / f"{revision.key}.json"
+        listing = self._read(path)
+        if listing is not None:
+            return listing
+
+        # pylint: disable=import-outside-toplevel
+        from filelock import FileLock
+
+        with FileLock(f"{path}.lock"):
+            # another process might have fetched it in the meantime
+            listing = self._read(path)
+            if listing is not None:
+                return listing
+            listing = self.fetch(revision)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(
+                json.dumps({**asdict(revision), "listing": listing})
+            )
+            os.replace(tmp_path, path)
+        return listing
@@ -0,0 +1,195 @@
+"""Database of the durations of previous test runs.
+
+The durations are stored in a json file mapping the node id of each test to
+its duration in seconds. They are recorded by the :command:`pytest-xdist`
+controller when ``--cost-aware-scheduling`` is used and can be imported from
+the junit xml files written by tox (:file:`junit_{envname}.xml`):
+
+.. code-block:: shell-session
+
+   $ python -m bci_tester.durations junit_*.xml
+
+"""
+
+import json
+import os
+import statistics
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+
+from bci_tester.util import get_cache_dir
+
+#: Duration in seconds assumed for tests without any recorded duration
+DEFAULT_DURATION = 1.0
+
+
+def get_default_db_path() -> Path:
+    """Returns the default location of the duration database."""
+    return get_cache_dir("durations") / "durations.json"
+
+
+def _classname_to_nodeid_prefix(classname: str, rootdir: Path) -> str:
+    # junit stores the path of the test module and the test class names
+    # joined with dots in the classname (e.g. tests.test_all.TestFoo)
+    parts = classname.split(".")
+    for i in range(len(parts), 0, -1):
+        path = "/".join(parts[:i]) + ".py"
+        if (rootdir / path).exists():
+            return "::".join([path] + parts[i:])
+    return "/".join(parts) + ".py"
+
+
+def _base_name(nodeid: str) -> str:
+    return nodeid.split("[", 1)[0]
+
+
+def _module(nodeid: str) -> str:
+    return nodeid.split("::", 1)[0]
+
+
+class DurationDB:
+    """Durations of previous test runs with estimates for unknown tests."""
+
+    def __init__(self, durations: Optional[Dict[str, float]] = None) -> None:
+        self.durations: Dict[str, float] = dict(durations or {})
+        self._medians: Optional[Dict[str, float]] = None
+
+    @staticmethod
+    def load(path: Path) -> "DurationDB":
+        """Loads the database from ``path``, a missing or broken file results
+        in an empty database.
+
+        """
+        try:
+            durations = json.loads(path.read_text())
+        except (OSError, ValueError):
+            durations = {}
+        return DurationDB(durations if isinstance(durations, dict) else {})
+
+    def save(self, path: Path) -> None:
+        """Writes the database atomically to ``path``."""
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(
+            json.dumps(self.durations, indent=0, sort_keys=True)
+        )
+        os.replace(tmp_path, path)
+
+    def update(self, durations: Dict[str, float]) -> None:
+        """Adds ``durations`` to the database, replacing existing entries."""
+        self.durations.update(durations)
+        self._medians = None
+
+    def import_junit(self, junit_xml: Path, rootdir: Path) -> int:
+        """Imports all durations of passed or failed tests from the junit xml
+        file ``junit_xml`` and returns the number of imported tests.
+
+        """
+        durations: Dict[str, float] = {}
+        for testcase in ET.parse(str(junit_xml)).iter("testcase"):
+            if testcase.find("skipped") is not None:
+                continue
+            nodeid = (
+                _classname_to_nodeid_prefix(
+                    testcase.get("classname", ""), rootdir
+                )
+                + "::"
+                + testcase.get("name", "")
+            )
+            durations[nodeid] = float(testcase.get("time", 0))
+        self.update(durations)
+        return len(durations)
+
+    def _get_medians(self) -> Dict[str, float]:
+        if self._medians is None:
+            groups: Dict[str, List[float]] = {}
+            for nodeid, duration in self.durations.items():
+                for key in (_base_name(nodeid), _module(nodeid), ""):
+                    groups.setdefault(key, []).append(duration)
+            self._medians = {
+                key: statistics.median(values)
+                for key, values in groups.items()
+            }
+        return self._medians
+
+    def estimate(self, nodeid: str) -> float:
+        """Returns the recorded duration of ``nodeid``. Unknown tests are
+        estimated by the median duration of the other parametrizations of the
+        same test, of the tests in the same module or of all tests.
+
+        """
+        if nodeid in self.durations:
+            return self.durations[nodeid]
+        medians = self._get_medians()
+        for key in (_base_name(nodeid), _module(nodeid), ""):
+            if key in medians:
+                return medians[key]
+        return DEFAULT_DURATION
+
+
+class DurationRecorder:
+    """pytest plugin recording the duration of each test (including the
+    setup, which contains the container launch, and the teardown) and adding
+    them to the database at the end of the session.
+
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        self._durations: Dict[str, float] = {}
+
+    def pytest_runtest_logreport(self, report) -> None:
+        if report.skipped:
+            return
+        self._durations[report.nodeid] = (
+            self._durations.get(report.nodeid, 0.0) + report.duration
+        )
+
+    def pytest_sessionfinish(self) -> None:
+        if not self._durations:
+            return
+        db = DurationDB.load(self.db_path)
+        db.update(self._durations)
+        db.save(self.db_path)
+
+
+def import_junit_files(
+    db_path: Path,
+    junit_files: Iterable[Path],
+    rootdir: Path,
+    only_newer: bool = False,
+) -> DurationDB:
+    """Imports the durations of all ``junit_files`` into the database at
+    ``db_path`` and returns it. If ``only_newer`` is ``True``, then junit
+    files that are older than the database are skipped.
+
+    """
+    db = DurationDB.load(db_path)
+    db_mtime = db_path.stat().st_mtime if db_path.exists() else 0.0
+    for junit_file in junit_files:
+        try:
+            if only_newer and junit_file.stat().st_mtime <= db_mtime:
+                continue
+            db.import_junit(junit_file, rootdir)
+        except (OSError, ET.ParseError):
+            continue
+    db.save(db_path)
+    return db
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Import test durations from junit xml files"
+    )
+    parser.add_argument("junit_files", nargs="+", type=Path)
+    parser.add_argument("--db", type=Path, default=None)
+    args = parser.parse_args()
+
+    db_file = args.db or get_default_db_path()
+    res = import_junit_files(db_file, args.junit_files, Path.cwd())
+    print(f"{db_file} contains the durations of {len(res.durations)} tests")
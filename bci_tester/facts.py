@@ -0,0 +1,251 @@
+"""Batched collection of facts about a running container.
+
+Most tests in :file:`tests/test_all.py` only inspect the static contents of the
+container (:file:`/etc/os-release`, file types, symlink targets, installed
+users, …). Each ``connection.file(…).exists`` or
+``connection.check_output(…)`` is a separate :command:`podman exec` with a
+round trip time of about 100ms, which adds up to hundreds of execs per
+container.
+
+:py:func:`get_container_facts` gathers all of these facts in a single shell
+script executed in the container, parses its output into a
+:py:class:`ContainerFacts` object and caches it for the lifetime of the
+container (i.e. per container id). The facts reflect the state of the
+container when they were first gathered, so they must only be used for checks
+of the image contents and not after the container has been modified.
+
+"""
+
+import shlex
+import uuid
+from dataclasses import dataclass
+from typing import Dict
+from typing import Iterable
+from typing import Optional
+from typing import Tuple
+
+from pytest_container.container import ContainerData
+
+from bci_tester.util import parse_os_release
+
+#: files whose contents are always part of the fact sheet
+DEFAULT_CONTENTS = ("/etc/os-release", "/etc/passwd", "/etc/group")
+
+
+@dataclass(frozen=True)
+class FileFacts:
+    """The type of a path in the container, equivalent to the respective
+    properties of :py:class:`testinfra.modules.file.File`.
+
+    """
+
+    path: str
+    exists: bool
+    is_file: bool
+    is_directory: bool
+    is_symlink: bool
+    #: the fully resolved target of the symlink (:command:`readlink -f`)
+    linked_to: Optional[str]
+
+
+@dataclass(frozen=True)
+class CommandResult:
+    """Exit code and (unmodified) standard output of a command."""
+
+    rc: int
+    stdout: str
+
+
+def _section(marker: str, kind: str, key: str, command: str) -> str:
+    # The output of each command is framed by a header and a footer with the
+    # exit code. The newline before the footer ensures that it is on its own
+    # line and is removed again by the parser.
+    return (
+        f"echo {shlex.quote(f'{marker} {kind} {key}')}\n"
+        f"{command}\n"
+        f'__rc=$?; echo; echo "{marker} end $__rc"\n'
+    )
+
+
+def _file_test(path: str) -> str:
+    quoted = shlex.quote(path)
+    return (
+        "__f=; "
+        + "; ".join(
+            f'test {flag} {quoted} && __f="${{__f}}{flag[1]}"'
+            for flag in ("-e", "-f", "-d", "-L")
+        )
+        + f'; echo "$__f"; test -L {quoted} && readlink -f {quoted}; true'
+    )
+
+
+def create_fact_script(
+    marker: str,
+    paths: Iterable[str] = (),
+    commands: Iterable[str] = (),
+    contents: Iterable[str] = (),
+    outputs: Iterable[str] = (),
+) -> str:
+    """Returns a POSIX shell script that gathers the facts about the ``paths``,
+    the existence of the ``commands``, the ``contents`` of files, the
+    ``outputs`` of shell commands. The output of
+    each section is framed by lines starting with ``marker``.
+
+    """
+    script = ""
+    for path in paths:
+        script += _section(marker, "file", path, _file_test(path))
+    for command in commands:
+        script += _section(
+            marker,
+            "which",
+            command,
+            f"command -v {shlex.quote(command)} >/dev/null 2>&1",
+        )
+    for path in (*DEFAULT_CONTENTS, *contents):
+        script += _section(
+            marker, "content", path, f"cat -- {shlex.quote(path)} 2>/dev/null"
+        )
+    for cmd in outputs:
+        script += _section(marker, "output", cmd, f"( {cmd} )")
+    return script
+
+
+def parse_fact_output(
+    marker: str, stdout: str
+) -> Dict[Tuple[str, str], CommandResult]:
+    """Splits the output of the script created by
+    :py:func:`create_fact_script` into the result of each section, indexed by
+    the kind of the section and its key.
+
+    """
+    results: Dict[Tuple[str, str], CommandResult] = {}
+    header = f"{marker} "
+    footer = f"\n{marker} end "
+    pos = 0
+    while True:
+        start = stdout.find(header, pos)
+        if start == -1:
+            return results
+        header_end = stdout.find("\n", start)
+        kind, _, key = stdout[start + len(header) : header_end].partition(" ")
+        end = stdout.find(footer, header_end)
+        if end == -1:
+            # the script got killed in the middle of this section
+            return results
+        rc_end = stdout.find("\n", end + len(footer))
+        if rc_end == -1:
+            rc_end = len(stdout)
+        results[(kind, key)] = CommandResult(
+            rc=int(stdout[end + len(footer) : rc_end]),
+            stdout=stdout[header_end + 1 : end],
+        )
+        pos = rc_end
+
+
+class ContainerFacts:
+    """The facts about a container as gathered by
+    :py:func:`get_container_facts`. Querying facts that were not requested
+    raises a :py:class:`KeyError`.
+
+    """
+
+    def __init__(self, results: Dict[Tuple[str, str], CommandResult]) -> None:
+        self._results = results
+
+    def file(self, path: str) -> FileFacts:
+        """Returns the type of ``path`` and its symlink target."""
+        lines = self._results[("file", path)].stdout.splitlines()
+        flags = lines[0] if lines else ""
+        return FileFacts(
+            path=path,
+            exists="e" in flags,
+            is_file="f" in flags,
+            is_directory="d" in flags,
+            is_symlink="L" in flags,
+            linked_to=lines[1] if "L" in flags and len(lines) > 1 else None,
+        )
+
+    def exists(self, command: str) -> bool:
+        """Returns whether ``command`` is in ``$PATH``."""
+        return self._results[("which", command)].rc == 0
+
+    def content(self, path: str) -> Optional[str]:
+        """Returns the contents of the file ``path`` or ``None`` if it cannot
+        be read.
+
+        """
+        result = self._results[("content", path)]
+        return result.stdout if result.rc == 0 else None
+
+    def output(self, command: str) -> CommandResult:
+        """Returns the exit code and output of the shell ``command``."""
+        return self._results[("output", command)]
+
+    def check_output(self, command: str) -> str:
+        """Returns the output of ``command`` without trailing newlines, like
+        :py:meth:`testinfra.host.Host.check_output`, and asserts that it
+        succeeded.
+
+        """
+        result = self.output(command)
+        assert result.rc == 0, (
+            f"{command} failed with exit code {result.rc}: {result.stdout}"
+        )
+        return result.stdout.rstrip("\r\n")
+
+    @property
+    def os_release(self) -> Dict[str, str]:
+        """The variables defined in :file:`/etc/os-release`."""
+        return parse_os_release(self.content("/etc/os-release") or "")
+
+    @property
+    def users(self) -> Dict[str, Tuple[int, int]]:
+        """uid and gid of each user in :file:`/etc/passwd`."""
+        users: Dict[str, Tuple[int, int]] = {}
+        for line in (self.content("/etc/passwd") or "").splitlines():
+            fields = line.split(":")
+            if len(fields) >= 4:
+                users[fields[0]] = (int(fields[2]), int(fields[3]))
+        return users
+
+    @property
+    def groups(self) -> Dict[str, int]:
+        """gid of each group in :file:`/etc/group`."""
+        groups: Dict[str, int] = {}
+        for line in (self.content("/etc/group") or "").splitlines():
+            fields = line.split(":")
+            if len(fields) >= 3:
+                groups[fields[0]] = int(fields[2])
+        return groups
+
+
+_FACTS_CACHE: Dict[Tuple, ContainerFacts] = {}
+
+
+def get_container_facts(
+    container: ContainerData,
+    paths: Iterable[str] = (),
+    commands: Iterable[str] = (),
+    contents: Iterable[str] = (),
+    outputs: Iterable[str] = (),
+) -> ContainerFacts:
+    """Gathers the facts about the running ``container`` in a single
+    :command:`exec` (see :py:func:`create_fact_script` for the parameters).
+    The result is cached per container id and set of requested facts.
+
+    """
+    paths, commands, contents, outputs = (
+        tuple(paths),
+        tuple(commands),
+        tuple(contents),
+        tuple(outputs),
+    )
+    key = (container.container_id, paths, commands, contents, outputs)
+    if key not in _FACTS_CACHE:
+        marker = f"@@bci-facts-{uuid.uuid4().hex}@@"
+        stdout = container.connection.check_output(
+            create_fact_script(marker, paths, commands, contents, outputs)
+        )
+        _FACTS_CACHE[key] = ContainerFacts(parse_fact_output(marker, stdout))
+    return _FACTS_CACHE[key]
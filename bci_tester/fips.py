@@ -1,10 +1,30 @@
 """Module containing utility functions & constants for FIPS compliant digests."""
 
 import os
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from subprocess import DEVNULL
+from subprocess import check_output
 from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import NamedTuple
+from typing import Optional
 from typing import Tuple
+from typing import Union
 
+from pytest_container import DerivedContainer
+from pytest_container import OciRuntimeBase
+from pytest_container.container import BindMount
+from pytest_container.container import Container
+from pytest_container.container import ContainerData
+
+from bci_tester.build_cache import CachedDerivedContainer
 from bci_tester.data import OS_VERSION
+from bci_tester.data import ZYPP_CREDENTIALS_DIR
+from bci_tester.facts import CommandResult
+from bci_tester.facts import get_container_facts
 
 #: openssl digests that are not FIPS compliant
 NONFIPS_DIGESTS: Tuple[str, ...] = (
@@ -122,6 +142,218 @@ else:
     FIPS_GCRYPT_DIGESTS += ("sha1",)
 
 
+class FipsTestProgram(NamedTuple):
+    """A test program in :file:`tests/files` that calculates a digest using
+    one of the crypto libraries. It is installed as :file:`/bin/{source
+    without .c}` in the FIPS tester image.
+
+    """
+
+    #: file name of the source in :file:`tests/files`
+    source: str
+
+    #: packages that are needed to build the program
+    build_packages: str
+
+    #: arguments of :command:`gcc` building the program
+    gcc_args: str
+
+    @property
+    def binary(self) -> str:
+        """The path of the program in the FIPS tester image."""
+        return f"/bin/{self.source[: -len('.c')]}"
+
+
+#: The test programs of OpenSSL, GnuTLS and libgcrypt in the FIPS tester image
+FIPS_TEST_PROGRAMS: Tuple[FipsTestProgram, ...] = (
+    FipsTestProgram(
+        "fips-test.c",
+        "libopenssl-devel",
+        "-O2 -Wall -Wextra -Wpedantic -lcrypto -lssl",
+    ),
+    FipsTestProgram(
+        "fips-test-gnutls.c",
+        "gnutls-devel",
+        "-Og -g3 -Wall -Wextra -Wpedantic -lgnutls",
+    ),
+    FipsTestProgram(
+        "fips-test-gcrypt.c",
+        "libgcrypt-devel",
+        "-O2 -Wall -Wextra -Werror -lgcrypt",
+    ),
+)
+
+#: packages of the FIPS tester image: the libraries of the test programs and
+#: :command:`openssl`, :command:`gnutls-cli` and :command:`gpgconf`, which the
+#: tests run as well
+FIPS_TESTER_PACKAGES = "openssl gnutls dirmngr"
+
+
+def _zypp_credentials() -> Dict[str, str]:
+    # secret id → readable credentials file of the host
+    credentials_dir = Path(ZYPP_CREDENTIALS_DIR)
+    if not credentials_dir.is_dir():
+        return {}
+    return {
+        f"zypp-{path.name}": str(path)
+        for path in sorted(credentials_dir.iterdir())
+        if path.is_file() and os.access(path, os.R_OK)
+    }
+
+
+def fips_tester_containerfile(base_url: str) -> str:
+    """Returns the multi-stage :file:`Containerfile` of the FIPS tester image
+    of the base image ``base_url``, without the ``FROM`` line of the builder
+    stage.
+
+    The builder stage installs the toolchain before it copies the sources,
+    so that the layer with the toolchain is reused by the container runtime
+    when only the sources change, and compiles all
+    :py:const:`FIPS_TEST_PROGRAMS`. The final stage only installs
+    :py:const:`FIPS_TESTER_PACKAGES` and copies the test programs from the
+    builder stage.
+
+    The zypp credentials of the host are mounted as build secrets, so that
+    they are not stored in the image. Docker only supports them with BuildKit
+    (see :py:func:`docker_buildkit_enabled`).
+
+    """
+    mounts = "".join(
+        f"--mount=type=secret,id={secret_id},"
+        f"target={ZYPP_CREDENTIALS_DIR}/{Path(path).name} "
+        for secret_id, path in _zypp_credentials().items()
+    )
+    build_packages = " ".join(
+        ["gcc"] + [program.build_packages for program in FIPS_TEST_PROGRAMS]
+    )
+    sources = " ".join(
+        f"tests/files/{program.source}" for program in FIPS_TEST_PROGRAMS
+    )
+    compile_commands = " && \\\n    ".join(
+        f"gcc {program.source} {program.gcc_args} -o {program.binary}"
+        for program in FIPS_TEST_PROGRAMS
+    )
+    binaries = " ".join(program.binary for program in FIPS_TEST_PROGRAMS)
+    return f"""RUN {mounts}zypper --gpg-auto-import-keys -n ref && \\
+    zypper -n in {build_packages}
+WORKDIR /src/
+COPY {sources} /src/
+RUN {compile_commands}
+
+FROM {base_url}
+RUN {mounts}zypper --gpg-auto-import-keys -n ref && \\
+    zypper -n in {FIPS_TESTER_PACKAGES} && \\
+    zypper -n clean
+COPY --from=0 {binaries} /bin/
+WORKDIR /src/
+"""
+
+
+def docker_buildkit_enabled(runner_binary: str = "docker") -> bool:
+    """Returns whether :command:`docker build` uses BuildKit, which is
+    required for ``RUN --mount=type=secret``: either as set via
+    ``DOCKER_BUILDKIT`` or as the default builder since docker 23.
+
+    """
+    setting = os.getenv("DOCKER_BUILDKIT")
+    if setting is not None:
+        return setting.lower() not in ("0", "false")
+    version = (
+        check_output(
+            [runner_binary, "version", "-f", "{{.Client.Version}}"],
+            stderr=DEVNULL,
+        )
+        .decode()
+        .strip()
+    )
+    try:
+        return int(version.split(".")[0]) >= 23
+    except ValueError:
+        return False
+
+
+@dataclass
+class FipsTesterContainer(CachedDerivedContainer):
+    """A :py:class:`~bci_tester.build_cache.CachedDerivedContainer` with the
+    FIPS test programs (see :py:func:`fips_tester_containerfile`), whose build
+    gets the zypp credentials of the host as secrets.
+
+    """
+
+    #: the ``--secret`` values passed to the build
+    build_secrets: List[str] = field(default_factory=list)
+
+    def finalize_containerfile(
+        self, container_runtime: OciRuntimeBase, base_image_id: str
+    ) -> None:
+        # the final stage starts from the same image as the builder stage
+        base_url = (
+            self.base
+            if isinstance(self.base, str)
+            else self.base.url or self.base._build_tag
+        )
+        self.containerfile = fips_tester_containerfile(base_url)
+
+    def prepare_container(
+        self,
+        container_runtime: OciRuntimeBase,
+        rootdir: Path,
+        extra_build_args: Optional[List[str]] = None,
+    ) -> None:
+        if (
+            self.build_secrets
+            and os.path.basename(container_runtime.runner_binary) == "docker"
+            and not docker_buildkit_enabled(container_runtime.runner_binary)
+        ):
+            raise RuntimeError(
+                "The FIPS tester image gets the zypp credentials as build "
+                "secrets, which docker only supports with BuildKit: set "
+                "DOCKER_BUILDKIT=1 and install docker-buildx"
+            )
+        secret_args = []
+        for secret in self.build_secrets:
+            secret_args.extend(("--secret", secret))
+        super().prepare_container(
+            container_runtime,
+            rootdir,
+            [*(extra_build_args or []), *secret_args],
+        )
+
+
+def create_fips_tester_container(
+    base: Union[Container, DerivedContainer],
+) -> FipsTesterContainer:
+    """Returns the container with the FIPS test programs (see
+    :py:func:`fips_tester_containerfile`) based on ``base`` and with its
+    launch settings. The image is built once per ``base`` and shared by the
+    OpenSSL, GnuTLS, libgcrypt and :command:`gpgconf` tests.
+
+    """
+    return FipsTesterContainer(
+        base=base,
+        # completed with the url of the base in finalize_containerfile()
+        containerfile=fips_tester_containerfile(""),
+        build_secrets=[
+            f"id={secret_id},src={path}"
+            for secret_id, path in _zypp_credentials().items()
+        ],
+        extra_environment_variables=base.extra_environment_variables,
+        extra_launch_args=base.extra_launch_args,
+        custom_entry_point=base.custom_entry_point,
+        volume_mounts=(
+            [
+                BindMount(
+                    ZYPP_CREDENTIALS_DIR,
+                    host_path=ZYPP_CREDENTIALS_DIR,
+                    flags=[],
+                )
+            ]
+            if Path(ZYPP_CREDENTIALS_DIR).exists()
+            else []
+        ),
+    )
+
+
 def host_fips_enabled(fipsfile: str = "/proc/sys/crypto/fips_enabled") -> bool:
     """Returns a boolean indicating whether FIPS mode is enabled on this
     machine.
@@ -140,3 +372,39 @@ def host_fips_enabled(fipsfile: str = "/proc/sys/crypto/fips_enabled") -> bool:
 def target_fips_enforced() -> bool:
     """Returns a boolean indicating whether FIPS mode is enforced on this target."""
     return os.getenv("TARGET", "obs") in ("dso",)
+
+
+def run_digest_commands(
+    container: ContainerData, commands: Dict[str, str]
+) -> Dict[str, CommandResult]:
+    """Runs the shell command of each digest in ``commands`` (digest → command)
+    in ``container`` in a single :command:`exec` and returns the exit code and
+    the combined standard output and error of each digest.
+
+    """
+    # stderr of the whole command line and not only of its last command
+    outputs = {digest: f"( {cmd} ) 2>&1" for digest, cmd in commands.items()}
+    results = get_container_facts(container, outputs=outputs.values())
+    return {digest: results.output(cmd) for digest, cmd in outputs.items()}
+
+
+def null_digest_failures(
+    results: Dict[str, CommandResult], digests: Iterable[str]
+) -> List[str]:
+    """Returns a description of each of the ``digests`` whose command in
+    ``results`` failed or did not print its digest of empty input from
+    :py:const:`NULL_DIGESTS`.
+
+    """
+    failures = []
+    for digest in digests:
+        result = results[digest]
+        if result.rc != 0:
+            failures.append(
+                f"{digest} failed with exit code {result.rc}: {result.stdout}"
+            )
+        elif f"= {NULL_DIGESTS[digest]}" not in result.stdout:
+            failures.append(
+                f"unexpected digest of hash {digest}: {result.stdout}"
+            )
+    return failures
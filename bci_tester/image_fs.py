@@ -0,0 +1,348 @@
+"""Read-only access to the filesystem of a container image without launching
+a container.
+
+Many checks only read static files of the image (:file:`/etc/os-release`, the
+product files, licenses, …). :py:func:`export_image_rootfs` exports the root
+filesystem of an image once per host into a tarball in
+:file:`$BCI_CACHE_DIR/rootfs/` (keyed by the image id) and
+:py:class:`ImageFilesystem` serves the files from it with an interface modeled
+after :py:class:`testinfra.modules.file.File`:
+
+.. code-block:: python
+
+   @pytest.mark.parametrize(
+       "container_image_fs", CONTAINER_IMAGES, indirect=True
+   )
+   def test_product(container_image_fs):
+       assert container_image_fs.file("/etc/products.d").is_directory
+
+The tarballs of images that no longer exist are removed at the end of the test
+run by :py:class:`RootfsCachePruner`, as are the least recently used ones once
+the cache exceeds :py:const:`ROOTFS_CACHE_MAX_SIZE`.
+
+"""
+
+import os
+import posixpath
+import tarfile
+from pathlib import Path
+from subprocess import DEVNULL
+from subprocess import check_output
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from pytest_container import OciRuntimeBase
+
+from bci_tester.util import get_cache_dir
+from bci_tester.util import get_image_id
+from bci_tester.util import parse_os_release
+
+#: default ``$PATH`` in which :py:meth:`ImageFilesystem.exists` searches
+DEFAULT_PATH = "/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin"
+
+#: size in bytes above which the least recently used root filesystems are
+#: removed from the cache
+ROOTFS_CACHE_MAX_SIZE = 10 * 1024**3
+
+#: maximum number of symbolic links that are followed when resolving a path
+_MAX_SYMLINKS = 40
+
+
+def export_image_rootfs(container_runtime: OciRuntimeBase, image: str) -> Path:
+    """Exports the root filesystem of the local ``image`` into a tarball in
+    the cache (unless it is already present) and returns its path.
+
+    """
+    image_id = get_image_id(container_runtime, image)
+    assert image_id, f"image {image} does not exist"
+    tarball = get_cache_dir("rootfs") / f"{image_id}.tar"
+
+    # pylint: disable=import-outside-toplevel
+    from filelock import FileLock
+
+    with FileLock(f"{tarball}.lock"):
+        if tarball.exists():
+            # the modification time records the last use for the pruning
+            os.utime(tarball)
+            return tarball
+
+        runtime = container_runtime.runner_binary
+        # the container is never started, the command just has to exist for
+        # images without an entrypoint & cmd
+        ctr_id = (
+            check_output([runtime, "create", image, "/bin/true"])
+            .decode()
+            .strip()
+        )
+        tmp_tarball = tarball.with_name(f"{tarball.name}.{os.getpid()}.tmp")
+        try:
+            check_output(
+                [runtime, "export", "-o", str(tmp_tarball), ctr_id],
+                stderr=DEVNULL,
+            )
+            os.replace(tmp_tarball, tarball)
+        finally:
+            check_output([runtime, "rm", "-f", ctr_id])
+            if tmp_tarball.exists():
+                tmp_tarball.unlink()
+
+    return tarball
+
+
+def prune_rootfs_cache(
+    container_runtime: OciRuntimeBase,
+    max_size: int = ROOTFS_CACHE_MAX_SIZE,
+) -> List[Path]:
+    """Removes the exported root filesystems of images that no longer exist
+    in ``container_runtime`` and the least recently used ones beyond
+    ``max_size`` bytes, returns the paths of the removed tarballs. Tarballs
+    that are being exported are skipped.
+
+    """
+    # pylint: disable=import-outside-toplevel
+    from filelock import FileLock
+    from filelock import Timeout
+
+    cached: List[Tuple[float, int, Path]] = []
+    for tarball in get_cache_dir("rootfs").glob("*.tar"):
+        stat = tarball.stat()
+        cached.append((stat.st_mtime, stat.st_size, tarball))
+    # most recently used first
+    cached.sort(reverse=True)
+
+    removed: List[Path] = []
+    total_size = 0
+    for _, size, tarball in cached:
+        total_size += size
+        if (
+            total_size <= max_size
+            and get_image_id(container_runtime, tarball.stem) is not None
+        ):
+            continue
+        try:
+            with FileLock(f"{tarball}.lock", timeout=0):
+                tarball.unlink()
+        except Timeout:
+            continue
+        total_size -= size
+        removed.append(tarball)
+    return removed
+
+
+class RootfsCachePruner:
+    """pytest plugin calling :py:func:`prune_rootfs_cache` at the end of the
+    test run. It must only be registered in the :command:`pytest-xdist`
+    controller (or without xdist).
+
+    """
+
+    def pytest_sessionfinish(self, session) -> None:
+        if not any(get_cache_dir("rootfs").glob("*.tar")):
+            return
+        # pylint: disable=import-outside-toplevel
+        from pytest_container.runtime import get_selected_runtime
+
+        try:
+            container_runtime = get_selected_runtime()
+        except ValueError:
+            # without a container runtime, no images exist that could be
+            # checked
+            return
+        prune_rootfs_cache(container_runtime)
+
+
+class ImageFile:
+    """A file in an :py:class:`ImageFilesystem`, its properties behave like
+    the ones of :py:class:`testinfra.modules.file.File`.
+
+    """
+
+    def __init__(self, image_fs: "ImageFilesystem", path: str) -> None:
+        self._fs = image_fs
+        self.path = path
+
+    @property
+    def _member(self) -> Optional[tarfile.TarInfo]:
+        # the path itself, not following it if it is a symlink
+        parent = self._fs.resolve(posixpath.dirname(self.path))
+        if parent is None:
+            return None
+        return self._fs.members.get(
+            posixpath.join(parent, posixpath.basename(self.path))
+        )
+
+    @property
+    def _target(self) -> Optional[tarfile.TarInfo]:
+        # the file after following all symlinks
+        resolved = self._fs.resolve(self.path)
+        return None if resolved is None else self._fs.members.get(resolved)
+
+    @property
+    def exists(self) -> bool:
+        return self._target is not None
+
+    @property
+    def is_file(self) -> bool:
+        target = self._target
+        return target is not None and (target.isfile() or target.islnk())
+
+    @property
+    def is_directory(self) -> bool:
+        target = self._target
+        return target is not None and target.isdir()
+
+    @property
+    def is_symlink(self) -> bool:
+        member = self._member
+        return member is not None and member.issym()
+
+    @property
+    def linked_to(self) -> Optional[str]:
+        """The fully resolved path (like :command:`readlink -f`)."""
+        return self._fs.resolve(self.path)
+
+    @property
+    def is_executable(self) -> bool:
+        target = self._target
+        return target is not None and bool(target.mode & 0o111)
+
+    @property
+    def mode(self) -> int:
+        return self._required_target.mode & 0o7777
+
+    @property
+    def uid(self) -> int:
+        return self._required_target.uid
+
+    @property
+    def gid(self) -> int:
+        return self._required_target.gid
+
+    @property
+    def size(self) -> int:
+        return self._required_target.size
+
+    @property
+    def content(self) -> bytes:
+        return self._fs.read_bytes(self._required_target)
+
+    @property
+    def content_string(self) -> str:
+        return self.content.decode()
+
+    def listdir(self) -> List[str]:
+        """Returns the names of the entries of this directory."""
+        directory = self._fs.resolve(self.path)
+        assert directory is not None and self.is_directory, (
+            f"{self.path} is not a directory"
+        )
+        return sorted(self._fs.children.get(directory, []))
+
+    @property
+    def _required_target(self) -> tarfile.TarInfo:
+        target = self._target
+        if target is None:
+            raise FileNotFoundError(self.path)
+        return target
+
+
+class ImageFilesystem:
+    """The root filesystem of a container image as exported by
+    :py:func:`export_image_rootfs`. The tarball stays open until
+    :py:meth:`close` is called or the ``with`` block is left.
+
+    """
+
+    def __init__(self, tarball: Path) -> None:
+        self._tar = tarfile.open(str(tarball))
+        #: all members indexed by their absolute & normalized path
+        self.members: Dict[str, tarfile.TarInfo] = {"/": tarfile.TarInfo("/")}
+        self.members["/"].type = tarfile.DIRTYPE
+        #: names of the entries of each directory
+        self.children: Dict[str, List[str]] = {}
+        for member in self._tar.getmembers():
+            path = posixpath.normpath(posixpath.join("/", member.name))
+            if path != "/":
+                self.members[path] = member
+                parent, name = posixpath.split(path)
+                self.children.setdefault(parent, []).append(name)
+
+    def close(self) -> None:
+        """Closes the tarball, the contents of files cannot be read
+        afterwards.
+
+        """
+        self._tar.close()
+
+    def __enter__(self) -> "ImageFilesystem":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def resolve(self, path: str) -> Optional[str]:
+        """Returns ``path`` with all symbolic links resolved or ``None`` if it
+        does not exist.
+
+        """
+        remaining = [part for part in path.split("/") if part][::-1]
+        resolved = "/"
+        followed = 0
+        while remaining:
+            part = remaining.pop()
+            if part == ".":
+                continue
+            if part == "..":
+                resolved = posixpath.dirname(resolved)
+                continue
+
+            candidate = posixpath.join(resolved, part)
+            member = self.members.get(candidate)
+            if member is None:
+                return None
+            if member.issym():
+                followed += 1
+                if followed > _MAX_SYMLINKS:
+                    return None
+                if member.linkname.startswith("/"):
+                    resolved = "/"
+                remaining.extend(
+                    part for part in member.linkname.split("/")[::-1] if part
+                )
+                continue
+            resolved = candidate
+        return resolved
+
+    def read_bytes(self, member: tarfile.TarInfo) -> bytes:
+        """Returns the contents of the regular file ``member``."""
+        if member.islnk():
+            # hard links refer to the path of another member
+            member = self.members[
+                posixpath.normpath(posixpath.join("/", member.linkname))
+            ]
+        fileobj = self._tar.extractfile(member)
+        if fileobj is None:
+            raise IsADirectoryError(member.name)
+        with fileobj:
+            return fileobj.read()
+
+    def file(self, path: str) -> ImageFile:
+        """Returns the file ``path`` of the image."""
+        return ImageFile(self, path)
+
+    def exists(self, command: str, path: str = DEFAULT_PATH) -> bool:
+        """Returns whether ``command`` is an executable in ``path``."""
+        return any(
+            self.file(posixpath.join(directory, command)).is_executable
+            for directory in path.split(":")
+        )
+
+    @property
+    def os_release(self) -> Dict[str, str]:
+        """The variables defined in :file:`/etc/os-release`."""
+        os_release = self.file("/etc/os-release")
+        return parse_os_release(
+            os_release.content_string if os_release.exists else ""
+        )
@@ -0,0 +1,104 @@
+"""Count the launches of the session scoped container fixtures.
+
+The ``container`` and ``auto_container`` fixtures of pytest-container are
+session scoped, but a container is launched again whenever a worker runs a test
+for a different container image in between or when the tests of an image are
+spread across multiple :command:`pytest-xdist` workers.
+:py:class:`ContainerLaunchCounter` counts the actual launches and reports them
+in the terminal summary together with an estimate of the launches if the tests
+were spread across all workers (as :command:`pytest-xdist` does by default).
+
+"""
+
+from typing import Dict
+from typing import Optional
+
+import pytest
+
+#: session scoped fixtures of pytest-container that launch a container
+SHARED_CONTAINER_FIXTURES = ("container", "auto_container")
+
+_WORKEROUTPUT_KEY = "bci_container_launches"
+
+
+def _container_key(container) -> str:
+    # a hash of all attributes of the container that identifies it across
+    # processes
+    return container.filelock_filename
+
+
+class ContainerLaunchCounter:
+    """pytest plugin counting the launches of the session scoped container
+    fixtures and the number of tests using them per container.
+
+    """
+
+    def __init__(self, config) -> None:
+        self.config = config
+        self.launches: Dict[str, int] = {}
+        self.tests: Dict[str, int] = {}
+        self.workers = 0
+
+    @staticmethod
+    def _add(target: Dict[str, int], source: Dict[str, int]) -> None:
+        for key, count in source.items():
+            target[key] = target.get(key, 0) + count
+
+    def pytest_fixture_setup(self, fixturedef, request) -> None:
+        if fixturedef.argname in SHARED_CONTAINER_FIXTURES and hasattr(
+            request, "param"
+        ):
+            self._add(self.launches, {_container_key(request.param): 1})
+
+    def pytest_runtest_protocol(self, item) -> None:
+        callspec = getattr(item, "callspec", None)
+        if callspec is None:
+            return
+        for name in SHARED_CONTAINER_FIXTURES:
+            if name in callspec.params:
+                self._add(
+                    self.tests, {_container_key(callspec.params[name]): 1}
+                )
+
+    def pytest_sessionfinish(self, session) -> None:
+        workeroutput = getattr(session.config, "workeroutput", None)
+        if workeroutput is not None:
+            workeroutput[_WORKEROUTPUT_KEY] = {
+                "launches": self.launches,
+                "tests": self.tests,
+            }
+        else:
+            self.workers = max(self.workers, 1)
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error) -> None:
+        output: Optional[Dict[str, Dict[str, int]]] = getattr(
+            node, "workeroutput", {}
+        ).get(_WORKEROUTPUT_KEY)
+        if output is None:
+            return
+        self.workers += 1
+        self._add(self.launches, output["launches"])
+        self._add(self.tests, output["tests"])
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        if getattr(self.config, "workeroutput", None) is not None:
+            return
+        if not self.tests:
+            return
+
+        launches = sum(self.launches.values())
+        # with the default distribution, the tests of each container end up
+        # on (nearly) every worker
+        scattered = sum(
+            min(tests, max(self.workers, 1)) for tests in self.tests.values()
+        )
+        terminalreporter.write_sep("-", "container launches")
+        terminalreporter.write_line(
+            f"{launches} launches of {len(self.tests)} containers for "
+            f"{sum(self.tests.values())} tests on {self.workers} worker(s)"
+        )
+        terminalreporter.write_line(
+            f"spreading the tests across all workers would need about "
+            f"{scattered} launches, saved {scattered - launches}"
+        )
@@ -0,0 +1,94 @@
+"""Checks of package names or licenses against lists of forbidden and allowed
+substrings.
+
+:py:class:`PackagePolicy` compiles each list into a single regular expression,
+so that every value is matched in one pass instead of testing each substring
+separately:
+
+.. code-block:: python
+
+   policy = PackagePolicy(forbidden=["kernel", "xen"], allowed=["kernelshark"])
+   violations = policy.violations(package_names)
+   assert not violations, ", ".join(str(v) for v in violations)
+
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Pattern
+from typing import Tuple
+from typing import Union
+
+
+def _compile(substrings: Iterable[str]) -> Optional[Pattern[str]]:
+    # the longest substrings come first, so that the reported match is the
+    # most specific one if multiple start at the same position
+    alternatives = sorted(set(substrings), key=lambda s: (-len(s), s))
+    if not alternatives:
+        return None
+    return re.compile("|".join(re.escape(s) for s in alternatives))
+
+
+@dataclass(frozen=True)
+class Violation:
+    """A package whose ``value`` (its name or e.g. its license) contains the
+    forbidden substring ``match``.
+
+    """
+
+    package: str
+    value: str
+    match: str
+
+    def __str__(self) -> str:
+        if self.value == self.package:
+            return f"{self.package} (contains {self.match})"
+        return f"{self.package}: {self.value} (contains {self.match})"
+
+
+class PackagePolicy:
+    """A value violates the policy if it contains any of the ``forbidden``
+    substrings and none of the ``allowed`` substrings.
+
+    """
+
+    def __init__(
+        self, forbidden: Iterable[str], allowed: Iterable[str] = ()
+    ) -> None:
+        self._forbidden = _compile(forbidden)
+        self._allowed = _compile(allowed)
+
+    def check(self, value: str) -> Optional[str]:
+        """Returns the forbidden substring contained in ``value`` or ``None``
+        if it complies with the policy.
+
+        """
+        if self._forbidden is None:
+            return None
+        match = self._forbidden.search(value)
+        if match is None:
+            return None
+        if self._allowed is not None and self._allowed.search(value):
+            return None
+        return match.group(0)
+
+    def violations(
+        self, packages: Iterable[Union[str, Tuple[str, str]]]
+    ) -> List[Violation]:
+        """Checks all ``packages`` and returns the violations. Each package is
+        either a name, that is checked, or a tuple of the name and the value
+        to check (e.g. its license).
+
+        """
+        violations = []
+        for package in packages:
+            name, value = (
+                (package, package) if isinstance(package, str) else package
+            )
+            match = self.check(value)
+            if match is not None:
+                violations.append(Violation(name, value, match))
+        return violations
@@ -0,0 +1,303 @@
+"""Pull all container images required by a test session upfront.
+
+pytest-container pulls the images lazily once the first test requiring them is
+launched, so a worker sits idle until the download completes. The functions in
+this module determine the base images of all collected tests and pull them
+concurrently before the first test is executed, so that the tests start
+against a warm local image store.
+
+"""
+
+import logging
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import pytest
+from pytest_container import OciRuntimeBase
+from pytest_container import get_selected_runtime
+from pytest_container.container import ContainerBase
+from pytest_container.container import DerivedContainer
+
+_LOGGER = logging.getLogger(__name__)
+
+_WORKEROUTPUT_KEY = "bci_prepull"
+
+
+@dataclass(frozen=True)
+class PullResult:
+    """The outcome of pulling a single image."""
+
+    #: url of the image
+    url: str
+
+    #: time that the pull took in seconds
+    duration: float
+
+    #: stderr of the container runtime if the pull failed, ``None`` otherwise
+    error: Optional[str] = None
+
+
+def get_root_container(container: ContainerBase) -> ContainerBase:
+    """Returns the container of the image that ``container`` is (indirectly)
+    derived from, or ``container`` itself if it is not derived.
+
+    """
+    base = container
+    while isinstance(base, DerivedContainer):
+        base = base.get_base()
+    return base
+
+
+def get_root_url(container: ContainerBase) -> Optional[str]:
+    """Returns the url of the image that has to be pulled from a registry to
+    launch ``container``, or ``None`` if it is a locally built image.
+
+    """
+    return get_root_container(container).baseurl
+
+
+def _is_skipped(item: pytest.Item) -> bool:
+    if item.get_closest_marker("skip"):
+        return True
+    return any(
+        mark.args and mark.args[0] is True
+        for mark in item.iter_markers("skipif")
+    )
+
+
+def get_image_urls(items: Iterable[pytest.Item]) -> List[str]:
+    """Returns the unique urls of all images that are required to run the
+    (not unconditionally skipped) test items in ``items``, in the order in
+    which they are first used.
+
+    """
+    urls: Dict[str, None] = {}
+    for item in items:
+        callspec = getattr(item, "callspec", None)
+        if callspec is None or _is_skipped(item):
+            continue
+        for param in callspec.params.values():
+            if isinstance(param, ContainerBase):
+                url = get_root_url(param)
+                if url:
+                    urls[url] = None
+    return list(urls)
+
+
+def get_registry(url: str) -> str:
+    """Returns the registry host of the image ``url``."""
+    first_component = url.split("/", 1)[0]
+    if "/" in url and (
+        "." in first_component
+        or ":" in first_component
+        or first_component == "localhost"
+    ):
+        return first_component
+    return "docker.io"
+
+
+def pull_images(
+    container_runtime: OciRuntimeBase,
+    urls: List[str],
+    parallelism: int = 4,
+    per_registry: int = 2,
+    report: Optional[Callable[[str], None]] = None,
+) -> List[PullResult]:
+    """Pulls all images in ``urls`` using at most ``parallelism`` concurrent
+    pulls in total and at most ``per_registry`` concurrent pulls from the same
+    registry. Failures are not fatal, they are returned in the
+    :py:attr:`PullResult.error` attribute and will resurface once the test
+    tries to launch the container.
+
+    ``report`` is invoked with a progress message after each pull.
+
+    """
+    semaphores: Dict[str, threading.Semaphore] = {
+        registry: threading.Semaphore(max(per_registry, 1))
+        for registry in {get_registry(url) for url in urls}
+    }
+
+    def _pull(url: str) -> PullResult:
+        with semaphores[get_registry(url)]:
+            start = time.monotonic()
+            proc = subprocess.run(
+                [container_runtime.runner_binary, "pull", url],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                check=False,
+            )
+            return PullResult(
+                url=url,
+                duration=time.monotonic() - start,
+                error=(
+                    proc.stderr.decode(errors="replace").strip()
+                    if proc.returncode != 0
+                    else None
+                ),
+            )
+
+    results: List[PullResult] = []
+    with ThreadPoolExecutor(max_workers=max(parallelism, 1)) as executor:
+        for future in as_completed([executor.submit(_pull, u) for u in urls]):
+            res = future.result()
+            results.append(res)
+            if report:
+                report(
+                    f"[{len(results)}/{len(urls)}] "
+                    + ("pulled" if res.error is None else "FAILED to pull")
+                    + f" {res.url} in {res.duration:.1f}s"
+                )
+    return results
+
+
+def _prepull(
+    items: Iterable[pytest.Item],
+    parallelism: int,
+    per_registry: int,
+    report: Callable[[str], None],
+) -> None:
+    urls = get_image_urls(items)
+    if not urls:
+        return
+
+    container_runtime = get_selected_runtime()
+    report(
+        f"pre-pulling {len(urls)} images with {container_runtime.runner_binary}"
+    )
+    start = time.monotonic()
+    results = pull_images(
+        container_runtime, urls, parallelism, per_registry, report
+    )
+    failures = [res for res in results if res.error is not None]
+    report(
+        f"pre-pulled {len(results) - len(failures)} of {len(urls)} images "
+        f"in {time.monotonic() - start:.1f}s"
+    )
+    for res in failures:
+        report(f"failed to pull {res.url}: {res.error}")
+
+
+def _marker_paths(run_id: str) -> Tuple[Path, Path]:
+    # the lock and the marker of the finished pre-pull of the test run
+    lock_dir = Path(tempfile.gettempdir())
+    return (
+        lock_dir / f"bci-prepull-{run_id}.lock",
+        lock_dir / f"bci-prepull-{run_id}.done",
+    )
+
+
+def prepull_session_images(
+    items: Iterable[pytest.Item],
+    parallelism: int,
+    per_registry: int,
+    run_id: Optional[str],
+    report: Callable[[str], None],
+) -> None:
+    """Pulls the images of all ``items`` with the selected container runtime
+    once per test run.
+
+    With :command:`pytest-xdist` every worker collects the tests and calls
+    this function with the same ``run_id``. The first worker performs the
+    pulls, while the others wait for it to finish and then skip them.
+    Without :command:`pytest-xdist`, ``run_id`` is ``None``.
+
+    """
+    if run_id is None:
+        _prepull(items, parallelism, per_registry, report)
+        return
+
+    # pylint: disable=import-outside-toplevel
+    from filelock import FileLock
+
+    lock_path, done_marker = _marker_paths(run_id)
+    with FileLock(str(lock_path)):
+        if not done_marker.exists():
+            _prepull(items, parallelism, per_registry, report)
+            done_marker.touch()
+
+
+class PrepullPlugin:
+    """pytest plugin pulling the images of all collected tests before the
+    first test runs (see :py:func:`prepull_session_images`).
+
+    The progress is written to the terminal. The terminal output of
+    :command:`pytest-xdist` workers is not shown, so the worker that pulled
+    the images sends its messages to the controller, which shows them in the
+    test summary and removes the lock files of the test run at its end.
+
+    """
+
+    def __init__(self, config) -> None:
+        self.config = config
+        #: the messages of the pre-pull on the workers
+        self.messages: List[str] = []
+        #: the test run id of the workers
+        self.run_id: Optional[str] = None
+
+    def _is_worker(self) -> bool:
+        return getattr(self.config, "workerinput", None) is not None
+
+    def pytest_collection_finish(self, session) -> None:
+        if self.config.getoption("collectonly"):
+            return
+
+        terminal_reporter = self.config.pluginmanager.getplugin(
+            "terminalreporter"
+        )
+
+        def _report(msg: str) -> None:
+            _LOGGER.info(msg)
+            if self._is_worker():
+                self.messages.append(msg)
+            elif terminal_reporter:
+                terminal_reporter.write_line(msg)
+
+        prepull_session_images(
+            session.items,
+            parallelism=self.config.getoption("prepull_parallelism"),
+            per_registry=self.config.getoption("prepull_per_registry"),
+            run_id=(
+                self.config.workerinput["testrunuid"]
+                if self._is_worker()
+                else None
+            ),
+            report=_report,
+        )
+
+    def pytest_sessionfinish(self, session) -> None:
+        workeroutput = getattr(session.config, "workeroutput", None)
+        if workeroutput is not None:
+            workeroutput[_WORKEROUTPUT_KEY] = self.messages
+            return
+        if self.run_id:
+            for path in _marker_paths(self.run_id):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error) -> None:
+        self.run_id = node.workerinput["testrunuid"]
+        self.messages.extend(
+            getattr(node, "workeroutput", {}).get(_WORKEROUTPUT_KEY, [])
+        )
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        if self._is_worker() or not self.messages:
+            return
+        terminalreporter.write_sep("-", "pre-pulled images")
+        for msg in self.messages:
+            terminalreporter.write_line(msg)
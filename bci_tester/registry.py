@@ -0,0 +1,597 @@
+"""Access to the image metadata via the OCI distribution API of the registry.
+
+Most tests in :file:`tests/test_metadata.py` only check the labels of the
+images. :py:func:`get_image_metadata` fetches them directly from the registry:
+only the manifest and the config blob of the image (a few KB) are downloaded,
+the image is neither pulled nor launched.
+
+All requests to a registry go through its shared :py:class:`RegistryClient`
+(see :py:func:`get_registry_client`), which reuses the connections and the
+bearer tokens. Manifests and blobs are content addressed and are therefore
+cached by their digest in :file:`$BCI_CACHE_DIR/registry/`, manifests
+referenced by a tag are only downloaded again if they changed.
+
+:py:class:`ReferenceResolver` checks whether many image references exist at
+once via concurrent ``HEAD`` requests and remembers the results.
+
+Registries that refuse anonymous access can only be read by the container
+runtime with its credentials, :py:func:`inspect_image_metadata` then pulls and
+inspects the image instead. :py:func:`get_container_metadata` also inspects
+local images and images whose registry cannot be reached via the container
+runtime.
+
+"""
+
+import hashlib
+import json
+import os
+import platform
+import re
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import requests
+from pytest_container import OciRuntimeBase
+from pytest_container.container import ContainerBase
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from bci_tester.prepull import get_registry
+from bci_tester.prepull import get_root_container
+from bci_tester.util import get_cache_dir
+
+#: media types of multi-architecture images
+INDEX_MEDIA_TYPES = (
+    "application/vnd.oci.image.index.v1+json",
+    "application/vnd.docker.distribution.manifest.list.v2+json",
+)
+
+#: media types of manifests of images for a single architecture
+MANIFEST_MEDIA_TYPES = (
+    "application/vnd.oci.image.manifest.v1+json",
+    "application/vnd.docker.distribution.manifest.v2+json",
+)
+
+_MANIFEST_ACCEPT = {
+    "Accept": ", ".join(INDEX_MEDIA_TYPES + MANIFEST_MEDIA_TYPES)
+}
+
+_USER_AGENT = "github.com/SUSE/BCI-tests"
+
+#: registries that are accessed via plain http
+_INSECURE_REGISTRIES = ("localhost", "127.0.0.1")
+
+#: architecture names of the OCI image spec that differ from ``uname -m``
+_OCI_ARCHITECTURES = {"aarch64": "arm64", "x86_64": "amd64"}
+
+
+def get_oci_architecture(machine: Optional[str] = None) -> str:
+    """Returns the architecture of the OCI image spec corresponding to
+    ``machine`` (defaults to the architecture of this host).
+
+    """
+    machine = machine or platform.machine()
+    return _OCI_ARCHITECTURES.get(machine, machine)
+
+
+@dataclass(frozen=True)
+class ImageReference:
+    """The location of an image in a registry."""
+
+    #: host (and port) of the registry
+    registry: str
+
+    #: name of the repository in the registry
+    repository: str
+
+    #: tag or digest of the image
+    reference: str
+
+    @staticmethod
+    def from_url(url: str) -> "ImageReference":
+        """Splits the image ``url`` (e.g.
+        ``registry.suse.com/bci/bci-base:15.7``) into its components.
+
+        """
+        registry = get_registry(url)
+        name = url[len(registry) + 1 :] if url.startswith(registry) else url
+        if registry == "docker.io":
+            registry = "registry-1.docker.io"
+            if "/" not in name:
+                name = f"library/{name}"
+        if "@" in name:
+            repository, _, reference = name.partition("@")
+            # the tag is ignored if the digest is given
+            if ":" in repository.rpartition("/")[2]:
+                repository = repository.rpartition(":")[0]
+        elif ":" in name.rpartition("/")[2]:
+            repository, _, reference = name.rpartition(":")
+        else:
+            repository, reference = name, "latest"
+        return ImageReference(registry, repository, reference)
+
+
+@dataclass(frozen=True)
+class ImageMetadata:
+    """The metadata of an image in a registry for the architecture of the
+    host.
+
+    """
+
+    #: url of the image
+    url: str
+
+    #: digest of the image manifest
+    digest: str
+
+    #: the ``config`` object of the image configuration (``Labels``, ``Env``,
+    #: ``Entrypoint``, …)
+    config: Dict[str, Any]
+
+    @property
+    def labels(self) -> Dict[str, str]:
+        """The labels of the image."""
+        return self.config.get("Labels") or {}
+
+
+class RegistryClient:
+    """Client of the distribution API of the registry ``registry``.
+
+    All requests share one connection pool and are retried with an
+    exponential backoff on connection errors and server errors. Anonymous
+    bearer tokens are requested once per repository and reused until they
+    expire. Manifests and blobs are cached in ``cache_dir`` by their digest,
+    manifests requested by their tag are revalidated via their ``ETag``.
+
+    """
+
+    def __init__(
+        self,
+        registry: str,
+        cache_dir: Optional[Path] = None,
+        max_workers: int = 4,
+        retries: int = 3,
+    ) -> None:
+        host = registry.partition(":")[0]
+        scheme = "http" if host in _INSECURE_REGISTRIES else "https"
+        self.registry = registry
+        self.url = f"{scheme}://{registry}/v2"
+        self.cache_dir = cache_dir or get_cache_dir("registry")
+        self.max_workers = max_workers
+        self._session = requests.Session()
+        self._session.headers["User-Agent"] = _USER_AGENT
+        self._session.verify = not registry.endswith("suse.de")
+        adapter = HTTPAdapter(
+            pool_maxsize=max_workers,
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                raise_on_status=False,
+            ),
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        # repository → (token, expiry in monotonic seconds)
+        self._tokens: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _request_token(self, repository: str, challenge: str) -> Optional[str]:
+        # anonymous bearer token according to the WWW-Authenticate challenge
+        if not challenge.lower().startswith("bearer "):
+            return None
+        params = dict(re.findall(r'(\w+)="([^"]*)"', challenge))
+        realm = params.pop("realm", None)
+        if not realm:
+            return None
+        params.setdefault("scope", f"repository:{repository}:pull")
+        response = self._session.get(realm, params=params, timeout=30)
+        response.raise_for_status()
+        answer = response.json()
+        token = answer.get("token") or answer.get("access_token")
+        if token:
+            # renew the token a bit before it expires
+            expires_in = float(answer.get("expires_in") or 60)
+            with self._lock:
+                self._tokens[repository] = (
+                    token,
+                    time.monotonic() + max(expires_in - 10, 0),
+                )
+        return token
+
+    def _get_cached_token(self, repository: str) -> Optional[str]:
+        with self._lock:
+            token, expiry = self._tokens.get(repository, ("", 0.0))
+        return token if token and time.monotonic() < expiry else None
+
+    def request(
+        self,
+        repository: str,
+        kind: str,
+        name: str,
+        headers: Optional[Dict[str, str]] = None,
+        stream: bool = False,
+        method: str = "GET",
+    ) -> requests.Response:
+        """Performs a ``method`` request of ``/v2/{repository}/{kind}/{name}``
+        with ``headers``, authenticating if necessary, and returns the
+        response without checking its status.
+
+        """
+        url = f"{self.url}/{repository}/{kind}/{name}"
+
+        def get(token: Optional[str]) -> requests.Response:
+            auth = {"Authorization": f"Bearer {token}"} if token else {}
+            return self._session.request(
+                method,
+                url,
+                headers={**(headers or {}), **auth},
+                timeout=30,
+                stream=stream,
+            )
+
+        response = get(self._get_cached_token(repository))
+        if response.status_code == 401:
+            token = self._request_token(
+                repository, response.headers.get("WWW-Authenticate", "")
+            )
+            if token:
+                response.close()
+                response = get(token)
+        return response
+
+    def _cache_path(self, digest: str) -> Path:
+        return self.cache_dir / digest.replace(":", "-")
+
+    def _read_cache(self, digest: str) -> Optional[bytes]:
+        try:
+            return self._cache_path(digest).read_bytes()
+        except OSError:
+            return None
+
+    def _write_cache(self, digest: str, content: bytes) -> None:
+        # content addressed objects never change, so they are only stored
+        # if they match their digest
+        algorithm, _, expected = digest.partition(":")
+        if hashlib.new(algorithm, content).hexdigest() != expected:
+            raise ValueError(f"{digest} does not match its content")
+        path = self._cache_path(digest)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(content)
+        os.replace(tmp_path, path)
+
+    def get_manifest(
+        self, repository: str, reference: str
+    ) -> Tuple[str, bytes]:
+        """Returns the digest and the content of the manifest ``reference``
+        (a tag or a digest) in ``repository``.
+
+        """
+        if reference.startswith("sha256:"):
+            content = self._read_cache(reference)
+            if content is None:
+                response = self.request(
+                    repository, "manifests", reference, _MANIFEST_ACCEPT
+                )
+                response.raise_for_status()
+                content = response.content
+                self._write_cache(reference, content)
+            return reference, content
+
+        # the digest of the last response is stored per tag and sent as ETag
+        tag_path = self.cache_dir / (
+            "tag-"
+            + hashlib.sha256(
+                f"{self.registry}/{repository}:{reference}".encode()
+            ).hexdigest()
+        )
+        try:
+            etag, cached_digest = json.loads(tag_path.read_text())
+            cached = self._read_cache(cached_digest)
+        except (OSError, ValueError, TypeError):
+            etag, cached_digest, cached = None, None, None
+        headers = dict(_MANIFEST_ACCEPT)
+        if etag and cached is not None:
+            headers["If-None-Match"] = etag
+        response = self.request(repository, "manifests", reference, headers)
+        if response.status_code == 304 and cached_digest and cached:
+            return cached_digest, cached
+        response.raise_for_status()
+        content = response.content
+        digest = "sha256:" + hashlib.sha256(content).hexdigest()
+        self._write_cache(digest, content)
+        if response.headers.get("ETag"):
+            tmp_path = tag_path.with_name(f"{tag_path.name}.{os.getpid()}")
+            tmp_path.write_text(json.dumps([response.headers["ETag"], digest]))
+            os.replace(tmp_path, tag_path)
+        return digest, content
+
+    def manifest_exists(self, repository: str, reference: str) -> bool:
+        """Checks via a ``HEAD`` request whether the manifest ``reference``
+        (a tag or a digest) exists in ``repository``. Raises a
+        :py:class:`requests.HTTPError` if the registry refuses the access.
+
+        """
+        response = self.request(
+            repository, "manifests", reference, _MANIFEST_ACCEPT, method="HEAD"
+        )
+        if response.status_code == 404:
+            return False
+        response.raise_for_status()
+        return True
+
+    def get_blob(self, repository: str, digest: str) -> bytes:
+        """Returns the content of the blob ``digest`` in ``repository``."""
+        content = self._read_cache(digest)
+        if content is None:
+            response = self.request(repository, "blobs", digest)
+            response.raise_for_status()
+            content = response.content
+            self._write_cache(digest, content)
+        return content
+
+    def iter_blob(
+        self, repository: str, digest: str, chunk_size: int = 65536
+    ) -> Iterator[bytes]:
+        """Yields the content of the blob ``digest`` in ``repository`` in
+        chunks of up to ``chunk_size`` bytes, without keeping the whole blob
+        in memory. The blob is added to the cache while it is read, raises a
+        :py:class:`ValueError` at the end if it does not match its digest.
+
+        """
+        path = self._cache_path(digest)
+        try:
+            cached = path.open("rb")
+        except OSError:
+            pass
+        else:
+            with cached:
+                yield from iter(lambda: cached.read(chunk_size), b"")
+            return
+
+        algorithm, _, expected = digest.partition(":")
+        checksum = hashlib.new(algorithm)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            with self.request(
+                repository, "blobs", digest, stream=True
+            ) as response, tmp_path.open("wb") as tmp_file:
+                response.raise_for_status()
+                for chunk in response.iter_content(chunk_size):
+                    checksum.update(chunk)
+                    tmp_file.write(chunk)
+                    yield chunk
+            if checksum.hexdigest() != expected:
+                raise ValueError(f"{digest} does not match its content")
+            os.replace(tmp_path, path)
+        finally:
+            # the blob was not read completely or is broken
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def get_blobs(
+        self, repository: str, digests: Iterable[str]
+    ) -> Dict[str, bytes]:
+        """Fetches the blobs ``digests`` of ``repository`` concurrently and
+        returns their content indexed by their digest.
+
+        """
+        unique = list(dict.fromkeys(digests))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            contents = executor.map(
+                lambda digest: self.get_blob(repository, digest), unique
+            )
+            return dict(zip(unique, contents))
+
+
+_CLIENTS: Dict[str, RegistryClient] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_registry_client(registry: str) -> RegistryClient:
+    """Returns the shared :py:class:`RegistryClient` of ``registry``."""
+    with _CLIENTS_LOCK:
+        if registry not in _CLIENTS:
+            _CLIENTS[registry] = RegistryClient(registry)
+        return _CLIENTS[registry]
+
+
+class ReferenceResolver:
+    """Checks whether image references (e.g.
+    ``registry.suse.com/bci/bci-base:15.7`` or
+    ``registry.suse.com/bci/bci-base@sha256:…``) exist in their registry.
+
+    The references are checked concurrently via ``HEAD`` requests of the
+    shared :py:class:`RegistryClient` of each registry. The results are
+    remembered: existing references for the lifetime of the resolver, missing
+    references and references that could not be checked (``None``) for
+    ``negative_ttl`` seconds.
+
+    """
+
+    def __init__(self, negative_ttl: float = 300, max_workers: int = 8):
+        self.negative_ttl = negative_ttl
+        self.max_workers = max_workers
+        # reference → (result, time of the check in monotonic seconds)
+        self._results: Dict[str, Tuple[Optional[bool], float]] = {}
+        self._lock = threading.Lock()
+
+    def _get_cached(self, url: str) -> Tuple[bool, Optional[bool]]:
+        with self._lock:
+            if url not in self._results:
+                return False, None
+            exists, checked = self._results[url]
+        if exists or time.monotonic() - checked < self.negative_ttl:
+            return True, exists
+        return False, None
+
+    def _check(self, url: str) -> Optional[bool]:
+        ref = ImageReference.from_url(url)
+        try:
+            exists: Optional[bool] = get_registry_client(
+                ref.registry
+            ).manifest_exists(ref.repository, ref.reference)
+        except requests.RequestException:
+            exists = None
+        with self._lock:
+            self._results[url] = (exists, time.monotonic())
+        return exists
+
+    def resolve(self, urls: Iterable[str]) -> Dict[str, Optional[bool]]:
+        """Checks all references ``urls`` that are not known yet concurrently
+        and returns the result of each reference (see :py:meth:`exists`).
+
+        """
+        results: Dict[str, Optional[bool]] = {}
+        pending: List[str] = []
+        for url in dict.fromkeys(urls):
+            known, exists = self._get_cached(url)
+            if known:
+                results[url] = exists
+            else:
+                pending.append(url)
+        if pending:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                results.update(
+                    zip(pending, executor.map(self._check, pending))
+                )
+        return results
+
+    def exists(self, url: str) -> Optional[bool]:
+        """Returns whether the reference ``url`` exists or ``None`` if the
+        registry could not be queried (e.g. because it requires credentials).
+
+        """
+        known, exists = self._get_cached(url)
+        return exists if known else self._check(url)
+
+
+def get_image_metadata(
+    url: str,
+    architecture: Optional[str] = None,
+    client: Optional[RegistryClient] = None,
+) -> ImageMetadata:
+    """Fetches the manifest and the configuration of the image ``url`` for
+    ``architecture`` (defaults to the architecture of the host) from the
+    registry, using ``client`` (defaults to the shared client of the
+    registry).
+
+    """
+    ref = ImageReference.from_url(url)
+    client = client or get_registry_client(ref.registry)
+    digest, content = client.get_manifest(ref.repository, ref.reference)
+    manifest = json.loads(content)
+
+    if manifest.get("mediaType") in INDEX_MEDIA_TYPES or (
+        "manifests" in manifest
+    ):
+        arch = architecture or get_oci_architecture()
+        digests = [
+            entry["digest"]
+            for entry in manifest["manifests"]
+            if entry.get("platform", {}).get("architecture") == arch
+            and entry.get("platform", {}).get("os", "linux") == "linux"
+        ]
+        if not digests:
+            raise ValueError(f"{url} has no image for the architecture {arch}")
+        digest, content = client.get_manifest(ref.repository, digests[0])
+        manifest = json.loads(content)
+
+    config = json.loads(
+        client.get_blob(ref.repository, manifest["config"]["digest"])
+    )
+    return ImageMetadata(
+        url=url, digest=digest, config=config.get("config") or {}
+    )
+
+
+def inspect_image_metadata(
+    runner_binary: str, url: str, pull: bool = True
+) -> ImageMetadata:
+    """Pulls the image ``url`` with the container runtime ``runner_binary``,
+    which uses its credentials for the registry, and returns the metadata
+    from :command:`image inspect`. Local images are inspected without
+    ``pull``.
+
+    """
+    if pull:
+        subprocess.run(
+            [runner_binary, "pull", url],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            check=True,
+        )
+    image = json.loads(
+        subprocess.check_output([runner_binary, "image", "inspect", url])
+    )[0]
+    # podman reports the manifest digest, docker only the repository digests
+    digest = image.get("Digest") or next(
+        (
+            repo_digest.partition("@")[2]
+            for repo_digest in image.get("RepoDigests") or []
+        ),
+        "",
+    )
+    return ImageMetadata(
+        url=url, digest=digest, config=image.get("Config") or {}
+    )
+
+
+def is_registry_reference(url: str) -> bool:
+    """Returns whether ``url`` refers to an image in a registry and not to the
+    id of a local image.
+
+    """
+    return not re.fullmatch(r"(sha256:)?[0-9a-f]{12,64}", url)
+
+
+def get_container_metadata(
+    container: ContainerBase,
+    get_container_runtime: Callable[[], OciRuntimeBase],
+    rootdir: Path,
+    extra_build_args: Optional[List[str]] = None,
+) -> ImageMetadata:
+    """Returns the metadata of the image of ``container`` (respectively of the
+    base image of a derived container).
+
+    It is fetched from the registry via :py:func:`get_image_metadata`. Images
+    that are not in a registry (e.g. ``containers-storage:`` images), images
+    whose registry cannot be reached and images whose registry refuses the
+    anonymous access are instead prepared like for launching them (i.e.
+    pulled if necessary) and inspected via the container runtime returned by
+    ``get_container_runtime``.
+
+    """
+    root = get_root_container(container)
+    url = root.baseurl
+    if url and is_registry_reference(url):
+        try:
+            return get_image_metadata(url)
+        except requests.ConnectionError:
+            pass
+        except requests.HTTPError as err:
+            if err.response is None or err.response.status_code not in (
+                401,
+                403,
+            ):
+                raise
+
+    container_runtime = get_container_runtime()
+    root.prepare_container(container_runtime, rootdir, extra_build_args)
+    local_url = root.url or root.container_id
+    assert local_url, f"{container} has no image"
+    return inspect_image_metadata(
+        container_runtime.runner_binary, local_url, pull=False
+    )
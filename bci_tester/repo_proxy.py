@@ -0,0 +1,421 @@
+"""Caching HTTP proxy for the SLE_BCI repository.
+
+The zypper tests refresh and download the repository metadata and packages of
+``BCI_DEVEL_REPO`` in every fresh container. :py:class:`RepoProxy` is a small
+HTTP server that forwards these requests to the repository and stores the
+responses in a content addressed cache in :file:`$BCI_CACHE_DIR/repo-proxy/`:
+
+- the blobs are stored by the sha256 digest of their contents, so identical
+  files are only stored once,
+- metadata that changes in place (e.g. :file:`repodata/repomd.xml`) is
+  fetched from the repository only once per proxy process, all other files
+  (packages and the checksum named repodata files) never change and are only
+  fetched once,
+- the least recently used blobs are evicted once the cache exceeds its
+  maximum size,
+- in offline mode, all requests are served from the cache.
+
+The proxy has no authentication, so it only listens on the address via which
+the containers reach the host (see :py:func:`get_proxy_addresses`) and not on
+all interfaces. It is started by pytest via ``--repo-proxy`` or separately:
+
+.. code-block:: shell-session
+
+   $ python -m bci_tester.repo_proxy --host 10.88.0.1 --port 8778
+   $ export BCI_REPO_PROXY=http://10.88.0.1:8778/
+
+"""
+
+import hashlib
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+from pathlib import Path
+from socketserver import ThreadingMixIn
+from typing import Callable
+from typing import Dict
+from typing import Optional
+from typing import Set
+from typing import Tuple
+from typing import Union
+
+from bci_tester.util import get_cache_dir
+
+_LOGGER = logging.getLogger(__name__)
+
+#: default maximum size of the cache in bytes
+DEFAULT_MAX_SIZE = 20 * 1024**3
+
+#: default port of the proxy, a fixed port keeps the repository url in the
+#: container definitions stable between test runs
+DEFAULT_PORT = 8778
+
+#: files that are named after their checksum or are versioned packages and
+#: therefore never change
+_IMMUTABLE_RE = re.compile(r"(^|/)repodata/[0-9a-f]{32,}[-.][^/]+$|\.d?rpm$")
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def is_immutable(path: str) -> bool:
+    """Returns whether the repository file ``path`` never changes."""
+    return bool(_IMMUTABLE_RE.search(path))
+
+
+def get_proxy_addresses(runner_binary: str) -> Tuple[str, str]:
+    """Returns the address on which the proxy has to listen and the host name
+    under which containers of the runtime ``runner_binary`` reach it.
+
+    Containers on the default bridge network of docker and rootful podman
+    reach the host via the gateway of the bridge, so the proxy listens only
+    there. Rootless podman maps ``host.containers.internal`` to the loopback
+    interface of the host. If the bridge cannot be determined, the proxy
+    listens on ``localhost`` only.
+
+    """
+
+    def _query(*args: str) -> str:
+        return subprocess.check_output(
+            [runner_binary, *args],
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True,
+        ).strip()
+
+    try:
+        if "docker" in os.path.basename(runner_binary):
+            gateway = _query(
+                "network",
+                "inspect",
+                "bridge",
+                "-f",
+                "{{range .IPAM.Config}}{{.Gateway}}{{end}}",
+            )
+        elif _query("info", "-f", "{{.Host.Security.Rootless}}") == "true":
+            gateway = ""
+        else:
+            gateway = _query(
+                "network",
+                "inspect",
+                "podman",
+                "-f",
+                "{{range .Subnets}}{{.Gateway}}{{end}}",
+            )
+    except (OSError, subprocess.CalledProcessError):
+        gateway = ""
+
+    if gateway:
+        return gateway, gateway
+    return "127.0.0.1", "host.containers.internal"
+
+
+@dataclass
+class ProxyStats:
+    """Request statistics of a :py:class:`RepoProxy`."""
+
+    requests: int = 0
+    hits: int = 0
+    downloaded_bytes: int = 0
+
+
+class BlobCache:
+    """Content addressed storage of the repository files in ``cache_dir``
+    with an index mapping each url to the digest of its contents.
+
+    """
+
+    def __init__(
+        self, cache_dir: Path, max_size: int = DEFAULT_MAX_SIZE
+    ) -> None:
+        self.blob_dir = cache_dir / "blobs"
+        self.index_dir = cache_dir / "index"
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._size = sum(
+            blob.stat().st_size for blob in self.blob_dir.iterdir()
+        )
+
+    def _index_file(self, url: str) -> Path:
+        return self.index_dir / hashlib.sha256(url.encode()).hexdigest()
+
+    def get(self, url: str) -> Optional[Path]:
+        """Returns the cached blob of ``url`` or ``None``."""
+        try:
+            digest = self._index_file(url).read_text().strip()
+        except OSError:
+            return None
+        blob = self.blob_dir / digest
+        try:
+            # the mtime is the last access for the LRU eviction
+            os.utime(blob)
+        except OSError:
+            return None
+        return blob
+
+    def put(self, url: str, tmp_file: Path, digest: str) -> Path:
+        """Moves the downloaded ``tmp_file`` with the sha256 ``digest`` into
+        the cache as the contents of ``url``.
+
+        """
+        blob = self.blob_dir / digest
+        with self._lock:
+            if blob.exists():
+                tmp_file.unlink()
+            else:
+                self._size += tmp_file.stat().st_size
+                os.replace(tmp_file, blob)
+            index_file = self._index_file(url)
+            tmp_index = index_file.with_name(f"{index_file.name}.tmp")
+            tmp_index.write_text(digest)
+            os.replace(tmp_index, index_file)
+            self._evict(keep=blob)
+        return blob
+
+    def _evict(self, keep: Path) -> None:
+        if self._size <= self.max_size:
+            return
+        blobs = sorted(
+            (blob.stat().st_mtime, blob)
+            for blob in self.blob_dir.iterdir()
+            if blob != keep
+        )
+        for _, blob in blobs:
+            if self._size <= self.max_size:
+                break
+            self._size -= blob.stat().st_size
+            # dangling index entries are treated as misses
+            blob.unlink()
+
+
+class RepoProxy:
+    """HTTP server forwarding ``GET`` and ``HEAD`` requests to the repository
+    ``upstream`` (or a callable returning it) and caching the responses.
+
+    """
+
+    def __init__(
+        self,
+        upstream: Union[str, Callable[[], str]],
+        cache_dir: Optional[Path] = None,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_PORT,
+        offline: bool = False,
+        max_size: int = DEFAULT_MAX_SIZE,
+    ) -> None:
+        self._upstream = upstream
+        self.cache = BlobCache(
+            cache_dir or get_cache_dir("repo-proxy"), max_size
+        )
+        self.offline = offline
+        self.stats = ProxyStats()
+        # mutable files that were already fetched by this proxy
+        self._refreshed: Set[str] = set()
+        self._url_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._server = _ThreadingHTTPServer((host, port), _make_handler(self))
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    @property
+    def upstream(self) -> str:
+        if callable(self._upstream):
+            self._upstream = self._upstream()
+        return self._upstream.rstrip("/") + "/"
+
+    def start(self) -> None:
+        """Serves the requests in a background thread."""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        )
+        self._thread.start()
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+        self._server.server_close()
+
+    def _url_lock(self, url: str) -> threading.Lock:
+        with self._lock:
+            return self._url_locks.setdefault(url, threading.Lock())
+
+    def fetch(self, path: str) -> Optional[Path]:
+        """Returns the cached file ``path`` of the repository, fetching it
+        first if necessary. Returns ``None`` if it does not exist.
+
+        """
+        url = self.upstream + path.lstrip("/")
+        with self._url_lock(url):
+            with self._lock:
+                self.stats.requests += 1
+            cached = self.cache.get(url)
+            fresh = is_immutable(path) or url in self._refreshed
+            if cached is not None and (fresh or self.offline):
+                with self._lock:
+                    self.stats.hits += 1
+                return cached
+            if self.offline:
+                return None
+
+            try:
+                blob = self._download(url)
+            except OSError as err:
+                if isinstance(err, urllib.error.HTTPError) and err.code == 404:
+                    return None
+                # serve stale metadata if the repository is unreachable
+                if cached is None:
+                    raise
+                _LOGGER.warning("Could not refresh %s, using the cache", url)
+                blob = cached
+            self._refreshed.add(url)
+            return blob
+
+    def _download(self, url: str) -> Path:
+        digest = hashlib.sha256()
+        tmp_fd, tmp_name = tempfile.mkstemp(
+            dir=str(self.cache.blob_dir.parent)
+        )
+        try:
+            with os.fdopen(tmp_fd, "wb") as tmp_file:
+                with urllib.request.urlopen(url, timeout=300) as response:
+                    while True:
+                        chunk = response.read(_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        digest.update(chunk)
+                        tmp_file.write(chunk)
+                        with self._lock:
+                            self.stats.downloaded_bytes += len(chunk)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+        return self.cache.put(url, Path(tmp_name), digest.hexdigest())
+
+
+class RepoProxyPlugin:
+    """pytest plugin running a :py:class:`RepoProxy` for the duration of the
+    test session and reporting its statistics in the terminal summary.
+
+    """
+
+    def __init__(self, proxy: RepoProxy) -> None:
+        self.proxy = proxy
+
+    def pytest_unconfigure(self) -> None:
+        self.proxy.stop()
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        stats = self.proxy.stats
+        terminalreporter.write_sep("-", "repository proxy")
+        terminalreporter.write_line(
+            f"{stats.requests} requests, {stats.hits} served from the cache, "
+            f"{stats.downloaded_bytes / 1024**2:.1f} MiB downloaded"
+        )
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    # http.server.ThreadingHTTPServer is only available on Python 3.7+
+    daemon_threads = True
+
+
+def _make_handler(proxy: RepoProxy):
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _serve(self, send_body: bool) -> None:
+            path = self.path.split("?", 1)[0]
+            try:
+                blob = proxy.fetch(path)
+            except OSError as err:
+                _LOGGER.error("Fetching %s failed: %s", path, err)
+                self.send_error(502)
+                return
+            if blob is None:
+                self.send_error(404)
+                return
+
+            # the blob could be evicted in the meantime, but the open file
+            # stays readable
+            with open(blob, "rb") as blob_file:
+                self.send_response(200)
+                self.send_header(
+                    "Content-Length", str(os.fstat(blob_file.fileno()).st_size)
+                )
+                self.end_headers()
+                if send_body:
+                    shutil.copyfileobj(blob_file, self.wfile, _CHUNK_SIZE)
+
+        def do_GET(self) -> None:  # noqa: N802
+            self._serve(send_body=True)
+
+        def do_HEAD(self) -> None:  # noqa: N802
+            self._serve(send_body=False)
+
+        def log_message(self, format, *args) -> None:  # noqa: A002
+            _LOGGER.debug(format, *args)
+
+    return _Handler
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Caching HTTP proxy for the SLE_BCI repository"
+    )
+    parser.add_argument(
+        "--upstream",
+        default=None,
+        help="URL of the repository (defaults to BCI_DEVEL_REPO)",
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Address on which the proxy listens (e.g. the container bridge)",
+    )
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--cache-dir", type=Path, default=None)
+    parser.add_argument("--max-size", type=int, default=DEFAULT_MAX_SIZE)
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Serve all requests from the cache",
+    )
+    args = parser.parse_args()
+
+    def _default_upstream() -> str:
+        # pylint: disable=import-outside-toplevel
+        from bci_tester.data import BCI_UPSTREAM_REPO
+
+        return BCI_UPSTREAM_REPO
+
+    logging.basicConfig(level=logging.INFO)
+    repo_proxy = RepoProxy(
+        args.upstream or _default_upstream,
+        cache_dir=args.cache_dir,
+        host=args.host,
+        port=args.port,
+        offline=args.offline,
+        max_size=args.max_size,
+    )
+    _LOGGER.info("Serving %s on port %d", repo_proxy.upstream, args.port)
+    try:
+        repo_proxy.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,314 @@
+"""On-disk cache of the rpm database of the tested images.
+
+Several tests query the installed packages of a container (their versions,
+licenses, provides or the files they own), each via its own :command:`rpm`
+invocation in the container. The rpm database only depends on the image, so
+:py:func:`get_rpm_database` extracts all headers of an image once with a
+single query, stores them in a sqlite database indexed by the image digest
+(:file:`$BCI_CACHE_DIR/rpmdb/rpmdb.sqlite`) and answers all further queries
+from there, also in later test runs.
+
+Images that are rebuilt for every run (e.g. the derived images with
+``BCI_DEVEL_REPO``) get a new digest each time, so the least recently used
+images are evicted once the cache holds more than
+:py:const:`MAX_CACHED_IMAGES` images or an image was not used for
+:py:const:`MAX_IMAGE_AGE`.
+
+"""
+
+import sqlite3
+import time
+from dataclasses import astuple
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from pytest_container.container import ContainerData
+
+from bci_tester.util import get_cache_dir
+
+#: query format passed to :command:`rpm -qa --qf` to extract all headers,
+#: each package starts with a line with its name, version, release, arch and
+#: license (separated by tabs), followed by one line per provide (``P``),
+#: require (``R``) and file (``F``)
+RPM_QUERY_FORMAT = (
+    r"@@pkg %{NAME}\t%{VERSION}\t%{RELEASE}\t%{ARCH}\t%{LICENSE}\n"
+    r"[P %{PROVIDES}\n][R %{REQUIRES}\n][F %{FILENAMES}\n]"
+)
+
+#: maximum number of images in the cache
+MAX_CACHED_IMAGES = 64
+
+#: images that were not used for this long are removed from the cache
+MAX_IMAGE_AGE = timedelta(days=14)
+
+_DATA_TABLES = ("packages", "provides", "requires", "files")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    digest TEXT PRIMARY KEY, last_used REAL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS packages (
+    digest TEXT, name TEXT, version TEXT, release TEXT, arch TEXT,
+    license TEXT
+);
+CREATE INDEX IF NOT EXISTS packages_name ON packages (digest, name);
+CREATE TABLE IF NOT EXISTS provides (digest TEXT, name TEXT, package TEXT);
+CREATE INDEX IF NOT EXISTS provides_name ON provides (digest, name);
+CREATE TABLE IF NOT EXISTS requires (digest TEXT, name TEXT, package TEXT);
+CREATE INDEX IF NOT EXISTS requires_package ON requires (digest, package);
+CREATE TABLE IF NOT EXISTS files (digest TEXT, path TEXT, package TEXT);
+CREATE INDEX IF NOT EXISTS files_path ON files (digest, path);
+CREATE INDEX IF NOT EXISTS files_package ON files (digest, package);
+"""
+
+
+@dataclass(frozen=True)
+class RpmPackage:
+    """An installed package."""
+
+    name: str
+    version: str
+    release: str
+    arch: str
+    license: str
+
+
+def get_default_db_path() -> Path:
+    """Returns the default location of the rpm database cache."""
+    return get_cache_dir("rpmdb") / "rpmdb.sqlite"
+
+
+def parse_rpm_query(
+    output: str,
+) -> Iterator[Tuple[RpmPackage, List[str], List[str], List[str]]]:
+    """Parses the output of :command:`rpm -qa --qf` with
+    :py:const:`RPM_QUERY_FORMAT` and yields each package with its provides,
+    requires and files.
+
+    """
+    package: Optional[RpmPackage] = None
+    provides: List[str] = []
+    requires: List[str] = []
+    files: List[str] = []
+    for line in output.splitlines():
+        kind, _, value = line.partition(" ")
+        if kind == "@@pkg":
+            if package is not None:
+                yield package, provides, requires, files
+            fields = value.split("\t")
+            package = RpmPackage(*(fields + [""] * 5)[:5])
+            provides, requires, files = [], [], []
+        elif kind == "P":
+            provides.append(value)
+        elif kind == "R":
+            requires.append(value)
+        elif kind == "F":
+            files.append(value)
+    if package is not None:
+        yield package, provides, requires, files
+
+
+def _connect(db_path: Path) -> sqlite3.Connection:
+    # multiple pytest-xdist workers write to the same database
+    conn = sqlite3.connect(str(db_path), timeout=120)
+    conn.executescript(_SCHEMA)
+    # databases created before the eviction was added
+    if "last_used" not in (
+        row[1] for row in conn.execute("PRAGMA table_info(images)")
+    ):
+        conn.execute("ALTER TABLE images ADD COLUMN last_used REAL DEFAULT 0")
+    return conn
+
+
+class RpmDatabase:
+    """The cached rpm database of the image with the digest ``digest``."""
+
+    def __init__(self, conn: sqlite3.Connection, digest: str) -> None:
+        self._conn = conn
+        self.digest = digest
+
+    def _query(self, sql: str, *args: str) -> List[Tuple]:
+        return self._conn.execute(sql, (self.digest, *args)).fetchall()
+
+    @property
+    def packages(self) -> List[RpmPackage]:
+        """All installed packages sorted by their name, like
+        :command:`rpm -qa` a package installed in multiple versions (e.g.
+        ``gpg-pubkey``) is listed once per version.
+
+        """
+        return [
+            RpmPackage(*row)
+            for row in self._query(
+                "SELECT name, version, release, arch, license FROM packages "
+                "WHERE digest = ? ORDER BY name, rowid"
+            )
+        ]
+
+    def package(self, name: str) -> Optional[RpmPackage]:
+        """Returns the installed package ``name`` or ``None``, the first one
+        if it is installed in multiple versions.
+
+        """
+        rows = self._query(
+            "SELECT name, version, release, arch, license FROM packages "
+            "WHERE digest = ? AND name = ? ORDER BY rowid LIMIT 1",
+            name,
+        )
+        return RpmPackage(*rows[0]) if rows else None
+
+    def is_installed(self, name: str) -> bool:
+        """Returns whether the package ``name`` is installed, equivalent to
+        :command:`rpm -q $name`.
+
+        """
+        return self.package(name) is not None
+
+    def what_provides(self, capability: str) -> List[str]:
+        """Returns the names of all packages providing ``capability``,
+        equivalent to :command:`rpm -q --whatprovides $capability`.
+
+        """
+        return [
+            row[0]
+            for row in self._query(
+                "SELECT DISTINCT package FROM provides "
+                "WHERE digest = ? AND name = ? ORDER BY package",
+                capability,
+            )
+        ]
+
+    def requires(self, name: str) -> List[str]:
+        """Returns the requirements of the package ``name``."""
+        return [
+            row[0]
+            for row in self._query(
+                "SELECT name FROM requires WHERE digest = ? AND package = ?",
+                name,
+            )
+        ]
+
+    def files(self, name: str) -> List[str]:
+        """Returns the files owned by the package ``name``."""
+        return [
+            row[0]
+            for row in self._query(
+                "SELECT path FROM files WHERE digest = ? AND package = ?",
+                name,
+            )
+        ]
+
+    def owner(self, path: str) -> List[str]:
+        """Returns the names of the packages owning ``path``, equivalent to
+        :command:`rpm -qf $path`.
+
+        """
+        return [
+            row[0]
+            for row in self._query(
+                "SELECT DISTINCT package FROM files "
+                "WHERE digest = ? AND path = ? ORDER BY package",
+                path,
+            )
+        ]
+
+
+def _evict(conn: sqlite3.Connection) -> None:
+    # removes the least recently used images beyond MAX_CACHED_IMAGES and all
+    # images that were not used within MAX_IMAGE_AGE
+    deadline = time.time() - MAX_IMAGE_AGE.total_seconds()
+    evicted = [
+        row[0]
+        for row in conn.execute(
+            "SELECT digest FROM images WHERE last_used < ? OR digest IN ("
+            "SELECT digest FROM images ORDER BY last_used DESC "
+            "LIMIT -1 OFFSET ?)",
+            (deadline, MAX_CACHED_IMAGES),
+        ).fetchall()
+    ]
+    for table in (*_DATA_TABLES, "images"):
+        conn.executemany(
+            f"DELETE FROM {table} WHERE digest = ?",
+            ((digest,) for digest in evicted),
+        )
+
+
+def _store(conn: sqlite3.Connection, digest: str, output: str) -> None:
+    # BEGIN IMMEDIATE takes the write lock, so that only one process stores
+    # the headers of an image
+    conn.isolation_level = None
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if conn.execute(
+            "SELECT 1 FROM images WHERE digest = ?", (digest,)
+        ).fetchone():
+            conn.execute("ROLLBACK")
+            return
+        for package, provides, requires, files in parse_rpm_query(output):
+            conn.execute(
+                "INSERT INTO packages VALUES (?, ?, ?, ?, ?, ?)",
+                (digest, *astuple(package)),
+            )
+            for table, values in (
+                ("provides", provides),
+                ("requires", requires),
+                ("files", files),
+            ):
+                conn.executemany(
+                    f"INSERT INTO {table} VALUES (?, ?, ?)",
+                    ((digest, value, package.name) for value in values),
+                )
+        conn.execute("INSERT INTO images VALUES (?, ?)", (digest, time.time()))
+        _evict(conn)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+_DATABASES: Dict[Tuple[Path, str], RpmDatabase] = {}
+
+
+def get_rpm_database(
+    container: ContainerData,
+    query: Optional[Callable[[str], str]] = None,
+    db_path: Optional[Path] = None,
+) -> RpmDatabase:
+    """Returns the rpm database of the image of ``container``.
+
+    If the image is not in the cache yet, then its headers are extracted with
+    ``query``, which receives the query format and returns the output of
+    :command:`rpm -qa --qf $format`. By default, :command:`rpm` is executed
+    in the container, images without :command:`rpm` need to pass a different
+    ``query`` (e.g. running :command:`rpm --root` in another container).
+
+    """
+    digest = container.inspect.image_hash
+    path = db_path or get_default_db_path()
+    if (path, digest) in _DATABASES:
+        return _DATABASES[(path, digest)]
+
+    conn = _connect(path)
+    with conn:
+        cached = conn.execute(
+            "UPDATE images SET last_used = ? WHERE digest = ?",
+            (time.time(), digest),
+        ).rowcount
+    if not cached:
+        if query is None:
+            output = container.connection.check_output(
+                f"rpm -qa --qf '{RPM_QUERY_FORMAT}'"
+            )
+        else:
+            output = query(RPM_QUERY_FORMAT)
+        _store(conn, digest, output)
+
+    _DATABASES[(path, digest)] = RpmDatabase(conn, digest)
+    return _DATABASES[(path, digest)]
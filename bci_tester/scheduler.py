@@ -0,0 +1,166 @@
+"""Cost aware :command:`pytest-xdist` scheduler.
+
+The durations of the tests in this testsuite differ by several orders of
+magnitude, so :command:`pytest-xdist`'s default scheduling often ends with one
+worker running a long test while all others are idle. It furthermore
+distributes the tests of one container image across all workers, so that each
+worker has to launch the container again.
+
+:py:class:`CostAwareScheduling` groups all tests using the same container
+image (as identified by the test id of the container parameter) into one work
+unit and hands out the work units in the order of their expected duration,
+longest first (LPT scheduling). Work units that would take longer than the
+fair share of a single worker are split into smaller chunks.
+
+"""
+
+import math
+import re
+from collections import OrderedDict
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Pattern
+
+from xdist.scheduler import LoadScopeScheduling
+
+from bci_tester.durations import DurationDB
+
+
+def get_image_id_pattern(image_ids: Iterable[str]) -> Optional[Pattern[str]]:
+    """Returns a regular expression matching any of the ``image_ids`` (the
+    ids of the container parameters) in the parameter part of a node id,
+    preferring the longest match.
+
+    """
+    ids = sorted(set(image_ids), key=len, reverse=True)
+    if not ids:
+        return None
+    return re.compile("|".join(re.escape(image_id) for image_id in ids))
+
+
+class CostAwareScheduling(LoadScopeScheduling):
+    """Scheduler assigning work units grouped by container image, longest
+    first.
+
+    """
+
+    def __init__(
+        self,
+        config,
+        log=None,
+        durations: Optional[DurationDB] = None,
+        image_ids: Iterable[str] = (),
+        split_large_units: bool = True,
+    ) -> None:
+        super().__init__(config, log)
+        self.durations = durations or DurationDB()
+        self._image_id_pattern = get_image_id_pattern(image_ids)
+        self._split_large_units = split_large_units
+        self._scope_of: Dict[str, str] = {}
+
+    def _image_scope(self, nodeid: str) -> str:
+        _, sep, params = nodeid.partition("[")
+        if sep and self._image_id_pattern is not None:
+            match = self._image_id_pattern.search(params)
+            if match:
+                return f"image: {match.group(0)}"
+        # tests without a container of the catalog are grouped by module
+        return nodeid.split("::", 1)[0]
+
+    def _split_scope(self, nodeid: str) -> str:
+        scope = self._scope_of.get(nodeid)
+        if scope is None:
+            scope = self._image_scope(nodeid)
+        return scope
+
+    def _cost(self, nodeids: Iterable[str]) -> float:
+        return sum(self.durations.estimate(nodeid) for nodeid in nodeids)
+
+    def _chunk(self, scope: str, nodeids: List[str], limit: float) -> None:
+        """Split the work unit ``scope`` consisting of ``nodeids`` into
+        consecutive chunks with an estimated duration of about ``limit``. The
+        order of the tests is retained, so that each chunk contains whole
+        modules/classes as far as possible.
+
+        """
+        chunks = math.ceil(self._cost(nodeids) / limit)
+        if chunks <= 1 or len(nodeids) <= 1:
+            return
+
+        chunk_limit = self._cost(nodeids) / chunks
+        index, cost = 0, 0.0
+        for nodeid in nodeids:
+            if cost >= chunk_limit:
+                index, cost = index + 1, 0.0
+            cost += self.durations.estimate(nodeid)
+            self._scope_of[nodeid] = f"{scope} #{index}"
+
+    def schedule(self) -> None:
+        # this is LoadScopeScheduling.schedule() with a work queue ordered by
+        # the expected duration of each work unit
+        assert self.collection_is_completed
+
+        if self.collection is not None:
+            for node in self.nodes:
+                self._reschedule(node)
+            return
+
+        if not self._check_nodes_have_same_collection():
+            self.log("**Different tests collected, aborting run**")
+            return
+
+        self.collection = list(
+            next(iter(self.registered_collections.values()))
+        )
+        if not self.collection:
+            return
+
+        units: Dict[str, List[str]] = OrderedDict()
+        for nodeid in self.collection:
+            units.setdefault(self._image_scope(nodeid), []).append(nodeid)
+
+        if self._split_large_units and self.nodes:
+            fair_share = self._cost(self.collection) / len(self.nodes)
+            for scope, nodeids in units.items():
+                self._chunk(scope, nodeids, fair_share)
+
+        unsorted_workqueue: Dict[str, Dict[str, bool]] = OrderedDict()
+        for nodeid in self.collection:
+            unsorted_workqueue.setdefault(self._split_scope(nodeid), {})[
+                nodeid
+            ] = False
+
+        # sorted() is stable, so units with the same cost stay in the order
+        # of the collection
+        for scope, work_unit in sorted(
+            unsorted_workqueue.items(), key=lambda unit: -self._cost(unit[1])
+        ):
+            self.workqueue[scope] = work_unit
+
+        self.log(
+            f"Scheduling {len(self.workqueue)} work units with an estimated "
+            f"duration of {self._cost(self.collection):.0f}s"
+        )
+
+        extra_nodes = len(self.nodes) - len(self.workqueue)
+        if extra_nodes > 0:
+            self.log(f"Shutting down {extra_nodes} nodes")
+            for _ in range(extra_nodes):
+                unused_node, _ = self.assigned_work.popitem()
+                self.log(f"Shutting down unused node {unused_node}")
+                unused_node.shutdown()
+
+        for node in self.nodes:
+            self._assign_work_unit(node)
+
+        # a worker only runs a test once it received the next one, so each
+        # node needs at least two work units if possible (pytest-xdist #277)
+        for node in self.nodes:
+            self._reschedule(node)
+
+        # all tests were sent, the nodes can shut down after running them
+        if not self.workqueue:
+            for node in self.nodes:
+                node.shutdown()
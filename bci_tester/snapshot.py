@@ -0,0 +1,169 @@
+"""Snapshots of containers after an expensive preparation step.
+
+Some tests first prepare the container (e.g. :command:`zypper dup` or
+installing build dependencies) and then perform a cheap check.
+:py:func:`prepared_container` turns such a preparation into a
+:py:class:`PreparedContainer`, whose image is the original image with the
+preparation applied. It is stored in the build cache
+(:py:mod:`bci_tester.build_cache`) keyed on the base image id and the
+preparation script and reused until the ``SLE_BCI`` repository changes, so
+that every test (and every subsequent run) starts from the snapshot:
+
+.. code-block:: python
+
+   @pytest.mark.parametrize(
+       "container_per_test",
+       [prepared_container(c, "dup", "zypper -n dup") for c in CONTAINERS],
+       indirect=True,
+   )
+   def test_after_dup(container_per_test): ...
+
+:py:class:`SnapshotReport` lists the built and reused snapshots in the test
+summary.
+
+"""
+
+from dataclasses import dataclass
+from dataclasses import fields
+from pathlib import Path
+from subprocess import check_output
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import pytest
+from _pytest.mark import ParameterSet
+from pytest_container import OciRuntimeBase
+from pytest_container import container_and_marks_from_pytest_param
+from pytest_container.container import Container
+
+from bci_tester.solv_cache import RepoSnapshotContainer
+
+_WORKEROUTPUT_KEY = "bci_snapshots"
+
+#: preparation name → number of snapshots that were built & reused by this
+#: process
+_STATS: Dict[str, Tuple[int, int]] = {}
+
+
+@dataclass
+class PreparedContainer(RepoSnapshotContainer):
+    """A container whose image has the preparation named ``preparation``
+    applied via its :py:attr:`containerfile`. The shell ``script`` runs as
+    ``root`` and the ``USER`` of the base image is restored afterwards.
+
+    """
+
+    preparation: str = ""
+
+    script: str = ""
+
+    def finalize_containerfile(
+        self, container_runtime: OciRuntimeBase, base_image_id: str
+    ) -> None:
+        user = (
+            check_output(
+                [
+                    container_runtime.runner_binary,
+                    "inspect",
+                    "--type",
+                    "image",
+                    "-f",
+                    "{{.Config.User}}",
+                    base_image_id,
+                ]
+            )
+            .decode()
+            .strip()
+        )
+        self.containerfile = f"USER root\nRUN {self.script}"
+        if user:
+            self.containerfile += f"\nUSER {user}"
+
+    def prepare_container(
+        self,
+        container_runtime: OciRuntimeBase,
+        rootdir: Path,
+        extra_build_args: Optional[List[str]] = None,
+    ) -> None:
+        super().prepare_container(container_runtime, rootdir, extra_build_args)
+        built, reused = _STATS.get(self.preparation, (0, 0))
+        if self.build_cache_hit:
+            reused += 1
+        else:
+            built += 1
+        _STATS[self.preparation] = (built, reused)
+
+
+def prepared_container(
+    param: ParameterSet, preparation: str, script: str
+) -> ParameterSet:
+    """Returns the container of the ``pytest.param`` ``param`` after the
+    shell ``script`` was run in it as ``root``, with the same id and marks.
+    The ``preparation`` names the script in the test summary.
+
+    The script runs while the image is built, so if it fails, the tests
+    using the container are reported as errors in their setup and not as
+    test failures.
+
+    """
+    ctr, marks = container_and_marks_from_pytest_param(param)
+    # the launch settings are not inherited from the base container
+    launch_settings = {
+        field.name: getattr(ctr, field.name)
+        for field in fields(Container)
+        if field.name not in ("url", "container_id", "_is_local")
+    }
+    return pytest.param(
+        PreparedContainer(
+            base=ctr,
+            containerfile=f"USER root\nRUN {script}",
+            preparation=preparation,
+            script=script,
+            **launch_settings,
+        ),
+        marks=marks or (),
+        id=getattr(param, "id", None) or str(ctr),
+    )
+
+
+class SnapshotReport:
+    """pytest plugin reporting how often each preparation was built and how
+    often it was reused from the cache.
+
+    """
+
+    def __init__(self, config) -> None:
+        self.config = config
+        self.stats: Dict[str, Tuple[int, int]] = {}
+
+    def _add(self, stats: Dict[str, Tuple[int, int]]) -> None:
+        for preparation, (built, reused) in stats.items():
+            total_built, total_reused = self.stats.get(preparation, (0, 0))
+            self.stats[preparation] = (
+                total_built + built,
+                total_reused + reused,
+            )
+
+    def pytest_sessionfinish(self, session) -> None:
+        workeroutput = getattr(session.config, "workeroutput", None)
+        if workeroutput is not None:
+            workeroutput[_WORKEROUTPUT_KEY] = dict(_STATS)
+        else:
+            self._add(_STATS)
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error) -> None:
+        self._add(getattr(node, "workeroutput", {}).get(_WORKEROUTPUT_KEY, {}))
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        if getattr(self.config, "workeroutput", None) is not None:
+            return
+        if not self.stats:
+            return
+        terminalreporter.write_sep("-", "prepared container snapshots")
+        for preparation, (built, reused) in sorted(self.stats.items()):
+            terminalreporter.write_line(
+                f"{preparation}: {reused} reused from the cache, {built} built"
+            )
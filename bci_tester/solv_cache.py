@@ -0,0 +1,76 @@
+"""Container image with the pre-built solv file of the ``SLE_BCI``
+repository.
+
+The tests running :command:`installcheck` or :command:`dumpsolv` need the
+solv file of the ``SLE_BCI`` repository and :command:`libsolv-tools`. Instead
+of refreshing the repository and installing the tools in every container,
+:py:func:`create_solv_container` creates a
+:py:class:`~bci_tester.build_cache.CachedDerivedContainer` that does both at
+build time. Its image is cached per revision of the repository metadata (the
+sha256 digest of :file:`repodata/repomd.xml`), so it is reused across test
+runs until the repository changes.
+
+"""
+
+import functools
+import hashlib
+import logging
+import urllib.request
+from typing import Optional
+from typing import Union
+
+from pytest_container import DerivedContainer
+from pytest_container.container import Container
+
+from bci_tester.build_cache import CachedDerivedContainer
+
+_LOGGER = logging.getLogger(__name__)
+
+#: path to the solv files generated by zypper, the repository alias has to be
+#: appended
+SOLV_CACHE_DIR = "/var/cache/zypp/solv"
+
+
+@functools.lru_cache(maxsize=None)
+def get_repomd_checksum(repo_url: str) -> Optional[str]:
+    """Returns the sha256 digest of :file:`repodata/repomd.xml` of the
+    repository ``repo_url`` or ``None`` if it cannot be fetched.
+
+    """
+    url = repo_url.rstrip("/") + "/repodata/repomd.xml"
+    try:
+        with urllib.request.urlopen(url, timeout=60) as response:
+            return hashlib.sha256(response.read()).hexdigest()
+    except OSError as err:
+        _LOGGER.warning("Could not fetch %s: %s", url, err)
+        return None
+
+
+class RepoSnapshotContainer(CachedDerivedContainer):
+    """A :py:class:`~bci_tester.build_cache.CachedDerivedContainer` whose
+    image is reused for as long as the metadata of the ``SLE_BCI`` repository
+    is unchanged and not only for one test run.
+
+    """
+
+    def build_cache_scope(self) -> str:
+        # pylint: disable=import-outside-toplevel
+        from bci_tester.data import BCI_UPSTREAM_REPO
+
+        checksum = get_repomd_checksum(BCI_UPSTREAM_REPO)
+        if checksum is None:
+            return super().build_cache_scope()
+        return f"repomd-{checksum}"
+
+
+def create_solv_container(
+    base: Union[Container, DerivedContainer],
+) -> RepoSnapshotContainer:
+    """Returns a container based on ``base`` with :command:`libsolv-tools`
+    installed and the solv files of all repositories generated.
+
+    """
+    return RepoSnapshotContainer(
+        base=base,
+        containerfile="RUN zypper -n ref && zypper -n in libsolv-tools",
+    )
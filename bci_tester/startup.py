@@ -0,0 +1,286 @@
+"""Measurement of the startup latency of the container images.
+
+:py:func:`measure_startup` launches a container step by step and measures the
+time of each step:
+
+- pulling the image into a separate, empty image store (see
+  :py:func:`cold_pull`), the images of the container runtime are not touched
+- creating the container
+- starting it until commands can be executed in it
+- starting it until its healthcheck reports it as healthy (if it has one)
+
+:py:class:`StartupResults` stores the times of all images of one architecture
+and ``OS_VERSION`` in a json file, which can serve as the baseline of later
+runs. :py:meth:`StartupTimes.regressions` compares the times with such a
+baseline.
+
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from contextlib import ExitStack
+from dataclasses import asdict
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Union
+
+from pytest_container import DerivedContainer
+from pytest_container import OciRuntimeBase
+from pytest_container.container import Container
+from pytest_container.container import get_volume_creator
+from pytest_container.inspect import ContainerHealth
+
+from bci_tester.prepull import get_root_url
+from bci_tester.util import get_cache_dir
+
+#: time in seconds between two checks whether the container is ready
+_POLL_INTERVAL = 0.1
+
+
+@dataclass(frozen=True)
+class StartupTimes:
+    """Startup times of a container image in seconds."""
+
+    #: time to pull the image (respectively the base image of a derived
+    #: container) into an empty image store, ``None`` if no separate store
+    #: is available
+    pull: Optional[float]
+
+    #: time to create the container
+    create: float
+
+    #: time from starting the container until commands can be executed in it
+    ready: float
+
+    #: time from starting the container until it is healthy, ``None`` if the
+    #: image has no healthcheck
+    healthy: Optional[float]
+
+    def regressions(
+        self, baseline: "StartupTimes", threshold: float, slack: float
+    ) -> List[str]:
+        """Returns a description of each time that exceeds the respective
+        time in ``baseline`` by more than the fraction ``threshold`` plus
+        ``slack`` seconds.
+
+        """
+        regressions = []
+        for name, value in asdict(self).items():
+            reference = getattr(baseline, name)
+            if value is None or reference is None:
+                continue
+            limit = reference * (1 + threshold) + slack
+            if value > limit:
+                regressions.append(
+                    f"{name}: {value:.2f}s (baseline {reference:.2f}s, "
+                    f"limit {limit:.2f}s)"
+                )
+        return regressions
+
+
+def _run(args: List[str], check: bool = True) -> "subprocess.CompletedProcess":
+    return subprocess.run(
+        args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        check=check,
+        universal_newlines=True,
+    )
+
+
+def _timed(args: List[str]) -> float:
+    start = time.monotonic()
+    _run(args)
+    return time.monotonic() - start
+
+
+def cold_pull(runner_binary: str, url: str) -> Optional[float]:
+    """Returns the time to pull the image ``url`` into an empty image store
+    without modifying the image store of ``runner_binary``: podman pulls into
+    a temporary storage root, otherwise :command:`skopeo` copies the image
+    into a temporary OCI layout. Returns ``None`` if neither is possible.
+
+    """
+    tmp_dir = tempfile.mkdtemp(dir=str(get_cache_dir("startup")))
+    try:
+        if "podman" in os.path.basename(runner_binary):
+            store = [
+                runner_binary,
+                "--root",
+                os.path.join(tmp_dir, "root"),
+                "--runroot",
+                os.path.join(tmp_dir, "runroot"),
+            ]
+            try:
+                return _timed([*store, "pull", url])
+            finally:
+                _run([*store, "rmi", "--all", "--force"], check=False)
+                # rootless podman stores files owned by subordinate ids
+                _run([runner_binary, "unshare", "rm", "-rf", tmp_dir], False)
+        if shutil.which("skopeo"):
+            return _timed(
+                [
+                    "skopeo",
+                    "copy",
+                    f"docker://{url}",
+                    f"oci:{os.path.join(tmp_dir, 'image')}",
+                ]
+            )
+        return None
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def measure_startup(
+    container_runtime: OciRuntimeBase,
+    container: Union[Container, DerivedContainer],
+    rootdir: Path,
+    extra_build_args: Optional[List[str]] = None,
+    extra_run_args: Optional[List[str]] = None,
+    timeout: timedelta = timedelta(minutes=5),
+) -> StartupTimes:
+    """Pulls, creates and starts ``container`` and returns the time of each
+    step. The container is removed afterwards. Raises a
+    :py:class:`RuntimeError` if the container exits or does not become ready
+    or healthy within ``timeout``.
+
+    The image is built with ``extra_build_args`` and the container is created
+    with ``extra_run_args``, so that the same container is measured that the
+    tests launch with these arguments.
+
+    The pull is measured in a separate image store (see
+    :py:func:`cold_pull`), the container itself uses the image of the
+    runtime.
+
+    """
+    runtime = container_runtime.runner_binary
+    url = get_root_url(container)
+    pull = cold_pull(runtime, url) if url else None
+    container.prepare_container(container_runtime, rootdir, extra_build_args)
+
+    with ExitStack() as stack:
+        for volume in container.volume_mounts:
+            stack.enter_context(get_volume_creator(volume, container_runtime))
+
+        launch_cmd = container.get_launch_cmd(
+            container_runtime, extra_run_args
+        )
+        assert launch_cmd[1:3] == ["run", "-d"], launch_cmd
+        start = time.monotonic()
+        container_id = _run(
+            [runtime, "create", *launch_cmd[3:]]
+        ).stdout.split()[-1]
+        create = time.monotonic() - start
+        stack.callback(_run, [runtime, "rm", "-f", container_id], False)
+
+        def wait_for(what: str, condition) -> float:
+            while not condition():
+                if time.monotonic() - start > timeout.total_seconds():
+                    raise RuntimeError(
+                        f"Container {container_id} did not become {what} "
+                        f"within {timeout.total_seconds()}s"
+                    )
+                if not container_runtime.inspect_container(
+                    container_id
+                ).state.running:
+                    raise RuntimeError(f"Container {container_id} exited")
+                time.sleep(_POLL_INTERVAL)
+            return time.monotonic() - start
+
+        start = time.monotonic()
+        _run([runtime, "start", container_id])
+        ready = wait_for(
+            "ready",
+            lambda: (
+                _run(
+                    [runtime, "exec", container_id, "/bin/sh", "-c", ":"],
+                    check=False,
+                ).returncode
+                == 0
+            ),
+        )
+
+        healthy: Optional[float] = None
+        if (
+            container_runtime.inspect_container(
+                container_id
+            ).config.healthcheck
+            is not None
+        ):
+            healthy = wait_for(
+                "healthy",
+                lambda: (
+                    container_runtime.inspect_container(
+                        container_id
+                    ).state.health
+                    == ContainerHealth.HEALTHY
+                ),
+            )
+
+    return StartupTimes(pull=pull, create=create, ready=ready, healthy=healthy)
+
+
+def get_default_results_path(os_version: str, arch: str) -> Path:
+    """Returns the default location of the startup times of the images of
+    ``os_version`` on ``arch``.
+
+    """
+    return get_cache_dir("startup") / f"{os_version}-{arch}.json"
+
+
+class StartupResults:
+    """Startup times of multiple images, indexed by the image name."""
+
+    def __init__(
+        self, times: Optional[Dict[str, StartupTimes]] = None
+    ) -> None:
+        self.times: Dict[str, StartupTimes] = dict(times or {})
+
+    @staticmethod
+    def load(path: Path) -> "StartupResults":
+        """Loads the results from ``path``, a missing or broken file results
+        in no results.
+
+        """
+        try:
+            entries = json.loads(path.read_text())
+            return StartupResults(
+                {
+                    name: StartupTimes(**times)
+                    for name, times in entries.items()
+                }
+            )
+        except (OSError, ValueError, TypeError, AttributeError):
+            return StartupResults()
+
+    def save(self, path: Path) -> None:
+        """Adds the results to the ones stored in ``path``, replacing the
+        existing results of the same images.
+
+        """
+        # pylint: disable=import-outside-toplevel
+        from filelock import FileLock
+
+        with FileLock(f"{path}.lock"):
+            results = StartupResults.load(path)
+            results.times.update(self.times)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(
+                json.dumps(
+                    {
+                        name: asdict(times)
+                        for name, times in results.times.items()
+                    },
+                    indent=2,
+                    sort_keys=True,
+                )
+            )
+            os.replace(tmp_path, path)
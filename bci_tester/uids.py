@@ -0,0 +1,205 @@
+"""Audit of the uids & gids of the users in the container images.
+
+The users of the images must have stable uids & gids across all images and
+releases (see ``USERNAME_UID_GID_MAP``). :py:func:`audit_users` compares the
+users owning files in an image against the expected ids and
+:py:class:`UidReport` collects the results of all images, so that the terminal
+summary can show the ids of each user across all tested images
+(``--uid-report``).
+
+"""
+
+import functools
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+import pytest
+
+#: the expected uid & gid of users, ``None`` stands for
+#: :py:const:`DEFAULT_ID`
+USERNAME_UID_GID_MAP: Dict[str, Tuple[Optional[int], Optional[int]]] = {
+    "nobody": (65534, 65534),
+    "root": (0, 0),
+    "wwwrun": (None, 485),
+    "pesign": (None, 486),
+    "nginx": (None, 486),
+    "registry": (None, 486),
+    "app": (1654, 1654),
+    "mysql": (60, 60),
+    "dirsrv": (None, 486),
+    "postgres": (None, 486),
+    "pcp": (496, 484),
+    "ldap": (498, 498),
+    "systemd-coredump": (497, 100),
+    "postfix": (51, 51),
+    "keadhcp": (None, 486),
+    "user": (1000, 1000),
+    "tss": (98, 98),
+}
+
+#: the uid & gid of users that are not in ``USERNAME_UID_GID_MAP``
+DEFAULT_ID = 499
+
+#: shell command printing the names of all users owning files in the
+#: directories where packages create their data
+FIND_FILE_OWNERS = "find /var /etc /opt /home -printf '%u\\n' | sort -u"
+
+_WORKEROUTPUT_KEY = "bci_uid_report"
+
+
+@functools.lru_cache(maxsize=None)
+def get_expected_uid_gid_map(
+    os_version: str, kiosk_xorg: bool = False
+) -> Mapping[str, Tuple[int, int]]:
+    """Returns the expected uid & gid of each user on ``os_version``.
+    ``kiosk_xorg`` selects the special case of the kiosk xorg images.
+
+    """
+    expected_map = dict(USERNAME_UID_GID_MAP)
+    # Apply special cases for TW & SLE 16
+    if os_version in ("tumbleweed", "16.0"):
+        # These users don't use the non-default GID on TW
+        for username in ("nginx", "dirsrv", "postgres", "registry", "keadhcp"):
+            expected_map.pop(username, None)
+
+        # Completely different UID & GID on TW
+        expected_map["pcp"] = (496, 498)
+        expected_map["wwwrun"] = (498, 498)
+        expected_map["pesign"] = (499, 499)
+        expected_map["systemd-coredump"] = (497, 1000)
+
+    if kiosk_xorg and "user" in expected_map:
+        expected_map["user"] = (expected_map["user"][0], 100)
+
+    return MappingProxyType(
+        {
+            name: (
+                DEFAULT_ID if uid is None else uid,
+                DEFAULT_ID if gid is None else gid,
+            )
+            for name, (uid, gid) in expected_map.items()
+        }
+    )
+
+
+@dataclass(frozen=True)
+class UserIds:
+    """The actual and expected uid & gid of a user in an image."""
+
+    name: str
+    uid: int
+    gid: int
+    expected_uid: int
+    expected_gid: int
+
+    @property
+    def is_stable(self) -> bool:
+        return (self.uid, self.gid) == (self.expected_uid, self.expected_gid)
+
+
+def audit_users(
+    users: Mapping[str, Tuple[int, int]],
+    file_owners: Iterable[str],
+    expected_map: Mapping[str, Tuple[int, int]],
+) -> List[UserIds]:
+    """Returns the ids of all ``users`` (name to uid & gid as in
+    :file:`/etc/passwd`) that own files (``file_owners``).
+
+    """
+    owners = {owner.strip() for owner in file_owners}
+    return [
+        UserIds(
+            name,
+            uid,
+            gid,
+            *expected_map.get(name, (DEFAULT_ID, DEFAULT_ID)),
+        )
+        for name, (uid, gid) in users.items()
+        if name in owners
+    ]
+
+
+class UidReport:
+    """pytest plugin collecting the audited users of all images and printing
+    them as one table (users × images) in the terminal summary.
+
+    """
+
+    def __init__(self, config) -> None:
+        self.config = config
+        #: image → user → (uid, gid, expected uid, expected gid)
+        self.images: Dict[str, Dict[str, Tuple[int, int, int, int]]] = {}
+
+    def record(self, image: str, audited: Iterable[UserIds]) -> None:
+        """Adds the audited users of ``image`` to the report."""
+        self.images[image] = {
+            user.name: (
+                user.uid,
+                user.gid,
+                user.expected_uid,
+                user.expected_gid,
+            )
+            for user in audited
+        }
+
+    def pytest_sessionfinish(self, session) -> None:
+        workeroutput = getattr(session.config, "workeroutput", None)
+        if workeroutput is not None:
+            workeroutput[_WORKEROUTPUT_KEY] = self.images
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error) -> None:
+        self.images.update(
+            getattr(node, "workeroutput", {}).get(_WORKEROUTPUT_KEY, {})
+        )
+
+    def format_table(self) -> List[str]:
+        """Returns one line per user with its expected ids and the images
+        grouped by their actual ids, deviating ids are marked with ``!``.
+
+        """
+        users: Dict[str, Tuple[int, int]] = {}
+        actual: Dict[str, Dict[Tuple[int, int], List[str]]] = {}
+        # the expected ids can differ between images (e.g. kiosk xorg)
+        deviating: Set[Tuple[str, Tuple[int, int]]] = set()
+        for image, image_users in sorted(self.images.items()):
+            for name, (uid, gid, exp_uid, exp_gid) in image_users.items():
+                users.setdefault(name, (exp_uid, exp_gid))
+                actual.setdefault(name, {}).setdefault((uid, gid), []).append(
+                    image
+                )
+                if (uid, gid) != (exp_uid, exp_gid):
+                    deviating.add((name, (uid, gid)))
+
+        width = max((len(name) for name in users), default=0)
+        lines = []
+        for name, expected in sorted(users.items()):
+            groups = []
+            for ids, images in sorted(actual[name].items()):
+                mark = "!" if (name, ids) in deviating else ""
+                if not mark and len(images) > 1:
+                    where = f"{len(images)} images"
+                else:
+                    where = ", ".join(images)
+                groups.append(f"{mark}{ids[0]}:{ids[1]} ({where})")
+            expected_ids = f"{expected[0]}:{expected[1]}"
+            lines.append(
+                f"{name:<{width}}  {expected_ids:<11} " + "; ".join(groups)
+            )
+        return lines
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        if getattr(self.config, "workeroutput", None) is not None:
+            return
+        if not self.images or not self.config.getoption("uid_report"):
+            return
+        terminalreporter.write_sep("-", "uids & gids of the users per image")
+        for line in self.format_table():
+            terminalreporter.write_line(line)
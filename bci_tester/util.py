@@ -2,8 +2,13 @@
 
 import os
 import re
+import shlex
 import xml.etree.ElementTree as ET
 from dataclasses import dataclass
+from pathlib import Path
+from subprocess import DEVNULL
+from subprocess import CalledProcessError
+from subprocess import check_output
 from typing import Dict
 from typing import List
 from typing import Optional
@@ -13,6 +18,7 @@ try:
 except ImportError:
     from typing_extensions import Literal
 
+from pytest_container import OciRuntimeBase
 from pytest_container import Version
 
 
@@ -129,3 +135,68 @@ def get_repository_name(image_type: Literal["dockerfile", "kiwi"]) -> str:
     if image_type == "kiwi":
         return "containerkiwi/" if os_version.startswith("16") else "images/"
     raise AssertionError(f"invalid image_type: {image_type}")
+
+
+def get_cache_dir(name: str) -> Path:
+    """Returns the directory :file:`name` in the persistent cache of the
+    testsuite and creates it if it does not exist yet.
+
+    The cache is located in ``$BCI_CACHE_DIR`` and defaults to
+    :file:`$XDG_CACHE_HOME/bci-tests` (respectively
+    :file:`~/.cache/bci-tests`).
+
+    """
+    cache_root = os.getenv("BCI_CACHE_DIR")
+    if not cache_root:
+        cache_root = os.path.join(
+            os.getenv("XDG_CACHE_HOME")
+            or os.path.join(os.path.expanduser("~"), ".cache"),
+            "bci-tests",
+        )
+    cache_dir = Path(cache_root) / name
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def get_image_id(
+    container_runtime: OciRuntimeBase, image: str
+) -> Optional[str]:
+    """Returns the id of the local ``image`` or ``None`` if it does not
+    exist.
+
+    """
+    try:
+        image_id = (
+            check_output(
+                [
+                    container_runtime.runner_binary,
+                    "inspect",
+                    "--type",
+                    "image",
+                    "-f",
+                    "{{.Id}}",
+                    image,
+                ],
+                stderr=DEVNULL,
+            )
+            .decode()
+            .strip()
+        )
+    except CalledProcessError:
+        return None
+    # docker prefixes the id with the hash algorithm, podman doesn't
+    return image_id.rpartition(":")[2]
+
+
+def parse_os_release(content: str) -> Dict[str, str]:
+    """Returns the variables defined in the contents of
+    :file:`/etc/os-release`.
+
+    """
+    os_release: Dict[str, str] = {}
+    for line in content.splitlines():
+        key, sep, value = line.partition("=")
+        if sep and not key.strip().startswith("#"):
+            # the values are quoted like shell variables
+            os_release[key.strip()] = " ".join(shlex.split(value))
+    return os_release
@@ -0,0 +1,206 @@
+"""Incremental parsers for the XML output of :command:`zypper`.
+
+The output of :command:`zypper --xmlout search` contains one ``solvable``
+element per package, i.e. thousands for a whole repository.
+:py:func:`iter_solvables` parses the output while it is being read from the
+container (see :py:func:`stream_exec`) and yields a compact
+:py:class:`Solvable` per element, instead of building the full element tree
+from the complete output:
+
+.. code-block:: python
+
+   orphaned = {
+       solvable.name
+       for solvable in iter_solvables(
+           stream_exec(container.connection, "zypper -x se -v -i '*'"),
+           lambda solvable: solvable.repository == "(System Packages)",
+       )
+   }
+
+Run ``python -m bci_tester.zypper`` to compare it with the full tree approach.
+
+"""
+
+import logging
+import shlex
+import subprocess
+import tempfile
+import xml.etree.ElementTree as ET
+from typing import Callable
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Union
+
+_CHUNK_SIZE = 64 * 1024
+
+# the commands are logged like the ones of testinfra, so that they are part of
+# the TESTINFRA_LOGGING papertrail
+_LOGGER = logging.getLogger("testinfra")
+
+
+class Solvable(NamedTuple):
+    """A ``solvable`` element from :command:`zypper --xmlout search`, the
+    attributes that are only present in the verbose output are empty strings
+    otherwise.
+
+    """
+
+    name: str
+    kind: str
+    status: str
+    edition: str = ""
+    arch: str = ""
+    repository: str = ""
+
+
+def stream_exec(connection, command: str) -> Iterator[bytes]:
+    """Runs the shell ``command`` in the container of the testinfra
+    ``connection`` like :py:meth:`testinfra.host.Host.run` and yields its
+    standard output in chunks while it is running. Raises a
+    :py:class:`~subprocess.CalledProcessError` with the standard error of the
+    command if it fails.
+
+    """
+    backend = connection.backend
+    args = [backend.NAME, "exec"]
+    if backend.user is not None:
+        args.extend(("-u", backend.user))
+    args.extend((backend.name, "/bin/sh", "-c", backend.get_command(command)))
+    _LOGGER.debug("RUN %s", " ".join(shlex.quote(arg) for arg in args))
+
+    streamed = 0
+    # stderr goes to a file, so that the command cannot block on a full pipe
+    # while we read its standard output
+    with tempfile.TemporaryFile() as stderr_file:
+        with subprocess.Popen(
+            args, stdout=subprocess.PIPE, stderr=stderr_file
+        ) as proc:
+            assert proc.stdout
+            while True:
+                chunk = proc.stdout.read(_CHUNK_SIZE)
+                if not chunk:
+                    break
+                streamed += len(chunk)
+                yield chunk
+        stderr_file.seek(0)
+        stderr = stderr_file.read()
+    _LOGGER.debug(
+        "%r exited with %d after streaming %d bytes: %s",
+        command,
+        proc.returncode,
+        streamed,
+        stderr.decode(errors="replace"),
+    )
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(
+            proc.returncode, args, stderr=stderr
+        )
+
+
+def _iter_elements(
+    xml: Union[str, bytes, Iterable[Union[str, bytes]]], tag: str
+) -> Iterator[ET.Element]:
+    # Yields all elements with the given tag once they are complete and clears
+    # them afterwards, so that only empty elements remain in the tree. Only
+    # listening to end events is as fast as ET.fromstring.
+    chunks = [xml] if isinstance(xml, (str, bytes)) else xml
+    parser = ET.XMLPullParser(events=("end",))
+
+    def drain() -> Iterator[ET.Element]:
+        for _, elem in parser.read_events():
+            if elem.tag == tag:
+                yield elem
+                elem.clear()
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from drain()
+    parser.close()
+    yield from drain()
+
+
+def iter_solvables(
+    xml: Union[str, bytes, Iterable[Union[str, bytes]]],
+    predicate: Optional[Callable[[Solvable], bool]] = None,
+) -> Iterator[Solvable]:
+    """Yields the solvables from the output of :command:`zypper --xmlout
+    search` (a string or an iterable of chunks) that match ``predicate``.
+
+    """
+    for elem in _iter_elements(xml, "solvable"):
+        solvable = Solvable._make(
+            elem.get(name, "") for name in Solvable._fields
+        )
+        if predicate is None or predicate(solvable):
+            yield solvable
+
+
+def _generate_search_result(count: int) -> bytes:
+    solvables = "\n".join(
+        f'<solvable status="installed" name="package-{i}" kind="package" '
+        f'edition="1.{i}-150700.1.1" arch="x86_64" '
+        f'repository="{"(System Packages)" if i % 100 == 0 else "SLE_BCI"}"/>'
+        for i in range(count)
+    )
+    return (
+        "<?xml version='1.0'?>\n<stream>\n<search-result version=\"0.0\">\n"
+        f"<solvable-list>\n{solvables}\n</solvable-list>\n"
+        "</search-result>\n</stream>\n"
+    ).encode()
+
+
+def _benchmark(count: int, repeat: int) -> None:
+    # pylint: disable=import-outside-toplevel
+    import timeit
+    import tracemalloc
+
+    output = _generate_search_result(count)
+    chunks = [
+        output[i : i + _CHUNK_SIZE] for i in range(0, len(output), _CHUNK_SIZE)
+    ]
+
+    def full_tree() -> List[str]:
+        tree = ET.fromstring(output.decode())
+        return [
+            child.attrib["name"]
+            for child in tree.iterfind(
+                "search-result/solvable-list/"
+                'solvable[@repository="(System Packages)"]'
+            )
+        ]
+
+    def streaming() -> List[str]:
+        return [
+            solvable.name
+            for solvable in iter_solvables(
+                chunks,
+                lambda solvable: solvable.repository == "(System Packages)",
+            )
+        ]
+
+    assert full_tree() == streaming()
+    print(f"{count} solvables, {len(output) / 1024:.0f} KiB of output")
+    for name, func in (("full tree", full_tree), ("streaming", streaming)):
+        seconds = min(timeit.repeat(func, number=1, repeat=repeat))
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(
+            f"{name:<10} {seconds * 1000:8.1f} ms {peak / 1024:8.0f} KiB peak"
+        )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Compare the streaming parser with ET.fromstring"
+    )
+    parser.add_argument("--solvables", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    _benchmark(args.solvables, args.repeat)
@@ -1,3 +1,4 @@
+import errno
 import logging
 import os
 import shlex
@@ -12,10 +13,33 @@ from _pytest.fixtures import SubRequest
 from pytest_container import GitRepositoryBuild
 from pytest_container import OciRuntimeBase
 from pytest_container import auto_container_parametrize
+from pytest_container import container_and_marks_from_pytest_param
+from pytest_container import get_extra_build_args
 from pytest_container.container import ContainerData
 from pytest_container.helpers import add_extra_run_and_build_args_options
 from pytest_container.helpers import add_logging_level_options
 from pytest_container.helpers import set_logging_level_from_cli_args
+from pytest_container.runtime import get_selected_runtime
+
+from bci_tester.build_cache import BuildCachePruner
+from bci_tester.container_pool import ContainerPool
+from bci_tester.durations import DurationRecorder
+from bci_tester.durations import get_default_db_path
+from bci_tester.durations import import_junit_files
+from bci_tester.image_fs import ImageFilesystem
+from bci_tester.image_fs import RootfsCachePruner
+from bci_tester.image_fs import export_image_rootfs
+from bci_tester.launch_report import ContainerLaunchCounter
+from bci_tester.prepull import PrepullPlugin
+from bci_tester.registry import ImageMetadata
+from bci_tester.registry import ReferenceResolver
+from bci_tester.registry import get_container_metadata
+from bci_tester.repo_proxy import DEFAULT_PORT
+from bci_tester.repo_proxy import RepoProxy
+from bci_tester.repo_proxy import RepoProxyPlugin
+from bci_tester.repo_proxy import get_proxy_addresses
+from bci_tester.snapshot import SnapshotReport
+from bci_tester.uids import UidReport
 
 
 @pytest.fixture(scope="function")
@@ -116,6 +140,69 @@ def host_git_clone(
         os.chdir(cwd)
 
 
+@pytest.fixture(scope="session")
+def container_image_fs(
+    request: SubRequest, container_runtime: OciRuntimeBase, pytestconfig
+) -> Iterator[ImageFilesystem]:
+    """This fixture provides read-only access to the root filesystem of the
+    container image passed as an indirect parameter to it, without launching
+    the container.
+
+    The image is pulled or built like for the ``container`` fixture and its
+    root filesystem is exported only once per host. The exported tarball is
+    closed at the end of the session.
+    """
+    container, _ = container_and_marks_from_pytest_param(request.param)
+    container.prepare_container(
+        container_runtime,
+        pytestconfig.rootpath,
+        get_extra_build_args(pytestconfig),
+    )
+    with ImageFilesystem(
+        export_image_rootfs(
+            container_runtime, container.url or container.container_id
+        )
+    ) as image_fs:
+        yield image_fs
+
+
+@pytest.fixture(scope="session")
+def image_metadata(request: SubRequest, pytestconfig) -> ImageMetadata:
+    """This fixture provides the labels and the configuration of the
+    container image passed as an indirect parameter to it.
+
+    They are fetched from the registry of the image (respectively of the base
+    image of a derived container), without pulling or launching it. Local
+    images, images whose registry cannot be reached and images whose
+    registry refuses the anonymous access are inspected via the container
+    runtime instead (see :py:func:`bci_tester.registry.get_container_metadata`).
+    """
+    container, _ = container_and_marks_from_pytest_param(request.param)
+    return get_container_metadata(
+        container,
+        lambda: request.getfixturevalue("container_runtime"),
+        pytestconfig.rootpath,
+        get_extra_build_args(pytestconfig),
+    )
+
+
+@pytest.fixture(scope="session")
+def reference_resolver() -> ReferenceResolver:
+    """This fixture provides a :py:class:`ReferenceResolver` shared by all
+    tests, which checks whether image references exist in their registry and
+    remembers the results.
+    """
+    return ReferenceResolver()
+
+
+@pytest.fixture(scope="session")
+def uid_report(pytestconfig) -> UidReport:
+    """This fixture returns the report of the uids & gids of the users in all
+    tested images.
+    """
+    return pytestconfig.pluginmanager.getplugin("bci_uid_report")
+
+
 def pytest_generate_tests(metafunc):
     auto_container_parametrize(metafunc)
 
@@ -124,10 +211,218 @@ def pytest_addoption(parser):
     add_extra_run_and_build_args_options(parser)
     add_logging_level_options(parser)
 
+    parser.addoption(
+        "--prepull",
+        action="store_true",
+        default=False,
+        help="Pull the images of all selected tests in parallel before running them",
+    )
+    parser.addoption(
+        "--prepull-parallelism",
+        type=int,
+        default=4,
+        help="Maximum number of concurrent pulls of --prepull",
+    )
+    parser.addoption(
+        "--prepull-per-registry",
+        type=int,
+        default=2,
+        help="Maximum number of concurrent pulls from the same registry of --prepull",
+    )
+    parser.addoption(
+        "--cost-aware-scheduling",
+        action="store_true",
+        default=False,
+        help=(
+            "Distribute the tests with pytest-xdist grouped by container image "
+            "and longest first, based on the durations of previous runs"
+        ),
+    )
+    parser.addoption(
+        "--container-affinity",
+        action="store_true",
+        default=False,
+        help=(
+            "Run all tests of a container image on the same pytest-xdist "
+            "worker, so that each container is launched only once, and report "
+            "the number of container launches"
+        ),
+    )
+    parser.addoption(
+        "--container-pool",
+        type=int,
+        default=0,
+        help=(
+            "Start the containers of the next N tests using "
+            "container_per_test in the background"
+        ),
+    )
+    parser.addoption(
+        "--repo-proxy",
+        action="store_true",
+        default=False,
+        help="Serve the SLE_BCI repository to the containers via a local caching proxy",
+    )
+    parser.addoption(
+        "--repo-proxy-port",
+        type=int,
+        default=DEFAULT_PORT,
+        help=(
+            "Port of the --repo-proxy, a random port is used if it is not "
+            f"available (default: {DEFAULT_PORT})"
+        ),
+    )
+    parser.addoption(
+        "--repo-proxy-host",
+        default=None,
+        help=(
+            "Hostname under which the containers reach the --repo-proxy "
+            "(defaults to the gateway of the container runtime's bridge)"
+        ),
+    )
+    parser.addoption(
+        "--repo-proxy-bind",
+        default=None,
+        help=(
+            "Address on which the --repo-proxy listens (defaults to the "
+            "gateway of the container runtime's bridge or localhost)"
+        ),
+    )
+    parser.addoption(
+        "--repo-proxy-offline",
+        action="store_true",
+        default=False,
+        help="Serve all requests of the --repo-proxy from its cache",
+    )
+    parser.addoption(
+        "--uid-report",
+        action="store_true",
+        default=False,
+        help="Show the uids & gids of the users of all tested images in the summary",
+    )
+    parser.addoption(
+        "--durations-db",
+        type=Path,
+        default=None,
+        help="Location of the database of test durations for --cost-aware-scheduling",
+    )
+
+
+def _get_durations_db_path(config) -> Path:
+    return config.getoption("durations_db") or get_default_db_path()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_make_scheduler(config, log):
+    container_affinity = config.getoption("container_affinity")
+    if (
+        not config.getoption("cost_aware_scheduling")
+        and not container_affinity
+    ):
+        return None
+
+    # pylint: disable=import-outside-toplevel
+    from bci_tester.data import ALL_CONTAINERS
+    from bci_tester.scheduler import CostAwareScheduling
+
+    # tox writes the results of each environment into junit_$envname.xml
+    durations = import_junit_files(
+        _get_durations_db_path(config),
+        sorted(config.rootpath.glob("junit_*.xml")),
+        config.rootpath,
+        only_newer=True,
+    )
+    return CostAwareScheduling(
+        config,
+        log,
+        durations=durations,
+        image_ids=[param.id for param in ALL_CONTAINERS],
+        # splitting the tests of an image would launch it multiple times
+        split_large_units=not container_affinity,
+    )
+
 
 def pytest_configure(config):
     set_logging_level_from_cli_args(config)
 
+    if (
+        config.getoption("cost_aware_scheduling")
+        or config.getoption("container_affinity")
+    ) and not os.getenv("PYTEST_XDIST_WORKER"):
+        # the controller receives the reports of all workers
+        config.pluginmanager.register(
+            DurationRecorder(_get_durations_db_path(config)),
+            "bci_duration_recorder",
+        )
+
+    if not os.getenv("PYTEST_XDIST_WORKER"):
+        config.pluginmanager.register(
+            BuildCachePruner(config), "bci_build_cache_pruner"
+        )
+        config.pluginmanager.register(
+            RootfsCachePruner(), "bci_rootfs_cache_pruner"
+        )
+
+    if config.getoption("prepull"):
+        config.pluginmanager.register(PrepullPlugin(config), "bci_prepull")
+
+    config.pluginmanager.register(UidReport(config), "bci_uid_report")
+    config.pluginmanager.register(
+        SnapshotReport(config), "bci_snapshot_report"
+    )
+    # the pool replaces the container_per_test fixture of pytest_container
+    if config.getoption("container_pool") > 0:
+        config.pluginmanager.register(
+            ContainerPool(config, config.getoption("container_pool")),
+            "bci_container_pool",
+        )
+
+    # the proxy must be running before bci_tester.data is imported, as it
+    # bakes the repository url into the container definitions; the workers
+    # inherit the environment from the controller
+    if (
+        config.getoption("repo_proxy")
+        and not os.getenv("PYTEST_XDIST_WORKER")
+        and not os.getenv("BCI_REPO_PROXY")
+    ):
+
+        def _upstream() -> str:
+            # pylint: disable=import-outside-toplevel
+            from bci_tester.data import BCI_UPSTREAM_REPO
+
+            return BCI_UPSTREAM_REPO
+
+        bind_address, proxy_host = get_proxy_addresses(
+            get_selected_runtime().runner_binary
+        )
+        bind_address = config.getoption("repo_proxy_bind") or bind_address
+        proxy_host = config.getoption("repo_proxy_host") or proxy_host
+        try:
+            proxy = RepoProxy(
+                _upstream,
+                host=bind_address,
+                port=config.getoption("repo_proxy_port"),
+                offline=config.getoption("repo_proxy_offline"),
+            )
+        except OSError as err:
+            if err.errno != errno.EADDRINUSE:
+                raise
+            # e.g. another test run on this host
+            proxy = RepoProxy(
+                _upstream,
+                host=bind_address,
+                port=0,
+                offline=config.getoption("repo_proxy_offline"),
+            )
+        proxy.start()
+        os.environ["BCI_REPO_PROXY"] = f"http://{proxy_host}:{proxy.port}/"
+        config.pluginmanager.register(RepoProxyPlugin(proxy), "bci_repo_proxy")
+
+    if config.getoption("container_affinity"):
+        config.pluginmanager.register(
+            ContainerLaunchCounter(config), "bci_container_launch_counter"
+        )
+
     if os.getenv("TESTINFRA_LOGGING"):
         # log all calls performed by testinfra, so that we have a papertrail of what
         # was executed.
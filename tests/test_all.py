@@ -6,17 +6,15 @@ import datetime
 import fnmatch
 import json
 import pathlib
-import xml.etree.ElementTree as ET
 from pathlib import Path
 from typing import Dict
-from typing import Optional
+from typing import List
 from typing import Tuple
 
 import packaging.version
 import pytest
 from _pytest.config import Config
 from pytest_container import Container
-from pytest_container import DerivedContainer
 from pytest_container import MultiStageBuild
 from pytest_container import container_and_marks_from_pytest_param
 from pytest_container import get_extra_build_args
@@ -25,6 +23,7 @@ from pytest_container.container import BindMount
 from pytest_container.container import ContainerData
 from pytest_container.container import VolumeFlag
 
+from bci_tester.build_cache import CachedDerivedContainer
 from bci_tester.data import ALLOWED_BCI_REPO_OS_VERSIONS
 from bci_tester.data import ALL_CONTAINERS
 from bci_tester.data import AMD_CONTAINERS
@@ -55,13 +54,68 @@ from bci_tester.data import PCP_CONTAINERS
 from bci_tester.data import RELEASED_LTSS_VERSIONS
 from bci_tester.data import RELEASED_SLE_VERSIONS
 from bci_tester.data import ZYPP_CREDENTIALS_DIR
+from bci_tester.facts import ContainerFacts
+from bci_tester.facts import get_container_facts
+from bci_tester.image_fs import ImageFilesystem
+from bci_tester.rpmdb import get_rpm_database
+from bci_tester.snapshot import prepared_container
+from bci_tester.uids import FIND_FILE_OWNERS
+from bci_tester.uids import audit_users
+from bci_tester.uids import get_expected_uid_gid_map
 from bci_tester.util import get_repos_from_connection
 from bci_tester.util import is_spr
+from bci_tester.zypper import iter_solvables
+from bci_tester.zypper import stream_exec
 
 CONTAINER_IMAGES = [
     x for x in ALL_CONTAINERS if x not in CONTAINERS_WITHOUT_SHELL
 ]
 
+_BRANDING_FILE = (
+    "/usr/etc/SUSE-brand" if OS_VERSION == "tumbleweed" else "/etc/SUSE-brand"
+)
+_PRODUCT_FILE = (
+    "/etc/products.d/openSUSE.prod"
+    if OS_VERSION == "tumbleweed"
+    else "/etc/products.d/SLES.prod"
+)
+_LIFECYCLE_DIR = "/usr/share/lifecycle/data"
+_BCI_LICENSE = "/usr/share/licenses/product/BCI/license.txt"
+
+
+def _facts(
+    container: ContainerData, extra_outputs: Tuple[str, ...] = ()
+) -> ContainerFacts:
+    """Returns the facts about ``container`` that the read-only checks in this
+    module need. They are gathered in a single :command:`exec` per container
+    instead of one per check. Expensive commands that only a single test needs
+    are passed via ``extra_outputs`` by that test.
+
+    """
+    return get_container_facts(
+        container,
+        paths=(
+            _LIFECYCLE_DIR,
+            f"{_LIFECYCLE_DIR}/",
+            _BCI_LICENSE,
+            "/etc/blkid.conf",
+        ),
+        commands=(
+            "cat",
+            "sh",
+            "bash",
+            "ls",
+            "rm",
+            "ldconfig",
+            "ldd",
+            "systemctl",
+            "udevadm",
+            "rpm",
+        ),
+        contents=(_BCI_LICENSE, "/etc/blkid.conf"),
+        outputs=(f"cat {_LIFECYCLE_DIR}/*.lifecycle", *extra_outputs),
+    )
+
 
 #: Go file to perform a GET request to suse.com and that panics if the request
 #: fails
@@ -90,13 +144,15 @@ CMD ["/fetcher/main"]
 """
 
 
-def test_os_release(auto_container):
+@pytest.mark.parametrize("container_image_fs", CONTAINER_IMAGES, indirect=True)
+def test_os_release(container_image_fs: ImageFilesystem):
     """
     :file:`/etc/os-release` is present and the values of ``OS_VERSION`` and
     ``OS_PRETTY_NAME`` equal :py:const:`bci_tester.data.OS_VERSION` and
     :py:const:`bci_tester.data.OS_PRETTY_NAME` respectively
     """
-    assert auto_container.connection.file("/etc/os-release").exists
+    assert container_image_fs.file("/etc/os-release").exists
+    os_release = container_image_fs.os_release
 
     for var_name, expected_value in (
         ("VERSION_ID", OS_VERSION_ID),
@@ -109,21 +165,14 @@ def test_os_release(auto_container):
                 assert (
                     datetime.datetime.now()
                     - datetime.datetime.strptime(
-                        auto_container.connection.check_output(
-                            f". /etc/os-release && echo ${var_name}"
-                        ),
-                        "%Y%m%d",
+                        os_release.get(var_name, ""), "%Y%m%d"
                     )
                 ).days < 10
                 continue
 
         # Ignore the Milestone suffix in the form of "SUSE Linux Enterprise Server XX YY (AlphaZ)"
         assert (
-            auto_container.connection.check_output(
-                f". /etc/os-release && echo ${var_name}"
-            )
-            .partition("(")[0]
-            .strip()
+            os_release.get(var_name, "").partition("(")[0].strip()
             == expected_value
         )
 
@@ -133,43 +182,33 @@ def test_os_release(auto_container):
     reason="branding packages are known to not be installed",
 )
 @pytest.mark.parametrize(
-    "container",
+    "container_image_fs",
     CONTAINERS_WITH_ZYPPER,
     indirect=True,
 )
-def test_branding(container):
+def test_branding(container_image_fs: ImageFilesystem):
     """
     check that the :file:`/etc/SUSE-brand` file exists and contains SLE branding
     """
-    location = "/etc/SUSE-brand"
     branding = "SLE"
     if OS_VERSION == "tumbleweed":
         branding = "openSUSE"
-    if OS_VERSION in ("tumbleweed",):
-        location = "/usr/etc/SUSE-brand"
-    assert container.connection.file(location).exists
-    assert branding in container.connection.file(location).content_string
+    assert container_image_fs.file(_BRANDING_FILE).exists
+    assert branding in container_image_fs.file(_BRANDING_FILE).content_string
 
 
-def test_product(auto_container):
+@pytest.mark.parametrize("container_image_fs", CONTAINER_IMAGES, indirect=True)
+def test_product(container_image_fs: ImageFilesystem):
     """
     check that :file:`/etc/products.d/$BASEPRODUCT.prod` exists and
     :file:`/etc/products.d/baseproduct` is a link to it
     """
-    assert auto_container.connection.file("/etc/products.d").is_directory
-    prodfname = "SLES"
-    if OS_VERSION == "tumbleweed":
-        prodfname = "openSUSE"
-    product_file = f"/etc/products.d/{prodfname}.prod"
+    assert container_image_fs.file("/etc/products.d").is_directory
 
-    assert auto_container.connection.file(product_file).is_file
-    assert auto_container.connection.file(
-        "/etc/products.d/baseproduct"
-    ).is_symlink
-    assert (
-        auto_container.connection.file("/etc/products.d/baseproduct").linked_to
-        == product_file
-    )
+    assert container_image_fs.file(_PRODUCT_FILE).is_file
+    baseproduct = container_image_fs.file("/etc/products.d/baseproduct")
+    assert baseproduct.is_symlink
+    assert baseproduct.linked_to == _PRODUCT_FILE
 
 
 @pytest.mark.skipif(
@@ -177,13 +216,14 @@ def test_product(auto_container):
     or OS_VERSION not in RELEASED_SLE_VERSIONS,
     reason="suse trademark only available in certain SLE versions",
 )
-def test_suse_trademark(auto_container):
+@pytest.mark.parametrize("container_image_fs", CONTAINER_IMAGES, indirect=True)
+def test_suse_trademark(container_image_fs: ImageFilesystem):
     """
     check that the :file:`/usr/share/licenses/product/BCI/SUSE.svg` exists which
     is needed to ensure SUSE trademarks apply.
     """
 
-    assert auto_container.connection.file(
+    assert container_image_fs.file(
         "/usr/share/licenses/product/BCI/SUSE.svg"
     ).exists
 
@@ -198,40 +238,38 @@ def test_lifecycle(auto_container):
     not have unsupported packages installed.
     """
 
-    lifecycle_dir = "/usr/share/lifecycle/data"
-    if not auto_container.connection.file(lifecycle_dir).exists:
+    facts = _facts(auto_container)
+    if not facts.file(_LIFECYCLE_DIR).exists:
         return
 
-    assert auto_container.connection.file(f"{lifecycle_dir}/").is_directory
+    assert facts.file(f"{_LIFECYCLE_DIR}/").is_directory
 
-    rpmqpack = auto_container.connection.check_output(
-        "rpm -qa --qf '%{NAME},%{VERSION}\n'"
-    ).splitlines()
-    installed_binaries = {}
-    for pack in rpmqpack:
-        rpm_name, _, rpm_version = pack.partition(",")
-        installed_binaries[rpm_name] = rpm_version
+    # packages can be installed in multiple versions
+    installed_versions: Dict[str, List[str]] = {}
+    for package in get_rpm_database(auto_container).packages:
+        installed_versions.setdefault(package.name, []).append(package.version)
 
-    for entry in auto_container.connection.check_output(
-        f"cat {lifecycle_dir}/*.lifecycle"
+    for entry in facts.check_output(
+        f"cat {_LIFECYCLE_DIR}/*.lifecycle"
     ).splitlines():
         entry = entry.partition("#")[0]
         if not entry.strip() or "," not in entry:
             continue
 
         entry_name, entry_version, entry_date = entry.split(",")
-        if entry_name in installed_binaries:
+        if entry_name in installed_versions:
             if entry_name.startswith("cpp14"):
                 pytest.xfail(
                     "Mismatch between lifecycle data and support statement for cpp14, see 2026-05-04 BCI sync meeting notes for details"
                 )
-            if fnmatch.fnmatch(installed_binaries[entry_name], entry_version):
-                support_end = datetime.datetime.strptime(
-                    entry_date, "%Y-%m-%d"
-                )
-                assert datetime.datetime.now() < support_end, (
-                    f"{entry_name} = {installed_binaries[entry_name]} installed but out of support since {entry_date}"
-                )
+            for version in installed_versions[entry_name]:
+                if fnmatch.fnmatch(version, entry_version):
+                    support_end = datetime.datetime.strptime(
+                        entry_date, "%Y-%m-%d"
+                    )
+                    assert datetime.datetime.now() < support_end, (
+                        f"{entry_name} = {version} installed but out of support since {entry_date}"
+                    )
 
 
 @pytest.mark.skipif(
@@ -241,8 +279,8 @@ def test_lifecycle(auto_container):
 @pytest.mark.parametrize("container", CONTAINERS_WITH_ZYPPER, indirect=True)
 def test_opensuse_product_flavor(container):
     """Checks that this is an appliance-docker flavored product."""
-    container.connection.run_expect(
-        [0], "rpm -q --whatprovides 'flavor(appliance-docker)'"
+    assert get_rpm_database(container).what_provides(
+        "flavor(appliance-docker)"
     )
 
 
@@ -265,14 +303,16 @@ def test_coreutils_present(container):
     Check that some core utilities (:command:`cat`, :command:`sh`, etc.) exist
     in the container.
     """
+    facts = _facts(container)
     for binary in ("cat", "sh", "bash", "ls", "rm"):
-        assert container.connection.exists(binary)
+        assert facts.exists(binary)
 
 
 def test_glibc_present(auto_container):
     """ensure that the glibc linker is present"""
+    facts = _facts(auto_container)
     for binary in ("ldconfig", "ldd"):
-        assert auto_container.connection.exists(binary)
+        assert facts.exists(binary)
 
 
 # this is all containers with zypper but with a temporary directory bind mounted
@@ -287,7 +327,7 @@ for param in CONTAINERS_WITH_ZYPPER_AS_ROOT:
     kwargs.pop("volume_mounts")
     _CONTAINERS_WITH_VOLUME_MOUNT.append(
         pytest.param(
-            DerivedContainer(volume_mounts=new_vol_mounts, **kwargs),
+            CachedDerivedContainer(volume_mounts=new_vol_mounts, **kwargs),
             marks=marks,
         )
     )
@@ -380,7 +420,14 @@ def test_no_downgrade_on_install(container: ContainerData) -> None:
 @pytest.mark.parametrize(
     "container_per_test",
     [
-        c
+        prepared_container(
+            c,
+            "zypper dup",
+            "timeout 5m zypper -n addlock libcurl-mini4 && "
+            f"timeout 5m zypper -n dup --from {BCI_REPO_NAME} -l "
+            "--no-allow-vendor-change --no-allow-name-change "
+            "--no-allow-arch-change --allow-downgrade",
+        )
         for c in CONTAINERS_WITH_ZYPPER_AS_ROOT
         if c
         not in LTSS_BASE_CONTAINERS
@@ -391,29 +438,18 @@ def test_no_downgrade_on_install(container: ContainerData) -> None:
 )
 def test_no_orphaned_packages(container_per_test: ContainerData) -> None:
     """Check that containers do not contain any package that isn't also
-    available via repositories.
+    available via repositories after a :command:`zypper dup` from the BCI
+    repository (performed when building the snapshot of the container).
     """
 
-    container_per_test.connection.check_output(
-        "timeout 5m zypper -n addlock libcurl-mini4"
-    )
-
-    container_per_test.connection.check_output(
-        f"timeout 5m zypper -n dup --from {BCI_REPO_NAME} -l "
-        "--no-allow-vendor-change --no-allow-name-change --no-allow-arch-change "
-        "--allow-downgrade"
-    )
-
-    searchresult = ET.fromstring(
-        container_per_test.connection.check_output(
-            "zypper -x -n search -t package -v -i '*'"
-        )
-    )
-
     orphaned_packages = {
-        child.attrib["name"]
-        for child in searchresult.iterfind(
-            'search-result/solvable-list/solvable[@repository="(System Packages)"]'
+        solvable.name
+        for solvable in iter_solvables(
+            stream_exec(
+                container_per_test.connection,
+                "zypper -x -n search -t package -v -i '*'",
+            ),
+            lambda solvable: solvable.repository == "(System Packages)",
         )
     }
 
@@ -520,11 +556,12 @@ def test_systemd_not_installed_in_all_containers_except_init(container):
     """Ensure that systemd is not present in all containers besides the init
     pcp and udev/systemd based containers.
     """
-    assert not container.connection.exists("systemctl")
+    facts = _facts(container)
+    assert not facts.exists("systemctl")
 
     # we cannot check for an existing package if rpm is not installed
-    if container.connection.exists("rpm"):
-        assert not container.connection.package("systemd").is_installed, (
+    if facts.exists("rpm"):
+        assert not get_rpm_database(container).is_installed("systemd"), (
             "systemd is installed in this container!"
         )
 
@@ -556,12 +593,11 @@ def test_udev_not_installed_in_all_containers_except_init(container):
     """Ensure that udev is not present in all containers besides init
     or udev based containers.
     """
-    assert not container.connection.exists("udevadm")
+    facts = _facts(container)
+    assert not facts.exists("udevadm")
 
-    if container.connection.file("/etc/blkid.conf").exists:
-        assert "EVALUATE=udev" not in container.connection.file(
-            "/etc/blkid.conf"
-        ).content.decode("utf-8")
+    if facts.file("/etc/blkid.conf").exists:
+        assert "EVALUATE=udev" not in (facts.content("/etc/blkid.conf") or "")
 
 
 @pytest.mark.parametrize(
@@ -571,11 +607,12 @@ def test_udev_not_installed_in_all_containers_except_init(container):
 )
 def test_no_compat_packages(container):
     """Ensure that no host-compatibility packages are installed in the containers"""
+    facts = _facts(container)
     # we cannot check for an existing package if rpm is not installed
-    if container.connection.exists("rpm"):
-        assert not container.connection.package(
+    if facts.exists("rpm"):
+        assert not get_rpm_database(container).is_installed(
             "compat-usrmerge-tools"
-        ).is_installed
+        )
 
 
 @pytest.mark.parametrize(
@@ -595,17 +632,15 @@ def test_no_compat_packages(container):
 def test_bci_eula_is_correctly_available(container: ContainerData) -> None:
     """Ensure that the BCI EULA exists iff it's not a LTSS container"""
 
-    bci_license = "/usr/share/licenses/product/BCI/license.txt"
+    facts = _facts(container)
     if (
         OS_VERSION in ALLOWED_BCI_REPO_OS_VERSIONS
         and OS_VERSION in RELEASED_SLE_VERSIONS
     ):
-        assert container.connection.file(bci_license).exists, (
-            "BCI EULA is missing"
-        )
+        assert facts.file(_BCI_LICENSE).exists, "BCI EULA is missing"
         assert (
             "SUSE Linux Enterprise Base Container Image License"
-            in container.connection.check_output(f"head -n 1 {bci_license}")
+            in (facts.content(_BCI_LICENSE) or "").partition("\n")[0]
         ), "EULA is not the expected BCI EULA"
         return
 
@@ -622,7 +657,7 @@ def test_bci_eula_is_correctly_available(container: ContainerData) -> None:
         ):
             pytest.skip("Unmaintained bci-* base os containers are not tested")
 
-        assert not container.connection.file(bci_license).exists, (
+        assert not facts.file(_BCI_LICENSE).exists, (
             "BCI EULA shall not be in LTSS container"
         )
 
@@ -805,7 +840,7 @@ for param in CONTAINERS_WITH_ZYPPER_AS_ROOT:
 
     _CONTAINERS_WITH_ZYPP_CREDENTIALS_MOUNTED.append(
         pytest.param(
-            DerivedContainer(**kwargs, volume_mounts=new_vol_mounts),
+            CachedDerivedContainer(**kwargs, volume_mounts=new_vol_mounts),
             marks=marks,
             id=param.id,
         )
@@ -841,102 +876,32 @@ def test_container_suseconnect_adds_repos(container_per_test: ContainerData):
     assert len(repos) > 3
 
 
-_USERNAME_UID_GID_MAP: Dict[str, Tuple[Optional[int], Optional[int]]] = {
-    "nobody": (65534, 65534),
-    "root": (0, 0),
-    "wwwrun": (None, 485),
-    "pesign": (None, 486),
-    "nginx": (None, 486),
-    "registry": (None, 486),
-    "app": (1654, 1654),
-    "mysql": (60, 60),
-    "dirsrv": (None, 486),
-    "postgres": (None, 486),
-    "pcp": (496, 484),
-    "ldap": (498, 498),
-    "systemd-coredump": (497, 100),
-    "postfix": (51, 51),
-    "keadhcp": (None, 486),
-    "user": (1000, 1000),
-    "tss": (98, 98),
-}
-
-
-def test_uids_stable(auto_container) -> None:
-    """Check that every user in :file:`/etc/passwd` has a stable uid & gid as
-    defined in ``_USERNAME_UID_GID_MAP``.
+def test_uids_stable(auto_container, request, uid_report) -> None:
+    """Check that every user owning files in :file:`/var`, :file:`/etc`,
+    :file:`/opt` or :file:`/home` has a stable uid & gid as defined in
+    :py:const:`bci_tester.uids.USERNAME_UID_GID_MAP`.
 
     """
-
-    def uid_gid_map(container: ContainerData) -> Dict[str, Tuple[int, int]]:
-        """
-        Returns the expected UID and GID mapping based on the container's
-        operating system version.
-        """
-        # Create a deep copy of the base map to modify it without affecting
-        # other tests that might use the same base data.
-        expected_map = {k: list(v) for k, v in _USERNAME_UID_GID_MAP.items()}
-        # Apply special cases for TW & SLE 16
-        if OS_VERSION in ("tumbleweed", "16.0"):
-            # These users don't use the non-default GID on TW
-            for username in (
-                "nginx",
-                "dirsrv",
-                "postgres",
-                "registry",
-                "keadhcp",
-            ):
-                if username in expected_map:
-                    del expected_map[username]
-
-            # Completely different UID & GID on TW
-            expected_map["pcp"] = [496, 498]
-            expected_map["wwwrun"] = [498, 498]
-            expected_map["pesign"] = [499, 499]
-            expected_map["systemd-coredump"] = [497, 1000]
-
-        # Handle the 'kiosk/xorg' special case
-        if (
-            (container.container.get_base().baseurl or "")
-            .split(":")[0]
-            .endswith("kiosk/xorg")
-        ):
-            if "user" in expected_map:
-                expected_map["user"] = [expected_map["user"][0], 100]
-
-        for name, (uid, gid) in expected_map.items():
-            uid = uid if uid is not None else 499
-            gid = gid if gid is not None else 499
-            expected_map[name] = (uid, gid)
-
-        return expected_map
-
-    # collect users who owns subdirectories in directories /var, /etc, /opt, /home
-    user_list = (
-        auto_container.connection.check_output(
-            "find /var /etc /opt /home -printf '%u \n' | sort -u"
-        )
-        .strip()
-        .split("\n")
+    facts = _facts(auto_container, extra_outputs=(FIND_FILE_OWNERS,))
+    assert "root" in facts.users, "root user does not exist"
+
+    expected_map = get_expected_uid_gid_map(
+        OS_VERSION,
+        kiosk_xorg=(auto_container.container.get_base().baseurl or "")
+        .split(":")[0]
+        .endswith("kiosk/xorg"),
     )
-    passwd: str = auto_container.connection.file("/etc/passwd").content_string
-    assert auto_container.connection.user("root").exists, (
-        "root user does not exist"
+    audited = audit_users(
+        facts.users,
+        facts.check_output(FIND_FILE_OWNERS).splitlines(),
+        expected_map,
     )
+    uid_report.record(request.node.callspec.id, audited)
 
-    for userline in passwd.splitlines():
-        tmp = userline.split(":")
-        name, uid, gid = tmp[0], int(tmp[2]), int(tmp[3])
-        if name not in user_list:
-            continue
-
-        expected_uid, expected_gid = uid_gid_map(auto_container).get(
-            name, (499, 499)
-        )
-
-        assert uid == expected_uid, (
-            f"Expected user {name} to have uid {expected_uid} but got {uid}"
-        )
-        assert gid == expected_gid, (
-            f"Expected user {name} to have gid {expected_gid} but got {gid}"
-        )
+    unstable = [
+        f"{user.name}: expected {user.expected_uid}:{user.expected_gid} "
+        f"but got {user.uid}:{user.gid}"
+        for user in audited
+        if not user.is_stable
+    ]
+    assert not unstable, "users with unstable uid/gid: " + ", ".join(unstable)
@@ -3,12 +3,10 @@ registry.suse.com)
 
 """
 
-from pathlib import Path
 from typing import Dict
 
 import pytest
 from pytest_container import DerivedContainer
-from pytest_container.container import BindMount
 from pytest_container.container import ContainerData
 from pytest_container.container import container_and_marks_from_pytest_param
 from pytest_container.runtime import LOCALHOST
@@ -21,10 +19,11 @@ from bci_tester.data import LTSS_BASE_FIPS_CONTAINERS
 from bci_tester.data import OS_VERSION
 from bci_tester.data import RELEASED_LTSS_VERSIONS
 from bci_tester.data import TARGET
-from bci_tester.data import ZYPP_CREDENTIALS_DIR
 from bci_tester.fips import ALL_DIGESTS
 from bci_tester.fips import FIPS_DIGESTS
+from bci_tester.fips import create_fips_tester_container
 from bci_tester.fips import host_fips_enabled
+from bci_tester.fips import run_digest_commands
 from bci_tester.fips import target_fips_enforced
 from bci_tester.runtime_choice import DOCKER_SELECTED
 from bci_tester.runtime_choice import PODMAN_SELECTED
@@ -38,35 +37,18 @@ CONTAINER_IMAGES = [
     *LTSS_BASE_FIPS_CONTAINERS,
 ]
 
-DOCKERFILE = """WORKDIR /src/
-COPY tests/files/fips-test.c /src/
-"""
-
 FIPS_TESTER_IMAGES = []
 for param in [*LTSS_BASE_FIPS_CONTAINERS, *BASE_FIPS_CONTAINERS] + (
     [BASE_CONTAINER] if TARGET in ("dso",) else []
 ):
     ctr, marks = container_and_marks_from_pytest_param(param)
-    kwargs = {
-        "base": ctr,
-        "extra_environment_variables": ctr.extra_environment_variables,
-        "extra_launch_args": ctr.extra_launch_args,
-        "custom_entry_point": ctr.custom_entry_point,
-        "volume_mounts": (
-            [
-                BindMount(
-                    ZYPP_CREDENTIALS_DIR,
-                    host_path=ZYPP_CREDENTIALS_DIR,
-                    flags=[],
-                )
-            ]
-            if Path(ZYPP_CREDENTIALS_DIR).exists()
-            else []
-        ),
-    }
-    tester_ctr = DerivedContainer(containerfile=DOCKERFILE, **kwargs)
+    # same image as in test_fips, so that it is only built once
     FIPS_TESTER_IMAGES.append(
-        pytest.param(tester_ctr, marks=marks, id=param.id)
+        pytest.param(
+            create_fips_tester_container(ctr),
+            marks=marks,
+            id=param.id,
+        )
     )
 
 
@@ -273,10 +255,19 @@ def test_openssl_hashes(container):
     algorithms work via :command:`openssl $digest /dev/null`.
 
     """
-    for digest in ALL_DIGESTS:
-        container.connection.run_expect(
-            [0], f"openssl {digest}{digest_xoflen(digest)} /dev/null"
-        )
+    results = run_digest_commands(
+        container,
+        {
+            digest: f"openssl {digest}{digest_xoflen(digest)} /dev/null"
+            for digest in ALL_DIGESTS
+        },
+    )
+    failures = [
+        f"{digest} failed with exit code {res.rc}: {res.stdout}"
+        for digest, res in results.items()
+        if res.rc != 0
+    ]
+    assert not failures, "\n".join(failures)
 
 
 @pytest.mark.parametrize(
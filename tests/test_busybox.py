@@ -11,6 +11,8 @@ from pytest_container.runtime import LOCALHOST
 from bci_tester.data import BASE_CONTAINER
 from bci_tester.data import BUSYBOX_CONTAINER
 from bci_tester.data import OS_VERSION
+from bci_tester.package_policy import PackagePolicy
+from bci_tester.rpmdb import get_rpm_database
 from bci_tester.selinux import selinux_status
 
 CONTAINER_IMAGES = [BUSYBOX_CONTAINER]
@@ -19,7 +21,7 @@ RPM_BUSYBOX_DOCKERFILE = """
 FROM $runner as target
 FROM $builder
 COPY --from=target / /target
-RUN rpm --root /target -qa --qf '%{NAME} %{LICENSE}\\n' > /tmp/licenses.txt
+RUN rpm --root /target -qa --qf '{query_format}' > /tmp/rpmdb.txt
 """
 
 
@@ -106,22 +108,34 @@ def test_no_gplv3_package(
 ):
     """test that there is no GPL-3 labelled package in the image."""
 
-    runner_id = MultiStageBuild(
-        containers={
-            "builder": BASE_CONTAINER,
-            "runner": auto_container.container,
-        },
-        containerfile_template=RPM_BUSYBOX_DOCKERFILE,
-    ).build(
-        tmp_path,
-        pytestconfig,
-        container_runtime,
-        extra_build_args=get_extra_run_args(pytestconfig),
+    def query_rpmdb(query_format: str) -> str:
+        # busybox has no rpm, so query its database from the base container
+        runner_id = MultiStageBuild(
+            containers={
+                "builder": BASE_CONTAINER,
+                "runner": auto_container.container,
+            },
+            containerfile_template=RPM_BUSYBOX_DOCKERFILE.format(
+                query_format=query_format
+            ),
+        ).build(
+            tmp_path,
+            pytestconfig,
+            container_runtime,
+            extra_build_args=get_extra_run_args(pytestconfig),
+        )
+        return host.check_output(
+            f"{container_runtime.runner_binary} run --rm "
+            f"{' '.join(get_extra_build_args(pytestconfig))} "
+            f"{runner_id} cat /tmp/rpmdb.txt",
+        )
+
+    violations = PackagePolicy(forbidden=["GPL-3"]).violations(
+        (package.name, package.license)
+        for package in get_rpm_database(auto_container, query_rpmdb).packages
     )
-    assert "GPL-3" not in host.check_output(
-        f"{container_runtime.runner_binary} run --rm "
-        f"{' '.join(get_extra_build_args(pytestconfig))} "
-        f"{runner_id} cat /tmp/licenses.txt",
+    assert not violations, "Found GPL-3 licensed packages: " + ", ".join(
+        str(violation) for violation in violations
     )
 
 
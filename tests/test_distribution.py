@@ -6,6 +6,7 @@ import requests
 from pytest_container import OciRuntimeBase
 
 from bci_tester.data import DISTRIBUTION_CONTAINER
+from bci_tester.registry import get_image_metadata
 
 CONTAINER_IMAGES = [DISTRIBUTION_CONTAINER]
 
@@ -57,3 +58,42 @@ def test_registry_service(
     host.run_expect([0], f"{engine} rmi {container_path}")
     host.run_expect([0], f"{engine} pull {force_http_mode} {container_path}")
     host.run_expect([0], f"{engine} run --rm {container_path}")
+
+
+def test_registry_image_metadata(
+    host, auto_container_per_test, tmp_path, container_runtime: OciRuntimeBase
+):
+    """Push an image with labels into the registry container and check that
+    :py:func:`~bci_tester.registry.get_image_metadata` reads them via the
+    distribution API.
+
+    """
+    engine = container_runtime.runner_binary
+    host_port = auto_container_per_test.forwarded_ports[0].host_port
+    container_path = f"localhost:{host_port}/labelled:1.0"
+
+    (tmp_path / "Containerfile").write_text(
+        textwrap.dedent(
+            """FROM registry.opensuse.org/opensuse/busybox:latest
+            LABEL org.opensuse.reference="registry.example.com/labelled:1.0"
+            ENV GREETING=hello
+            """
+        )
+    )
+    host.run_expect(
+        [0],
+        f"cd {tmp_path} && {' '.join(container_runtime.build_command)} "
+        f"-t {container_path} -f Containerfile .",
+    )
+    force_http_mode = "--tls-verify=false" if engine == "podman" else ""
+    host.run_expect([0], f"{engine} push {force_http_mode} {container_path}")
+
+    metadata = get_image_metadata(container_path)
+    assert (
+        metadata.labels["org.opensuse.reference"]
+        == "registry.example.com/labelled:1.0"
+    )
+    assert "GREETING=hello" in metadata.config["Env"]
+    assert metadata.digest.startswith("sha256:")
+
+    host.run_expect([0], f"{engine} rmi {container_path}")
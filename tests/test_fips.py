@@ -4,11 +4,8 @@ FIPS mode.
 """
 
 import re
-from pathlib import Path
 
 import pytest
-from pytest_container import DerivedContainer
-from pytest_container.container import BindMount
 from pytest_container.container import ContainerData
 from pytest_container.container import container_and_marks_from_pytest_param
 from pytest_container.runtime import LOCALHOST
@@ -18,63 +15,23 @@ from bci_tester.data import CONTAINERS_WITH_ZYPPER
 from bci_tester.data import LTSS_BASE_FIPS_CONTAINERS
 from bci_tester.data import MICRO_FIPS_CONTAINER
 from bci_tester.data import OS_VERSION
-from bci_tester.data import ZYPP_CREDENTIALS_DIR
 from bci_tester.fips import FIPS_DIGESTS
 from bci_tester.fips import FIPS_GCRYPT_DIGESTS
 from bci_tester.fips import FIPS_GNUTLS_DIGESTS
 from bci_tester.fips import NONFIPS_DIGESTS
 from bci_tester.fips import NONFIPS_GCRYPT_DIGESTS
 from bci_tester.fips import NONFIPS_GNUTLS_DIGESTS
-from bci_tester.fips import NULL_DIGESTS
+from bci_tester.fips import create_fips_tester_container
 from bci_tester.fips import host_fips_enabled
+from bci_tester.fips import null_digest_failures
+from bci_tester.fips import run_digest_commands
 
-#: multistage :file:`Dockerfile` that builds the program from
-#: :py:const:`FIPS_TEST_DOT_C` using gcc and copies it, ``libcrypto``, ``libssl``
-#: and ``libz`` into the deployment image. The libraries must be copied, as they
-#: are not available in the minimal container images.
-DOCKERFILE = """WORKDIR /src/
-COPY tests/files/fips-test.c /src/
-"""
-
-DOCKERFILE_GNUTLS = """WORKDIR /src/
-COPY tests/files/fips-test-gnutls.c /src/
-"""
-
-DOCKERFILE_GCRYPT = """WORKDIR /src/
-COPY tests/files/fips-test-gcrypt.c /src/
-"""
-
-
+#: the containers with the FIPS test programs for OpenSSL, GnuTLS and libgcrypt
+#: (see :py:func:`~bci_tester.fips.create_fips_tester_container`), one image
+#: per base that is shared by the tests of all libraries
 FIPS_TESTER_IMAGES = []
-FIPS_GNUTLS_TESTER_IMAGES = []
-FIPS_GCRYPT_TESTER_IMAGES = []
 for param in CONTAINERS_WITH_ZYPPER:
     ctr, marks = container_and_marks_from_pytest_param(param)
-    kwargs = {
-        "base": ctr,
-        "extra_environment_variables": ctr.extra_environment_variables,
-        "extra_launch_args": ctr.extra_launch_args,
-        "custom_entry_point": ctr.custom_entry_point,
-        "volume_mounts": (
-            [
-                BindMount(
-                    ZYPP_CREDENTIALS_DIR,
-                    host_path=ZYPP_CREDENTIALS_DIR,
-                    flags=[],
-                )
-            ]
-            if Path(ZYPP_CREDENTIALS_DIR).exists()
-            else []
-        ),
-    }
-    tester_ctr = DerivedContainer(containerfile=DOCKERFILE, **kwargs)
-    gnutls_tester_ctr = DerivedContainer(
-        containerfile=DOCKERFILE_GNUTLS, **kwargs
-    )
-    gcrypt_tester_ctr = DerivedContainer(
-        containerfile=DOCKERFILE_GCRYPT, **kwargs
-    )
-
     if param not in LTSS_BASE_FIPS_CONTAINERS + BASE_FIPS_CONTAINERS:
         # create a shallow copy here to avoid mutating the original params
         marks = marks[:] + [
@@ -84,13 +41,9 @@ for param in CONTAINERS_WITH_ZYPPER:
             )
         ]
     FIPS_TESTER_IMAGES.append(
-        pytest.param(tester_ctr, marks=marks, id=param.id)
-    )
-    FIPS_GNUTLS_TESTER_IMAGES.append(
-        pytest.param(gnutls_tester_ctr, marks=marks, id=param.id)
-    )
-    FIPS_GCRYPT_TESTER_IMAGES.append(
-        pytest.param(gcrypt_tester_ctr, marks=marks, id=param.id)
+        pytest.param(
+            create_fips_tester_container(ctr), marks=marks, id=param.id
+        )
     )
 
 
@@ -148,32 +101,35 @@ def test_openssl_binary(container_per_test: ContainerData) -> None:
     """Check that a binary linked against OpenSSL obeys the host's FIPS mode
     setting:
 
-    - build a container image using :py:const:`DOCKERFILE`
-    - run the bundled binary compiled from :file:`tests/files/fips-test.c` with
+    - run the binary compiled from :file:`tests/files/fips-test.c` with
       all FIPS digests and assert that it successfully calculates the message
       digest
     - rerun the same binary with non-FIPS digests and assert that this fails
       with the expected error message.
 
     """
-    container_per_test.connection.check_output(
-        "zypper --gpg-auto-import-keys -n ref && zypper -n install gcc libopenssl-devel && zypper -n clean &&"
-        "gcc -O2 fips-test.c -Wall -Wextra -Wpedantic -lcrypto -lssl -o fips-test && "
-        "mv fips-test /bin/fips-test"
+    results = run_digest_commands(
+        container_per_test,
+        {
+            digest: f"/bin/fips-test {digest}"
+            for digest in FIPS_DIGESTS + NONFIPS_DIGESTS
+        },
     )
-
-    for digest in FIPS_DIGESTS:
-        container_per_test.connection.check_output(f"/bin/fips-test {digest}")
-
+    failures = [
+        f"fips digest {digest} failed: {results[digest].stdout}"
+        for digest in FIPS_DIGESTS
+        if results[digest].rc != 0
+    ]
     for digest in NONFIPS_DIGESTS:
-        err_msg = container_per_test.connection.run_expect(
-            [1], f"/bin/fips-test {digest}"
-        ).stderr
-
-        assert (
-            f"Unknown message digest {digest}" in err_msg
-            or "EVP_DigestInit_ex was not successful" in err_msg
-        ), f"non-fips digest {digest} unexpected output {err_msg}"
+        res = results[digest]
+        if res.rc != 1 or not (
+            f"Unknown message digest {digest}" in res.stdout
+            or "EVP_DigestInit_ex was not successful" in res.stdout
+        ):
+            failures.append(
+                f"non-fips digest {digest} unexpected output {res.stdout}"
+            )
+    assert not failures, "\n".join(failures)
 
 
 def openssl_fips_hashes_test_fnct(container_per_test: ContainerData) -> None:
@@ -185,17 +141,10 @@ def openssl_fips_hashes_test_fnct(container_per_test: ContainerData) -> None:
     con = container_per_test.connection
 
     def run_digest_tests(command_prefix: str):
-        for digest in NONFIPS_DIGESTS:
-            cmd = container_per_test.connection.run(
-                f"{command_prefix} {digest} /dev/null"
-            )
-            assert cmd.rc != 0, (
-                f"expected 'openssl {digest}' to return nonzero exit code"
-            )
-            assert (
-                "is not a known digest" in cmd.stderr
-                or "Error setting digest" in cmd.stderr
-            )
+        commands = {
+            digest: f"{command_prefix} {digest} /dev/null"
+            for digest in NONFIPS_DIGESTS
+        }
         for digest in FIPS_DIGESTS:
             # The --xoflen flag is only available in OpenSSL v3
             xoflen_flag = (
@@ -203,12 +152,27 @@ def openssl_fips_hashes_test_fnct(container_per_test: ContainerData) -> None:
                 if command_prefix == "openssl-1_1"
                 else digest_xoflen(digest)
             )
-            dev_null_digest = con.check_output(
+            commands[digest] = (
                 f"{command_prefix} {digest}{xoflen_flag} /dev/null"
             )
-            assert f"= {NULL_DIGESTS[digest]}" in dev_null_digest, (
-                f"unexpected digest of hash {digest}: {dev_null_digest}"
-            )
+        results = run_digest_commands(container_per_test, commands)
+
+        failures = null_digest_failures(results, FIPS_DIGESTS)
+        for digest in NONFIPS_DIGESTS:
+            res = results[digest]
+            if res.rc == 0:
+                failures.append(
+                    f"expected '{command_prefix} {digest}' to return nonzero "
+                    "exit code"
+                )
+            elif not (
+                "is not a known digest" in res.stdout
+                or "Error setting digest" in res.stdout
+            ):
+                failures.append(
+                    f"non-fips digest {digest} unexpected output {res.stdout}"
+                )
+        assert not failures, "\n".join(failures)
 
     run_digest_tests("openssl")
 
@@ -242,14 +206,13 @@ def test_openssl_fips_hashes(container_per_test: ContainerData):
 
 
 @pytest.mark.parametrize(
-    "container_per_test", FIPS_GNUTLS_TESTER_IMAGES, indirect=True
+    "container_per_test", FIPS_TESTER_IMAGES, indirect=True
 )
 def test_gnutls_binary(container_per_test: ContainerData) -> None:
     """Check that a binary linked against GnuTLS obeys the host's FIPS mode
     setting:
 
-    - build a container image using :py:const:`DOCKERFILE_GNUTLS`
-    - run the bundled binary compiled from :file:`tests/files/fips-gnutls-test.c` with
+    - run the binary compiled from :file:`tests/files/fips-test-gnutls.c` with
       all FIPS digests and assert that it successfully calculates the message
       digest
     - rerun the same binary with non-FIPS digests and assert that this fails
@@ -259,12 +222,6 @@ def test_gnutls_binary(container_per_test: ContainerData) -> None:
 
     c = container_per_test.connection
 
-    c.check_output(
-        "zypper --gpg-auto-import-keys -n ref && zypper -n install gcc gnutls gnutls-devel && zypper -n clean && "
-        "gcc -Og -g3 fips-test-gnutls.c -Wall -Wextra -Wpedantic -lgnutls -o fips-test-gnutls && "
-        "mv fips-test-gnutls /bin/fips-test-gnutls"
-    )
-
     assert re.search(
         r"library is in FIPS140(-3|-2|) mode",
         c.run_expect([0], "gnutls-cli --fips140-mode").stderr,
@@ -278,27 +235,37 @@ def test_gnutls_binary(container_per_test: ContainerData) -> None:
         "sha512": "3916af571551c0c40eb19936c7ac2c090e140cad48e348dc4e9d5b6508a34ac6090daeeed3a081ce0e44c90b181987b71f09e8e0c190e5af26cd46eea724489de1c112ff908febc3b98b1693a6cd3564eaf8e5e6ca629d084d9f0eba99247cacdd72e369ff8941397c2807409ff66be64be908da17ad7b8a49a2a26c0e8086aa",
     }
 
-    for digest in FIPS_GNUTLS_DIGESTS:
-        res = c.check_output(f"/bin/fips-test-gnutls {digest}")
-        assert "Digest is: " + expected_fips_gnutls_digests[digest] in res
-
-    for digest in NONFIPS_GNUTLS_DIGESTS:
-        err_msg = c.run_expect([1], f"/bin/fips-test-gnutls {digest}").stderr
-
-        assert "Hash calculation failed" in err_msg, (
-            f"Hash calculation unexpectedly succeeded for {digest}"
-        )
+    results = run_digest_commands(
+        container_per_test,
+        {
+            digest: f"/bin/fips-test-gnutls {digest}"
+            for digest in FIPS_GNUTLS_DIGESTS + NONFIPS_GNUTLS_DIGESTS
+        },
+    )
+    failures = [
+        f"unexpected digest of hash {digest}: {results[digest].stdout}"
+        for digest in FIPS_GNUTLS_DIGESTS
+        if results[digest].rc != 0
+        or "Digest is: " + expected_fips_gnutls_digests[digest]
+        not in results[digest].stdout
+    ]
+    failures += [
+        f"Hash calculation unexpectedly succeeded for {digest}"
+        for digest in NONFIPS_GNUTLS_DIGESTS
+        if results[digest].rc != 1
+        or "Hash calculation failed" not in results[digest].stdout
+    ]
+    assert not failures, "\n".join(failures)
 
 
 @pytest.mark.parametrize(
-    "container_per_test", FIPS_GCRYPT_TESTER_IMAGES, indirect=True
+    "container_per_test", FIPS_TESTER_IMAGES, indirect=True
 )
 def test_gcrypt_binary(container_per_test: ContainerData) -> None:
     """Check that a binary linked against gcrypt obeys the host's FIPS mode
     setting:
 
-    - build a container image using :py:const:`DOCKERFILE_GCRYPT`
-    - run the bundled binary compiled from :file:`tests/files/fips-gcrypt-test.c` with
+    - run the binary compiled from :file:`tests/files/fips-test-gcrypt.c` with
       all FIPS digests and assert that it successfully calculates the message
       digest
     - rerun the same binary with non-FIPS digests and assert that this fails
@@ -308,15 +275,6 @@ def test_gcrypt_binary(container_per_test: ContainerData) -> None:
 
     c = container_per_test.connection
 
-    # we must add --gpg-auto-import-keys to import the NVidia GPG key
-    c.check_output("zypper --gpg-auto-import-keys -n ref")
-
-    c.check_output(
-        "zypper -n in gcc libgcrypt-devel dirmngr && "
-        "gcc -O2 fips-test-gcrypt.c -Wall -Wextra -Werror -lgcrypt -o fips-test-gcrypt && "
-        "mv fips-test-gcrypt /bin/fips-test-gcrypt"
-    )
-
     fips_ver_match = re.search(
         r"fips-mode:y::Libgcrypt version [\d\.\-]+:",
         c.check_output("gpgconf --show-versions"),
@@ -337,17 +295,29 @@ def test_gcrypt_binary(container_per_test: ContainerData) -> None:
         "sha3-512": "0bc583f093fb557e5aa6c3020cc93e9065a01600f3c8e1be17c5026799e4434c701a423ade5edae77491b7ee05c78cdc6e01af22bdc67fcd351fb1ab9a1936abc9a2f69add89697a8b935ce1bbc3d5c21f276b9e2377015003f98543bceffb8a2e1ec8d96fc99bd39d88ca6a0fd69d812362eda0937de4e3b3f0d94093a5b5cc",
     }
 
-    for digest in FIPS_GCRYPT_DIGESTS:
-        res = c.run_expect([0, 1], f"/bin/fips-test-gcrypt {digest}")
-
-        assert (
-            res.rc == 0
-            and "Digest is: " + expected_fips_gcrypt_digests[digest]
-            in res.stdout
+    results = run_digest_commands(
+        container_per_test,
+        {
+            digest: f"/bin/fips-test-gcrypt {digest}"
+            for digest in FIPS_GCRYPT_DIGESTS + NONFIPS_GCRYPT_DIGESTS
+        },
+    )
+    for digest, res in results.items():
+        assert res.rc in (0, 1), (
+            f"/bin/fips-test-gcrypt {digest} exited with {res.rc}"
         )
 
+    failures = [
+        f"unexpected digest of hash {digest}: {results[digest].stdout}"
+        for digest in FIPS_GCRYPT_DIGESTS
+        if results[digest].rc != 0
+        or "Digest is: " + expected_fips_gcrypt_digests[digest]
+        not in results[digest].stdout
+    ]
+    assert not failures, "\n".join(failures)
+
     for digest in NONFIPS_GCRYPT_DIGESTS:
-        non_fips_call = c.run_expect([0, 1], f"/bin/fips-test-gcrypt {digest}")
+        non_fips_call = results[digest]
 
         expected_msg = (
             "Failed to create hash context",
@@ -355,7 +325,7 @@ def test_gcrypt_binary(container_per_test: ContainerData) -> None:
         )
 
         if non_fips_call.rc == 0 or any(
-            msg in non_fips_call.stderr for msg in expected_msg
+            msg in non_fips_call.stdout for msg in expected_msg
         ):
             if OS_VERSION in ("15.4", "15.5"):
                 pytest.xfail(
@@ -367,7 +337,7 @@ def test_gcrypt_binary(container_per_test: ContainerData) -> None:
 
 
 @pytest.mark.parametrize(
-    "container_per_test", FIPS_GCRYPT_TESTER_IMAGES, indirect=True
+    "container_per_test", FIPS_TESTER_IMAGES, indirect=True
 )
 def test_gpgconf_binary(container_per_test: ContainerData) -> None:
     """validate that gpgconf lists ``fips-mode``"""
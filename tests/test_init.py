@@ -14,6 +14,7 @@ from pytest_container.runtime import LOCALHOST
 
 from bci_tester.data import INIT_CONTAINER
 from bci_tester.data import OS_PRETTY_NAME
+from bci_tester.rpmdb import get_rpm_database
 from bci_tester.runtime_choice import DOCKER_SELECTED
 
 CONTAINER_IMAGES = [INIT_CONTAINER]
@@ -39,7 +40,7 @@ def test_systemd_no_udev_present(auto_container: ContainerData):
     """https://jira.suse.com/browse/SLE-21856 - check that systemd is not pulling in
     udev.
     """
-    assert not auto_container.connection.package("udev").is_installed
+    assert not get_rpm_database(auto_container).is_installed("udev")
 
 
 def test_systemd_boottime(auto_container: ContainerData):
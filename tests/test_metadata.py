@@ -9,25 +9,33 @@ conventions outlined in
 to skip some of the tests for the SLE 15 SP3 base container, as it does not
 offer the labels under the ``com.suse.bci`` prefix but ``com.suse.sle``.
 
+The labels are fetched from the registry via the ``image_metadata`` fixture,
+the images are neither pulled nor launched (local images and images in
+unreachable or private registries are inspected via the container runtime). The references in the labels are
+checked for all images at once via the ``checked_references`` fixture.
+
 """
 
-import base64
 import datetime
 import json
+import os
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any
 from typing import List
+from typing import Optional
 from typing import Tuple
 
 import pytest
 import requests
 from _pytest.mark.structures import ParameterSet
 from pytest_container import OciRuntimeBase
-from pytest_container.container import ContainerData
 from pytest_container.container import container_and_marks_from_pytest_param
 from pytest_container.runtime import LOCALHOST
 
+from bci_tester.attestations import AttestationSummary
+from bci_tester.attestations import PeakMemory
+from bci_tester.attestations import get_attestations
 from bci_tester.data import ACC_CONTAINERS
 from bci_tester.data import ALERTMANAGER_CONTAINERS
 from bci_tester.data import ALL_CONTAINERS
@@ -110,6 +118,17 @@ from bci_tester.data import TARGET
 from bci_tester.data import TOMCAT_CONTAINERS
 from bci_tester.data import VALKEY_CONTAINERS
 from bci_tester.data import ImageType
+from bci_tester.disturl import SourceCache
+from bci_tester.disturl import SourceRevision
+from bci_tester.disturl import fetch_from_obs
+from bci_tester.disturl import fetch_unrecorded
+from bci_tester.prepull import get_root_url
+from bci_tester.registry import ImageMetadata
+from bci_tester.registry import ImageReference
+from bci_tester.registry import ReferenceResolver
+from bci_tester.registry import get_image_metadata
+from bci_tester.registry import get_oci_architecture
+from bci_tester.registry import get_registry_client
 from bci_tester.runtime_choice import PODMAN_SELECTED
 from bci_tester.util import get_spr_namespace
 from bci_tester.util import get_spr_version
@@ -167,6 +186,80 @@ def _get_container_ref(
     return f"{name}:{non_release_ref}"
 
 
+def _get_base_ref(labels) -> Optional[str]:
+    # the base image by digest according to the OCI base image labels
+    base_digest = labels.get("org.opencontainers.image.base.digest")
+    base_name = labels.get("org.opencontainers.image.base.name")
+    if not base_digest or not base_name:
+        return None
+    return f"{base_name.partition(':')[0]}@{base_digest}"
+
+
+@pytest.fixture(scope="module")
+def checked_references(
+    request: pytest.FixtureRequest, reference_resolver: ReferenceResolver
+) -> ReferenceResolver:
+    """This fixture provides the ``reference_resolver`` after the references
+    of all selected :py:func:`test_reference` and
+    :py:func:`test_oci_base_refs` tests have been resolved concurrently.
+    """
+    images: List[Tuple[str, Optional[ImageType]]] = []
+    for item in request.session.items:
+        callspec = getattr(item, "callspec", None)
+        if (
+            callspec is None
+            or getattr(item, "module", None) is not request.module
+            or item.originalname
+            not in ("test_reference", "test_oci_base_refs")
+        ):
+            continue
+        container, _ = container_and_marks_from_pytest_param(
+            callspec.params["image_metadata"]
+        )
+        url = get_root_url(container)
+        if url:
+            images.append((url, callspec.params.get("container_type")))
+
+    def get_refs(image: Tuple[str, Optional[ImageType]]) -> List[str]:
+        url, container_type = image
+        try:
+            labels = get_image_metadata(url).labels
+            if container_type is None:
+                base_ref = _get_base_ref(labels)
+                return [base_ref] if base_ref else []
+            ref = _get_container_ref(
+                labels["org.opensuse.reference"], container_type
+            )
+        except (requests.RequestException, KeyError, ValueError):
+            # the test itself reports the broken image or labels
+            return []
+        return [ref] if url.startswith(ref.partition(":")[0]) else []
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        refs = [ref for refs in executor.map(get_refs, images) for ref in refs]
+    reference_resolver.resolve(refs)
+    return reference_resolver
+
+
+def _check_manifest_exists(
+    ref: str,
+    checked_references: ReferenceResolver,
+    container_runtime: OciRuntimeBase,
+) -> None:
+    exists = checked_references.exists(ref)
+    if exists is not None:
+        assert exists, f"{ref} does not exist in the registry"
+        return
+
+    # the registry refused the anonymous access, but the container runtime
+    # might have credentials for it
+    if PODMAN_SELECTED and container_runtime.version.major < 3:
+        pytest.skip("Podman version too old for checking manifest")
+    LOCALHOST.run_expect(
+        [0], f"{container_runtime.runner_binary} manifest inspect {ref}"
+    )
+
+
 #: List of all containers and their respective names which are used in the image
 #: labels ``com.suse.bci.$name``.
 IMAGES_AND_NAMES: List[ParameterSet] = [
@@ -412,12 +505,12 @@ assert len(ALL_CONTAINERS) == len(IMAGES_AND_NAMES), (
 
 
 @pytest.mark.parametrize(
-    "container,container_name,container_type",
+    "image_metadata,container_name,container_type",
     IMAGES_AND_NAMES,
-    indirect=["container"],
+    indirect=["image_metadata"],
 )
 def test_general_labels(
-    container: ContainerData,
+    image_metadata: ImageMetadata,
     container_name: str,
     container_type: ImageType,
 ):
@@ -434,8 +527,8 @@ def test_general_labels(
 
     """
 
-    labels = container.inspect.config.labels
-    version = container.container.get_base().url.split(":")[-1]
+    labels = image_metadata.labels
+    version = image_metadata.url.split(":")[-1]
 
     for prefix in (
         _get_container_label_prefix(container_name, container_type),
@@ -524,12 +617,12 @@ def test_general_labels(
 
 
 @pytest.mark.parametrize(
-    "container,container_name,container_type",
+    "image_metadata,container_name,container_type",
     IMAGES_AND_NAMES,
-    indirect=["container"],
+    indirect=["image_metadata"],
 )
 def test_url(
-    container: ContainerData,
+    image_metadata: ImageMetadata,
     container_name: str,
     container_type: ImageType,
 ):
@@ -537,7 +630,7 @@ def test_url(
     Check if label ``com.suse.bci.$name.url`` equals :py:const:`URL`
     """
 
-    labels = container.inspect.config.labels
+    labels = image_metadata.labels
 
     for prefix in (
         _get_container_label_prefix(container_name, container_type),
@@ -582,13 +675,13 @@ def test_url(
 @SKIP_IF_PC_MARK
 @SKIP_IF_LTSS_VERSION
 @pytest.mark.parametrize(
-    "container",
+    "image_metadata",
     [cont for cont in ALL_CONTAINERS if cont != BASE_CONTAINER],
     indirect=True,
 )
-def test_artifacthub_urls(container: ContainerData) -> None:
+def test_artifacthub_urls(image_metadata: ImageMetadata) -> None:
     """Smoke test checking that the artifacthub.io labeling is passing sanity checks"""
-    labels = container.inspect.config.labels
+    labels = image_metadata.labels
 
     assert "io.artifacthub.package.readme-url" in labels, (
         "readme url missing in labels"
@@ -613,16 +706,16 @@ def test_artifacthub_urls(container: ContainerData) -> None:
 
 
 @pytest.mark.parametrize(
-    "container,container_name,container_type",
+    "image_metadata,container_name,container_type",
     IMAGES_AND_NAMES,
-    indirect=["container"],
+    indirect=["image_metadata"],
 )
 def test_support_end_in_future(
-    container: ContainerData,
+    image_metadata: ImageMetadata,
     container_name: str,
     container_type: ImageType,  # pylint: disable=unused-argument
 ):
-    support_end_label = container.inspect.config.labels.get(
+    support_end_label = image_metadata.labels.get(
         "com.suse.supportlevel.until", None
     )
     if support_end_label:
@@ -645,7 +738,7 @@ def test_support_end_in_future(
                 support_end_label, "%Y-%m-%d"
             )
         assert datetime.datetime.now() < support_end, (
-            f"container '{container.image_url_or_id}' out of support: {support_end}"
+            f"container '{image_metadata.url}' out of support: {support_end}"
         )
 
 
@@ -654,12 +747,12 @@ def test_support_end_in_future(
     reason="disturl can be anything if TARGET=custom",
 )
 @pytest.mark.parametrize(
-    "container,container_name,container_type",
+    "image_metadata,container_name,container_type",
     IMAGES_AND_NAMES,
-    indirect=["container"],
+    indirect=["image_metadata"],
 )
 def test_disturl(
-    container: ContainerData,
+    image_metadata: ImageMetadata,
     container_name: str,
     container_type: ImageType,
 ):
@@ -671,12 +764,10 @@ def test_disturl(
     ``com.suse.bci.$name.disturl``.
 
     """
-    labels = container.inspect.config.labels
+    labels = image_metadata.labels
 
     disturl = labels["org.openbuildservice.disturl"]
-    baseurl = urllib.parse.urlparse(
-        f"oci://{container.container.get_base().url}"
-    )
+    baseurl = urllib.parse.urlparse(f"oci://{image_metadata.url}")
     assert (
         disturl
         == labels[
@@ -736,53 +827,61 @@ def test_disturl(
             )
 
 
-@pytest.mark.parametrize("container", ALL_CONTAINERS, indirect=True)
+@pytest.fixture(scope="module")
+def source_cache(pytestconfig: pytest.Config) -> SourceCache:
+    """This fixture provides the cache of the sources referenced by the
+    disturl labels. ``BCI_DISTURL_STORE`` replaces the cache directory,
+    ``BCI_DISTURL_OFFLINE=1`` only uses the listings stored in it.
+    """
+    store = os.getenv("BCI_DISTURL_STORE")
+    if os.getenv("BCI_DISTURL_OFFLINE") == "1":
+        return SourceCache(fetch_unrecorded, Path(store) if store else None)
+
+    cert = str(
+        pytestconfig.rootpath / "tests" / "files" / "SUSE_Trust_Root.crt"
+    )
+    return SourceCache(
+        lambda revision: fetch_from_obs(
+            revision, cert if "suse.de" in revision.host else None
+        ),
+        Path(store) if store else None,
+    )
+
+
+@pytest.mark.parametrize("image_metadata", ALL_CONTAINERS, indirect=True)
 def test_disturl_can_be_checked_out(
-    container: ContainerData, pytestconfig: pytest.Config
+    image_metadata: ImageMetadata, source_cache: SourceCache
 ):
     """The Open Build Service automatically adds a ``org.openbuildservice.disturl``
     label that can be checked out using :command:`osc` to get the sources at
     exactly the version from which the container was built. This test verifies
     that the url is accessible.
+
+    The sources of each revision are only fetched once and then cached (see
+    :py:mod:`bci_tester.disturl`).
     """
-    disturl_label = container.inspect.config.labels[
-        "org.openbuildservice.disturl"
-    ]
+    disturl_label = image_metadata.labels["org.openbuildservice.disturl"]
     disturl = urllib.parse.urlparse(disturl_label)
 
     assert disturl.scheme == "obs", f"unsupported scheme in {disturl_label}"
     for p in ("params", "query", "fragment"):
         assert getattr(disturl, p) == "", f"unsupported {p} in {disturl_label}"
 
-    src_revision, _, src_package = Path(disturl.path).name.partition("-")
-    src_package = src_package.partition(":")[0]  # strip multibuild flavor
-    src_project = Path(disturl.path).parent.parent.name
-
-    cert = (
-        str(pytestconfig.rootpath / "tests" / "files" / "SUSE_Trust_Root.crt")
-        if "suse.de" in disturl.hostname
-        else None
-    )
+    revision = SourceRevision.from_disturl(disturl_label)
     try:
-        req = requests.get(
-            f"https://{disturl.hostname}/public/source/{src_project}/{src_package}",
-            params={"rev": src_revision},
-            cert=cert,
-            timeout=(5, 10),
-        )
+        listing = source_cache.get_listing(revision)
     except requests.exceptions.ConnectionError as e:
-        if "suse.de" in disturl.hostname:
+        if "suse.de" in revision.host:
             pytest.skip(reason=f"Cannot connect to SUSE internal host: {e}")
         raise
-    req.raise_for_status()
-    assert "kiwi" in req.text or "Dockerfile" in req.text, (
+    assert "kiwi" in listing or "Dockerfile" in listing, (
         "Cannot find a valid build description"
     )
 
 
 @SKIP_IF_TW_MARK
 @pytest.mark.parametrize(
-    "container",
+    "image_metadata",
     [
         cont
         for cont in ALL_CONTAINERS
@@ -790,65 +889,65 @@ def test_disturl_can_be_checked_out(
     ],
     indirect=True,
 )
-def test_techpreview_label(container: ContainerData):
+def test_techpreview_label(image_metadata: ImageMetadata):
     """Check that containers that are not L3 supported have the label
     ``com.suse.supportlevel`` set to ``techpreview``.
     Reference: https://confluence.suse.com/display/ENGCTNRSTORY/SLE+BCI+Image+Overview
     """
-    assert (
-        container.inspect.config.labels["com.suse.supportlevel"]
-        == "techpreview"
-    ), "images must be marked as techpreview"
+    assert image_metadata.labels["com.suse.supportlevel"] == "techpreview", (
+        "images must be marked as techpreview"
+    )
 
 
 @SKIP_IF_TW_MARK
 @pytest.mark.parametrize(
-    "container",
+    "image_metadata",
     list(ACC_CONTAINERS),
     indirect=True,
 )
-def test_acc_label(container: ContainerData):
+def test_acc_label(image_metadata: ImageMetadata):
     """Check that containers that are in ACC_CONTAINERS have
     ``com.suse.supportlevel`` set to ``acc``.
     Reference: https://confluence.suse.com/display/ENGCTNRSTORY/SLE+BCI+Image+Overview
     """
-    assert container.inspect.config.labels["com.suse.supportlevel"] == "acc", (
+    assert image_metadata.labels["com.suse.supportlevel"] == "acc", (
         "acc images must be marked as acc"
     )
 
 
 @SKIP_IF_TW_MARK
-@pytest.mark.parametrize("container", L3_CONTAINERS, indirect=True)
-def test_l3_label(container: ContainerData):
+@pytest.mark.parametrize("image_metadata", L3_CONTAINERS, indirect=True)
+def test_l3_label(image_metadata: ImageMetadata):
     """Check that containers under L3 support have the label
     ``com.suse.supportlevel`` set to ``l3``.
     Reference: https://confluence.suse.com/display/ENGCTNRSTORY/SLE+BCI+Image+Overview
     """
-    assert container.inspect.config.labels["com.suse.supportlevel"] == "l3", (
+    assert image_metadata.labels["com.suse.supportlevel"] == "l3", (
         "image supportlevel must be marked as L3"
     )
 
 
 @pytest.mark.parametrize(
-    "container,container_name,container_type",
+    "image_metadata,container_name,container_type",
     IMAGES_AND_NAMES,
-    indirect=["container"],
+    indirect=["image_metadata"],
 )
 def test_reference(
-    container: ContainerData,
+    image_metadata: ImageMetadata,
     container_name: str,
     container_type: ImageType,
     container_runtime: OciRuntimeBase,
+    checked_references: ReferenceResolver,
 ):
     """The ``reference`` label (available via ``org.opensuse.reference`` and
-    ``com.suse.bci.$name.reference``) is pointing to a manifest that can be
-    inspected via :command:`podman` or :command:`docker`.
+    ``com.suse.bci.$name.reference``) is pointing to a manifest that exists in
+    the registry.
 
     We check that both values are equal, that the container name is correct in
     the reference and that the reference begins with the expected registry url.
 
     """
-    labels = container.inspect.config.labels
+    labels = image_metadata.labels
 
     reference = labels["org.opensuse.reference"]
     assert (
@@ -907,26 +1006,25 @@ def test_reference(
     ref = _get_container_ref(reference, container_type)
 
     # Skip testing containers that have not yet been released to avoid unnecessary failures
-    if not container.container.baseurl.startswith(ref.partition(":")[0]):
+    if not image_metadata.url.startswith(ref.partition(":")[0]):
         pytest.skip(
-            f"reference {ref} not checked in TARGET={container.container.baseurl}"
+            f"reference {ref} not checked in TARGET={image_metadata.url}"
         )
 
-    LOCALHOST.run_expect(
-        [0], f"{container_runtime.runner_binary} manifest inspect {ref}"
-    )
+    _check_manifest_exists(ref, checked_references, container_runtime)
 
 
 @SKIP_IF_TW_MARK
-@pytest.mark.parametrize("container", ALL_CONTAINERS, indirect=True)
+@pytest.mark.parametrize("image_metadata", ALL_CONTAINERS, indirect=True)
 def test_oci_base_refs(
-    container: ContainerData,
+    image_metadata: ImageMetadata,
     container_runtime: OciRuntimeBase,
+    checked_references: ReferenceResolver,
 ):
     """The ``org.opencontainers.image.base.digest`` label is pointing to a
-    digest that can be inspected via :command:`podman` or :command:`docker`.
+    digest that exists in the registry.
     """
-    labels = container.inspect.config.labels
+    labels = image_metadata.labels
 
     if "org.opencontainers.image.base.digest" not in labels:
         pytest.skip("no oci base ref annotation set - itself a base image?")
@@ -937,7 +1035,6 @@ def test_oci_base_refs(
     assert ":" in base_name, (
         f"`org.opencontainers.image.base.name` is not the expected format: {base_name}"
     )
-    base_repository = base_name.partition(":")[0]
 
     assert base_name.startswith("registry.suse.com/")
     assert f":{OS_VERSION_ID}" in base_name, (
@@ -945,30 +1042,16 @@ def test_oci_base_refs(
     )
     assert base_digest.startswith("sha256:")
 
-    if PODMAN_SELECTED and container_runtime.version.major < 3:
-        pytest.skip("Podman version too old for checking manifest")
-
-    LOCALHOST.check_output(
-        f"{container_runtime.runner_binary} manifest inspect {base_repository}@{base_digest}",
-    )
-
-
-def _reg(registry: str, repository: str, otype: str, object: str) -> Any:
-    r = requests.get(
-        f"https://{registry}/v2/{repository}/{otype}/{object}",
-        timeout=5,
-        allow_redirects=False,
-        verify=not registry.endswith("suse.de"),
-        headers={"User-Agent": "github.com/SUSE/BCI-tests"},
-    )
-    return r.json()
+    base_ref = _get_base_ref(labels)
+    assert base_ref
+    _check_manifest_exists(base_ref, checked_references, container_runtime)
 
 
 @pytest.mark.skipif(
     OS_VERSION not in ("15.7",), reason="Does not have buildtime attestations"
 )
 @pytest.mark.parametrize(
-    "container",
+    "image_metadata",
     [
         *BASE_FIPS_CONTAINERS,
         BASE_CONTAINER,
@@ -977,63 +1060,72 @@ def _reg(registry: str, repository: str, otype: str, object: str) -> Any:
         MICRO_FIPS_CONTAINER,
         NANO_CONTAINER,
     ],
-    indirect=["container"],
+    indirect=["image_metadata"],
 )
-def test_buildtime_attestations(container):
-    baseurl = urllib.parse.urlparse(
-        f"oci://{container.container.get_base().url}"
-    )
-    repository, _, tag = baseurl.path.partition(":")
+def test_buildtime_attestations(
+    image_metadata: ImageMetadata, record_property
+):
+    """The images of all architectures have a ClamAV scan and the trivy and
+    NeuVector vulnerability reports (where available) attached as build time
+    attestations, which do not report any findings.
 
-    container_reference = container.inspect.config.labels[
-        "org.opensuse.reference"
-    ]
+    The attestations of all architectures are streamed concurrently (see
+    :py:mod:`bci_tester.attestations`), the peak of the memory allocated while
+    reading them is recorded as the property ``peak_alloc_kib``.
+    """
+    ref = ImageReference.from_url(image_metadata.url)
+    client = get_registry_client(ref.registry)
+
+    container_reference = image_metadata.labels["org.opensuse.reference"]
     assert container_reference
 
-    digest = None
-    # Find the match for the local architecture in the fat manifest
-    fat_manifest = _reg(baseurl.netloc, repository, "manifests", tag)
+    fat_manifest = json.loads(
+        client.get_manifest(ref.repository, ref.reference)[1]
+    )
     assert fat_manifest["schemaVersion"] == 2
-    for manifest in fat_manifest["manifests"]:
-        local_arch = {"aarch64": "arm64", "x86_64": "amd64"}.get(
-            LOCALHOST.system_info.arch, LOCALHOST.system_info.arch
+    architectures = {
+        manifest["digest"]: manifest["platform"]["architecture"]
+        for manifest in fat_manifest["manifests"]
+    }
+    assert get_oci_architecture(LOCALHOST.system_info.arch) in (
+        architectures.values()
+    ), f"No manifest found for architecture {LOCALHOST.system_info.arch}"
+
+    with PeakMemory() as memory:
+        attestations = get_attestations(client, ref.repository, architectures)
+    record_property("peak_alloc_kib", memory.peak_kib)
+
+    for digest, arch in architectures.items():
+        _check_attestations(
+            attestations[digest],
+            digest,
+            arch,
+            container_reference,
+            minimum_length=1000 if "bci-nano" in image_metadata.url else 10000,
         )
-        if manifest["platform"]["architecture"] == local_arch:
-            digest = manifest["digest"]
-            break
 
-    assert digest, (
-        f"No manifest found for architecture {LOCALHOST.system_info.arch}"
-    )
-    # Fetch the attestation for the specific architecture
-    attestation = _reg(
-        baseurl.netloc,
-        repository,
-        "manifests",
-        digest.replace("sha256:", "sha256-") + ".att",
-    )
+
+def _check_attestations(
+    attestations: List[AttestationSummary],
+    digest: str,
+    arch: str,
+    container_reference: str,
+    minimum_length: int,
+) -> None:
     got_clamav: bool = False
     # Trivy is not scanning on s390x architecture
-    got_trivy: bool = manifest["platform"]["architecture"] in ("s390x",)
+    got_trivy: bool = arch in ("s390x",)
     # NeuVector is only scanning on x86_64 and aarch64, so skip on ppc64le and s390x
-    got_neuvector: bool = manifest["platform"]["architecture"] in (
-        "ppc64le",
-        "s390x",
-    )
-    for layer in attestation["layers"]:
-        predicate_type = layer.get("annotations", {}).get(
-            "org.open-build-service.intoto.predicatetype", None
-        )
-        predicate = _reg(baseurl.netloc, repository, "blobs", layer["digest"])
-
-        payload = json.loads(base64.b64decode(predicate["payload"]))
-        assert digest.endswith(payload["subject"][0]["digest"]["sha256"])
+    got_neuvector: bool = arch in ("ppc64le", "s390x")
+    for attestation in attestations:
+        predicate_type = attestation.predicate_type or ""
+        assert digest.endswith(attestation.subject_digests[0])
 
         if predicate_type == "https://cosign.sigstore.dev/attestation/v1":
             assert not got_clamav
             got_clamav = True
-            clamav_result = payload["predicate"]["data"]
-            assert "Infected files: 0" in clamav_result
+            clamav_result = attestation.data
+            assert clamav_result and "Infected files: 0" in clamav_result
 
             virus_count_found = False
             files_count_found = False
@@ -1050,67 +1142,53 @@ def test_buildtime_attestations(container):
                     files_count_found = True
 
             assert virus_count_found and files_count_found
-            assert 500 < len(predicate["payload"]) < 1000, (
+            assert 500 < attestation.payload_length < 1000, (
                 "ClamAV scan result has unusual length"
             )
             continue
         if not predicate_type.endswith("/vuln/v1"):
-            minimum_length = (
-                1000 if "bci-nano" in container.image_url_or_id else 10000
-            )
-            assert minimum_length < len(predicate["payload"]) < 10000000, (
-                f"Attestation payload length {len(predicate['payload'])} outside range"
+            assert minimum_length < attestation.payload_length < 10000000, (
+                f"Attestation payload length {attestation.payload_length} outside range"
             )
             continue
 
-        scanner = payload["predicate"]["scanner"]
-        result = scanner["result"]
-        if "aquasecurity/trivy" in scanner["uri"]:
-            assert not got_trivy, (
-                f"Multiple Trivy attestations for {manifest['platform']['architecture']}"
-            )
+        scanner_uri = attestation.scanner_uri or ""
+        if "aquasecurity/trivy" in scanner_uri:
+            assert not got_trivy, f"Multiple Trivy attestations for {arch}"
             got_trivy = True
 
-            trivy_reference = result["Metadata"]["ImageConfig"]["config"][
-                "Labels"
-            ]["org.opensuse.reference"]
+            trivy_reference = (attestation.labels or {}).get(
+                "org.opensuse.reference"
+            )
             assert container_reference == trivy_reference, (
                 f"Unexpected reference {trivy_reference} in trivy report"
             )
 
-            for finding in result["Results"]:
-                assert "Vulnerabilities" not in finding, (
-                    f"Image has vulnerability {finding['Vulnerabilities'][0]['VulnerabilityID']}"
-                )
-            assert "Class" in result["Results"][0]
-        elif "neuvector/scanner" in scanner["uri"]:
+            assert not attestation.vulnerabilities, (
+                f"Image has vulnerabilities {attestation.vulnerabilities}"
+            )
+            assert attestation.result_classes[0] is not None
+        elif "neuvector/scanner" in scanner_uri:
             assert not got_neuvector, (
-                f"Multiple NeuVector attestations for {manifest['platform']['architecture']}"
+                f"Multiple NeuVector attestations for {arch}"
             )
             got_neuvector = True
-            assert scanner["db"]["uri"]
-            if "error_message" in result:
-                assert len(result["error_message"]) == 0
-            for check in result["report"]["checks"]:
-                assert check["level"] in ("WARN",), (
-                    f"Neuvector file {check['description']}"
+            assert attestation.scanner_db_uri
+            assert not attestation.error_message
+            for check in attestation.checks:
+                assert check.get("level") in ("WARN",), (
+                    f"Neuvector file {check.get('description')}"
                 )
 
             # for some reason, NeuVector cannot extract labels from kiwi type containers
-            if "labels" in result["report"]:
+            if attestation.labels is not None:
                 assert (
                     container_reference
-                    == result["report"]["labels"]["org.opensuse.reference"]
+                    == attestation.labels["org.opensuse.reference"]
                 )
-        assert 8000 < len(predicate["payload"]) < 1000000, (
-            f"Vulnerability report length {len(predicate['payload'])} outside range"
+        assert 8000 < attestation.payload_length < 1000000, (
+            f"Vulnerability report length {attestation.payload_length} outside range"
         )
-    assert got_clamav, (
-        f"ClamAV missing for {manifest['platform']['architecture']}"
-    )
-    assert got_neuvector, (
-        f"NeuVector missing for {manifest['platform']['architecture']}"
-    )
-    assert got_trivy, (
-        f"Trivy missing for {manifest['platform']['architecture']}"
-    )
+    assert got_clamav, f"ClamAV missing for {arch}"
+    assert got_neuvector, f"NeuVector missing for {arch}"
+    assert got_trivy, f"Trivy missing for {arch}"
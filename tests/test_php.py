@@ -21,6 +21,7 @@ from bci_tester.data import OS_VERSION
 from bci_tester.data import PHP_8_APACHE
 from bci_tester.data import PHP_8_CLI
 from bci_tester.data import PHP_8_FPM
+from bci_tester.snapshot import prepared_container
 
 CONTAINER_IMAGES = [PHP_8_CLI, PHP_8_APACHE, PHP_8_FPM]
 
@@ -145,17 +146,22 @@ MEDIAWIKI_FPM_POD = Pod(
 )
 
 
-def test_install_phpize_deps(auto_container_per_test: ContainerData):
+@pytest.mark.parametrize(
+    "container_per_test",
+    [
+        prepared_container(c, "PHPIZE_DEPS", "zypper -n in $PHPIZE_DEPS")
+        for c in CONTAINER_IMAGES
+    ],
+    indirect=True,
+)
+def test_install_phpize_deps(container_per_test: ContainerData):
     """Check that we can install whatever is in the environment variable
-    ``PHPIZE_DEPS`` and that afterwards :command:`phpize` works.
+    ``PHPIZE_DEPS`` (performed when building the snapshot of the container)
+    and that afterwards :command:`phpize` works.
 
     """
-    auto_container_per_test.connection.run_expect(
-        [0],
-        "zypper -n in $PHPIZE_DEPS",
-    )
-    auto_container_per_test.connection.run_expect([0], "touch config.m4")
-    auto_container_per_test.connection.run_expect([0], "phpize")
+    container_per_test.connection.run_expect([0], "touch config.m4")
+    container_per_test.connection.run_expect([0], "phpize")
 
 
 @pytest.mark.parametrize("extension", ["pcntl", "gd"])
@@ -4,63 +4,119 @@ be installed and ensure that we do not accidentally ship forbidden packages.
 """
 
 import xml.etree.ElementTree as ET
-from typing import Callable
+from typing import Dict
 from typing import List
+from typing import Sequence
 
 import pytest
+from pytest_container import container_and_marks_from_pytest_param
 
 from bci_tester.data import ALLOWED_BCI_REPO_OS_VERSIONS
 from bci_tester.data import BASE_CONTAINER
 from bci_tester.data import BCI_REPO_NAME
 from bci_tester.data import OS_VERSION
+from bci_tester.facts import CommandResult
+from bci_tester.facts import get_container_facts
+from bci_tester.package_policy import PackagePolicy
+from bci_tester.solv_cache import SOLV_CACHE_DIR
+from bci_tester.solv_cache import create_solv_container
+from bci_tester.zypper import iter_solvables
+from bci_tester.zypper import stream_exec
 
 _RM_ZYPPSERVICE = (
     "rm -v /usr/lib/zypp/plugins/services/container-suseconnect-zypp"
 )
 
 
+_BASE_CTR, _BASE_MARKS = container_and_marks_from_pytest_param(BASE_CONTAINER)
+
+#: The base container with libsolv-tools and the solv files of the
+#: repositories, the image is reused until the repository changes
+SOLV_CONTAINER = pytest.param(
+    create_solv_container(_BASE_CTR), marks=_BASE_MARKS, id=BASE_CONTAINER.id
+)
+
+
+#: Packages that must not be shipped in the ``SLE_BCI`` repository, see
+#: :py:func:`test_sle_bci_forbidden_packages`
+FORBIDDEN_PACKAGES_POLICY = PackagePolicy(
+    forbidden=[
+        "gcc-build",
+        "libstdc++-build-devel",
+        "libgccjit-build-devel",
+        "livepatch",
+        "kernel",
+        "yast",
+        "kvm",
+        "xen",
+    ],
+    allowed=[
+        "system-group-kvm",
+        "jaxen",
+        "kernelshark",
+        "librfxencode0",
+        "nfs-kernel-server",
+        "texlive-l3kernel",
+        "purge-kernels-service",
+        "kernel-azure-devel",
+        "kernel-devel-azure",
+        "kernel-macros",
+        "kernel-default-devel",
+        "kernel-devel",
+        "kernel-syms",
+        "kernel-syms-azure",
+        # aarch64 only
+        "kernel-64kb-devel",
+    ],
+)
+
+
+def dry_run_install(
+    container, packages: Sequence[str]
+) -> Dict[str, CommandResult]:
+    """Resolves the installation of each of the ``packages`` from the
+    ``SLE_BCI`` repository in ``container`` via :command:`zypper -n in
+    --dry-run` and returns the result per package.
+
+    All packages are first resolved together in a single solver run. Only if
+    that fails, each package is resolved on its own (in one :command:`exec`)
+    to find the culprits.
+
+    """
+    install = f"zypper -n in --dry-run -r {BCI_REPO_NAME}"
+    batch = f"{_RM_ZYPPSERVICE}; {install} {' '.join(packages)} 2>&1"
+    result = get_container_facts(container, outputs=(batch,)).output(batch)
+    if result.rc == 0:
+        return {pkg: result for pkg in packages}
+
+    commands = {pkg: f"{install} {pkg} 2>&1" for pkg in packages}
+    facts = get_container_facts(container, outputs=tuple(commands.values()))
+    return {pkg: facts.output(cmd) for pkg, cmd in commands.items()}
+
+
 def get_package_list(con) -> List[str]:
     """This function returns all packages available from the ``SLE_BCI``
     repository given a container connection.
 
     """
-    zypper_se_xml = ET.fromstring(
-        con.check_output("zypper --xmlout se -r SLE_BCI")
-    )
     package_list = [
-        s.get("name") for s in zypper_se_xml.findall(".//solvable")
+        solvable.name
+        for solvable in iter_solvables(
+            stream_exec(con, "zypper --xmlout se -r SLE_BCI")
+        )
     ]
     assert len(package_list) > 3000
     return package_list
 
 
-def package_name_filter_func(
-    packages_to_filter_out: List[str],
-) -> Callable[[str], bool]:
-    """Returns a function to be used with ``filter`` to remove the strings
-    containing any of the strings from `packages_to_filter_out` from an
-    iterable.
-
-    """
-
-    def f(pkg_name: str) -> bool:
-        for to_filter in packages_to_filter_out:
-            if to_filter in pkg_name:
-                return False
-        return True
-
-    return f
-
-
 @pytest.mark.skipif(
     OS_VERSION == "tumbleweed", reason="No testing for openSUSE"
 )
-@pytest.mark.parametrize("container_per_test", [BASE_CONTAINER], indirect=True)
+@pytest.mark.parametrize("container_per_test", [SOLV_CONTAINER], indirect=True)
 def test_installcheck(container_per_test):
     """Run installcheck against the SLE_BCI repo + locally installed packages."""
-    # Let zypper fetch the repo data and generate solv files.
-    container_per_test.connection.check_output("zypper ref")
-    container_per_test.connection.check_output("zypper -n in libsolv-tools")
+    # The repo data was fetched and the solv files generated when building
+    # the image.
     # Check that all packages in SLE_BCI can be installed, using already installed
     # packages (@System) if necessary. It tries to keep rpm installed
     # but rpm-ndb conflicts with that, so exclude rpm-ndb.
@@ -69,7 +125,7 @@ def test_installcheck(container_per_test):
         excludes = "--exclude 'rpm-ndb'"
 
     container_per_test.connection.check_output(
-        f"installcheck $(uname -m) {excludes} /var/cache/zypp/solv/SLE_BCI/solv --nocheck /var/cache/zypp/solv/@System/solv"
+        f"installcheck $(uname -m) {excludes} {SOLV_CACHE_DIR}/SLE_BCI/solv --nocheck {SOLV_CACHE_DIR}/@System/solv"
     )
 
 
@@ -108,50 +164,11 @@ def test_sle_bci_forbidden_packages(container_per_test):
     """
     package_list = get_package_list(container_per_test.connection)
 
-    ALLOWED_PACKAGES = [
-        "system-group-kvm",
-        "jaxen",
-        "kernelshark",
-        "librfxencode0",
-        "nfs-kernel-server",
-        "texlive-l3kernel",
-        "purge-kernels-service",
-        "kernel-azure-devel",
-        "kernel-devel-azure",
-        "kernel-macros",
-        "kernel-default-devel",
-        "kernel-devel",
-        "kernel-syms",
-        "kernel-syms-azure",
-        # aarch64 only
-        "kernel-64kb-devel",
-    ]
-
-    FORBIDDEN_PACKAGE_NAMES = [
-        "gcc-build",
-        "libstdc++-build-devel",
-        "libgccjit-build-devel",
-        "livepatch",
-        "kernel",
-        "yast",
-        "kvm",
-        "xen",
-    ]
-
-    forbidden_packages = list(
-        filter(
-            package_name_filter_func(ALLOWED_PACKAGES),
-            filter(
-                lambda p: (
-                    not package_name_filter_func(FORBIDDEN_PACKAGE_NAMES)(p)
-                ),
-                package_list,
-            ),
-        )
-    )
+    forbidden_packages = FORBIDDEN_PACKAGES_POLICY.violations(package_list)
 
     assert not forbidden_packages, (
-        f"package_list contains forbidden packages: {', '.join(forbidden_packages)}"
+        "package_list contains forbidden packages: "
+        + ", ".join(str(violation) for violation in forbidden_packages)
     )
 
 
@@ -181,17 +198,26 @@ def test_package_installation(container_per_test, pkg):
     OS_VERSION not in ALLOWED_BCI_REPO_OS_VERSIONS,
     reason="no included BCI repository - can't test",
 )
-@pytest.mark.parametrize("container_per_test", [BASE_CONTAINER], indirect=True)
+@pytest.mark.parametrize("container_per_test", [SOLV_CONTAINER], indirect=True)
 def test_repo_content_licensing(container_per_test) -> None:
     conn = container_per_test.connection
-    conn.check_output("timeout 2m zypper ref && zypper -n in libsolv-tools")
-
-    assert (
-        conn.check_output(
-            f"set -o pipefail; dumpsolv /var/cache/zypp/solv/{BCI_REPO_NAME}/solv | sed -n '/^solvable:license:.*SUSE-Firmware/p' | wc -l"
-        ).strip()
-        == "0"
-    ), "Found a package with a SUSE-Firmware license"
+    licenses = []
+    name = ""
+    for line in conn.check_output(
+        f"set -o pipefail; dumpsolv {SOLV_CACHE_DIR}/{BCI_REPO_NAME}/solv | grep -E '^solvable:(name|license):'"
+    ).splitlines():
+        key, _, value = line.partition(": ")
+        if key == "solvable:name":
+            name = value
+        else:
+            licenses.append((name, value))
+
+    violations = PackagePolicy(forbidden=["SUSE-Firmware"]).violations(
+        licenses
+    )
+    assert not violations, "Found packages with a SUSE-Firmware license: " + (
+        ", ".join(str(violation) for violation in violations)
+    )
 
 
 @pytest.mark.skipif(
@@ -243,51 +269,61 @@ def test_sl16_lifecycle(container_per_test):
     )
 
 
+#: Packages that we received reports by users for as missing/broken
+SLE15_PACKAGES = [
+    "libsnmp30",  # bsc#1209442
+    "aws-cli",  # disappeared after python311 switch due to unresolvables
+    "mercurial",  # PED-2420
+    "python3-azure-sdk",  # might also become unresolvable
+    "uuidd",  # reported as missing by ironbank user
+    "java-11-openjdk-headless",  # provide java11 until 2026-12-31 see jsc#PED-9926/jsc#NVSHAS-8819
+    "libboost_program_options1_66_0",  # bsc#1229894
+    "libOpenCL1",  # PED-7838
+]
+
+#: Packages that are only available for certain service packs
+_SLE15_PACKAGE_OS_VERSIONS = {"java-11-openjdk-headless": ("15.6",)}
+
+_SLE15_AVAILABLE_PACKAGES = [
+    pkg
+    for pkg in SLE15_PACKAGES
+    if OS_VERSION in _SLE15_PACKAGE_OS_VERSIONS.get(pkg, (OS_VERSION,))
+]
+
+SL16_PACKAGES = [
+    "mercurial",  # PED-2420
+]
+
+
 @pytest.mark.skipif(
     not OS_VERSION.startswith("15."), reason="SLE15 specific test"
 )
-@pytest.mark.parametrize(
-    "pkg",
-    [
-        "libsnmp30",  # bsc#1209442
-        "aws-cli",  # disappeared after python311 switch due to unresolvables
-        "mercurial",  # PED-2420
-        "python3-azure-sdk",  # might also become unresolvable
-        "uuidd",  # reported as missing by ironbank user
-        "java-11-openjdk-headless",  # provide java11 until 2026-12-31 see jsc#PED-9926/jsc#NVSHAS-8819
-        "libboost_program_options1_66_0",  # bsc#1229894
-        "libOpenCL1",  # PED-7838
-    ],
-)
-@pytest.mark.parametrize("container_per_test", [BASE_CONTAINER], indirect=True)
-def test_sle15_packages(container_per_test, pkg):
+@pytest.mark.parametrize("pkg", SLE15_PACKAGES)
+@pytest.mark.parametrize("container", [SOLV_CONTAINER], indirect=True)
+def test_sle15_packages(container, pkg):
     """Test that packages that we received reports by users for as missing/broken
     remain installable and available.
+
+    All packages are resolved in the same container, see
+    :py:func:`dry_run_install`.
     """
 
-    if OS_VERSION not in ("15.6",) and pkg in ("java-11-openjdk-headless",):
+    if pkg not in _SLE15_AVAILABLE_PACKAGES:
         pytest.skip(reason="Only available for SP6")
 
-    container_per_test.connection.check_output(
-        f"{_RM_ZYPPSERVICE}; zypper -n in --dry-run -r {BCI_REPO_NAME} {pkg}"
-    )
+    result = dry_run_install(container, _SLE15_AVAILABLE_PACKAGES)[pkg]
+    assert result.rc == 0, result.stdout
 
 
 @pytest.mark.skipif(
     not OS_VERSION.startswith("16."), reason="SL16 specific test"
 )
-@pytest.mark.parametrize(
-    "pkg",
-    [
-        "mercurial",  # PED-2420
-    ],
-)
-@pytest.mark.parametrize("container_per_test", [BASE_CONTAINER], indirect=True)
-def test_sl16_packages(container_per_test, pkg):
+@pytest.mark.parametrize("pkg", SL16_PACKAGES)
+@pytest.mark.parametrize("container", [SOLV_CONTAINER], indirect=True)
+def test_sl16_packages(container, pkg):
     """Test that packages that we received reports by users for as missing/broken
     remain installable and available.
     """
 
-    container_per_test.connection.check_output(
-        f"{_RM_ZYPPSERVICE}; zypper -n in --dry-run -r {BCI_REPO_NAME} {pkg}"
-    )
+    result = dry_run_install(container, SL16_PACKAGES)[pkg]
+    assert result.rc == 0, result.stdout
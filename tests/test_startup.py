@@ -0,0 +1,93 @@
+"""Benchmark of the startup latency of all container images.
+
+:py:func:`test_startup_latency` measures for each image how long pulling,
+creating and starting it takes until it is ready and healthy (see
+:py:func:`bci_tester.startup.measure_startup`). The times are stored in
+:file:`$BCI_CACHE_DIR/startup/{OS_VERSION}-{arch}.json` (override via
+``BCI_STARTUP_RESULTS``).
+
+If ``BCI_STARTUP_BASELINE`` points to the results of a previous run, then each
+time must not exceed the baseline by more than the fraction
+``BCI_STARTUP_THRESHOLD`` (default: 0.5) plus ``BCI_STARTUP_SLACK`` seconds
+(default: 1).
+
+The images are built and launched with the arguments of
+``--extra-build-args`` and ``--extra-run-args``, like in all other tests.
+
+"""
+
+import os
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from pytest_container import OciRuntimeBase
+from pytest_container import get_extra_build_args
+from pytest_container import get_extra_run_args
+from pytest_container.runtime import LOCALHOST
+
+from bci_tester.data import ALL_CONTAINERS
+from bci_tester.data import CONTAINERS_WITHOUT_SHELL
+from bci_tester.data import OS_VERSION
+from bci_tester.startup import StartupResults
+from bci_tester.startup import get_default_results_path
+from bci_tester.startup import measure_startup
+
+#: the images are only ready once a command can be executed in them
+CONTAINER_IMAGES = [
+    c for c in ALL_CONTAINERS if c not in CONTAINERS_WITHOUT_SHELL
+]
+
+_BASELINE = os.getenv("BCI_STARTUP_BASELINE")
+_THRESHOLD = float(os.getenv("BCI_STARTUP_THRESHOLD", "0.5"))
+_SLACK = float(os.getenv("BCI_STARTUP_SLACK", "1"))
+
+
+@pytest.fixture(scope="module")
+def startup_results() -> Iterator[StartupResults]:
+    """Startup times of all images of this module, which are stored once all
+    tests finished.
+
+    """
+    results = StartupResults()
+    yield results
+    if results.times:
+        results_path = os.getenv("BCI_STARTUP_RESULTS")
+        results.save(
+            Path(results_path)
+            if results_path
+            else get_default_results_path(
+                OS_VERSION, LOCALHOST.system_info.arch
+            )
+        )
+
+
+@pytest.mark.parametrize("container_image", CONTAINER_IMAGES)
+def test_startup_latency(
+    container_image,
+    container_runtime: OciRuntimeBase,
+    startup_results: StartupResults,
+    request: pytest.FixtureRequest,
+    pytestconfig: pytest.Config,
+) -> None:
+    """Measure the startup times of the image and compare them with the
+    baseline.
+
+    """
+    name = request.node.callspec.id
+    times = measure_startup(
+        container_runtime,
+        container_image,
+        pytestconfig.rootpath,
+        get_extra_build_args(pytestconfig),
+        get_extra_run_args(pytestconfig),
+    )
+    startup_results.times[name] = times
+
+    if not _BASELINE:
+        return
+    baseline = StartupResults.load(Path(_BASELINE)).times.get(name)
+    if baseline is None:
+        pytest.skip(f"{name} is not in the baseline {_BASELINE}")
+    regressions = times.regressions(baseline, _THRESHOLD, _SLACK)
+    assert not regressions, f"{name} starts slower: " + ", ".join(regressions)
@@ -1,10 +1,69 @@
 """Unit tests for validating that BCI-tests in principle works."""
 
+import io
+import os
+import sqlite3
+import subprocess
+import sys
+import tarfile
+from datetime import timedelta
 from pathlib import Path
+from types import SimpleNamespace
+from typing import List
 
+import pytest
+import testinfra
+
+from bci_tester import attestations
+from bci_tester import build_cache
+from bci_tester.attestations import read_attestation
+from bci_tester.build_cache import CachedDerivedContainer
+from bci_tester.build_cache import prune_build_cache
+from bci_tester.catalog import LazyCatalog
+from bci_tester.container_pool import ContainerPool
+from bci_tester.disturl import SourceCache
+from bci_tester.disturl import SourceRevision
+from bci_tester.disturl import fetch_unrecorded
+from bci_tester.durations import DurationDB
+from bci_tester.facts import CommandResult
+from bci_tester.facts import get_container_facts
+from bci_tester.fips import create_fips_tester_container
+from bci_tester.fips import docker_buildkit_enabled
 from bci_tester.fips import host_fips_enabled
+from bci_tester.fips import null_digest_failures
+from bci_tester.fips import run_digest_commands
+from bci_tester.image_fs import ImageFilesystem
+from bci_tester.image_fs import prune_rootfs_cache
+from bci_tester.launch_report import ContainerLaunchCounter
+from bci_tester.package_policy import PackagePolicy
+from bci_tester.package_policy import Violation
+from bci_tester.prepull import PrepullPlugin
+from bci_tester.prepull import get_registry
+from bci_tester.registry import ImageReference
+from bci_tester.registry import ReferenceResolver
+from bci_tester.registry import RegistryClient
+from bci_tester.registry import get_container_metadata
+from bci_tester.registry import get_image_metadata
+from bci_tester.registry import get_oci_architecture
+from bci_tester.registry import inspect_image_metadata
+from bci_tester.repo_proxy import RepoProxy
+from bci_tester.repo_proxy import get_proxy_addresses
+from bci_tester.rpmdb import MAX_IMAGE_AGE
+from bci_tester.rpmdb import get_rpm_database
 from bci_tester.selinux import selinux_status
+from bci_tester.snapshot import SnapshotReport
+from bci_tester.snapshot import prepared_container
+from bci_tester.solv_cache import get_repomd_checksum
+from bci_tester.startup import StartupResults
+from bci_tester.startup import StartupTimes
+from bci_tester.startup import cold_pull
+from bci_tester.uids import UidReport
+from bci_tester.uids import audit_users
+from bci_tester.uids import get_expected_uid_gid_map
 from bci_tester.util import get_repos_from_zypper_xmlout
+from bci_tester.zypper import Solvable
+from bci_tester.zypper import iter_solvables
+from bci_tester.zypper import stream_exec
 
 
 def test_host_fips_enabled(tmp_path):
@@ -102,3 +161,1447 @@ def test_selinux_permissive(tmp_path: Path) -> None:
     (tmp_path / "enforce").touch()
     (tmp_path / "enforce").write_text("0\n")
     assert selinux_status(str(tmp_path)) == "permissive"
+
+
+def test_lazy_catalog_memoizes() -> None:
+    """Check that a :py:class:`~bci_tester.catalog.LazyCatalog` invokes each
+    factory only once, resolves dependencies between groups and publishes the
+    result into the namespace.
+
+    """
+    calls = []
+    namespace = {}
+    catalog = LazyCatalog(namespace)
+
+    @catalog.register("FOO")
+    def _foo():
+        calls.append("FOO")
+        return ["foo"]
+
+    catalog.register_call("BAR", lambda: catalog["FOO"] + ["bar"])
+
+    assert not catalog.is_materialized("FOO")
+    assert catalog["BAR"] == ["foo", "bar"]
+    assert catalog["FOO"] is catalog["FOO"]
+    assert calls == ["FOO"]
+    assert namespace == {"FOO": ["foo"], "BAR": ["foo", "bar"]}
+
+    with pytest.raises(ValueError):
+        catalog.register_call("FOO", list)
+    with pytest.raises(KeyError):
+        catalog["BAZ"]  # pylint: disable=pointless-statement
+
+
+def test_data_import_is_lazy() -> None:
+    """Check that importing a single container from :py:mod:`bci_tester.data`
+    only constructs that container and not the whole catalog.
+
+    """
+    if sys.version_info < (3, 7):
+        pytest.skip("module level __getattr__ requires Python 3.7+")
+
+    materialized = subprocess.check_output(
+        [
+            sys.executable,
+            "-c",
+            "from bci_tester.data import NANO_CONTAINER, _CATALOG;"
+            "print(' '.join(_CATALOG.materialized()))",
+        ],
+        cwd=Path(__file__).parent.parent,
+    ).decode()
+    assert materialized.split() == ["NANO_CONTAINER"]
+
+
+@pytest.mark.parametrize(
+    "url,registry",
+    [
+        ("registry.suse.com/bci/bci-base:15.7", "registry.suse.com"),
+        ("localhost:5000/foo/bar", "localhost:5000"),
+        ("opensuse/tumbleweed:latest", "docker.io"),
+        ("busybox", "docker.io"),
+    ],
+)
+def test_get_registry(url: str, registry: str) -> None:
+    """Check that ``get_registry`` extracts the registry host of an image."""
+    assert get_registry(url) == registry
+
+
+def test_prepull_plugin(tmp_path: Path, monkeypatch) -> None:
+    """Check that the worker performing the pre-pull sends its messages to
+    the controller, which shows them in the summary and removes the lock
+    files of the test run.
+
+    """
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path))
+    monkeypatch.setattr(
+        "bci_tester.prepull._prepull",
+        lambda items, parallelism, per_registry, report: report("pulled"),
+    )
+    options = {
+        "collectonly": False,
+        "prepull_parallelism": 4,
+        "prepull_per_registry": 2,
+    }
+    worker_config = SimpleNamespace(
+        workerinput={"testrunuid": "run"},
+        workeroutput={},
+        getoption=options.get,
+        pluginmanager=SimpleNamespace(getplugin=lambda name: None),
+    )
+    worker = PrepullPlugin(worker_config)
+    worker.pytest_collection_finish(SimpleNamespace(items=[]))
+    worker.pytest_sessionfinish(SimpleNamespace(config=worker_config))
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "bci-prepull-run.done",
+        "bci-prepull-run.lock",
+    ]
+
+    controller_config = SimpleNamespace()
+    controller = PrepullPlugin(controller_config)
+    controller.pytest_testnodedown(worker_config, None)
+    lines: List[str] = []
+    controller.pytest_terminal_summary(
+        SimpleNamespace(
+            write_sep=lambda sep, title: lines.append(title),
+            write_line=lines.append,
+        )
+    )
+    assert lines == ["pre-pulled images", "pulled"]
+    controller.pytest_sessionfinish(SimpleNamespace(config=controller_config))
+    assert not list(tmp_path.iterdir())
+
+
+def test_build_cache_key() -> None:
+    """Check that the build cache key of a ``CachedDerivedContainer`` only
+    depends on the inputs of the image build and not on the launch settings.
+
+    """
+    ctr = CachedDerivedContainer(base="foo", containerfile="RUN true")
+    assert ctr.build_cache_key("abc") == CachedDerivedContainer(
+        base="foo", containerfile="RUN true", custom_entry_point="/bin/sh"
+    ).build_cache_key("abc")
+    assert ctr.build_cache_key("abc") != ctr.build_cache_key("def")
+    assert ctr.build_cache_key("abc") != ctr.build_cache_key(
+        "abc", ["--squash"]
+    )
+    assert ctr.build_cache_key("abc") != CachedDerivedContainer(
+        base="foo", containerfile="RUN false"
+    ).build_cache_key("abc")
+
+
+def test_build_cache_key_build_context(tmp_path: Path) -> None:
+    """Check that the build cache key changes with the files that the
+    containerfile copies from the build context, but not with other files.
+
+    """
+    (tmp_path / "files").mkdir()
+    (tmp_path / "files" / "a.c").write_text("a")
+    (tmp_path / "other.txt").write_text("other")
+    ctr = CachedDerivedContainer(
+        base="foo",
+        containerfile="""COPY --chown=1000 files/*.c /src/
+ADD ["https://example.com/x", "/x"]
+COPY --from=builder /bin/foo /bin/foo
+""",
+    )
+
+    def key() -> str:
+        return ctr.build_cache_key("abc", rootdir=tmp_path)
+
+    initial = key()
+    (tmp_path / "other.txt").write_text("changed")
+    assert key() == initial
+    (tmp_path / "files" / "a.c").write_text("b")
+    assert key() != initial
+    changed = key()
+    (tmp_path / "files" / "b.c").write_text("b")
+    assert key() != changed
+
+
+def test_prune_build_cache(tmp_path: Path, monkeypatch) -> None:
+    """Check that ``prune_build_cache`` removes the cached images of the
+    finished test run and the ones that were not used recently.
+
+    """
+    # pylint: disable=protected-access
+    monkeypatch.setenv("BCI_CACHE_DIR", str(tmp_path))
+    fake_runtime = tmp_path / "runtime"
+    fake_runtime.write_text(f'#!/bin/sh\necho "$@" >> {tmp_path}/log\n')
+    fake_runtime.chmod(0o755)
+
+    build_cache._record_use("cache:run", "run-1")
+    build_cache._record_use("cache:other-run", "run-2")
+    build_cache._record_use("cache:repomd", "repomd-abc")
+    assert prune_build_cache(str(fake_runtime), "run-1") == ["cache:run"]
+    assert (tmp_path / "log").read_text() == "rmi cache:run\n"
+
+    assert sorted(
+        prune_build_cache(str(fake_runtime), max_age=timedelta(0))
+    ) == ["cache:other-run", "cache:repomd"]
+
+
+class _FakeNode:
+    """Minimal stand-in for ``xdist.workermanage.WorkerController``."""
+
+    def __init__(self, name: str) -> None:
+        self.gateway = SimpleNamespace(id=name)
+        self.shutting_down = False
+        self.sent: List[int] = []
+
+    def send_runtest_some(self, indices: List[int]) -> None:
+        self.sent.extend(indices)
+
+    def shutdown(self) -> None:
+        self.shutting_down = True
+
+
+def test_cost_aware_scheduling() -> None:
+    """Check that ``CostAwareScheduling`` groups the tests by container image,
+    assigns the most expensive work unit first and splits work units that
+    exceed the fair share of a worker.
+
+    """
+    pytest.importorskip("xdist")
+    # pylint: disable=import-outside-toplevel
+    from bci_tester.scheduler import CostAwareScheduling
+
+    collection = [
+        "tests/test_a.py::test_x[bci/foo:1 from reg/foo:1]",
+        "tests/test_a.py::test_x[bci/bar:1 from reg/bar:1]",
+        "tests/test_b.py::test_y[bci/foo:1 from reg/foo:1-param]",
+        "tests/test_b.py::test_z[bci/bar:1 from reg/bar:1]",
+        "tests/test_c.py::test_no_container",
+    ]
+    durations = DurationDB(
+        dict(zip(collection, (1.0, 100.0, 1.0, 100.0, 1.0)))
+    )
+    config = SimpleNamespace(
+        getvalue=lambda name: ["2*popen"],
+        option=SimpleNamespace(loadscopereorder=True),
+    )
+    sched = CostAwareScheduling(
+        config,
+        durations=durations,
+        image_ids=["bci/foo:1 from reg/foo:1", "bci/bar:1 from reg/bar:1"],
+    )
+
+    assert sched._image_scope(collection[0]) == sched._image_scope(
+        collection[2]
+    )
+    assert sched._image_scope(collection[4]) == "tests/test_c.py"
+
+    nodes = [_FakeNode("gw0"), _FakeNode("gw1")]
+    for node in nodes:
+        sched.add_node(node)
+        sched.add_node_collection(node, collection)
+    sched.schedule()
+
+    # bci/bar takes 200s which exceeds the fair share of ~101s per worker,
+    # each node gets a second work unit right away
+    assert nodes[0].sent == [1, 0, 2]
+    assert nodes[1].sent == [3, 4]
+    assert not sched.workqueue
+
+
+@pytest.mark.parametrize(
+    "split_large_units,num_nodes", [(True, 2), (False, 2), (False, 6)]
+)
+def test_cost_aware_scheduling_single_test_units(
+    split_large_units: bool, num_nodes: int
+) -> None:
+    """Check that with work units of a single test every node either gets at
+    least two work units or is shut down, as a worker waits for the next test
+    before it runs the current one. ``split_large_units=False`` is used by
+    ``--container-affinity``, which never splits the work units, also with
+    more workers than images.
+
+    """
+    pytest.importorskip("xdist")
+    # pylint: disable=import-outside-toplevel
+    from bci_tester.scheduler import CostAwareScheduling
+
+    image_ids = [f"bci/img{i}:1 from reg/img{i}:1" for i in range(4)]
+    collection = [
+        f"tests/test_{i}.py::test_x[{image_id}]"
+        for i, image_id in enumerate(image_ids)
+    ]
+    sched = CostAwareScheduling(
+        SimpleNamespace(
+            getvalue=lambda name: [f"{num_nodes}*popen"],
+            option=SimpleNamespace(loadscopereorder=True),
+        ),
+        durations=DurationDB(dict.fromkeys(collection, 1.0)),
+        image_ids=image_ids,
+        split_large_units=split_large_units,
+    )
+    nodes = [_FakeNode(f"gw{i}") for i in range(num_nodes)]
+    for node in nodes:
+        sched.add_node(node)
+        sched.add_node_collection(node, collection)
+    sched.schedule()
+
+    assert not sched.workqueue
+    assert sorted(i for node in nodes for i in node.sent) == [0, 1, 2, 3]
+    for node in nodes:
+        assert node.shutting_down or len(sched.assigned_work[node]) >= 2
+
+
+def test_container_launch_counter() -> None:
+    """Check that the ``ContainerLaunchCounter`` on the pytest-xdist controller
+    sums up the launches reported by the workers and estimates the launches
+    without container affinity.
+
+    """
+    counter = ContainerLaunchCounter(SimpleNamespace())
+    for launches, tests in (({"a": 1}, {"a": 10}), ({"b": 2}, {"b": 3})):
+        counter.pytest_testnodedown(
+            SimpleNamespace(
+                workeroutput={
+                    "bci_container_launches": {
+                        "launches": launches,
+                        "tests": tests,
+                    }
+                }
+            ),
+            None,
+        )
+
+    lines: List[str] = []
+    counter.pytest_terminal_summary(
+        SimpleNamespace(
+            write_sep=lambda sep, title: None, write_line=lines.append
+        )
+    )
+    assert lines == [
+        "3 launches of 2 containers for 13 tests on 2 worker(s)",
+        "spreading the tests across all workers would need about 4 launches, "
+        "saved 1",
+    ]
+
+
+def test_container_facts(host, tmp_path: Path) -> None:
+    """Check that ``get_container_facts`` gathers the facts via a single
+    script, here executed on the host.
+
+    """
+    (tmp_path / "file").write_text("first\n\nlast")
+    (tmp_path / "link").symlink_to(tmp_path / "file")
+
+    facts = get_container_facts(
+        SimpleNamespace(container_id="unit-test", connection=host),
+        paths=[str(tmp_path / name) for name in ("file", "link", "missing")],
+        commands=["sh", "not-a-command"],
+        contents=[str(tmp_path / "file"), str(tmp_path / "missing")],
+        outputs=["echo out; exit 3"],
+    )
+
+    assert facts.file(str(tmp_path / "file")).is_file
+    link = facts.file(str(tmp_path / "link"))
+    assert link.is_symlink and link.linked_to == str(tmp_path / "file")
+    assert not facts.file(str(tmp_path / "missing")).exists
+    assert facts.exists("sh") and not facts.exists("not-a-command")
+    assert facts.content(str(tmp_path / "file")) == "first\n\nlast"
+    assert facts.content(str(tmp_path / "missing")) is None
+    assert facts.output("echo out; exit 3") == CommandResult(3, "out\n")
+    assert facts.users["root"] == (0, 0)
+
+
+def test_run_digest_commands(host) -> None:
+    """Check that ``run_digest_commands`` reports the result of each digest
+    and that ``null_digest_failures`` compares them with the digests of empty
+    input.
+
+    """
+    results = run_digest_commands(
+        SimpleNamespace(container_id="unit-test-digests", connection=host),
+        {
+            "sha256": 'echo "SHA2-256(/dev/null)= $(sha256sum < /dev/null '
+            "| cut -d' ' -f1)\"",
+            "md5": "echo 'md5 is not a known digest' >&2; exit 1",
+            "sha512": "echo 'SHA2-512(/dev/null)= 0'",
+        },
+    )
+
+    assert results["md5"] == CommandResult(1, "md5 is not a known digest\n")
+    assert null_digest_failures(results, ["sha256", "sha512"]) == [
+        "unexpected digest of hash sha512: SHA2-512(/dev/null)= 0\n"
+    ]
+
+
+def test_fips_tester_container(tmp_path: Path, monkeypatch) -> None:
+    """Check that the FIPS tester container builds all test programs in its
+    builder stage, starts its final stage from the same base, has the launch
+    settings of its base and gets the zypp credentials as build secrets.
+
+    """
+    # pylint: disable=import-outside-toplevel
+    from pytest_container.container import Container
+
+    (tmp_path / "SCCcredentials").write_text("username=foo")
+    monkeypatch.setattr("bci_tester.fips.ZYPP_CREDENTIALS_DIR", str(tmp_path))
+    base = Container(url="registry/fips", extra_launch_args=["--user", "0"])
+    tester = create_fips_tester_container(base)
+    assert tester.base is base
+    assert tester.extra_launch_args == ["--user", "0"]
+
+    tester.finalize_containerfile(SimpleNamespace(), "sha")
+    builder, final = tester.containerfile.split("\nFROM registry/fips\n")
+    for program in ("fips-test", "fips-test-gnutls", "fips-test-gcrypt"):
+        assert f"-o /bin/{program}" in builder
+        assert f"/bin/{program}" in final
+    assert "gcc" not in final
+    # the toolchain is installed before the sources are copied
+    assert builder.index("zypper -n in gcc") < builder.index("COPY")
+    assert (
+        final.count(
+            f"--mount=type=secret,id=zypp-SCCcredentials,"
+            f"target={tmp_path}/SCCcredentials"
+        )
+        == 1
+    )
+    assert tester.build_secrets == [
+        f"id=zypp-SCCcredentials,src={tmp_path}/SCCcredentials"
+    ]
+
+
+def test_fips_tester_needs_buildkit(tmp_path: Path, monkeypatch) -> None:
+    """Check that the FIPS tester image refuses to pass the zypp credentials
+    as build secrets to docker without BuildKit.
+
+    """
+    # pylint: disable=import-outside-toplevel
+    from pytest_container.container import Container
+
+    (tmp_path / "SCCcredentials").write_text("username=foo")
+    monkeypatch.setattr("bci_tester.fips.ZYPP_CREDENTIALS_DIR", str(tmp_path))
+    monkeypatch.setenv("DOCKER_BUILDKIT", "0")
+    tester = create_fips_tester_container(Container(url="registry/fips"))
+    with pytest.raises(RuntimeError, match="BuildKit"):
+        tester.prepare_container(
+            SimpleNamespace(runner_binary="docker"), tmp_path
+        )
+
+    assert not docker_buildkit_enabled()
+    monkeypatch.setenv("DOCKER_BUILDKIT", "1")
+    assert docker_buildkit_enabled()
+
+
+def test_rpm_database(tmp_path: Path, monkeypatch) -> None:
+    """Check that ``get_rpm_database`` stores the output of the rpm query in
+    the cache and only queries each image once.
+
+    """
+    queries: List[str] = []
+
+    def query(query_format: str) -> str:
+        queries.append(query_format)
+        return (
+            "@@pkg bash\t5.2\t1.1\tx86_64\tGPL-3.0-or-later\n"
+            "P bash\nP /bin/sh\nR glibc\nF /usr/bin/bash\nF /bin/sh\n"
+            "@@pkg glibc\t2.38\t2.1\tx86_64\tLGPL-2.1-or-later\n"
+            "P glibc\n"
+            "@@pkg gpg-pubkey\t39db7c82\t5f68629b\t(none)\tpubkey\n"
+            "@@pkg gpg-pubkey\t09d9ea69\t645b99ce\t(none)\tpubkey\n"
+        )
+
+    container = SimpleNamespace(inspect=SimpleNamespace(image_hash="sha"))
+    db_path = tmp_path / "rpmdb.sqlite"
+    rpmdb = get_rpm_database(container, query, db_path)
+
+    assert rpmdb.package("bash").license == "GPL-3.0-or-later"
+    assert rpmdb.is_installed("glibc") and not rpmdb.is_installed("zsh")
+    assert rpmdb.what_provides("/bin/sh") == ["bash"]
+    assert rpmdb.requires("bash") == ["glibc"]
+    assert rpmdb.owner("/usr/bin/bash") == ["bash"]
+    assert rpmdb.files("glibc") == []
+
+    # a different process would only read the stored database
+    monkeypatch.setattr("bci_tester.rpmdb._DATABASES", {})
+    packages = get_rpm_database(container, query, db_path).packages
+    assert [package.name for package in packages] == [
+        "bash",
+        "glibc",
+        "gpg-pubkey",
+        "gpg-pubkey",
+    ]
+    # all installed versions are kept
+    assert [package.version for package in packages[2:]] == [
+        "39db7c82",
+        "09d9ea69",
+    ]
+    assert len(queries) == 1
+
+
+def test_rpm_database_eviction(tmp_path: Path, monkeypatch) -> None:
+    """Check that the least recently used images are evicted from the rpm
+    database cache.
+
+    """
+    monkeypatch.setattr("bci_tester.rpmdb.MAX_CACHED_IMAGES", 2)
+    now = [1000.0]
+    monkeypatch.setattr("bci_tester.rpmdb.time.time", lambda: now[0])
+    db_path = tmp_path / "rpmdb.sqlite"
+
+    def load(digest: str) -> None:
+        now[0] += 1
+        monkeypatch.setattr("bci_tester.rpmdb._DATABASES", {})
+        get_rpm_database(
+            SimpleNamespace(inspect=SimpleNamespace(image_hash=digest)),
+            lambda _: f"@@pkg {digest}\t1\t1\tnoarch\tMIT\nF /{digest}\n",
+            db_path,
+        )
+
+    load("a")
+    load("b")
+    # "a" is now more recently used than "b"
+    load("a")
+    load("c")
+
+    with sqlite3.connect(str(db_path)) as conn:
+        assert sorted(
+            row[0] for row in conn.execute("SELECT digest FROM images")
+        ) == ["a", "c"]
+        assert sorted(
+            row[0] for row in conn.execute("SELECT digest FROM files")
+        ) == ["a", "c"]
+
+    # images that were not used for MAX_IMAGE_AGE are evicted as well
+    now[0] += MAX_IMAGE_AGE.total_seconds()
+    load("d")
+    with sqlite3.connect(str(db_path)) as conn:
+        assert [
+            row[0] for row in conn.execute("SELECT digest FROM images")
+        ] == ["d"]
+
+
+def test_prune_rootfs_cache(tmp_path: Path, monkeypatch) -> None:
+    """Check that ``prune_rootfs_cache`` removes the root filesystems of
+    removed images and the least recently used ones beyond the size limit.
+
+    """
+    monkeypatch.setenv("BCI_CACHE_DIR", str(tmp_path))
+    fake_runtime = tmp_path / "runtime"
+    # only the image "gone" does not exist
+    fake_runtime.write_text(
+        '#!/bin/sh\nfor a; do last="$a"; done\n'
+        '[ "$last" = gone ] && exit 1\necho "$last"\n'
+    )
+    fake_runtime.chmod(0o755)
+
+    rootfs = tmp_path / "rootfs"
+    rootfs.mkdir()
+    for age, image_id in enumerate(("new", "gone", "old", "oldest")):
+        tarball = rootfs / f"{image_id}.tar"
+        tarball.write_bytes(b"x" * 10)
+        os.utime(tarball, (1000 - age, 1000 - age))
+
+    runtime = SimpleNamespace(runner_binary=str(fake_runtime))
+    assert prune_rootfs_cache(runtime, max_size=20) == [
+        rootfs / "gone.tar",
+        rootfs / "oldest.tar",
+    ]
+    assert sorted(p.name for p in rootfs.glob("*.tar")) == [
+        "new.tar",
+        "old.tar",
+    ]
+
+
+def test_image_filesystem(tmp_path: Path) -> None:
+    """Check that ``ImageFilesystem`` resolves relative and absolute symlinks
+    in an exported root filesystem.
+
+    """
+    tarball = tmp_path / "rootfs.tar"
+    with tarfile.open(str(tarball), "w") as tar:
+
+        def add(name: str, kind: bytes, data: bytes = b"", link: str = ""):
+            info = tarfile.TarInfo(name)
+            info.type, info.linkname, info.size = kind, link, len(data)
+            info.mode = 0o755 if kind == tarfile.DIRTYPE else 0o644
+            tar.addfile(info, io.BytesIO(data))
+
+        for directory in ("usr", "usr/bin", "etc", "etc/products.d"):
+            add(directory, tarfile.DIRTYPE)
+        add("bin", tarfile.SYMTYPE, link="usr/bin")
+        add("etc/products.d/SLES.prod", tarfile.REGTYPE, b"<product/>")
+        add("etc/products.d/baseproduct", tarfile.SYMTYPE, link="SLES.prod")
+        add("etc/os-release", tarfile.REGTYPE, b'NAME="SLES"\nID=sles\n')
+        add("usr/bin/ls", tarfile.REGTYPE, b"ELF")
+        add("etc/loop", tarfile.SYMTYPE, link="/etc/loop")
+
+    image_fs = ImageFilesystem(tarball)
+
+    baseproduct = image_fs.file("/etc/products.d/baseproduct")
+    assert baseproduct.is_symlink and baseproduct.is_file
+    assert baseproduct.linked_to == "/etc/products.d/SLES.prod"
+    assert baseproduct.content_string == "<product/>"
+    # .. refers to the parent of the symlink target, like in the kernel
+    assert image_fs.file("/bin/../bin/ls").linked_to == "/usr/bin/ls"
+    assert not image_fs.file("/bin/../etc").exists
+    assert image_fs.file("/bin/ls").content == b"ELF"
+    assert not image_fs.file("/etc/loop").exists
+    assert not image_fs.file("/etc/missing").exists
+    assert image_fs.os_release == {"NAME": "SLES", "ID": "sles"}
+    assert image_fs.file("/etc/products.d").listdir() == [
+        "SLES.prod",
+        "baseproduct",
+    ]
+
+    with ImageFilesystem(tarball) as closed_fs:
+        assert closed_fs.file("/usr/bin/ls").content == b"ELF"
+    with pytest.raises(OSError, match="closed"):
+        _ = closed_fs.file("/usr/bin/ls").content
+    image_fs.close()
+
+
+def test_uid_audit() -> None:
+    """Check the audit of the uids & gids of the users owning files and the
+    report of all images.
+
+    """
+    expected_map = get_expected_uid_gid_map("15.7")
+    assert get_expected_uid_gid_map("15.7") is expected_map
+    assert expected_map["wwwrun"] == (499, 485)
+    assert get_expected_uid_gid_map("16.0")["wwwrun"] == (498, 498)
+    assert get_expected_uid_gid_map("15.7", kiosk_xorg=True)["user"] == (
+        1000,
+        100,
+    )
+
+    users = {"root": (0, 0), "nginx": (480, 480), "daemon": (2, 2)}
+    audited = audit_users(users, ["root", "nginx"], expected_map)
+    assert [user.name for user in audited if not user.is_stable] == ["nginx"]
+
+    report = UidReport(SimpleNamespace())
+    report.record("nginx", audited)
+    report.record("base", audit_users(users, ["root"], expected_map))
+    assert report.format_table() == [
+        "nginx  499:486     !480:480 (nginx)",
+        "root   0:0         0:0 (2 images)",
+    ]
+
+
+def test_repo_proxy(tmp_path: Path) -> None:
+    """Check that the ``RepoProxy`` fetches immutable files only once, mutable
+    metadata once per proxy and serves everything from the cache when
+    offline.
+
+    """
+    # pylint: disable=import-outside-toplevel
+    import threading
+    import urllib.error
+    import urllib.request
+    from functools import partial
+    from http.server import HTTPServer
+    from http.server import SimpleHTTPRequestHandler
+
+    repo = tmp_path / "repo"
+    (repo / "repodata").mkdir(parents=True)
+    (repo / "repodata" / "repomd.xml").write_text("v1")
+    (repo / "foo.rpm").write_text("rpm")
+    requests: List[str] = []
+
+    class Handler(SimpleHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            requests.append(self.path)
+            super().do_GET()
+
+        def log_message(self, format, *args) -> None:  # noqa: A002
+            pass
+
+    upstream = HTTPServer(
+        ("127.0.0.1", 0), partial(Handler, directory=str(repo))
+    )
+    threading.Thread(target=upstream.serve_forever, daemon=True).start()
+
+    def get(proxy: RepoProxy, path: str) -> bytes:
+        with urllib.request.urlopen(
+            f"http://127.0.0.1:{proxy.port}/{path}"
+        ) as response:
+            return response.read()
+
+    cache_dir = tmp_path / "cache"
+    upstream_url = f"http://127.0.0.1:{upstream.server_address[1]}/"
+    try:
+        proxy = RepoProxy(upstream_url, cache_dir, host="127.0.0.1", port=0)
+        proxy.start()
+        for _ in range(2):
+            assert get(proxy, "repodata/repomd.xml") == b"v1"
+            assert get(proxy, "foo.rpm") == b"rpm"
+        with pytest.raises(urllib.error.HTTPError):
+            get(proxy, "missing.rpm")
+        proxy.stop()
+        assert requests == ["/repodata/repomd.xml", "/foo.rpm", "/missing.rpm"]
+
+        (repo / "repodata" / "repomd.xml").write_text("v2")
+        proxy = RepoProxy(upstream_url, cache_dir, host="127.0.0.1", port=0)
+        proxy.start()
+        assert get(proxy, "repodata/repomd.xml") == b"v2"
+        assert get(proxy, "foo.rpm") == b"rpm"
+        proxy.stop()
+        assert requests[3:] == ["/repodata/repomd.xml"]
+    finally:
+        upstream.shutdown()
+        upstream.server_close()
+
+    # the upstream server is gone by now
+    offline = RepoProxy(
+        upstream_url, cache_dir, host="127.0.0.1", port=0, offline=True
+    )
+    offline.start()
+    try:
+        assert get(offline, "repodata/repomd.xml") == b"v2"
+    finally:
+        offline.stop()
+
+
+def test_get_proxy_addresses(tmp_path: Path) -> None:
+    """Check that the repository proxy listens on the gateway of the bridge
+    network of docker and rootful podman and on localhost for rootless
+    podman.
+
+    """
+
+    def fake_runtime(name: str, rootless: str) -> str:
+        runtime = tmp_path / name
+        runtime.write_text(
+            "#!/bin/sh\n"
+            f'[ "$1" = info ] && echo {rootless} && exit 0\n'
+            '[ "$3" = bridge ] && echo 172.17.0.1 && exit 0\n'
+            '[ "$3" = podman ] && echo 10.88.0.1 && exit 0\n'
+            "exit 1\n"
+        )
+        runtime.chmod(0o755)
+        return str(runtime)
+
+    assert get_proxy_addresses(fake_runtime("docker", "")) == (
+        "172.17.0.1",
+        "172.17.0.1",
+    )
+    assert get_proxy_addresses(fake_runtime("podman", "false")) == (
+        "10.88.0.1",
+        "10.88.0.1",
+    )
+    assert get_proxy_addresses(fake_runtime("podman", "true")) == (
+        "127.0.0.1",
+        "host.containers.internal",
+    )
+    assert get_proxy_addresses(str(tmp_path / "missing")) == (
+        "127.0.0.1",
+        "host.containers.internal",
+    )
+
+
+def test_repomd_checksum(tmp_path: Path) -> None:
+    """Check that the solv image cache is keyed by the contents of
+    :file:`repomd.xml` and that unreachable repositories have no key.
+
+    """
+    repodata = tmp_path / "repo" / "repodata"
+    repodata.mkdir(parents=True)
+    (repodata / "repomd.xml").write_text("v1")
+    repo_url = (tmp_path / "repo").as_uri() + "/"
+
+    checksum = get_repomd_checksum(repo_url)
+    assert checksum and len(checksum) == 64
+    (repodata / "repomd.xml").write_text("v2")
+    get_repomd_checksum.cache_clear()
+    assert get_repomd_checksum(repo_url) not in (None, checksum)
+    assert get_repomd_checksum((tmp_path / "missing").as_uri()) is None
+
+
+def test_iter_solvables() -> None:
+    """Check that ``iter_solvables`` parses the output of ``zypper -x search``
+    fed in arbitrary chunks and filters the solvables.
+
+    """
+    output = b"""<?xml version='1.0'?>
+<stream>
+<message type="info">Loading repository data...</message>
+<search-result version="0.0">
+<solvable-list>
+<solvable status="installed" name="bash" kind="package" edition="4.4-150400.27.3.2" arch="x86_64" repository="SLE_BCI"/>
+<solvable status="installed" name="sles-release" kind="package" edition="15.7-150700.1.1" arch="x86_64" repository="(System Packages)"/>
+</solvable-list>
+</search-result>
+</stream>
+"""
+    chunks = [output[i : i + 7] for i in range(0, len(output), 7)]
+
+    assert list(iter_solvables(chunks)) == [
+        Solvable(
+            "bash",
+            "package",
+            "installed",
+            "4.4-150400.27.3.2",
+            "x86_64",
+            "SLE_BCI",
+        ),
+        Solvable(
+            "sles-release",
+            "package",
+            "installed",
+            "15.7-150700.1.1",
+            "x86_64",
+            "(System Packages)",
+        ),
+    ]
+    assert [
+        solvable.name
+        for solvable in iter_solvables(
+            output.decode(),
+            lambda solvable: solvable.repository == "(System Packages)",
+        )
+    ] == ["sles-release"]
+
+
+def test_stream_exec(tmp_path: Path, monkeypatch, caplog) -> None:
+    """Check that ``stream_exec`` runs the command like the testinfra backend
+    of the connection, yields its output and logs it with testinfra.
+
+    """
+    fake_runtime = tmp_path / "podman"
+    fake_runtime.write_text(
+        '#!/bin/sh\necho "$@"\n[ "$7" != false ] || {\n'
+        "    echo 'Repository SLE_BCI is invalid.' >&2\n    exit 4\n}\n"
+    )
+    fake_runtime.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}:{os.environ['PATH']}")
+    connection = testinfra.get_host("podman://nobody@ctr")
+
+    caplog.set_level("DEBUG", logger="testinfra")
+    assert b"".join(stream_exec(connection, "true")) == (
+        b"exec -u nobody ctr /bin/sh -c true\n"
+    )
+    assert "RUN podman exec -u nobody ctr /bin/sh -c true" in caplog.text
+    assert "'true' exited with 0" in caplog.text
+
+    with pytest.raises(subprocess.CalledProcessError) as exc_info:
+        list(stream_exec(connection, "false"))
+    assert exc_info.value.returncode == 4
+    assert exc_info.value.stderr == b"Repository SLE_BCI is invalid.\n"
+    assert "'false' exited with 4" in caplog.text
+    assert "Repository SLE_BCI is invalid." in caplog.text
+
+
+def test_package_policy() -> None:
+    """Check that ``PackagePolicy`` reports the values containing a forbidden
+    substring unless they contain an allowed one.
+
+    """
+    policy = PackagePolicy(
+        forbidden=["kernel", "kvm", "xen", "gcc-build"],
+        allowed=["kernelshark", "system-group-kvm", "kernel-devel"],
+    )
+    assert policy.violations(
+        [
+            "bash",
+            "kernel-default",
+            "kernelshark",
+            "system-group-kvm",
+            "qemu-kvm",
+            "kernel-devel",
+            "cross-gcc-build",
+        ]
+    ) == [
+        Violation("kernel-default", "kernel-default", "kernel"),
+        Violation("qemu-kvm", "qemu-kvm", "kvm"),
+        Violation("cross-gcc-build", "cross-gcc-build", "gcc-build"),
+    ]
+
+    licenses = PackagePolicy(forbidden=["GPL-3"])
+    violations = licenses.violations(
+        [("bash", "GPL-3.0-or-later"), ("zlib", "Zlib")]
+    )
+    assert [str(violation) for violation in violations] == [
+        "bash: GPL-3.0-or-later (contains GPL-3)"
+    ]
+    assert PackagePolicy(forbidden=[]).check("kernel") is None
+
+
+def test_container_pool(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Check that the ``ContainerPool`` starts the containers of the upcoming
+    tests ahead and removes all containers at the end of the session.
+
+    """
+    # pylint: disable=import-outside-toplevel
+    import threading
+
+    from pytest_container.container import Container
+
+    monkeypatch.delenv("PYTEST_XDIST_WORKER", raising=False)
+    lock = threading.Lock()
+    launched: List[str] = []
+    destroyed: List[str] = []
+
+    class Pool(ContainerPool):
+        def _launch(self, container, container_runtime):
+            with lock:
+                launched.append(container.url)
+            return SimpleNamespace(url=container.url)
+
+        def _destroy(self, launcher) -> None:
+            with lock:
+                destroyed.append(launcher.url)
+
+    ctr_a, ctr_b = Container(url="registry/a"), Container(url="registry/b")
+    session = SimpleNamespace(items=[], config=SimpleNamespace())
+    for name, ctr in (("t1", ctr_a), ("t2", ctr_a), ("t3", ctr_b)):
+        session.items.append(
+            SimpleNamespace(
+                nodeid=name,
+                session=session,
+                callspec=SimpleNamespace(params={"container_per_test": ctr}),
+            )
+        )
+    session.items.append(SimpleNamespace(nodeid="t4", session=session))
+
+    pool = Pool(SimpleNamespace(), size=2)
+    pool.pytest_collection_finish(session)
+    for pos, ctr in enumerate((ctr_a, ctr_a, ctr_b)):
+        pool.pytest_runtest_protocol(
+            session.items[pos], session.items[pos + 1]
+        )
+        launcher = pool.acquire(ctr, container_runtime=SimpleNamespace())
+        assert launcher.url == ctr.url
+        pool.release(launcher)
+    pool.pytest_sessionfinish(session)
+
+    assert (pool.hits, pool.misses) == (2, 1)
+    assert sorted(launched) == ["registry/a", "registry/a", "registry/b"]
+    assert sorted(destroyed) == sorted(launched)
+
+
+def test_prepared_container() -> None:
+    """Check that ``prepared_container`` keeps the id, marks and launch
+    settings of the original container and that the ``SnapshotReport`` sums
+    up the snapshots of all workers.
+
+    """
+    # pylint: disable=import-outside-toplevel
+    from pytest_container.container import Container
+
+    ctr = Container(url="registry/a", extra_launch_args=["--user", "root"])
+    param = prepared_container(
+        pytest.param(ctr, marks=pytest.mark.skip, id="a"), "dup", "zypper dup"
+    )
+    assert param.id == "a"
+    assert [mark.name for mark in param.marks] == ["skip"]
+    prepared = param.values[0]
+    assert prepared.base is ctr
+    assert prepared.containerfile == "USER root\nRUN zypper dup"
+    assert prepared.extra_launch_args == ["--user", "root"]
+
+    # the USER of the base image is restored after the preparation
+    prepared.finalize_containerfile(
+        SimpleNamespace(runner_binary="echo"), "base-id"
+    )
+    assert prepared.containerfile == (
+        "USER root\nRUN zypper dup\n"
+        "USER inspect --type image -f {{.Config.User}} base-id"
+    )
+
+    report = SnapshotReport(SimpleNamespace())
+    for stats in ({"dup": (1, 2)}, {"dup": (0, 3), "deps": (1, 0)}):
+        report.pytest_testnodedown(
+            SimpleNamespace(workeroutput={"bci_snapshots": stats}), None
+        )
+    lines: List[str] = []
+    report.pytest_terminal_summary(
+        SimpleNamespace(
+            write_sep=lambda sep, title: None, write_line=lines.append
+        )
+    )
+    assert lines == [
+        "deps: 0 reused from the cache, 1 built",
+        "dup: 5 reused from the cache, 1 built",
+    ]
+
+
+def test_cold_pull(tmp_path: Path, monkeypatch) -> None:
+    """Check that ``cold_pull`` pulls the image into a temporary image store
+    and never removes images from the store of the runtime.
+
+    """
+    monkeypatch.setenv("BCI_CACHE_DIR", str(tmp_path))
+    log = tmp_path / "log"
+    fake_podman = tmp_path / "podman"
+    fake_podman.write_text(f'#!/bin/sh\necho "$@" >> {log}\n')
+    fake_podman.chmod(0o755)
+
+    assert cold_pull(str(fake_podman), "registry/a:1") is not None
+    calls = log.read_text().splitlines()
+    assert calls[0].startswith("--root ") and calls[0].endswith(
+        " pull registry/a:1"
+    )
+    assert all("--root" in call or "unshare" in call for call in calls)
+    assert list((tmp_path / "startup").iterdir()) == []
+
+    monkeypatch.setenv("PATH", str(tmp_path / "missing"))
+    assert cold_pull("docker", "registry/a:1") is None
+
+
+def test_startup_results(tmp_path: Path) -> None:
+    """Check that ``StartupResults`` merges the stored results and that
+    ``StartupTimes.regressions`` only reports times above the threshold.
+
+    """
+    path = tmp_path / "startup.json"
+    StartupResults({"a": StartupTimes(2.0, 0.1, 0.5, None)}).save(path)
+    StartupResults({"b": StartupTimes(None, 0.2, 1.0, 4.0)}).save(path)
+    baseline = StartupResults.load(path).times
+    assert baseline["a"] == StartupTimes(2.0, 0.1, 0.5, None)
+    assert baseline["b"] == StartupTimes(None, 0.2, 1.0, 4.0)
+
+    times = StartupTimes(pull=3.0, create=0.2, ready=2.0, healthy=1.0)
+    assert times.regressions(baseline["a"], 0.5, 0.0) == [
+        "create: 0.20s (baseline 0.10s, limit 0.15s)",
+        "ready: 2.00s (baseline 0.50s, limit 0.75s)",
+    ]
+    assert not times.regressions(baseline["a"], 0.5, 2.0)
+
+
+@pytest.mark.parametrize(
+    "url,registry,repository,reference",
+    [
+        (
+            "registry.suse.com/bci/bci-base:15.7",
+            "registry.suse.com",
+            "bci/bci-base",
+            "15.7",
+        ),
+        ("localhost:5000/labelled", "localhost:5000", "labelled", "latest"),
+        ("busybox", "registry-1.docker.io", "library/busybox", "latest"),
+        (
+            "registry.suse.com/bci/bci-base:15.7@sha256:abc",
+            "registry.suse.com",
+            "bci/bci-base",
+            "sha256:abc",
+        ),
+    ],
+)
+def test_image_reference(
+    url: str, registry: str, repository: str, reference: str
+) -> None:
+    """Check that ``ImageReference.from_url`` splits image urls into the
+    registry, repository and tag or digest.
+
+    """
+    assert ImageReference.from_url(url) == ImageReference(
+        registry, repository, reference
+    )
+    assert get_oci_architecture("x86_64") == "amd64"
+
+
+def test_registry_client(tmp_path: Path, monkeypatch) -> None:
+    """Check the ``RegistryClient`` against a stand-in of a registry that
+    requires a bearer token: the token is requested once, failed requests
+    are retried, unchanged manifests and cached blobs are not downloaded
+    again. The ``ReferenceResolver`` remembers existing references.
+
+    """
+    # pylint: disable=import-outside-toplevel,protected-access
+    import hashlib
+    import json
+    import threading
+    from http.server import BaseHTTPRequestHandler
+    from http.server import HTTPServer
+    from socketserver import ThreadingMixIn
+
+    from bci_tester import registry as registry_module
+
+    def digest(content: bytes) -> str:
+        return "sha256:" + hashlib.sha256(content).hexdigest()
+
+    config = json.dumps({"config": {"Labels": {"name": "test"}}}).encode()
+    blobs = {digest(c): c for c in (config, b"layer1", b"layer2")}
+    manifest = json.dumps({"config": {"digest": digest(config)}}).encode()
+    index = json.dumps(
+        {
+            "mediaType": "application/vnd.oci.image.index.v1+json",
+            "manifests": [
+                {"digest": "sha256:0", "platform": {"architecture": "arm64"}},
+                {
+                    "digest": digest(manifest),
+                    "platform": {"architecture": "amd64", "os": "linux"},
+                },
+            ],
+        }
+    ).encode()
+    manifests = {
+        "1.0": index,
+        digest(index): index,
+        digest(manifest): manifest,
+    }
+    requests: List[str] = []
+    failures = {f"/v2/repo/blobs/{digest(b'layer2')}"}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            requests.append(self.path)
+            if self.path.startswith("/token"):
+                return self._reply(200, b'{"token": "t", "expires_in": 300}')
+            if self.headers.get("Authorization") != "Bearer t":
+                return self._reply(401)
+            if self.path in failures:
+                failures.remove(self.path)
+                return self._reply(503)
+            _, _, _, kind, name = self.path.split("/")
+            content = (manifests if kind == "manifests" else blobs).get(name)
+            if content is None:
+                return self._reply(404)
+            etag = f'"{digest(content)}"'
+            if self.headers.get("If-None-Match") == etag:
+                return self._reply(304)
+            return self._reply(200, content, {"ETag": etag})
+
+        do_HEAD = do_GET  # noqa: N815
+
+        def _reply(self, status, content=b"", headers=None) -> None:
+            self.send_response(status)
+            if status == 401:
+                port = self.server.server_address[1]
+                self.send_header(
+                    "WWW-Authenticate",
+                    f'Bearer realm="http://127.0.0.1:{port}/token",'
+                    'service="test"',
+                )
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(content)
+
+        def log_message(self, format, *args) -> None:  # noqa: A002
+            pass
+
+    class Server(ThreadingMixIn, HTTPServer):
+        daemon_threads = True
+
+    server = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    registry = f"127.0.0.1:{server.server_address[1]}"
+    try:
+        client = RegistryClient(registry, cache_dir=tmp_path)
+        metadata = get_image_metadata(
+            f"{registry}/repo:1.0", "amd64", client=client
+        )
+        assert metadata.labels == {"name": "test"}
+        assert metadata.digest == digest(manifest)
+        assert client.get_blobs("repo", list(blobs)) == blobs
+        assert len([r for r in requests if r.startswith("/token")]) == 1
+        assert requests.count(f"/v2/repo/blobs/{digest(b'layer2')}") == 2
+
+        # blobs are streamed into the cache
+        (tmp_path / "stream").mkdir()
+        stream_client = RegistryClient(registry, cache_dir=tmp_path / "stream")
+        for _ in range(2):
+            assert list(
+                stream_client.iter_blob("repo", digest(b"layer1"), 4)
+            ) == [b"laye", b"r1"]
+        # get_blobs and the unauthorized & authorized request of the stream
+        assert requests.count(f"/v2/repo/blobs/{digest(b'layer1')}") == 3
+
+        # a new client only revalidates the tag
+        requests.clear()
+        other_client = RegistryClient(registry, cache_dir=tmp_path)
+        assert other_client.get_manifest("repo", "1.0") == (
+            digest(index),
+            index,
+        )
+        assert client.get_blob("repo", digest(config)) == config
+        assert [r for r in requests if r.startswith("/v2")] == [
+            "/v2/repo/manifests/1.0",
+            "/v2/repo/manifests/1.0",
+        ]
+
+        requests.clear()
+        monkeypatch.setitem(registry_module._CLIENTS, registry, client)
+        resolver = ReferenceResolver(negative_ttl=0)
+        refs = [
+            f"{registry}/repo:1.0",
+            f"{registry}/repo@{digest(manifest)}",
+            f"{registry}/repo:2.0",
+        ]
+        assert resolver.resolve(refs + refs) == dict(
+            zip(refs, (True, True, False))
+        )
+        assert len(requests) == 3
+        # only the missing reference is checked again
+        assert [resolver.exists(ref) for ref in refs] == [True, True, False]
+        assert len(requests) == 4
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_inspect_image_metadata(tmp_path: Path) -> None:
+    """Check that ``inspect_image_metadata`` reads the labels and the digest
+    from the image pulled by the container runtime.
+
+    """
+    fake_docker = tmp_path / "docker"
+    fake_docker.write_text(
+        "#!/bin/sh\n"
+        '[ "$1" = pull ] && exit 0\n'
+        """echo '[{"RepoDigests": ["reg/repo@sha256:abc"], """
+        """"Config": {"Labels": {"name": "test"}}}]'\n"""
+    )
+    fake_docker.chmod(0o755)
+
+    metadata = inspect_image_metadata(str(fake_docker), "reg/repo:1.0")
+    assert metadata.labels == {"name": "test"}
+    assert metadata.digest == "sha256:abc"
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        # the registry cannot be reached
+        "127.0.0.1:1/repo:1.0",
+        # local images
+        "containers-storage:localhost/repo:1.0",
+        "0123456789ab",
+    ],
+)
+def test_container_metadata_fallback(
+    tmp_path: Path, monkeypatch, url: str
+) -> None:
+    """Check that ``get_container_metadata`` inspects the local image via the
+    container runtime if it is not available from a registry.
+
+    """
+    # pylint: disable=import-outside-toplevel
+    from pytest_container.container import Container
+    from pytest_container.container import DerivedContainer
+
+    calls = tmp_path / "calls"
+    fake_podman = tmp_path / "podman"
+    fake_podman.write_text(
+        "#!/bin/sh\n"
+        f'echo "$@" >> {calls}\n'
+        '[ "$1" = pull ] && exit 1\n'
+        """echo '[{"Digest": "sha256:abc", """
+        """"Config": {"Labels": {"name": "test"}}}]'\n"""
+    )
+    fake_podman.chmod(0o755)
+    # use the image of the local store like the container fixture does
+    monkeypatch.setenv("PULL_ALWAYS", "0")
+
+    container = DerivedContainer(
+        base=Container(url=url), containerfile="RUN true"
+    )
+    metadata = get_container_metadata(
+        container,
+        lambda: SimpleNamespace(runner_binary=str(fake_podman)),
+        tmp_path,
+    )
+    assert metadata.labels == {"name": "test"}
+    assert metadata.digest == "sha256:abc"
+    assert "pull" not in calls.read_text().split()
+    assert metadata.url == url.replace("containers-storage:", "")
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+def test_read_attestation(chunk_size: int) -> None:
+    """Check that ``read_attestation`` extracts the checked values of a
+    statement independently of how the envelope is split into chunks.
+
+    """
+    # pylint: disable=import-outside-toplevel
+    import base64
+    import json
+
+    statement = {
+        "subject": [{"name": "image", "digest": {"sha256": "abc"}}],
+        "predicateType": "https://cosign.sigstore.dev/attestation/vuln/v1",
+        "predicate": {
+            "scanner": {
+                "uri": "docker.io/neuvector/scanner",
+                "db": {"uri": "db", "version": 3.5},
+                "result": {
+                    "error_message": "",
+                    "report": {
+                        "labels": {"org.opensuse.reference": 'a/b:1 \\ "c"'},
+                        "checks": [
+                            {"level": "WARN", "description": "ü"},
+                            {"level": "INFO", "tags": [None, True, -1e3]},
+                        ],
+                        "vulnerabilities": [{"name": "x" * 1000}] * 10,
+                    },
+                },
+            }
+        },
+    }
+    payload = base64.b64encode(json.dumps(statement).encode()).decode()
+    # some encoders escape the slashes
+    envelope = (
+        json.dumps(
+            {
+                "payloadType": "application/vnd.in-toto+json",
+                "payload": payload,
+                "signatures": [],
+            }
+        )
+        .replace("/", "\\/")
+        .encode()
+    )
+
+    summary = read_attestation(
+        envelope[i : i + chunk_size]
+        for i in range(0, len(envelope), chunk_size)
+    )
+    assert summary.predicate_type == statement["predicateType"]
+    assert summary.payload_length == len(payload)
+    assert summary.subject_digests == ["abc"]
+    assert summary.scanner_uri == "docker.io/neuvector/scanner"
+    assert summary.scanner_db_uri == "db"
+    assert summary.labels == {"org.opensuse.reference": 'a/b:1 \\ "c"'}
+    assert summary.error_message == ""
+    assert summary.checks == [
+        {"level": "WARN", "description": "ü"},
+        {"level": "INFO"},
+    ]
+    assert not summary.vulnerabilities and summary.data is None
+
+
+def test_read_attestation_lazily(monkeypatch) -> None:
+    """Check that ``read_attestation`` parses the payload while the chunks
+    are consumed and still reads the envelope completely.
+
+    """
+    # pylint: disable=import-outside-toplevel
+    import base64
+    import json
+
+    statement = {"predicateType": "type", "predicate": {"data": "x" * 10000}}
+    envelope = json.dumps(
+        {
+            "payload": base64.b64encode(
+                json.dumps(statement).encode()
+            ).decode(),
+            "signatures": [{"sig": "y" * 1000}],
+        }
+    ).encode()
+    starts = range(0, len(envelope), 100)
+    consumed: List[int] = []
+
+    def iter_chunks():
+        for start in starts:
+            consumed.append(start)
+            yield envelope[start : start + 100]
+
+    # number of consumed chunks when the first json event is parsed
+    first_event: List[int] = []
+    iter_json_events = attestations.iter_json_events
+
+    def recording_iter_json_events(chunks):
+        for event in iter_json_events(chunks):
+            if not first_event:
+                first_event.append(len(consumed))
+            yield event
+
+    monkeypatch.setattr(
+        attestations, "iter_json_events", recording_iter_json_events
+    )
+    assert read_attestation(iter_chunks()).data == "x" * 10000
+    assert first_event[0] <= 2
+    assert len(consumed) == len(starts)
+
+
+def test_iter_json_events_long_string(monkeypatch) -> None:
+    """Check that ``iter_json_events`` only scans the new chunks of a string
+    that spans many chunks instead of the whole string again.
+
+    """
+    document = '{"key": "' + 'a\\"' * 25000 + '", "n": 1}'
+    scanned: List[int] = []
+    token = attestations._TOKEN
+
+    class CountingToken:
+        @staticmethod
+        def match(buffer: str, pos: int = 0):
+            scanned.append(len(buffer) - pos)
+            return token.match(buffer, pos)
+
+    monkeypatch.setattr(attestations, "_TOKEN", CountingToken)
+    events = list(
+        attestations.iter_json_events(
+            document[i : i + 100] for i in range(0, len(document), 100)
+        )
+    )
+    assert events[1] == (("key",), "scalar", 'a"' * 25000)
+    assert events[2] == (("n",), "scalar", 1)
+    assert sum(scanned) < 2 * len(document)
+
+
+def test_peak_memory() -> None:
+    """Check that ``PeakMemory`` measures the allocations within its block
+    and keeps the traces if tracemalloc is already tracing.
+
+    """
+    # pylint: disable=import-outside-toplevel
+    import tracemalloc
+
+    with attestations.PeakMemory() as memory:
+        data = bytearray(1 << 20)
+    assert memory.peak_kib is not None and memory.peak_kib >= 1024
+    assert not tracemalloc.is_tracing()
+
+    tracemalloc.start()
+    try:
+        traced = tracemalloc.get_traced_memory()[0]
+        with attestations.PeakMemory() as memory:
+            del data
+        assert tracemalloc.get_traced_memory()[0] >= traced - 64
+        if hasattr(tracemalloc, "reset_peak"):
+            assert memory.peak_kib is not None and memory.peak_kib < 1024
+        else:
+            assert memory.peak_kib is None
+    finally:
+        tracemalloc.stop()
+
+
+def test_source_cache(tmp_path: Path) -> None:
+    """Check that ``SourceCache`` fetches each source revision only once and
+    that the stored listings can be read without fetching them.
+
+    """
+    revision = SourceRevision.from_disturl(
+        "obs://build.suse.de/SUSE:SLE-15-SP7:Update:CR/images/"
+        "0123abcd-sles15-image:base"
+    )
+    assert revision == SourceRevision(
+        "build.suse.de",
+        "SUSE:SLE-15-SP7:Update:CR",
+        "sles15-image",
+        "0123abcd",
+    )
+    with pytest.raises(ValueError):
+        SourceRevision.from_disturl("https://build.suse.de/foo/bar/baz")
+
+    fetched = []
+
+    def fetch(rev: SourceRevision) -> str:
+        fetched.append(rev)
+        if rev.rev == "missing":
+            raise LookupError(rev)
+        return "<directory><entry name='Dockerfile'/></directory>"
+
+    cache = SourceCache(fetch, tmp_path)
+    for _ in range(2):
+        assert "Dockerfile" in cache.get_listing(revision)
+    assert fetched == [revision]
+
+    # failures are not cached
+    missing = SourceRevision("build.suse.de", "p", "sles15-image", "missing")
+    for _ in range(2):
+        with pytest.raises(LookupError):
+            cache.get_listing(missing)
+    assert fetched == [revision, missing, missing]
+
+    offline = SourceCache(fetch_unrecorded, tmp_path)
+    assert "Dockerfile" in offline.get_listing(revision)
+    with pytest.raises(LookupError):
+        offline.get_listing(missing)